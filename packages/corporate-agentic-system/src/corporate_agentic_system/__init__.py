@@ -4,5 +4,47 @@ Corporate Agentic System
 A multi-agent system for corporate operations including document analysis,
 meeting scheduling, and workflow automation.
 """
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = "0.1.0"
+
+# Public names and their submodules; submodules load on first attribute
+# access (PEP 562), so importing the package itself is nearly free
+_EXPORTS = {
+    "TaskOutcome": "executor",
+    "WorkflowExecutor": "executor",
+    "CorporateContext": "orchestrator",
+    "CorporateOrchestrator": "orchestrator",
+    "Task": "orchestrator",
+    "WorkflowResult": "orchestrator",
+    "add_corporate_routes": "service",
+}
+
+__all__ = [
+    "TaskOutcome",
+    "WorkflowExecutor",
+    "CorporateContext",
+    "CorporateOrchestrator",
+    "Task",
+    "WorkflowResult",
+    "add_corporate_routes",
+]
+
+if TYPE_CHECKING:
+    from .executor import TaskOutcome, WorkflowExecutor
+    from .orchestrator import CorporateContext, CorporateOrchestrator, Task, WorkflowResult
+    from .service import add_corporate_routes
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_EXPORTS})
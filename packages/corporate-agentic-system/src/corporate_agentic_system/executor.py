@@ -0,0 +1,190 @@
+"""
+Corporate Agentic System - Workflow Executor
+
+Executes planned `Task`s as a dependency DAG. Independent tasks run
+concurrently on asyncio, each specialized agent has its own concurrency
+limit, and ready tasks are started in `priority` order (1 = most urgent).
+Completions are streamed back as they land.
+"""
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from pydantic_ai_shared.config import get_settings
+
+from .orchestrator import CorporateContext, Task
+
+TaskHandler = Callable[[Task, CorporateContext], Awaitable[Any]]
+
+
+@dataclass
+class TaskOutcome:
+    """Outcome of executing a single task."""
+    task: Task
+    status: str  # "completed", "failed", "skipped"
+    result: Any = None
+    error: Optional[Exception] = None
+    duration: float = 0.0
+
+
+def build_dag(tasks: List[Task]) -> Dict[str, Set[str]]:
+    """Build and validate the dependency graph of a task list.
+
+    Args:
+        tasks: Tasks whose `depends_on` entries reference other task titles
+
+    Returns:
+        Mapping of task title to the titles of tasks that depend on it
+
+    Raises:
+        ValueError: On duplicate titles, unknown dependencies or cycles
+    """
+    titles = [task.title for task in tasks]
+    if len(set(titles)) != len(titles):
+        raise ValueError("Task titles must be unique to build a workflow DAG")
+
+    dependents: Dict[str, Set[str]] = {title: set() for title in titles}
+    for task in tasks:
+        for dependency in task.depends_on:
+            if dependency not in dependents:
+                raise ValueError(f"Task '{task.title}' depends on unknown task '{dependency}'")
+            dependents[dependency].add(task.title)
+
+    # Kahn's algorithm: every task must become ready for the graph to be acyclic
+    remaining = {task.title: len(set(task.depends_on)) for task in tasks}
+    ready = [title for title, count in remaining.items() if count == 0]
+    visited = 0
+    while ready:
+        title = ready.pop()
+        visited += 1
+        for dependent in dependents[title]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    if visited != len(tasks):
+        raise ValueError("Workflow tasks contain a dependency cycle")
+
+    return dependents
+
+
+class WorkflowExecutor:
+    """Runs a task DAG with per-agent concurrency limits."""
+
+    def __init__(
+        self,
+        handlers: Dict[str, TaskHandler],
+        agent_limits: Optional[Dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+        default_handler: Optional[TaskHandler] = None,
+    ):
+        """Initialize the executor.
+
+        Args:
+            handlers: Coroutine per `assigned_agent` name that performs a task
+            agent_limits: Maximum concurrent tasks per agent name
+            default_limit: Limit for agents missing from `agent_limits`
+                (defaults to the shared `concurrency.workflow_agent` setting)
+            default_handler: Handler for agents missing from `handlers`
+        """
+        self.handlers = handlers
+        self.agent_limits = agent_limits or {}
+        self.default_limit = default_limit
+        self.default_handler = default_handler
+
+    def _limit(self, agent: str) -> int:
+        default_limit = self.default_limit or get_settings().concurrency.workflow_agent
+        return max(1, self.agent_limits.get(agent, default_limit))
+
+    async def _run_task(self, task: Task, context: CorporateContext) -> TaskOutcome:
+        handler = self.handlers.get(task.assigned_agent, self.default_handler)
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for agent '{task.assigned_agent}'")
+            result = await handler(task, context)
+        except Exception as exc:
+            logger.warning(f"Task '{task.title}' failed: {exc!r}")
+            return TaskOutcome(task, "failed", error=exc, duration=time.perf_counter() - start)
+        return TaskOutcome(task, "completed", result=result, duration=time.perf_counter() - start)
+
+    async def execute(self, tasks: List[Task], context: CorporateContext) -> AsyncIterator[TaskOutcome]:
+        """Execute tasks, yielding each outcome as soon as it is known.
+
+        Tasks whose dependencies failed are reported as "skipped" and never run.
+
+        Args:
+            tasks: The tasks to execute
+            context: User and organizational context passed to every handler
+
+        Yields:
+            Task outcomes in completion order
+        """
+        dependents = build_dag(tasks)
+        by_title = {task.title: task for task in tasks}
+        waiting_on = {task.title: set(task.depends_on) for task in tasks}
+        running: Dict[str, int] = {}
+        in_flight: Dict[asyncio.Task, str] = {}
+        # Heap of (priority, insertion order, title) so equal priorities stay FIFO
+        ready: List[Tuple[int, int, str]] = []
+        order = 0
+
+        def mark_ready(title: str) -> None:
+            nonlocal order
+            heapq.heappush(ready, (by_title[title].priority, order, title))
+            order += 1
+
+        def skip_dependents(title: str) -> List[TaskOutcome]:
+            skipped = []
+            stack = list(dependents[title])
+            while stack:
+                dependent = stack.pop()
+                if waiting_on.pop(dependent, None) is None:
+                    continue
+                skipped.append(TaskOutcome(by_title[dependent], "skipped"))
+                stack.extend(dependents[dependent])
+            return skipped
+
+        for title in [title for title, deps in waiting_on.items() if not deps]:
+            del waiting_on[title]
+            mark_ready(title)
+
+        logger.info(f"Executing workflow of {len(tasks)} tasks")
+        try:
+            while ready or in_flight:
+                deferred = []
+                while ready:
+                    entry = heapq.heappop(ready)
+                    task = by_title[entry[2]]
+                    if running.get(task.assigned_agent, 0) >= self._limit(task.assigned_agent):
+                        deferred.append(entry)
+                        continue
+                    running[task.assigned_agent] = running.get(task.assigned_agent, 0) + 1
+                    in_flight[asyncio.create_task(self._run_task(task, context))] = task.title
+                for entry in deferred:
+                    heapq.heappush(ready, entry)
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    title = in_flight.pop(finished)
+                    outcome = finished.result()
+                    running[outcome.task.assigned_agent] -= 1
+                    yield outcome
+
+                    if outcome.status != "completed":
+                        for skipped in skip_dependents(title):
+                            yield skipped
+                        continue
+                    for dependent in dependents[title]:
+                        deps = waiting_on.get(dependent)
+                        if deps is None:
+                            continue
+                        deps.discard(title)
+                        if not deps:
+                            del waiting_on[dependent]
+                            mark_ready(dependent)
+        finally:
+            for pending in in_flight:
+                pending.cancel()
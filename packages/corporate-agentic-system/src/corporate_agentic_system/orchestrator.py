@@ -6,21 +6,40 @@ Uses Anthropic's Claude by default for enhanced reasoning.
 """
 import asyncio
 import os
-from typing import List, Dict
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, RunContext
 from loguru import logger
 
-# Import from shared package
-try:
-    from pydantic_ai_shared.config import get_default_model
-except ImportError:
-    # Fallback for development
-    import sys
-    sys.path.insert(0, "../../shared/src")
-    from config import get_default_model
+from pydantic_ai_shared.cache import cache_key, namespace_key
+from pydantic_ai_shared.config import get_default_model, get_settings
+from pydantic_ai_shared.singleflight import SingleFlight
+from pydantic_ai_shared.telemetry import instrument, traced_run
+
+from .stores import CorporateStores, get_corporate_stores
+
+if TYPE_CHECKING:
+    # pydantic_ai and the model-facing helpers load on first run, keeping import cheap
+    from pydantic_ai import Agent
+    from pydantic_ai_shared.hedging import HedgedRunner
+    from pydantic_ai_shared.memo import ResultMemo
+    from pydantic_ai_shared.streaming import StreamMetrics
+
+    from .executor import TaskOutcome, WorkflowExecutor
+
+# Static prompts only: per-request context goes in the user prompt or deps, so
+# every request shares the same cacheable prefix
+PLANNER_SYSTEM_PROMPT = """You are a corporate workflow planning AI.
+Analyze requests and break them into actionable tasks.
+Consider company policies, priorities, and resource availability;
+use the lookup_policy and check_resource_availability tools to check them.
+Delegate tasks to appropriate specialized agents.
+List each task in `tasks`, naming its prerequisites in `depends_on`
+so independent tasks can run in parallel."""
+
+SPECIALIST_SYSTEM_PROMPT = """You are a specialized corporate agent executing one task
+of a larger workflow. Complete the task and report the outcome concisely."""
 
 
 class Task(BaseModel):
@@ -28,8 +47,9 @@ class Task(BaseModel):
     title: str
     description: str
     assigned_agent: str
-    priority: int = Field(ge=1, le=5)
+    priority: int = Field(ge=1, le=5)  # 1 = most urgent
     estimated_time: str
+    depends_on: List[str] = Field(default_factory=list)  # titles of prerequisite tasks
 
 
 class WorkflowResult(BaseModel):
@@ -38,6 +58,7 @@ class WorkflowResult(BaseModel):
     tasks_completed: List[str]
     summary: str
     next_steps: List[str] = Field(default_factory=list)
+    tasks: List[Task] = Field(default_factory=list)
 
 
 @dataclass
@@ -46,32 +67,96 @@ class CorporateContext:
     user_role: str
     department: str
     access_level: str = "standard"
+    # Pooled per process; tools reach policies and resources through it
+    stores: CorporateStores = field(default_factory=get_corporate_stores, compare=False, repr=False)
 
 
 class CorporateOrchestrator:
     """Orchestrator for corporate agentic system."""
     
-    def __init__(self, model: str = None):
+    def __init__(
+        self,
+        model: str = None,
+        hedger: Optional["HedgedRunner[WorkflowResult]"] = None,
+        memo: Optional["ResultMemo"] = None,
+    ):
         """Initialize the orchestrator.
         
         Args:
             model: The model to use (defaults to configured Anthropic model for corporate use)
+            hedger: Optional runner that hedges slow planning calls on a secondary model;
+                built automatically when the shared `hedge.enabled` setting is on
+            memo: Optional persistent memo of workflow plans, consulted before planning;
+                opened from the shared `memo` settings when a path is configured
         """
         if model is None:
             # Default to Anthropic for corporate use (enhanced reasoning)
             model = get_default_model("anthropic")
             
-        self.planner = Agent(
-            model,
-            result_type=WorkflowResult,
-            deps_type=CorporateContext,
-            system_prompt="""You are a corporate workflow planning AI.
-            Analyze requests and break them into actionable tasks.
-            Consider company policies, priorities, and resource availability.
-            Delegate tasks to appropriate specialized agents."""
-        )
+        self.model = model
+        # Agents are built on first use, so constructing the class stays cheap
+        self._planner: Optional["Agent"] = None
+        self._specialist: Optional["Agent"] = None
+        self._hedger = hedger
+        self._auto_hedge = hedger is None and get_settings().hedge.enabled and isinstance(model, str)
+        # Identical concurrent requests from the same context share a single plan
+        self.inflight: SingleFlight[WorkflowResult] = SingleFlight("plan_workflow")
+        if memo is None and get_settings().memo.path is not None:
+            from pydantic_ai_shared.memo import ResultMemo
+
+            memo = ResultMemo.from_settings()
+        self.memo = memo
         logger.info(f"Corporate orchestrator initialized with {model}")
+
+    @property
+    def planner(self) -> "Agent":
+        """The workflow planning agent, taken from the shared registry on first use."""
+        if self._planner is None:
+            from pydantic_ai_shared.registry import get_registry
+
+            from .tools import CORPORATE_TOOLS
+
+            self._planner = get_registry().agent(
+                self.model,
+                result_type=WorkflowResult,
+                deps_type=CorporateContext,
+                system_prompt=PLANNER_SYSTEM_PROMPT,
+                toolset=CORPORATE_TOOLS,
+            )
+        return self._planner
+
+    @property
+    def specialist(self) -> "Agent":
+        """The generic task agent, taken from the shared registry on first use."""
+        if self._specialist is None:
+            from pydantic_ai_shared.registry import get_registry
+
+            self._specialist = get_registry().agent(
+                self.model,
+                deps_type=CorporateContext,
+                system_prompt=SPECIALIST_SYSTEM_PROMPT,
+            )
+        return self._specialist
+
+    @property
+    def hedger(self) -> Optional["HedgedRunner[WorkflowResult]"]:
+        """The hedged planner runner, if one was given or hedging is enabled in the settings."""
+        if self._hedger is None and self._auto_hedge:
+            from pydantic_ai_shared.hedging import HedgedRunner
+
+            from .tools import CORPORATE_TOOLS
+
+            self._hedger = HedgedRunner(
+                self.model,
+                result_type=WorkflowResult,
+                system_prompt=PLANNER_SYSTEM_PROMPT,
+                deps_type=CorporateContext,
+                toolset=CORPORATE_TOOLS,
+                name="orchestrator.hedge",
+            )
+        return self._hedger
     
+    @instrument("orchestrator.plan_workflow")
     async def plan_workflow(
         self, 
         request: str, 
@@ -87,10 +172,122 @@ class CorporateOrchestrator:
             Planned workflow with tasks
         """
         logger.info(f"Planning workflow for: {request[:50]}...")
-        result = await self.planner.run(request, deps=context)
+        namespace = namespace_key(context.user_role, context.department, context.access_level)
+        key = cache_key(request, namespace=namespace)
+        return await self.inflight.do(key, lambda: self._plan(request, context))
+
+    async def _plan(self, request: str, context: CorporateContext) -> WorkflowResult:
+        if self.memo is None:
+            return await self._run_planner(request, context)
+        from pydantic_ai_shared.memo import memo_key
+
+        # Tool results (policies, availability) are assumed stable for the memo's lifetime
+        key = memo_key(
+            self.model,
+            PLANNER_SYSTEM_PROMPT,
+            WorkflowResult,
+            request,
+            context=(context.user_role, context.department, context.access_level),
+        )
+        return await self.memo.get_or_run(key, WorkflowResult, lambda: self._run_planner(request, context))
+
+    async def _run_planner(self, request: str, context: CorporateContext) -> WorkflowResult:
+        if self.hedger is not None:
+            result = await self.hedger.run(request, deps=context)
+        else:
+            result = await traced_run(self.planner, request, deps=context)
         logger.info(f"Workflow planned: {result.data.status}")
         return result.data
 
+    async def stream_summary(
+        self,
+        request: str,
+        context: CorporateContext,
+        metrics: Optional["StreamMetrics"] = None,
+    ) -> AsyncIterator[str]:
+        """Plan a workflow, streaming the `summary` field as it is generated.
+        
+        Args:
+            request: The corporate request or task
+            context: User and organizational context
+            metrics: Optional metrics object; `metrics.result` holds the full
+                `WorkflowResult` once the stream completes
+            
+        Yields:
+            Text deltas of the workflow summary
+        """
+        from pydantic_ai_shared.streaming import stream_field
+
+        logger.info(f"Planning workflow (streaming) for: {request[:50]}...")
+        async for delta in stream_field(self.planner, request, "summary", metrics, deps=context):
+            yield delta
+
+    async def stream_plan_items(
+        self,
+        request: str,
+        context: CorporateContext,
+        metrics: Optional["StreamMetrics"] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Plan a workflow, streaming `tasks_completed` and `next_steps` items as each completes.
+        
+        A plan that turns schema-invalid mid-stream is abandoned and replanned
+        instead of being generated to the end.
+        
+        Args:
+            request: The corporate request or task
+            context: User and organizational context
+            metrics: Optional metrics object; `metrics.result` holds the full
+                `WorkflowResult` once the stream completes
+            
+        Yields:
+            `(field_name, item)` pairs, e.g. `("next_steps", "Book the venue")`
+        """
+        from pydantic_ai_shared.streaming import stream_items
+
+        logger.info(f"Planning workflow (streaming items) for: {request[:50]}...")
+        async for name, item in stream_items(
+            self.planner, request, ("tasks_completed", "next_steps"), metrics, deps=context
+        ):
+            yield name, item
+
+    @instrument("orchestrator.run_specialist")
+    async def run_specialist(self, task: Task, context: CorporateContext) -> str:
+        """Execute a single task with the generic specialist agent.
+
+        Args:
+            task: The task to perform
+            context: User and organizational context
+
+        Returns:
+            The specialist's report
+        """
+        prompt = f"As the {task.assigned_agent}, complete: {task.title}\n\n{task.description}"
+        result = await traced_run(self.specialist, prompt, deps=context)
+        return result.data
+
+    async def execute_workflow(
+        self,
+        workflow: WorkflowResult,
+        context: CorporateContext,
+        executor: Optional["WorkflowExecutor"] = None,
+    ) -> AsyncIterator["TaskOutcome"]:
+        """Execute a planned workflow, streaming task outcomes as they land.
+
+        Args:
+            workflow: A plan returned by `plan_workflow`
+            context: User and organizational context
+            executor: Executor to use (defaults to routing every agent to `run_specialist`)
+
+        Yields:
+            Task outcomes in completion order
+        """
+        from .executor import WorkflowExecutor
+
+        if executor is None:
+            executor = WorkflowExecutor(handlers={}, default_handler=self.run_specialist)
+        async for outcome in executor.execute(workflow.tasks, context):
+            yield outcome
+
 
 async def main():
     """Demo the corporate agentic system."""
@@ -104,6 +301,8 @@ async def main():
     print("   - Scheduling Agent: Manages meetings and calendars")
     print("   - Analytics Agent: Provides data insights")
     
+    from pydantic_ai_shared.streaming import StreamMetrics
+
     if not os.getenv("ANTHROPIC_API_KEY"):
         print("\n⚠️  Set ANTHROPIC_API_KEY to run live demo")
         print("💡 This system uses Claude for enhanced reasoning")
@@ -126,16 +325,27 @@ async def main():
     print(f"\n📬 Corporate Request:")
     print(f"   {request}")
     
-    workflow = await orchestrator.plan_workflow(request, context)
+    print(f"\n📝 Summary:")
+    print("   ", end="", flush=True)
+    metrics = StreamMetrics()
+    async for delta in orchestrator.stream_summary(request, context, metrics):
+        print(delta, end="", flush=True)
+    if metrics.time_to_first_token is None:
+        print("\n   ⏱️  No text was streamed")
+    else:
+        print(f"\n   ⏱️  TTFT {metrics.time_to_first_token:.2f}s")
+    workflow = metrics.result
     
     print(f"\n✅ Workflow Status: {workflow.status}")
     print(f"\n📊 Tasks:")
     for task in workflow.tasks_completed:
         print(f"   - {task}")
     
-    print(f"\n📝 Summary:")
-    print(f"   {workflow.summary}")
-    
+    if workflow.tasks:
+        print(f"\n⚙️  Executing Tasks:")
+        async for outcome in orchestrator.execute_workflow(workflow, context):
+            print(f"   [{outcome.status}] {outcome.task.title} ({outcome.duration:.1f}s)")
+
     if workflow.next_steps:
         print(f"\n➡️  Next Steps:")
         for step in workflow.next_steps:
@@ -0,0 +1,38 @@
+"""
+Corporate Agentic System - HTTP Endpoint
+
+Exposes `CorporateOrchestrator.plan_workflow` as `POST /corporate/plan` on a
+shared `AgentService`.
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from pydantic_ai_shared.service import AgentService
+
+from .orchestrator import CorporateContext, CorporateOrchestrator, WorkflowResult
+
+
+class PlanRequest(BaseModel):
+    """Body of `POST /corporate/plan`."""
+    request: str = Field(min_length=1, max_length=8000)
+    user_role: str
+    department: str
+    access_level: str = "standard"
+
+
+def add_corporate_routes(service: AgentService, orchestrator: Optional[CorporateOrchestrator] = None) -> None:
+    """Register the corporate endpoints on `service`.
+
+    Args:
+        service: Service to register on
+        orchestrator: Orchestrator planning workflows (defaults to one on the configured model)
+    """
+    orchestrator = orchestrator or CorporateOrchestrator()
+
+    @service.route("/corporate/plan", PlanRequest)
+    async def plan_workflow(request: PlanRequest) -> WorkflowResult:
+        context = CorporateContext(
+            user_role=request.user_role, department=request.department, access_level=request.access_level
+        )
+        return await orchestrator.plan_workflow(request.request, context)
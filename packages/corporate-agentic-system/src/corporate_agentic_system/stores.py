@@ -0,0 +1,79 @@
+"""
+Corporate Agentic System - Backing Stores
+
+Policy and resource lookups used by the planner's tools. Stores are created
+once per process and reach the tools through `CorporateContext.stores`, so
+connections (or, for the in-memory versions here, seeded data) are pooled
+across runs instead of being opened per tool call.
+"""
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Protocol
+
+
+class PolicyStore(Protocol):
+    """Company policies by topic."""
+
+    async def lookup(self, topic: str, department: str) -> List[str]: ...
+
+
+class ResourceStore(Protocol):
+    """Availability of shared resources (rooms, budget, headcount)."""
+
+    async def availability(self, resource: str, department: str) -> Dict[str, str]: ...
+
+
+@dataclass
+class InMemoryPolicyStore:
+    """Policy store seeded with a few company-wide policies."""
+    policies: Dict[str, List[str]] = field(default_factory=lambda: {
+        "travel": ["Book travel at least 14 days ahead", "Economy class for flights under 6 hours"],
+        "expenses": ["Submit receipts within 30 days", "Expenses above $500 need manager approval"],
+        "meetings": ["Recurring meetings need an agenda", "Keep cross-team reviews under 60 minutes"],
+        "data": ["Customer data stays in approved systems", "Share reports internally only"],
+    })
+
+    async def lookup(self, topic: str, department: str) -> List[str]:
+        return list(self.policies.get(topic.strip().lower(), []))
+
+
+@dataclass
+class InMemoryResourceStore:
+    """Resource store seeded with per-department availability."""
+    resources: Dict[str, Dict[str, str]] = field(default_factory=lambda: {
+        "meeting_rooms": {"default": "available"},
+        "budget": {"default": "limited", "engineering": "available"},
+        "headcount": {"default": "frozen"},
+    })
+
+    async def availability(self, resource: str, department: str) -> Dict[str, str]:
+        by_department = self.resources.get(resource.strip().lower())
+        if by_department is None:
+            return {"resource": resource, "status": "unknown"}
+        status = by_department.get(department.lower(), by_department.get("default", "unknown"))
+        return {"resource": resource, "department": department, "status": status}
+
+
+@dataclass
+class CorporateStores:
+    """The backing stores the corporate tools use."""
+    policies: PolicyStore = field(default_factory=InMemoryPolicyStore)
+    resources: ResourceStore = field(default_factory=InMemoryResourceStore)
+    # Key of cached tool results: stores sharing a scope must hold the same data.
+    # Each instance gets its own, except the process-wide stores, which share
+    # "default" so a shared tool cache (e.g. Redis) serves every worker.
+    scope: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+_stores: Optional[CorporateStores] = None
+_stores_lock = threading.Lock()
+
+
+def get_corporate_stores() -> CorporateStores:
+    """Get the process-wide stores, creating them on first use."""
+    global _stores
+    with _stores_lock:
+        if _stores is None:
+            _stores = CorporateStores(scope="default")
+        return _stores
@@ -0,0 +1,41 @@
+"""
+Corporate Agentic System - Planner Tools
+
+Policies change rarely, so lookups are cached for minutes; resource
+availability moves faster and is cached briefly. Both read from the pooled
+stores on `CorporateContext.stores`, and answers depend on those stores and
+the requester's department, which are therefore part of each cache key.
+"""
+from typing import Dict, List, Tuple
+
+from pydantic_ai import RunContext
+
+from pydantic_ai_shared.tools import ToolSet
+
+from .orchestrator import CorporateContext
+
+CORPORATE_TOOLS: ToolSet[CorporateContext] = ToolSet("corporate")
+
+
+def _scope(ctx: RunContext[CorporateContext]) -> Tuple[str, str]:
+    return ctx.deps.stores.scope, ctx.deps.department
+
+
+@CORPORATE_TOOLS.tool(ttl=300, timeout=5, vary=_scope)
+async def lookup_policy(ctx: RunContext[CorporateContext], topic: str) -> List[str]:
+    """Look up the company policies on a topic, e.g. travel, expenses, meetings or data.
+
+    Args:
+        topic: The policy topic
+    """
+    return await ctx.deps.stores.policies.lookup(topic, ctx.deps.department)
+
+
+@CORPORATE_TOOLS.tool(ttl=30, timeout=5, vary=_scope)
+async def check_resource_availability(ctx: RunContext[CorporateContext], resource: str) -> Dict[str, str]:
+    """Check whether a shared resource is available to the requester's department.
+
+    Args:
+        resource: The resource, e.g. meeting_rooms, budget or headcount
+    """
+    return await ctx.deps.stores.resources.availability(resource, ctx.deps.department)
@@ -0,0 +1,82 @@
+"""Tests for the workflow executor."""
+import asyncio
+
+import pytest
+
+from corporate_agentic_system.executor import WorkflowExecutor, build_dag
+from corporate_agentic_system.orchestrator import CorporateContext, Task
+
+CONTEXT = CorporateContext(user_role="manager", department="engineering")
+
+
+def make_task(title, agent="analytics", priority=3, depends_on=()):
+    return Task(
+        title=title,
+        description=f"Do {title}",
+        assigned_agent=agent,
+        priority=priority,
+        estimated_time="1h",
+        depends_on=list(depends_on),
+    )
+
+
+def test_build_dag_rejects_cycles_and_unknown_dependencies():
+    """Test DAG validation."""
+    with pytest.raises(ValueError, match="cycle"):
+        build_dag([make_task("a", depends_on=["b"]), make_task("b", depends_on=["a"])])
+    with pytest.raises(ValueError, match="unknown"):
+        build_dag([make_task("a", depends_on=["missing"])])
+    with pytest.raises(ValueError, match="unique"):
+        build_dag([make_task("a"), make_task("a")])
+
+
+@pytest.mark.asyncio
+async def test_execute_runs_independent_tasks_concurrently():
+    """Test that independent tasks overlap and dependents wait."""
+    active = 0
+    peak = 0
+
+    async def handler(task, context):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return task.title.upper()
+
+    tasks = [make_task(f"t{i}") for i in range(6)] + [
+        make_task("report", depends_on=[f"t{i}" for i in range(6)])
+    ]
+    executor = WorkflowExecutor({"analytics": handler}, agent_limits={"analytics": 3})
+    outcomes = [outcome async for outcome in executor.execute(tasks, CONTEXT)]
+
+    assert peak == 3
+    assert outcomes[-1].task.title == "report"
+    assert all(outcome.status == "completed" for outcome in outcomes)
+    assert outcomes[-1].result == "REPORT"
+
+
+@pytest.mark.asyncio
+async def test_execute_orders_by_priority_and_skips_failed_dependents():
+    """Test priority ordering and failure propagation."""
+    started = []
+
+    async def handler(task, context):
+        started.append(task.title)
+        if task.title == "broken":
+            raise RuntimeError("boom")
+
+    tasks = [
+        make_task("low", priority=5),
+        make_task("broken", priority=1),
+        make_task("after-broken", priority=1, depends_on=["broken"]),
+        make_task("chained", depends_on=["after-broken"]),
+    ]
+    executor = WorkflowExecutor({}, default_limit=1, default_handler=handler)
+    outcomes = {outcome.task.title: outcome async for outcome in executor.execute(tasks, CONTEXT)}
+
+    assert started == ["broken", "low"]
+    assert outcomes["broken"].status == "failed"
+    assert outcomes["after-broken"].status == "skipped"
+    assert outcomes["chained"].status == "skipped"
+    assert outcomes["low"].status == "completed"
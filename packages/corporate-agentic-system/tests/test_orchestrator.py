@@ -8,6 +8,19 @@ def test_basic():
     assert hasattr(orchestrator, "CorporateOrchestrator")
 
 
+def test_import_and_construction_defer_pydantic_ai():
+    """Test that pydantic_ai loads on first run, not at import or construction."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; from corporate_agentic_system import CorporateOrchestrator; "
+        "CorporateOrchestrator(model='anthropic:claude-3-5-sonnet-latest'); print('pydantic_ai' in sys.modules)"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "False"
+
+
 @pytest.mark.asyncio
 async def test_workflow_result_structure():
     """Test that WorkflowResult model works."""
@@ -23,3 +36,152 @@ async def test_workflow_result_structure():
     assert result.status == "planned"
     assert len(result.tasks_completed) == 2
     assert len(result.next_steps) == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_workflow_uses_specialist_by_default():
+    """Test that planned tasks run through the specialist agent."""
+    from pydantic_ai.models.test import TestModel
+
+    from corporate_agentic_system.orchestrator import (
+        CorporateContext,
+        CorporateOrchestrator,
+        Task,
+        WorkflowResult,
+    )
+
+    orchestrator = CorporateOrchestrator(model=TestModel(custom_result_text="done"))
+    workflow = WorkflowResult(
+        status="planned",
+        tasks_completed=[],
+        summary="",
+        tasks=[
+            Task(title="a", description="", assigned_agent="docs", priority=1, estimated_time="1h"),
+            Task(title="b", description="", assigned_agent="docs", priority=2,
+                 estimated_time="1h", depends_on=["a"]),
+        ],
+    )
+    context = CorporateContext(user_role="manager", department="engineering")
+
+    outcomes = [o async for o in orchestrator.execute_workflow(workflow, context)]
+    assert [o.task.title for o in outcomes] == ["a", "b"]
+    assert all(o.result == "done" for o in outcomes)
+
+
+@pytest.mark.asyncio
+async def test_plan_workflow_coalesces_per_context():
+    """Test that identical requests share a plan only within the same context."""
+    import asyncio
+
+    from pydantic_ai_shared.stub import StubModel
+
+    from corporate_agentic_system.orchestrator import CorporateContext, CorporateOrchestrator
+
+    model = StubModel(latency=0.01)
+    orchestrator = CorporateOrchestrator(model=model)
+    engineering = CorporateContext(user_role="manager", department="engineering")
+    finance = CorporateContext(user_role="manager", department="finance")
+
+    plans = await asyncio.gather(
+        orchestrator.plan_workflow("Onboard Alice", engineering),
+        orchestrator.plan_workflow("Onboard Alice", CorporateContext("manager", "engineering")),
+        orchestrator.plan_workflow("Onboard Alice", finance),
+    )
+
+    assert plans[0] is plans[1]
+    assert model.requests == 2
+    assert orchestrator.inflight.stats.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_plan_workflow_replays_memoized_plans(tmp_path):
+    """Test that a rerun over the same requests is served from the persistent memo."""
+    from pydantic_ai_shared.memo import MemoMissError, ResultMemo
+    from pydantic_ai_shared.stub import StubModel
+
+    from corporate_agentic_system.orchestrator import CorporateContext, CorporateOrchestrator
+
+    path = str(tmp_path / "plans.sqlite")
+    context = CorporateContext(user_role="manager", department="engineering")
+    model = StubModel()
+    first = await CorporateOrchestrator(model=model, memo=ResultMemo(path)).plan_workflow("Onboard Alice", context)
+
+    rerun = CorporateOrchestrator(model=model, memo=ResultMemo(path, mode="replay"))
+    assert await rerun.plan_workflow("Onboard Alice", context) == first
+    with pytest.raises(MemoMissError):
+        await rerun.plan_workflow("Onboard Alice", CorporateContext("manager", "finance"))
+    assert model.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_planner_tools_read_context_stores():
+    """Test that the planner's tools reach the stores on the context."""
+    from pydantic_ai.messages import ModelRequest, ModelResponse, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import FunctionModel
+
+    from corporate_agentic_system.orchestrator import CorporateContext, CorporateOrchestrator
+    from corporate_agentic_system.stores import CorporateStores, InMemoryPolicyStore
+
+    async def respond(messages, info):
+        returns = [
+            part.content for message in messages if isinstance(message, ModelRequest)
+            for part in message.parts if isinstance(part, ToolReturnPart)
+        ]
+        if not returns:
+            return ModelResponse(parts=[
+                ToolCallPart("lookup_policy", {"topic": "offsites"}),
+                ToolCallPart("check_resource_availability", {"resource": "budget"}),
+            ])
+        plan = {"status": "planned", "tasks_completed": [str(value) for value in returns], "summary": "ok"}
+        return ModelResponse(parts=[ToolCallPart(info.result_tools[0].name, plan)])
+
+    stores = CorporateStores(policies=InMemoryPolicyStore({"offsites": ["Offsites need VP approval"]}))
+    context = CorporateContext(user_role="manager", department="engineering", stores=stores)
+    orchestrator = CorporateOrchestrator(model=FunctionModel(respond))
+
+    workflow = await orchestrator.plan_workflow("Plan the offsite", context)
+
+    assert workflow.tasks_completed[0] == "['Offsites need VP approval']"
+    assert "available" in workflow.tasks_completed[1]
+
+
+@pytest.mark.asyncio
+async def test_planner_tool_cache_is_scoped_to_the_stores():
+    """Test that cached policy lookups from one set of stores are not served to another."""
+    from types import SimpleNamespace
+
+    from corporate_agentic_system.orchestrator import CorporateContext
+    from corporate_agentic_system.stores import CorporateStores, InMemoryPolicyStore
+    from corporate_agentic_system.tools import CORPORATE_TOOLS
+
+    lookup = {tool.name: tool for tool in CORPORATE_TOOLS.tools()}["lookup_policy"].function
+
+    def context(rule):
+        stores = CorporateStores(policies=InMemoryPolicyStore({"offsites": [rule]}))
+        return SimpleNamespace(deps=CorporateContext("manager", "engineering", stores=stores))
+
+    assert await lookup(context("Offsites need VP approval"), "offsites") == ["Offsites need VP approval"]
+    assert await lookup(context("Offsites are banned"), "offsites") == ["Offsites are banned"]
+
+
+@pytest.mark.asyncio
+async def test_stream_plan_items_yields_list_items():
+    """Test streaming the items of a plan's task and next-step lists."""
+    from pydantic_ai_shared.streaming import StreamMetrics
+    from pydantic_ai_shared.stub import StubModel
+
+    from corporate_agentic_system.orchestrator import CorporateContext, CorporateOrchestrator
+
+    outputs = {"tasks_completed": ["Book venue", "Send invites"], "next_steps": ["Confirm catering"], "tasks": []}
+    orchestrator = CorporateOrchestrator(model=StubModel(outputs=outputs))
+    context = CorporateContext(user_role="manager", department="engineering")
+    metrics = StreamMetrics()
+
+    items = [item async for item in orchestrator.stream_plan_items("Plan the offsite", context, metrics)]
+
+    assert items == [
+        ("tasks_completed", "Book venue"),
+        ("tasks_completed", "Send invites"),
+        ("next_steps", "Confirm catering"),
+    ]
+    assert metrics.result.next_steps == ["Confirm catering"]
@@ -0,0 +1,49 @@
+"""
+Benchmark: batch ticket intake throughput vs. concurrency
+
+Runs `InternalSupportAgent.process_batch` against a local stub model that
+simulates provider latency, so no API key or network access is needed.
+
+Usage:
+    uv run python benchmarks/bench_batch.py --queries 2000 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from internal_support_agent.agent import InternalSupportAgent
+from pydantic_ai_shared.stub import StubModel
+
+
+async def run(queries: int, latency: float, levels: list[int]) -> None:
+    """Run the batch benchmark at each concurrency level and print a table."""
+    agent = InternalSupportAgent(model=StubModel(latency=latency))
+    batch = [f"Benchmark query #{i}" for i in range(queries)]
+
+    print(f"{'concurrency':>12} {'seconds':>10} {'queries/s':>12} {'speedup':>10}")
+    baseline = None
+    for level in levels:
+        start = time.perf_counter()
+        results = await agent.process_batch(batch, max_concurrency=level)
+        elapsed = time.perf_counter() - start
+        assert all(result.ok for result in results)
+        throughput = queries / elapsed
+        baseline = baseline or throughput
+        print(f"{level:>12} {elapsed:>10.2f} {throughput:>12.1f} {throughput / baseline:>9.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries per run")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated model latency (s)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    asyncio.run(run(args.queries, args.latency, args.levels))
+
+
+if __name__ == "__main__":
+    main()
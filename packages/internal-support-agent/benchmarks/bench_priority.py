@@ -0,0 +1,73 @@
+"""
+Benchmark: queue wait per priority class under overload, FIFO vs. priority
+
+Feeds a worker more queries per second than it can process, mixing urgent
+outages with routine and low-priority questions, and reports queue wait
+percentiles per predicted priority. The FIFO baseline uses an aging rate so
+fast that waiting time alone decides the order.
+
+Usage:
+    uv run python benchmarks/bench_priority.py --rate 200 --seconds 5 --concurrency 8
+"""
+import argparse
+import asyncio
+import random
+
+from internal_support_agent.agent import InternalSupportAgent
+from internal_support_agent.priority import PRIORITY_LEVELS
+from internal_support_agent.worker import InMemoryJobQueue, SupportWorker, WorkerStats
+from pydantic_ai_shared.stub import StubModel
+
+QUERIES = [
+    (0.05, "The shared drive is down for the whole sales team"),
+    (0.15, "I cannot log in to the VPN from home"),
+    (0.45, "Please order a new monitor for my desk"),
+    (0.35, "What is our policy on remote work?"),
+]
+
+
+async def run(mode: str, rate: float, seconds: float, concurrency: int, latency: float, aging: float) -> WorkerStats:
+    """Enqueue at `rate` per second for `seconds`, then drain the queue."""
+    rng = random.Random(0)
+    queue = InMemoryJobQueue(aging=aging if mode == "priority" else 1e-9)
+    worker = SupportWorker(
+        InternalSupportAgent(model=StubModel(latency=latency)), queue, concurrency=concurrency, poll_interval=0.01
+    )
+    weights = [weight for weight, _ in QUERIES]
+    texts = [text for _, text in QUERIES]
+
+    running = asyncio.create_task(worker.run())
+    for i in range(int(rate * seconds)):
+        await queue.enqueue([f"{rng.choices(texts, weights)[0]} (#{i})"])
+        await asyncio.sleep(1 / rate)
+    while await queue.pending():
+        await asyncio.sleep(0.05)
+    worker.stop()
+    return await running
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=200, help="Queries enqueued per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated model latency (s)")
+    parser.add_argument("--aging", type=float, default=30.0, help="Seconds of waiting per promoted level")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    print(f"{'mode':<9} {'priority':<8} {'jobs':>6} {'p50 wait s':>11} {'p99 wait s':>11}")
+    for mode in ("fifo", "priority"):
+        stats = asyncio.run(run(mode, args.rate, args.seconds, args.concurrency, args.latency, args.aging))
+        for priority in PRIORITY_LEVELS:
+            if priority in stats.waits:
+                print(
+                    f"{mode:<9} {priority:<8} {len(stats.waits[priority]):>6} "
+                    f"{stats.wait_percentile(priority, 50):>11.2f} {stats.wait_percentile(priority, 99):>11.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
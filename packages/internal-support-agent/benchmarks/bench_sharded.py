@@ -0,0 +1,68 @@
+"""
+Benchmark: sharded bulk classification throughput vs. worker processes
+
+Writes --queries synthetic queries to a JSON Lines file and runs
+`ShardedRunner` over it with 1, 2, 4, ... up to --max-shards processes
+against the local stub model. With a near-zero stub latency the run is bound
+by per-query CPU work (prompt building, JSON parsing, validation, logging),
+so throughput should grow with the number of cores until it runs out of them.
+
+Usage:
+    uv run python benchmarks/bench_sharded.py --queries 20000 --max-shards 8
+"""
+import argparse
+import functools
+import json
+import os
+import tempfile
+
+from internal_support_agent.agent import InternalSupportAgent
+from internal_support_agent.sharded import ShardedRunner
+from pydantic_ai_shared.stub import StubModel
+
+
+def stub_agent(latency: float) -> InternalSupportAgent:
+    """Agent factory run inside each shard; must be importable for pickling."""
+    return InternalSupportAgent(model=StubModel(latency=latency))
+
+
+def shard_levels(max_shards: int) -> list[int]:
+    levels = [1]
+    while levels[-1] * 2 <= max_shards:
+        levels.append(levels[-1] * 2)
+    return levels if levels[-1] == max_shards else levels + [max_shards]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=64, help="Queries in flight per shard")
+    parser.add_argument("--latency", type=float, default=0.001, help="Simulated model latency (s)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "queries.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            for i in range(args.queries):
+                f.write(json.dumps({"query": f"My laptop keeps freezing when I open the VPN client (#{i})"}) + "\n")
+
+        print(f"{os.cpu_count()} CPUs")
+        print(f"{'shards':>7} {'seconds':>9} {'queries/s':>10} {'speedup':>8}")
+        baseline = None
+        for shards in shard_levels(args.max_shards):
+            runner = ShardedRunner(
+                shards, functools.partial(stub_agent, args.latency), args.concurrency, log_level="ERROR"
+            )
+            report = runner.run(input_path, os.path.join(directory, "tickets.jsonl"))
+            assert report.queries == args.queries and report.failed == 0
+            baseline = baseline or report.throughput
+            speedup = report.throughput / baseline
+            print(f"{shards:>7} {report.elapsed:>9.2f} {report.throughput:>10.1f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,5 +4,65 @@ Internal Support Agent
 An AI-powered internal support agent for handling employee queries,
 IT support tickets, and internal documentation questions.
 """
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = "0.1.0"
+
+# Public names and their submodules; submodules load on first attribute
+# access (PEP 562), so importing the package itself is nearly free
+_EXPORTS = {
+    "BatchResult": "agent",
+    "InternalSupportAgent": "agent",
+    "SupportDeps": "agent",
+    "SupportTicket": "agent",
+    "build_ticket_router": "agent",
+    "PriorityClassifier": "priority",
+    "add_support_routes": "service",
+    "ShardedRunner": "sharded",
+    "InMemoryJobQueue": "worker",
+    "Job": "worker",
+    "PostgresJobQueue": "worker",
+    "SupportWorker": "worker",
+}
+
+__all__ = [
+    "BatchResult",
+    "InternalSupportAgent",
+    "SupportDeps",
+    "SupportTicket",
+    "build_ticket_router",
+    "PriorityClassifier",
+    "add_support_routes",
+    "ShardedRunner",
+    "InMemoryJobQueue",
+    "Job",
+    "PostgresJobQueue",
+    "SupportWorker",
+]
+
+if TYPE_CHECKING:
+    from .agent import (
+        BatchResult,
+        InternalSupportAgent,
+        SupportDeps,
+        SupportTicket,
+        build_ticket_router,
+    )
+    from .priority import PriorityClassifier
+    from .service import add_support_routes
+    from .sharded import ShardedRunner
+    from .worker import InMemoryJobQueue, Job, PostgresJobQueue, SupportWorker
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_EXPORTS})
@@ -5,59 +5,214 @@ This module implements an AI agent for internal company support.
 """
 import asyncio
 import os
-from typing import List
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Annotated, AsyncIterator, Iterable, List, Literal, Optional, get_args
 
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, RunContext
 from loguru import logger
 
-# Import from shared package
-try:
-    from pydantic_ai_shared.config import get_default_model
-except ImportError:
-    # Fallback for development
-    import sys
-    sys.path.insert(0, "../../shared/src")
-    from config import get_default_model
+from pydantic_ai_shared.cache import ResponseCache, cache_key
+from pydantic_ai_shared.config import get_default_model, get_settings
+from pydantic_ai_shared.schemas import CaseInsensitive
+from pydantic_ai_shared.singleflight import SingleFlight
+from pydantic_ai_shared.telemetry import instrument, traced_run
+
+from .stores import SupportStores, get_support_stores
+
+if TYPE_CHECKING:
+    # pydantic_ai and the model-facing helpers load on first run, keeping import cheap
+    from pydantic_ai import Agent
+    from pydantic_ai_shared.hedging import HedgedRunner
+    from pydantic_ai_shared.routing import CascadeRouter
+
+
+SupportCategory = Literal["IT", "HR", "Finance", "General"]
+SupportPriority = Literal["low", "medium", "high", "urgent"]
+SUPPORT_CATEGORIES = get_args(SupportCategory)
+SUPPORT_PRIORITIES = get_args(SupportPriority)
+
+SUPPORT_SYSTEM_PROMPT = """You are an internal company support AI assistant.
+Help employees with:
+- IT issues (password resets, access requests, software problems)
+- HR questions (policies, benefits, time off)
+- General company information
+
+Create structured support tickets from employee queries.
+Prioritize based on urgency and impact.
+Escalate complex or sensitive issues.
+Search the knowledge base and documentation and check service status before
+suggesting an action; base policy answers on the documents you find.
+Rate your confidence in the ticket from 0 to 1."""
 
 
 class SupportTicket(BaseModel):
     """Support ticket structure."""
     title: str
-    category: str  # "IT", "HR", "Finance", "General"
-    priority: str  # "low", "medium", "high", "urgent"
+    category: Annotated[SupportCategory, CaseInsensitive()]
+    priority: Annotated[SupportPriority, CaseInsensitive()]
     description: str
     suggested_action: str
     requires_escalation: bool = False
+    confidence: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+
+
+@dataclass
+class SupportDeps:
+    """Dependencies available to the support tools."""
+    # Pooled per process; tools reach the knowledge base and status page through it
+    stores: SupportStores = field(default_factory=get_support_stores)
+
+
+def ticket_is_confident(ticket: SupportTicket, threshold: Optional[float] = None) -> bool:
+    """Decide whether a fast-tier ticket can be kept without escalating.
+    
+    Args:
+        ticket: Ticket produced by a cheap model
+        threshold: Minimum confidence (defaults to the shared `routing.confidence_threshold`)
+        
+    Returns:
+        True when the ticket is well-formed, confident and not flagged for escalation
+    """
+    if threshold is None:
+        threshold = get_settings().routing.confidence_threshold
+    return (
+        ticket.category in SUPPORT_CATEGORIES
+        and ticket.priority in SUPPORT_PRIORITIES
+        and not ticket.requires_escalation
+        and ticket.confidence is not None
+        and ticket.confidence >= threshold
+    )
+
+
+def build_ticket_router(
+    fast_model: Optional[str] = None,
+    strong_model: Optional[str] = None,
+) -> "CascadeRouter[SupportTicket]":
+    """Build a router that tries a fast model before the default one.
+
+    Route costs come from the shared `routing.prices` setting.
+    
+    Args:
+        fast_model: Cheap first tier (defaults to the configured OpenAI fast model)
+        strong_model: Escalation tier (defaults to the configured OpenAI model)
+        
+    Returns:
+        A cascade router producing support tickets
+    """
+    from pydantic_ai_shared.routing import CascadeRouter, Route
+
+    from .tools import SUPPORT_TOOLS
+
+    provider = get_settings().provider("openai")
+    return CascadeRouter(
+        [
+            Route.priced("fast", fast_model or provider.fast_model or provider.model),
+            Route.priced("strong", strong_model or provider.model),
+        ],
+        result_type=SupportTicket,
+        system_prompt=SUPPORT_SYSTEM_PROMPT,
+        accept=ticket_is_confident,
+        deps_type=SupportDeps,
+        toolset=SUPPORT_TOOLS,
+    )
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single query within a batch."""
+    index: int
+    query: str
+    ticket: Optional[SupportTicket] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the query produced a ticket."""
+        return self.error is None
 
 
 class InternalSupportAgent:
     """AI agent for internal support queries."""
     
-    def __init__(self, model: str = None):
+    def __init__(
+        self,
+        model: str = None,
+        cache: Optional[ResponseCache[SupportTicket]] = None,
+        router: Optional["CascadeRouter[SupportTicket]"] = None,
+        hedger: Optional["HedgedRunner[SupportTicket]"] = None,
+        deps: Optional[SupportDeps] = None,
+    ):
         """Initialize the support agent.
         
         Args:
             model: The model to use (defaults to configured OpenAI model)
+            cache: Optional response cache consulted before calling the model
+            router: Optional cascade router used instead of the single model,
+                see `build_ticket_router`
+            hedger: Optional runner that hedges slow calls on a secondary model;
+                built automatically when the shared `hedge.enabled` setting is on
+            deps: Dependencies for the tools (defaults to the process-wide stores)
         """
         if model is None:
             model = get_default_model("openai")
             
-        self.agent = Agent(
-            model,
-            result_type=SupportTicket,
-            system_prompt="""You are an internal company support AI assistant.
-            Help employees with:
-            - IT issues (password resets, access requests, software problems)
-            - HR questions (policies, benefits, time off)
-            - General company information
-            
-            Create structured support tickets from employee queries.
-            Prioritize based on urgency and impact.
-            Escalate complex or sensitive issues."""
-        )
+        self.model = model
+        self.cache = cache
+        self.router = router
+        self.deps = deps or SupportDeps()
+        # Agents are built on first use, so constructing the class stays cheap
+        self._agent: Optional["Agent"] = None
+        self._hedger = hedger
+        self._auto_hedge = hedger is None and get_settings().hedge.enabled and isinstance(model, str)
+        # Identical concurrent queries share a single model call
+        self.inflight: SingleFlight[SupportTicket] = SingleFlight("process_query")
         logger.info(f"Internal support agent initialized with {model}")
+
+    @property
+    def agent(self) -> "Agent":
+        """The ticket agent, taken from the shared registry on first use."""
+        if self._agent is None:
+            from pydantic_ai_shared.registry import get_registry
+
+            from .tools import SUPPORT_TOOLS
+
+            self._agent = get_registry().agent(
+                self.model,
+                result_type=SupportTicket,
+                system_prompt=SUPPORT_SYSTEM_PROMPT,
+                deps_type=SupportDeps,
+                toolset=SUPPORT_TOOLS,
+            )
+        return self._agent
+
+    @property
+    def hedger(self) -> Optional["HedgedRunner[SupportTicket]"]:
+        """The hedged runner, if one was given or hedging is enabled in the settings."""
+        if self._hedger is None and self._auto_hedge:
+            from pydantic_ai_shared.hedging import HedgedRunner
+
+            from .tools import SUPPORT_TOOLS
+
+            self._hedger = HedgedRunner(
+                self.model,
+                result_type=SupportTicket,
+                system_prompt=SUPPORT_SYSTEM_PROMPT,
+                deps_type=SupportDeps,
+                toolset=SUPPORT_TOOLS,
+                name="support.hedge",
+            )
+        return self._hedger
     
+    @property
+    def cache_model(self) -> str:
+        """Models behind this agent's answers, which scope its cache entries."""
+        from pydantic_ai_shared.memo import model_id
+
+        if self.router is not None:
+            return "+".join(model_id(route.model) for route in self.router.routes)
+        return model_id(self.model)
+
+    @instrument("support.process_query")
     async def process_query(self, query: str) -> SupportTicket:
         """Process an employee support query.
         
@@ -68,9 +223,90 @@ class InternalSupportAgent:
             A structured support ticket
         """
         logger.info(f"Processing query: {query[:50]}...")
-        result = await self.agent.run(query)
-        logger.info(f"Created ticket: {result.data.title}")
-        return result.data
+        if self.cache is not None:
+            cached = await self.cache.get(query, model=self.cache_model)
+            if cached is not None:
+                logger.info(f"Cache hit for ticket: {cached.title}")
+                return cached
+
+        return await self.inflight.do(cache_key(query), lambda: self._create_ticket(query))
+
+    async def _create_ticket(self, query: str) -> SupportTicket:
+        if self.router is not None:
+            routed = await self.router.run(query, deps=self.deps)
+            ticket = routed.data
+            logger.info(f"Created ticket via {routed.route} route: {ticket.title}")
+        else:
+            if self.hedger is not None:
+                result = await self.hedger.run(query, deps=self.deps)
+            else:
+                result = await traced_run(self.agent, query, deps=self.deps)
+            ticket = result.data
+            logger.info(f"Created ticket: {ticket.title}")
+        if self.cache is not None:
+            await self.cache.set(query, ticket, model=self.cache_model)
+        return ticket
+
+    async def process_batch(
+        self,
+        queries: Iterable[str],
+        max_concurrency: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """Process many queries concurrently, preserving input order.
+
+        Failures are captured per query, so one bad query does not sink the batch.
+
+        Args:
+            queries: The employee queries to process
+            max_concurrency: Maximum number of queries in flight at once
+                (defaults to the shared `concurrency.batch` setting)
+
+        Returns:
+            One result per query, in the same order as the input
+        """
+        results = [result async for result in self.process_batch_as_completed(queries, max_concurrency)]
+        results.sort(key=lambda result: result.index)
+        return results
+
+    async def process_batch_as_completed(
+        self,
+        queries: Iterable[str],
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """Process many queries concurrently, yielding results as they complete.
+
+        Args:
+            queries: The employee queries to process
+            max_concurrency: Maximum number of queries in flight at once
+                (defaults to the shared `concurrency.batch` setting)
+
+        Yields:
+            Results in completion order; use `BatchResult.index` to correlate
+        """
+        if max_concurrency is None:
+            max_concurrency = get_settings().concurrency.batch
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(index: int, query: str) -> BatchResult:
+            async with semaphore:
+                try:
+                    ticket = await self.process_query(query)
+                except Exception as exc:
+                    logger.warning(f"Query {index} failed: {exc!r}")
+                    return BatchResult(index=index, query=query, error=exc)
+                return BatchResult(index=index, query=query, ticket=ticket)
+
+        tasks = [asyncio.create_task(run_one(i, q)) for i, q in enumerate(queries)]
+        logger.info(f"Processing batch of {len(tasks)} queries (max_concurrency={max_concurrency})")
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
 
 
 async def main():
@@ -92,12 +328,16 @@ async def main():
     print("Internal Support Agent Demo")
     print("=" * 70)
     
-    for query in queries:
+    for result in await agent.process_batch(queries):
         print(f"\n📩 Employee Query:")
-        print(f"   {query}")
-        
-        ticket = await agent.process_query(query)
-        
+        print(f"   {result.query}")
+
+        if not result.ok:
+            print(f"\n❌ Failed: {result.error}")
+            print("-" * 70)
+            continue
+
+        ticket = result.ticket
         print(f"\n🎫 Support Ticket Created:")
         print(f"   Title: {ticket.title}")
         print(f"   Category: {ticket.category}")
@@ -0,0 +1,87 @@
+"""
+Internal Support Agent - Priority Pre-classifier
+
+`SupportTicket.priority` is only known after the model call, too late to
+order the queue. `PriorityClassifier` estimates it up front from keyword and
+regex rules in tens of microseconds, so the job queues can serve urgent queries
+first. The estimate only orders the queue; the ticket's priority still comes
+from the model.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .agent import SUPPORT_PRIORITIES
+
+# Queue levels, most urgent first
+PRIORITY_LEVELS = tuple(reversed(SUPPORT_PRIORITIES))
+PRIORITY_RANK: Dict[str, int] = {priority: rank for rank, priority in enumerate(PRIORITY_LEVELS)}
+DEFAULT_PRIORITY = "medium"
+
+
+@dataclass(frozen=True)
+class PriorityRule:
+    """Queries matching `pattern` (case-insensitive regex) get `priority`."""
+    priority: str
+    pattern: str
+
+
+DEFAULT_RULES = (
+    PriorityRule("urgent", r"\b(outage|is down|are down|went down|security (breach|incident)|phishing|data (leak|breach))\b"),
+    PriorityRule("urgent", r"\b(production|prod|customers?|clients?)\b.*\b(down|broken|failing|blocked)\b"),
+    PriorityRule("urgent", r"\b(asap|urgent(ly)?|emergency|immediately|within (the )?(next )?(an? |\d+ )?(hour|minute)s?|in \d+ (hour|minute)s?)\b"),
+    PriorityRule("high", r"\b(can(no|')?t|cannot|unable to|locked out)\b.*\b(access|log ?in|sign ?in|connect|open|use)\b"),
+    PriorityRule("high", r"\b(not working|doesn'?t work|broken|crash(es|ed|ing)?|freez(e|es|ing)|won'?t (boot|start|load)|error)\b"),
+    PriorityRule("low", r"\b(polic(y|ies)|benefits?|time off|vacation|holiday|remote work|how do i|where can i|wondering|question about)\b"),
+)
+
+
+class PriorityClassifier:
+    """Estimates a query's priority from ordered regex rules."""
+
+    def __init__(self, rules: Iterable[PriorityRule] = DEFAULT_RULES, default: str = DEFAULT_PRIORITY):
+        """Initialize the classifier.
+
+        Args:
+            rules: Rules to apply; when several match, the most urgent wins
+            default: Priority of queries no rule matches
+
+        Raises:
+            ValueError: If a rule or `default` names an unknown priority
+        """
+        if default not in PRIORITY_RANK:
+            raise ValueError(f"Unknown priority {default!r}, expected one of {PRIORITY_LEVELS}")
+        patterns: Dict[str, List[str]] = {}
+        for rule in rules:
+            if rule.priority not in PRIORITY_RANK:
+                raise ValueError(f"Unknown priority {rule.priority!r}, expected one of {PRIORITY_LEVELS}")
+            patterns.setdefault(rule.priority, []).append(f"(?:{rule.pattern})")
+        # One alternation per level, most urgent level first
+        self._levels = [
+            (priority, re.compile("|".join(patterns[priority]), re.IGNORECASE))
+            for priority in PRIORITY_LEVELS
+            if priority in patterns
+        ]
+        self.default = default
+
+    def classify(self, query: str) -> str:
+        """The estimated priority of a query."""
+        for priority, pattern in self._levels:
+            if pattern.search(query):
+                return priority
+        return self.default
+
+    def classify_many(self, queries: Sequence[str], priorities: Optional[Sequence[str]] = None) -> List[str]:
+        """Priorities for `queries`, keeping any given explicitly.
+
+        Raises:
+            ValueError: If `priorities` has the wrong length or unknown values
+        """
+        if priorities is None:
+            return [self.classify(query) for query in queries]
+        if len(priorities) != len(queries):
+            raise ValueError(f"Got {len(priorities)} priorities for {len(queries)} queries")
+        unknown = set(priorities) - set(PRIORITY_RANK)
+        if unknown:
+            raise ValueError(f"Unknown priorities {sorted(unknown)}, expected one of {PRIORITY_LEVELS}")
+        return list(priorities)
@@ -0,0 +1,32 @@
+"""
+Internal Support Agent - HTTP Endpoint
+
+Exposes `InternalSupportAgent.process_query` as `POST /support/query` on a
+shared `AgentService`.
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from pydantic_ai_shared.service import AgentService
+
+from .agent import InternalSupportAgent, SupportTicket
+
+
+class QueryRequest(BaseModel):
+    """Body of `POST /support/query`."""
+    query: str = Field(min_length=1, max_length=8000)
+
+
+def add_support_routes(service: AgentService, agent: Optional[InternalSupportAgent] = None) -> None:
+    """Register the support endpoints on `service`.
+
+    Args:
+        service: Service to register on
+        agent: Agent answering queries (defaults to one on the configured model)
+    """
+    agent = agent or InternalSupportAgent()
+
+    @service.route("/support/query", QueryRequest)
+    async def process_query(request: QueryRequest) -> SupportTicket:
+        return await agent.process_query(request.query)
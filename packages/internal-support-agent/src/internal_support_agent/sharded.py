@@ -0,0 +1,309 @@
+"""
+Internal Support Agent - Sharded Bulk Runner
+
+One event loop saturates a core on JSON parsing, validation and logging long
+before provider limits are reached. `ShardedRunner` splits a JSON Lines file
+of queries into byte ranges and runs each range in its own worker process,
+with its own event loop, agent and connection pools. Each shard writes its
+tickets to a part file, and the parent stitches the parts together in input
+order and merges the shards' stats and metrics. Shards read their range a
+chunk at a time, and a malformed input line becomes an error row rather
+than failing the shard. If a shard fails anyway, its error is logged and
+raised and the part files are removed.
+
+Provider rate limits (`rpm`/`tpm`) and the optional `max_rate` cap are
+enforced through a shared-memory bucket store, so all shards together stay
+within one budget.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass, field
+from itertools import islice, pairwise
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from pydantic_ai_shared.config import get_settings
+from pydantic_ai_shared.ratelimit import BucketStore, SharedMemoryBucketStore, configure_rate_limiter
+from pydantic_ai_shared.telemetry import get_telemetry
+
+from .agent import InternalSupportAgent
+
+QUERY_BUDGET_KEY = "sharded:queries"
+
+# Set in each worker process by `_init_shard`
+_store: Optional[BucketStore] = None
+
+
+@dataclass
+class ShardStats:
+    """Outcome of one shard."""
+    shard: int
+    queries: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class ShardedReport:
+    """Aggregated outcome of a sharded run."""
+    shards: List[ShardStats] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def queries(self) -> int:
+        return sum(shard.queries for shard in self.shards)
+
+    @property
+    def failed(self) -> int:
+        return sum(shard.failed for shard in self.shards)
+
+    @property
+    def throughput(self) -> float:
+        """Queries per second over the whole run."""
+        return self.queries / self.elapsed if self.elapsed else 0.0
+
+
+def partition(path: str, shards: int) -> List[Tuple[int, int]]:
+    """Split a file into at most `shards` byte ranges that start and end on line boundaries.
+
+    Args:
+        path: Path to a line-oriented file
+        shards: Number of ranges wanted
+
+    Returns:
+        `(start, end)` byte offsets, in file order, covering the whole file
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, shards):
+            f.seek(max(bounds[-1], size * i // shards))
+            f.readline()  # move to the start of the next line
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in pairwise(bounds) if end > start]
+
+
+def _init_shard(store: BucketStore, log_level: Optional[str]) -> None:
+    global _store
+    _store = store
+    configure_rate_limiter(store)
+    if log_level is not None:
+        logger.remove()
+        logger.add(sys.stderr, level=log_level)
+
+
+async def _take_query_budget(rate: float) -> None:
+    while True:
+        wait = await _store.take(QUERY_BUDGET_KEY, 1, rate, max(1.0, rate))
+        if wait <= 0:
+            return
+        await asyncio.sleep(wait)
+
+
+def _read_rows(path: str, start: int, end: int, query_field: str) -> Iterator[Dict[str, Any]]:
+    """Yield one pending row per line of a byte range, or an error row for a malformed line."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            if not line.strip():
+                continue
+            try:
+                yield {"query": json.loads(line)[query_field]}
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning(f"Skipping malformed input line at byte {position - len(line)}: {exc!r}")
+                text = line.decode("utf-8", errors="replace").strip()
+                yield {"query": text, "ticket": None, "error": f"invalid input line: {exc!r}"}
+
+
+async def _process(
+    agent: InternalSupportAgent,
+    rows: Iterator[Dict[str, Any]],
+    out: Any,
+    stats: ShardStats,
+    concurrency: int,
+    chunk_size: int,
+    max_rate: Optional[float],
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(row: Dict[str, Any]) -> Dict[str, Any]:
+        if "error" in row:
+            return row
+        query = row["query"]
+        async with semaphore:
+            if max_rate is not None:
+                await _take_query_budget(max_rate)
+            try:
+                ticket = await agent.process_query(query)
+            except Exception as exc:
+                logger.warning(f"Query failed: {exc!r}")
+                return {"query": query, "ticket": None, "error": repr(exc)}
+            return {"query": query, "ticket": ticket.model_dump(), "error": None}
+
+    # Chunks keep memory flat and let each part file be written in input order
+    while chunk := list(islice(rows, chunk_size)):
+        for row in await asyncio.gather(*(run_one(row) for row in chunk)):
+            out.write(json.dumps(row) + "\n")
+            stats.queries += 1
+            if row["error"] is None:
+                stats.succeeded += 1
+            else:
+                stats.failed += 1
+
+
+def _run_shard(
+    shard: int,
+    input_path: str,
+    span: Tuple[int, int],
+    part_path: str,
+    agent_factory: Callable[[], InternalSupportAgent],
+    query_field: str,
+    concurrency: int,
+    chunk_size: int,
+    max_rate: Optional[float],
+) -> Tuple[ShardStats, Dict[str, Any]]:
+    """Process one byte range in a worker process; returns its stats and metrics.
+
+    Each shard runs in a fresh process (`max_tasks_per_child=1`), so the
+    metrics snapshot holds this shard's series only.
+    """
+    started = time.perf_counter()
+    stats = ShardStats(shard)
+    rows = _read_rows(input_path, *span, query_field)
+    agent = agent_factory()
+    with open(part_path, "w", encoding="utf-8") as out:
+        asyncio.run(_process(agent, rows, out, stats, concurrency, chunk_size, max_rate))
+    stats.elapsed = time.perf_counter() - started
+    return stats, get_telemetry().metrics.snapshot()
+
+
+class ShardedRunner:
+    """Runs support queries from a file across worker processes."""
+
+    def __init__(
+        self,
+        shards: Optional[int] = None,
+        agent_factory: Callable[[], InternalSupportAgent] = InternalSupportAgent,
+        concurrency: Optional[int] = None,
+        max_rate: Optional[float] = None,
+        chunk_size: int = 1000,
+        log_level: Optional[str] = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            shards: Worker processes (defaults to the number of CPUs)
+            agent_factory: Picklable callable building the agent inside each worker
+            concurrency: Queries in flight per shard (defaults to the shared `concurrency.batch` setting)
+            max_rate: Queries per second across all shards (None for no cap beyond provider limits)
+            chunk_size: Queries a shard gathers at a time
+            log_level: Log level inside the workers (None keeps the default)
+        """
+        self.shards = shards or os.cpu_count() or 1
+        self.agent_factory = agent_factory
+        self.concurrency = concurrency or get_settings().concurrency.batch
+        self.max_rate = max_rate
+        self.chunk_size = chunk_size
+        self.log_level = log_level
+
+    def run(self, input_path: str, output_path: str, query_field: str = "query") -> ShardedReport:
+        """Process every query in a JSON Lines file.
+
+        Args:
+            input_path: JSON Lines file with one query per line
+            output_path: JSON Lines file receiving one `{query, ticket, error}` row
+                per input line, in input order (malformed lines get an error row)
+            query_field: Key holding the query in each input object
+
+        Returns:
+            Per-shard stats and totals; shard metrics are merged into this
+            process's telemetry
+
+        Raises:
+            Exception: The error of the first shard that failed
+        """
+        started = time.perf_counter()
+        spans = partition(input_path, self.shards)
+        parts = [f"{output_path}.part-{shard}" for shard in range(len(spans))]
+        # Workers are spawned rather than forked, so no pooled clients or threads leak into them
+        context = get_context("spawn")
+        store = SharedMemoryBucketStore(context=context)
+        logger.info(f"Running {input_path} in {len(spans)} shard(s)")
+        report = ShardedReport()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(spans),
+                mp_context=context,
+                initializer=_init_shard,
+                initargs=(store, self.log_level),
+                max_tasks_per_child=1,
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        _run_shard, shard, input_path, span, parts[shard], self.agent_factory,
+                        query_field, self.concurrency, self.chunk_size, self.max_rate,
+                    )
+                    for shard, span in enumerate(spans)
+                ]
+                metrics = get_telemetry().metrics
+                for shard, future in enumerate(futures):
+                    try:
+                        stats, snapshot = future.result()
+                    except Exception:
+                        logger.exception(f"Shard {shard} ({input_path} bytes {spans[shard]}) failed")
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    report.shards.append(stats)
+                    metrics.merge(snapshot)
+
+            with open(output_path, "wb") as out:
+                for part in parts:
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out)
+        finally:
+            for part in parts:
+                with suppress(FileNotFoundError):
+                    os.remove(part)
+        report.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Processed {report.queries} queries ({report.failed} failed) "
+            f"in {report.elapsed:.1f}s, {report.throughput:.1f} queries/s"
+        )
+        return report
+
+
+def main() -> None:
+    """Run a sharded bulk job from the command line."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process a JSON Lines file of support queries in parallel shards")
+    parser.add_argument("input", help="JSON Lines file with one query object per line")
+    parser.add_argument("output", help="JSON Lines file for the tickets")
+    parser.add_argument("--query-field", default="query")
+    parser.add_argument("--shards", type=int, default=None, help="Worker processes (defaults to CPU count)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Queries in flight per shard")
+    parser.add_argument("--max-rate", type=float, default=None, help="Queries per second across all shards")
+    args = parser.parse_args()
+
+    runner = ShardedRunner(args.shards, concurrency=args.concurrency, max_rate=args.max_rate)
+    runner.run(args.input, args.output, args.query_field)
+
+
+if __name__ == "__main__":
+    main()
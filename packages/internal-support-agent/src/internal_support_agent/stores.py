@@ -0,0 +1,104 @@
+"""
+Internal Support Agent - Backing Stores
+
+Knowledge base, service status and document lookups used by the support
+tools. Stores are created once per process and reach the tools through
+`SupportDeps`, so they are pooled across queries instead of being opened per
+tool call. The document retriever memory-maps the index configured by
+`RETRIEVAL__INDEX_PATH` and is absent when that is unset.
+"""
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Protocol
+
+from pydantic_ai_shared.config import get_settings
+
+if TYPE_CHECKING:
+    from pydantic_ai_shared.retrieval import Retriever
+
+
+class KnowledgeBase(Protocol):
+    """Searchable help articles."""
+
+    async def search(self, query: str, limit: int) -> List[Dict[str, str]]: ...
+
+
+class StatusPage(Protocol):
+    """Current status of internal services."""
+
+    async def status(self, service: str) -> Dict[str, str]: ...
+
+
+@dataclass
+class InMemoryKnowledgeBase:
+    """Knowledge base seeded with a few common articles, matched by keyword."""
+    articles: List[Dict[str, str]] = field(default_factory=lambda: [
+        {"title": "Reset your password", "category": "IT",
+         "body": "Use the self-service portal; password resets take effect within 5 minutes."},
+        {"title": "Request access to a shared drive", "category": "IT",
+         "body": "Ask the drive owner to approve an access request in the IT portal."},
+        {"title": "Remote work policy", "category": "HR",
+         "body": "Employees may work remotely up to three days a week with manager approval."},
+        {"title": "Submit an expense report", "category": "Finance",
+         "body": "File expenses in the finance portal within 30 days with receipts attached."},
+    ])
+
+    async def search(self, query: str, limit: int) -> List[Dict[str, str]]:
+        words = {word for word in query.lower().split() if len(word) > 2}
+        scored = []
+        for article in self.articles:
+            text = f"{article['title']} {article['body']}".lower()
+            score = sum(1 for word in words if word in text)
+            if score:
+                scored.append((score, article))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [dict(article) for _, article in scored[:limit]]
+
+
+@dataclass
+class InMemoryStatusPage:
+    """Status page where every known service is operational unless marked otherwise."""
+    services: Dict[str, str] = field(default_factory=lambda: {
+        "email": "operational",
+        "vpn": "operational",
+        "shared_drive": "operational",
+        "sso": "operational",
+    })
+
+    async def status(self, service: str) -> Dict[str, str]:
+        name = service.strip().lower().replace(" ", "_")
+        return {"service": name, "status": self.services.get(name, "unknown")}
+
+
+def _document_retriever() -> Optional["Retriever"]:
+    if get_settings().retrieval.index_path is None:
+        return None
+    from pydantic_ai_shared.retrieval import get_retriever  # numpy loads only when retrieval is configured
+
+    return get_retriever()
+
+
+@dataclass
+class SupportStores:
+    """The backing stores the support tools use."""
+    knowledge_base: KnowledgeBase = field(default_factory=InMemoryKnowledgeBase)
+    status_page: StatusPage = field(default_factory=InMemoryStatusPage)
+    documents: Optional["Retriever"] = field(default_factory=_document_retriever)
+    # Key of cached tool results: stores sharing a scope must hold the same data.
+    # Each instance gets its own, except the process-wide stores, which share
+    # "default" so a shared tool cache (e.g. Redis) serves every worker.
+    scope: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+_stores: Optional[SupportStores] = None
+_stores_lock = threading.Lock()
+
+
+def get_support_stores() -> SupportStores:
+    """Get the process-wide stores, creating them on first use."""
+    global _stores
+    with _stores_lock:
+        if _stores is None:
+            _stores = SupportStores(scope="default")
+        return _stores
@@ -0,0 +1,55 @@
+"""
+Internal Support Agent - Tools
+
+Knowledge base articles and indexed documents change rarely, so searches are
+cached for minutes; service status is cached only briefly. All read from the
+pooled stores on `SupportDeps.stores`, whose scope is part of each cache key
+so results never cross between differently backed agents.
+"""
+from typing import Any, Dict, List
+
+from pydantic_ai import RunContext
+
+from pydantic_ai_shared.tools import ToolSet
+
+from .agent import SupportDeps
+
+SUPPORT_TOOLS: ToolSet[SupportDeps] = ToolSet("support")
+
+
+def _stores_scope(ctx: RunContext[SupportDeps]) -> str:
+    return ctx.deps.stores.scope
+
+
+@SUPPORT_TOOLS.tool(ttl=300, timeout=5, vary=_stores_scope)
+async def search_knowledge_base(ctx: RunContext[SupportDeps], query: str, limit: int = 3) -> List[Dict[str, str]]:
+    """Search the internal knowledge base for articles that may resolve the issue.
+
+    Args:
+        query: Keywords describing the issue
+        limit: Maximum number of articles to return
+    """
+    return await ctx.deps.stores.knowledge_base.search(query, limit)
+
+
+@SUPPORT_TOOLS.tool(ttl=15, timeout=2, vary=_stores_scope)
+async def check_service_status(ctx: RunContext[SupportDeps], service: str) -> Dict[str, str]:
+    """Check whether an internal service (email, vpn, shared_drive, sso) is having an outage.
+
+    Args:
+        service: The service name
+    """
+    return await ctx.deps.stores.status_page.status(service)
+
+
+@SUPPORT_TOOLS.tool(ttl=300, timeout=5, vary=_stores_scope)
+async def search_documents(ctx: RunContext[SupportDeps], query: str) -> List[Dict[str, Any]]:
+    """Search internal documentation (HR policies, benefits, time off, IT guides) for relevant passages.
+
+    Args:
+        query: The question or keywords to look up
+    """
+    retriever = ctx.deps.stores.documents
+    if retriever is None:
+        return []
+    return [hit.model_dump() for hit in await retriever.asearch(query)]
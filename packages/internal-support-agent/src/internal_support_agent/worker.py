@@ -0,0 +1,596 @@
+"""
+Internal Support Agent - Queue Worker
+
+Pulls employee queries from a durable job queue, turns them into support
+tickets with `InternalSupportAgent`, and persists the tickets in batches.
+
+Claimed jobs stay invisible for a visibility timeout; a worker that crashes
+mid-job simply lets the timeout lapse and another worker picks the job up.
+Failed jobs are retried with exponential backoff (the shared `retry`
+settings) and moved to a dead state after the last attempt. Completion is
+conditional on the claim still being current, so a job re-claimed after a
+timeout never produces two tickets.
+
+Queries are queued at the priority `PriorityClassifier` predicts for them, and
+claims serve the most urgent visible job first. Waiting promotes a job by one
+level every `aging` seconds, so low-priority work still runs under sustained
+urgent load. The worker reports queue wait time per priority class.
+
+`PostgresJobQueue` uses a `FOR UPDATE SKIP LOCKED` table and COPY for bulk
+writes (requires the `postgres` extra); `InMemoryJobQueue` has the same
+semantics for tests and benchmarks. Because a job's aged rank is
+`level - waited / aging`, ordering by rank is the same as ordering by
+`visible_at + level * aging`. The Postgres queue stores that as
+`effective_at`, so claims read a partial index instead of sorting every
+pending job.
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Deque, Dict, List, Optional, Protocol, Sequence, Set, Tuple
+
+from loguru import logger
+
+from pydantic_ai_shared.config import get_settings
+from pydantic_ai_shared.loadtest import percentile
+from pydantic_ai_shared.ratelimit import backoff_delay
+from pydantic_ai_shared.telemetry import get_telemetry
+
+from .agent import InternalSupportAgent, SupportTicket
+from .priority import DEFAULT_PRIORITY, PRIORITY_LEVELS, PRIORITY_RANK, PriorityClassifier
+
+TICKET_COLUMNS = tuple(SupportTicket.model_fields)
+WAIT_SAMPLES = 10_000  # recent queue waits kept per priority for percentiles
+NO_AGING_GAP = 1e9  # seconds between levels when aging is off (about 30 years)
+
+
+@dataclass
+class Job:
+    """A claimed query."""
+    id: int
+    query: str
+    attempts: int  # including the current one; doubles as the claim token
+    priority: str = DEFAULT_PRIORITY  # predicted before the model call
+    waited: float = 0.0  # seconds the job was visible before this claim
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt, following the shared retry settings.
+
+    Args:
+        attempts: Attempts made so far
+
+    Returns:
+        Delay in seconds, with jitter
+    """
+    return backoff_delay(attempts)
+
+
+class JobQueue(Protocol):
+    """Durable queue of support queries and store of resulting tickets."""
+
+    async def setup(self) -> None:
+        """Create any tables or structures the queue needs."""
+        ...
+
+    async def enqueue(self, queries: Sequence[str], priorities: Optional[Sequence[str]] = None) -> int:
+        """Add queries to the queue, returning how many were added.
+
+        Priorities default to the queue classifier's prediction.
+        """
+        ...
+
+    async def claim(self, limit: int) -> List[Job]:
+        """Claim up to `limit` visible jobs, most urgent (after aging) first,
+        hiding them for the visibility timeout."""
+        ...
+
+    async def complete(self, results: Sequence[Tuple[Job, SupportTicket]]) -> int:
+        """Store tickets and mark their jobs done; stale claims are ignored.
+
+        Returns:
+            Number of tickets stored
+        """
+        ...
+
+    async def fail(self, job: Job, error: str) -> None:
+        """Schedule a retry, or mark the job dead after the last attempt."""
+        ...
+
+    async def pending(self) -> int:
+        """Number of jobs not yet done or dead, including invisible ones."""
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+@dataclass
+class _Entry:
+    query: str
+    priority: str = DEFAULT_PRIORITY
+    attempts: int = 0
+    visible_at: float = 0.0
+    status: str = "pending"  # pending, done, dead
+    error: Optional[str] = None
+
+
+class InMemoryJobQueue:
+    """In-process job queue with the same semantics as `PostgresJobQueue`."""
+
+    def __init__(
+        self,
+        visibility_timeout: float = 300.0,
+        max_attempts: Optional[int] = None,
+        aging: float = 30.0,
+        classifier: Optional[PriorityClassifier] = None,
+    ):
+        """Initialize the queue.
+
+        Args:
+            visibility_timeout: Seconds a claimed job stays hidden
+            max_attempts: Attempts before a job is dead (defaults to `retry.max_attempts`)
+            aging: Seconds of waiting that promote a job by one priority level
+            classifier: Predicts the priority of enqueued queries
+        """
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts or get_settings().retry.max_attempts
+        self.aging = aging
+        self.classifier = classifier or PriorityClassifier()
+        self.entries: Dict[int, _Entry] = {}
+        self.tickets: List[Tuple[int, SupportTicket]] = []
+        self._ids = itertools.count(1)
+        # One heap of (visible_at, job id) per priority level; the head of a
+        # level is its longest-waiting job, so aging only needs the heads
+        self._levels: List[List[Tuple[float, int]]] = [[] for _ in PRIORITY_LEVELS]
+        self._pending = 0
+
+    async def setup(self) -> None:
+        return None
+
+    async def enqueue(self, queries: Sequence[str], priorities: Optional[Sequence[str]] = None) -> int:
+        now = time.monotonic()
+        for query, priority in zip(queries, self.classifier.classify_many(queries, priorities), strict=True):
+            job_id = next(self._ids)
+            self.entries[job_id] = _Entry(query, priority, visible_at=now)
+            heapq.heappush(self._levels[PRIORITY_RANK[priority]], (now, job_id))
+        self._pending += len(queries)
+        return len(queries)
+
+    def _push(self, job_id: int, entry: _Entry) -> None:
+        heapq.heappush(self._levels[PRIORITY_RANK[entry.priority]], (entry.visible_at, job_id))
+
+    def _next_level(self, now: float) -> Optional[int]:
+        """The level whose visible head has the best aged rank."""
+        best, best_rank = None, None
+        for level, heap in enumerate(self._levels):
+            while heap and not self._is_live(*heap[0]):
+                heapq.heappop(heap)  # superseded heap entry
+            if not heap or heap[0][0] > now:
+                continue
+            waited = now - heap[0][0]
+            rank = level - waited / self.aging if self.aging > 0 else level
+            if best_rank is None or rank < best_rank:
+                best, best_rank = level, rank
+        return best
+
+    def _is_live(self, visible_at: float, job_id: int) -> bool:
+        entry = self.entries[job_id]
+        return entry.status == "pending" and entry.visible_at == visible_at
+
+    async def claim(self, limit: int) -> List[Job]:
+        now = time.monotonic()
+        jobs = []
+        while len(jobs) < limit:
+            level = self._next_level(now)
+            if level is None:
+                break
+            visible_at, job_id = heapq.heappop(self._levels[level])
+            entry = self.entries[job_id]
+            entry.attempts += 1
+            entry.visible_at = now + self.visibility_timeout
+            self._push(job_id, entry)
+            jobs.append(Job(job_id, entry.query, entry.attempts, entry.priority, now - visible_at))
+        return jobs
+
+    def _is_current(self, job: Job) -> bool:
+        entry = self.entries.get(job.id)
+        return entry is not None and entry.status == "pending" and entry.attempts == job.attempts
+
+    async def complete(self, results: Sequence[Tuple[Job, SupportTicket]]) -> int:
+        stored = 0
+        for job, ticket in results:
+            if not self._is_current(job):
+                continue
+            self.entries[job.id].status = "done"
+            self.tickets.append((job.id, ticket))
+            self._pending -= 1
+            stored += 1
+        return stored
+
+    async def fail(self, job: Job, error: str) -> None:
+        if not self._is_current(job):
+            return
+        entry = self.entries[job.id]
+        entry.error = error
+        if entry.attempts >= self.max_attempts:
+            entry.status = "dead"
+            self._pending -= 1
+            return
+        entry.visible_at = time.monotonic() + retry_delay(entry.attempts)
+        self._push(job.id, entry)
+
+    async def pending(self) -> int:
+        return self._pending
+
+    async def close(self) -> None:
+        return None
+
+
+class PostgresJobQueue:
+    """Job queue backed by a Postgres table claimed with `FOR UPDATE SKIP LOCKED`."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS support_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            query TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            visible_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            last_error TEXT,
+            enqueued_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            priority SMALLINT NOT NULL DEFAULT 2
+        );
+        ALTER TABLE support_jobs ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 2;
+        -- visible_at plus `aging` seconds per priority level: claim order, independent of now()
+        ALTER TABLE support_jobs ADD COLUMN IF NOT EXISTS effective_at TIMESTAMPTZ;
+        DROP INDEX IF EXISTS support_jobs_visible;
+        CREATE INDEX IF NOT EXISTS support_jobs_effective
+            ON support_jobs (effective_at) WHERE status = 'pending';
+        CREATE TABLE IF NOT EXISTS support_tickets (
+            id BIGSERIAL PRIMARY KEY,
+            job_id BIGINT NOT NULL REFERENCES support_jobs (id),
+            title TEXT NOT NULL,
+            category TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            description TEXT NOT NULL,
+            suggested_action TEXT NOT NULL,
+            requires_escalation BOOLEAN NOT NULL,
+            confidence DOUBLE PRECISION,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        visibility_timeout: float = 300.0,
+        max_attempts: Optional[int] = None,
+        aging: float = 30.0,
+        classifier: Optional[PriorityClassifier] = None,
+    ):
+        """Initialize the queue.
+
+        Operations share one connection; claims and writes are batched, so
+        it is rarely the bottleneck. Run several workers for more.
+
+        Args:
+            dsn: Postgres connection string (defaults to the shared `database_url` setting)
+            visibility_timeout: Seconds a claimed job stays hidden
+            max_attempts: Attempts before a job is dead (defaults to `retry.max_attempts`)
+            aging: Seconds of waiting that promote a job by one priority level
+            classifier: Predicts the priority of enqueued queries
+        """
+        try:
+            import psycopg  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("PostgresJobQueue requires the postgres extra: pip install psycopg") from exc
+        settings = get_settings()
+        self.dsn = dsn or settings.database_url
+        if not self.dsn:
+            raise ValueError("PostgresJobQueue needs a dsn or the DATABASE_URL setting")
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts or settings.retry.max_attempts
+        self.aging = aging
+        self.classifier = classifier or PriorityClassifier()
+        # Seconds of `effective_at` between adjacent levels; keep `aging` the same
+        # for every worker on a table, as stored jobs keep the gap they were written with
+        self._level_gap = aging if aging > 0 else NO_AGING_GAP
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def _connection(self):
+        if self._conn is None:
+            import psycopg
+
+            self._conn = await psycopg.AsyncConnection.connect(self.dsn)
+        return self._conn
+
+    async def setup(self) -> None:
+        async with self._lock:
+            conn = await self._connection()
+            async with conn.transaction():
+                await conn.execute(self.SCHEMA)
+                # Jobs queued before effective_at existed
+                await conn.execute(
+                    "UPDATE support_jobs SET effective_at = visible_at + make_interval(secs => priority * %s) "
+                    "WHERE effective_at IS NULL AND status = 'pending'",
+                    (self._level_gap,),
+                )
+
+    async def enqueue(self, queries: Sequence[str], priorities: Optional[Sequence[str]] = None) -> int:
+        priorities = self.classifier.classify_many(queries, priorities)
+        async with self._lock:
+            conn = await self._connection()
+            async with conn.transaction(), conn.cursor() as cur:
+                # now() is the transaction start, which the visible_at default also uses
+                await cur.execute("SELECT now()")
+                (now,) = await cur.fetchone()
+                async with cur.copy("COPY support_jobs (query, priority, effective_at) FROM STDIN") as copy:
+                    for query, priority in zip(queries, priorities, strict=True):
+                        rank = PRIORITY_RANK[priority]
+                        await copy.write_row((query, rank, now + timedelta(seconds=rank * self._level_gap)))
+        return len(queries)
+
+    async def claim(self, limit: int) -> List[Job]:
+        async with self._lock:
+            conn = await self._connection()
+            async with conn.transaction():
+                # effective_at order is aged-rank order and is served by the partial index
+                cur = await conn.execute(
+                    """
+                    WITH claimed AS (
+                        SELECT id, visible_at AS was_visible_at FROM support_jobs
+                        WHERE status = 'pending' AND visible_at <= now()
+                        ORDER BY effective_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE support_jobs
+                    SET attempts = attempts + 1,
+                        visible_at = now() + make_interval(secs => %s),
+                        effective_at = now() + make_interval(secs => %s + support_jobs.priority * %s)
+                    FROM claimed
+                    WHERE support_jobs.id = claimed.id
+                    RETURNING support_jobs.id, query, attempts, priority,
+                              extract(epoch FROM now() - claimed.was_visible_at)
+                    """,
+                    (limit, self.visibility_timeout, self.visibility_timeout, self._level_gap),
+                )
+                return [
+                    Job(job_id, query, attempts, PRIORITY_LEVELS[rank], float(waited))
+                    for job_id, query, attempts, rank, waited in await cur.fetchall()
+                ]
+
+    async def complete(self, results: Sequence[Tuple[Job, SupportTicket]]) -> int:
+        if not results:
+            return 0
+        async with self._lock:
+            conn = await self._connection()
+            async with conn.transaction(), conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    UPDATE support_jobs SET status = 'done', last_error = NULL
+                    WHERE status = 'pending'
+                      AND (id, attempts) IN (SELECT * FROM unnest(%s::bigint[], %s::integer[]))
+                    RETURNING id
+                    """,
+                    ([job.id for job, _ in results], [job.attempts for job, _ in results]),
+                )
+                current = {row[0] for row in await cur.fetchall()}
+                async with cur.copy(
+                    f"COPY support_tickets (job_id, {', '.join(TICKET_COLUMNS)}) FROM STDIN"
+                ) as copy:
+                    for job, ticket in results:
+                        if job.id in current:
+                            await copy.write_row((job.id, *(getattr(ticket, c) for c in TICKET_COLUMNS)))
+        return len(current)
+
+    async def fail(self, job: Job, error: str) -> None:
+        delay = retry_delay(job.attempts)
+        async with self._lock:
+            conn = await self._connection()
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    UPDATE support_jobs
+                    SET last_error = %s,
+                        status = CASE WHEN attempts >= %s THEN 'dead' ELSE 'pending' END,
+                        visible_at = now() + make_interval(secs => %s),
+                        effective_at = now() + make_interval(secs => %s + priority * %s)
+                    WHERE id = %s AND attempts = %s AND status = 'pending'
+                    """,
+                    (error, self.max_attempts, delay, delay, self._level_gap, job.id, job.attempts),
+                )
+
+    async def pending(self) -> int:
+        async with self._lock:
+            conn = await self._connection()
+            async with conn.transaction():
+                cur = await conn.execute("SELECT count(*) FROM support_jobs WHERE status = 'pending'")
+                return (await cur.fetchone())[0]
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+@dataclass
+class WorkerStats:
+    """Counters for a worker run."""
+    claimed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    stored: int = 0
+    flushes: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+    waits: Dict[str, Deque[float]] = field(default_factory=dict)  # recent queue waits by priority
+
+    @property
+    def jobs_per_second(self) -> float:
+        return self.succeeded / self.elapsed if self.elapsed else 0.0
+
+    def record_wait(self, job: Job) -> None:
+        self.waits.setdefault(job.priority, deque(maxlen=WAIT_SAMPLES)).append(job.waited)
+
+    def wait_percentile(self, priority: str, pct: float) -> float:
+        """Queue wait in seconds at percentile `pct` for one priority class (0 if none seen)."""
+        return percentile(sorted(self.waits.get(priority, ())), pct)
+
+    def wait_summary(self) -> str:
+        return ", ".join(
+            f"{priority} p50 {self.wait_percentile(priority, 50):.2f}s p95 {self.wait_percentile(priority, 95):.2f}s"
+            for priority in PRIORITY_LEVELS
+            if priority in self.waits
+        )
+
+
+class SupportWorker:
+    """Processes queued queries with a bounded pool of concurrent agent calls."""
+
+    def __init__(
+        self,
+        agent: InternalSupportAgent,
+        queue: JobQueue,
+        concurrency: Optional[int] = None,
+        flush_size: int = 100,
+        flush_interval: float = 0.5,
+        poll_interval: float = 0.2,
+    ):
+        """Initialize the worker.
+
+        Args:
+            agent: The support agent that creates tickets
+            queue: Job queue to pull from and store tickets in
+            concurrency: Maximum jobs in flight (defaults to the shared `concurrency.batch` setting)
+            flush_size: Tickets buffered before a bulk insert
+            flush_interval: Maximum seconds a ticket waits in the buffer
+            poll_interval: Seconds between claims while the queue is empty
+        """
+        if concurrency is None:
+            concurrency = get_settings().concurrency.batch
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.agent = agent
+        self.queue = queue
+        self.concurrency = concurrency
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop claiming new jobs; `run` returns once in-flight jobs are stored."""
+        self._stopping.set()
+
+    async def _process(self, job: Job) -> Tuple[Job, Optional[SupportTicket], Optional[Exception]]:
+        try:
+            return job, await self.agent.process_query(job.query), None
+        except Exception as exc:
+            return job, None, exc
+
+    async def run(self, drain: bool = False) -> WorkerStats:
+        """Process jobs until stopped.
+
+        Args:
+            drain: Return once the queue has no pending jobs left
+
+        Returns:
+            Counters for this run
+        """
+        stats = WorkerStats()
+        in_flight: Set[asyncio.Task] = set()
+        buffer: List[Tuple[Job, SupportTicket]] = []
+        last_flush = time.monotonic()
+
+        async def flush() -> None:
+            nonlocal buffer, last_flush
+            if buffer:
+                stats.stored += await self.queue.complete(buffer)
+                stats.flushes += 1
+                buffer = []
+            last_flush = time.monotonic()
+
+        telemetry = get_telemetry()
+        logger.info(f"Support worker started (concurrency={self.concurrency})")
+        try:
+            while True:
+                if not self._stopping.is_set() and len(in_flight) < self.concurrency:
+                    jobs = await self.queue.claim(self.concurrency - len(in_flight))
+                    stats.claimed += len(jobs)
+                    for job in jobs:
+                        stats.record_wait(job)
+                        telemetry.metrics.observe(
+                            "agent_queue_wait_seconds", job.waited, queue="support", priority=job.priority
+                        )
+                    in_flight.update(asyncio.create_task(self._process(job)) for job in jobs)
+                    if drain and not in_flight:
+                        await flush()
+                        if await self.queue.pending() == 0:
+                            break
+                elif self._stopping.is_set() and not in_flight:
+                    break
+
+                if in_flight:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        job, ticket, error = task.result()
+                        if error is None:
+                            stats.succeeded += 1
+                            buffer.append((job, ticket))
+                        else:
+                            stats.failed += 1
+                            logger.warning(f"Job {job.id} attempt {job.attempts} failed: {error!r}")
+                            await self.queue.fail(job, repr(error))
+                elif not self._stopping.is_set():
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if len(buffer) >= self.flush_size or time.monotonic() - last_flush >= self.flush_interval:
+                    await flush()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await flush()
+
+        stats.elapsed = time.perf_counter() - stats.started_at
+        logger.info(
+            f"Support worker stopped: {stats.succeeded} tickets, {stats.failed} failures, "
+            f"{stats.jobs_per_second:.1f} jobs/s"
+        )
+        if stats.waits:
+            logger.info(f"Queue wait by priority: {stats.wait_summary()}")
+        return stats
+
+
+async def main():
+    """Run a worker against the Postgres queue from the command line."""
+    parser = argparse.ArgumentParser(description="Support ticket queue worker")
+    parser.add_argument("--dsn", default=None, help="Postgres DSN (defaults to DATABASE_URL)")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--visibility-timeout", type=float, default=300.0)
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+
+    queue = PostgresJobQueue(args.dsn, visibility_timeout=args.visibility_timeout)
+    await queue.setup()
+    worker = SupportWorker(InternalSupportAgent(), queue, concurrency=args.concurrency)
+    try:
+        await worker.run(drain=args.drain)
+    finally:
+        await queue.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
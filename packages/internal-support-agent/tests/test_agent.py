@@ -8,6 +8,19 @@ def test_basic():
     assert hasattr(agent, "InternalSupportAgent")
 
 
+def test_import_and_construction_defer_pydantic_ai():
+    """Test that pydantic_ai loads on first run, not at import or construction."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; from internal_support_agent import InternalSupportAgent; "
+        "InternalSupportAgent(model='openai:gpt-4'); print('pydantic_ai' in sys.modules)"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "False"
+
+
 @pytest.mark.asyncio
 async def test_support_ticket_structure():
     """Test that SupportTicket model works."""
@@ -25,3 +38,188 @@ async def test_support_ticket_structure():
     assert ticket.title == "Test Ticket"
     assert ticket.priority == "high"
     assert ticket.requires_escalation is True
+
+
+def _ticket_model(fail_on: str = ""):
+    """Build a stub model that returns a ticket titled after the query."""
+    from pydantic_ai.messages import ModelResponse, ToolCallPart
+    from pydantic_ai.models.function import FunctionModel
+
+    async def respond(messages, info):
+        query = messages[-1].parts[-1].content
+        if query == fail_on:
+            raise RuntimeError("provider error")
+        return ModelResponse(parts=[ToolCallPart(
+            info.result_tools[0].name,
+            {
+                "title": query,
+                "category": "IT",
+                "priority": "low",
+                "description": query,
+                "suggested_action": "none",
+            },
+        )])
+
+    return FunctionModel(respond)
+
+
+@pytest.mark.asyncio
+async def test_process_batch_preserves_order_and_isolates_failures():
+    """Test that a failing query does not sink the rest of the batch."""
+    from internal_support_agent.agent import InternalSupportAgent
+
+    agent = InternalSupportAgent(model=_ticket_model(fail_on="bad"))
+    results = await agent.process_batch(["one", "bad", "three"], max_concurrency=2)
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert results[0].ticket.title == "one"
+    assert not results[1].ok
+    assert isinstance(results[1].error, RuntimeError)
+    assert results[2].ticket.title == "three"
+
+
+@pytest.mark.asyncio
+async def test_process_batch_rejects_invalid_concurrency():
+    """Test that max_concurrency must be positive."""
+    from internal_support_agent.agent import InternalSupportAgent
+
+    agent = InternalSupportAgent(model=_ticket_model())
+    with pytest.raises(ValueError):
+        await agent.process_batch(["one"], max_concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_process_query_uses_cache():
+    """Test that repeated queries are served from the cache."""
+    from internal_support_agent.agent import InternalSupportAgent, SupportTicket
+    from pydantic_ai_shared.cache import ResponseCache
+
+    cache = ResponseCache(SupportTicket)
+    agent = InternalSupportAgent(model=_ticket_model(), cache=cache)
+
+    first = await agent.process_query("VPN down")
+    second = await agent.process_query("vpn down!")
+
+    assert second == first
+    assert cache.stats.exact_hits == 1
+    assert cache.stats.misses == 1
+
+
+def test_ticket_is_confident():
+    """Test the fast-tier acceptance heuristics."""
+    from internal_support_agent.agent import SupportTicket, ticket_is_confident
+
+    ticket = SupportTicket(
+        title="VPN", category="IT", priority="low", description="", suggested_action="",
+        confidence=0.95,
+    )
+    assert ticket_is_confident(ticket, threshold=0.7)
+    assert not ticket_is_confident(ticket.model_copy(update={"confidence": 0.5}), threshold=0.7)
+    assert not ticket_is_confident(ticket.model_copy(update={"category": "Facilities"}), threshold=0.7)
+    assert not ticket_is_confident(ticket.model_copy(update={"requires_escalation": True}), threshold=0.7)
+    assert not ticket_is_confident(ticket.model_copy(update={"confidence": None}), threshold=0.7)
+
+
+def test_ticket_router_routes_are_priced():
+    """Test that the default ticket router tracks cost on both tiers."""
+    from internal_support_agent.agent import build_ticket_router
+
+    router = build_ticket_router()
+    assert all(route.input_cost_per_mtok > 0 and route.output_cost_per_mtok > 0 for route in router.routes)
+
+
+def test_ticket_category_and_priority_are_canonical():
+    """Test that tickets only hold the canonical category and priority spellings."""
+    from pydantic import ValidationError
+
+    from internal_support_agent.agent import SupportTicket
+
+    ticket = SupportTicket.model_validate_json(
+        '{"title": "VPN", "category": "it", "priority": "Urgent ", "description": "", "suggested_action": ""}'
+    )
+    assert (ticket.category, ticket.priority) == ("IT", "urgent")
+    with pytest.raises(ValidationError):
+        SupportTicket(title="VPN", category="Facilities", priority="low", description="", suggested_action="")
+
+
+@pytest.mark.asyncio
+async def test_process_query_coalesces_identical_concurrent_queries():
+    """Test that concurrent duplicates share one model call."""
+    import asyncio
+
+    from internal_support_agent.agent import InternalSupportAgent
+    from pydantic_ai_shared.stub import StubModel
+
+    model = StubModel(latency=0.01)
+    agent = InternalSupportAgent(model=model)
+    tickets = await asyncio.gather(
+        *(agent.process_query("VPN is down!") for _ in range(5)),
+        agent.process_query("vpn is down"),
+        agent.process_query("Printer jammed"),
+    )
+
+    assert model.requests == 2
+    assert all(ticket is tickets[0] for ticket in tickets[:6])
+    assert agent.inflight.stats.coalesced == 5
+
+
+@pytest.mark.asyncio
+async def test_process_query_hedges_slow_primary():
+    """Test that a slow primary model is hedged on the secondary."""
+    from internal_support_agent.agent import SUPPORT_SYSTEM_PROMPT, InternalSupportAgent, SupportTicket
+    from pydantic_ai_shared.hedging import HedgedRunner
+    from pydantic_ai_shared.stub import StubModel
+
+    slow, fast = StubModel(latency=5.0), StubModel(latency=0.01)
+    hedger = HedgedRunner(
+        slow, fast, result_type=SupportTicket, system_prompt=SUPPORT_SYSTEM_PROMPT, max_delay=0.05,
+    )
+    agent = InternalSupportAgent(model=slow, hedger=hedger)
+
+    ticket = await agent.process_query("Laptop will not boot")
+
+    assert isinstance(ticket, SupportTicket)
+    assert hedger.stats.hedged == 1
+    assert hedger.stats.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_search_documents_tool_reads_the_retriever(tmp_path):
+    """Test that the documentation tool returns indexed passages."""
+    from types import SimpleNamespace
+
+    pytest.importorskip("numpy")
+    from pydantic_ai_shared.retrieval import Retriever
+
+    from internal_support_agent.agent import SupportDeps
+    from internal_support_agent.stores import SupportStores
+    from internal_support_agent.tools import search_documents
+
+    retriever = Retriever(tmp_path)
+    retriever.ingest({"handbook/time-off.md": "# Time off\n\nEmployees get 25 days of paid vacation per year."})
+    ctx = SimpleNamespace(deps=SupportDeps(stores=SupportStores(documents=retriever)))
+
+    hits = await search_documents(ctx, "how many vacation days do I get")
+    assert hits[0]["source"] == "handbook/time-off.md"
+    assert await search_documents(SimpleNamespace(deps=SupportDeps(stores=SupportStores(documents=None))), "x") == []
+
+
+@pytest.mark.asyncio
+async def test_cached_tool_results_stay_with_their_stores():
+    """Test that agents backed by different stores never share cached tool results."""
+    from types import SimpleNamespace
+
+    from internal_support_agent.agent import SupportDeps
+    from internal_support_agent.stores import InMemoryKnowledgeBase, SupportStores
+    from internal_support_agent.tools import SUPPORT_TOOLS
+
+    search = {tool.name: tool for tool in SUPPORT_TOOLS.tools()}["search_knowledge_base"].function
+    tenant_a = SupportStores(knowledge_base=InMemoryKnowledgeBase([{"title": "Printer A", "body": "floor 1"}]))
+    tenant_b = SupportStores(knowledge_base=InMemoryKnowledgeBase([{"title": "Printer B", "body": "floor 2"}]))
+
+    first = await search(SimpleNamespace(deps=SupportDeps(stores=tenant_a)), "printer")
+    second = await search(SimpleNamespace(deps=SupportDeps(stores=tenant_b)), "printer")
+    again = await search(SimpleNamespace(deps=SupportDeps(stores=tenant_a)), "printer")
+
+    assert first[0]["title"] == again[0]["title"] == "Printer A"
+    assert second[0]["title"] == "Printer B"
@@ -0,0 +1,77 @@
+"""
+Tests for the sharded bulk runner.
+"""
+import json
+from itertools import pairwise
+
+from internal_support_agent.agent import InternalSupportAgent
+from internal_support_agent.sharded import ShardedRunner, partition
+from pydantic_ai_shared.stub import StubModel
+
+
+def stub_agent() -> InternalSupportAgent:
+    return InternalSupportAgent(model=StubModel())
+
+
+def write_queries(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"query": f"query {i}"}) + "\n")
+
+
+def test_partition_splits_on_line_boundaries(tmp_path):
+    """Test that byte ranges cover the file exactly and never split a line."""
+    path = tmp_path / "queries.jsonl"
+    write_queries(path, 101)
+    data = path.read_bytes()
+
+    spans = partition(str(path), 4)
+
+    assert len(spans) == 4
+    assert spans[0][0] == 0 and spans[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in pairwise(spans))
+    assert sum(data[start:end].count(b"\n") for start, end in spans) == 101
+    assert all(data[start - 1:start] == b"\n" for start, _ in spans[1:])
+
+
+def test_runner_processes_every_query_in_input_order(tmp_path):
+    """Test that shards' outputs are stitched together in input order."""
+    source, output = tmp_path / "queries.jsonl", tmp_path / "tickets.jsonl"
+    write_queries(source, 40)
+
+    report = ShardedRunner(shards=2, agent_factory=stub_agent, concurrency=8).run(str(source), str(output))
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["query"] for row in rows] == [f"query {i}" for i in range(40)]
+    assert all(row["ticket"] is not None for row in rows)
+    assert report.queries == 40 and report.failed == 0
+    assert len(report.shards) == 2
+
+
+def test_malformed_lines_become_error_rows(tmp_path):
+    """Test that a bad input line is reported in place and leaves no part files behind."""
+    source, output = tmp_path / "queries.jsonl", tmp_path / "tickets.jsonl"
+    source.write_text('{"query": "first"}\nnot json\n{"other": 1}\n{"query": "last"}\n', encoding="utf-8")
+
+    report = ShardedRunner(shards=2, agent_factory=stub_agent, chunk_size=1).run(str(source), str(output))
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["error"] is None for row in rows] == [True, False, False, True]
+    assert rows[1]["query"] == "not json"
+    assert (report.queries, report.failed) == (4, 2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["queries.jsonl", "tickets.jsonl"]
+
+
+def test_max_rate_is_shared_across_shards(tmp_path):
+    """Test that all shards together stay within one queries-per-second budget."""
+    source, output = tmp_path / "queries.jsonl", tmp_path / "tickets.jsonl"
+    write_queries(source, 40)
+
+    # A 10/s budget with a one-second burst needs 3s for 40 queries; two
+    # separate per-shard budgets would finish their 20 each in about 1s
+    report = ShardedRunner(shards=2, agent_factory=stub_agent, concurrency=8, max_rate=10).run(
+        str(source), str(output)
+    )
+
+    assert report.queries == 40 and report.failed == 0
+    assert report.elapsed >= 3.0
@@ -0,0 +1,189 @@
+"""Tests for the support queue worker."""
+import asyncio
+import os
+
+import pytest
+
+from internal_support_agent.agent import InternalSupportAgent, SupportTicket
+from internal_support_agent.priority import PriorityClassifier
+from internal_support_agent.worker import InMemoryJobQueue, PostgresJobQueue, SupportWorker
+from pydantic_ai_shared.stub import StubModel
+
+
+def _ticket(title: str = "t") -> SupportTicket:
+    return SupportTicket(title=title, category="IT", priority="low", description="", suggested_action="")
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Retry failed jobs without waiting."""
+    monkeypatch.setattr("internal_support_agent.worker.retry_delay", lambda attempts: 0.0)
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_queue_in_batches():
+    """Test that a draining worker processes every job and stores tickets in batches."""
+    queue = InMemoryJobQueue()
+    await queue.enqueue([f"query {i}" for i in range(25)])
+    worker = SupportWorker(InternalSupportAgent(model=StubModel()), queue, concurrency=4, flush_size=10)
+
+    stats = await worker.run(drain=True)
+
+    assert stats.succeeded == stats.stored == 25
+    assert stats.flushes >= 3
+    assert sorted(job_id for job_id, _ in queue.tickets) == list(range(1, 26))
+    assert await queue.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_retried_then_dead_lettered():
+    """Test that failures are retried up to max_attempts, then marked dead."""
+    queue = InMemoryJobQueue(max_attempts=2)
+    await queue.enqueue(["flaky", "broken"])
+    calls = {"flaky": 0, "broken": 0}
+
+    class Agent:
+        """Agent that fails "broken" always and "flaky" once."""
+
+        async def process_query(self, query):
+            calls[query] += 1
+            if query == "broken" or calls[query] == 1:
+                raise RuntimeError("provider error")
+            return _ticket(query)
+
+    stats = await SupportWorker(Agent(), queue, concurrency=2, poll_interval=0.01).run(drain=True)
+
+    assert calls == {"flaky": 2, "broken": 2}
+    assert [ticket.title for _, ticket in queue.tickets] == ["flaky"]
+    assert queue.entries[2].status == "dead"
+    assert "provider error" in queue.entries[2].error
+    assert stats.failed == 3
+
+
+@pytest.mark.asyncio
+async def test_visibility_timeout_reclaims_and_stale_claims_are_ignored():
+    """Test that expired claims are handed out again and the stale claimant can't complete."""
+    queue = InMemoryJobQueue(visibility_timeout=0.01)
+    await queue.enqueue(["vpn down"])
+
+    [first] = await queue.claim(10)
+    assert await queue.claim(10) == []
+    await asyncio.sleep(0.02)
+    [second] = await queue.claim(10)
+    assert second.attempts == 2
+
+    assert await queue.complete([(first, _ticket("stale"))]) == 0
+    assert await queue.complete([(second, _ticket("fresh"))]) == 1
+    assert [ticket.title for _, ticket in queue.tickets] == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_stop_finishes_in_flight_jobs():
+    """Test that stop lets claimed jobs finish and leaves the rest queued."""
+    queue = InMemoryJobQueue()
+    await queue.enqueue([f"query {i}" for i in range(10)])
+    worker = SupportWorker(InternalSupportAgent(model=StubModel(latency=0.05)), queue, concurrency=3)
+
+    run = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.01)
+    worker.stop()
+    stats = await run
+
+    assert stats.claimed == stats.stored == 3
+    assert await queue.pending() == 7
+
+
+def test_classifier_predicts_priority():
+    """Test the keyword priority classifier on typical queries."""
+    classifier = PriorityClassifier()
+
+    assert classifier.classify("The shared drive is down for everyone") == "urgent"
+    assert classifier.classify("I can't access the CRM and need it in 1 hour") == "urgent"
+    assert classifier.classify("Cannot log in to the VPN") == "high"
+    assert classifier.classify("What is our policy on remote work?") == "low"
+    assert classifier.classify("Need a new badge") == "medium"
+
+
+def test_classifier_rejects_unknown_default():
+    """Test that a misspelled default priority fails when the classifier is built."""
+    with pytest.raises(ValueError, match="Unknown priority 'meduim'"):
+        PriorityClassifier(default="meduim")
+
+
+@pytest.mark.asyncio
+async def test_claims_serve_urgent_first_and_age_waiting_jobs(monkeypatch):
+    """Test that claims follow priority and promote jobs that have waited long."""
+    clock = [100.0]
+    monkeypatch.setattr("internal_support_agent.worker.time.monotonic", lambda: clock[0])
+    queue = InMemoryJobQueue(aging=10)
+    await queue.enqueue(["old question"], priorities=["low"])
+    clock[0] += 5
+    await queue.enqueue(["routine", "outage"], priorities=["medium", "urgent"])
+
+    # low has aged half a level: still behind urgent and medium
+    assert [job.query for job in await queue.claim(3)] == ["outage", "routine", "old question"]
+
+    await queue.enqueue(["old question 2"], priorities=["low"])
+    clock[0] += 25  # 2.5 levels of aging turn low (3) into 0.5, ahead of fresh high (1)
+    await queue.enqueue(["fresh"], priorities=["high"])
+    [first, second] = await queue.claim(2)
+    assert (first.query, first.priority, first.waited) == ("old question 2", "low", 25)
+    assert second.query == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_worker_reports_wait_per_priority():
+    """Test that queue wait is reported per priority, urgent shortest."""
+    queue = InMemoryJobQueue()
+    await queue.enqueue(["VPN is down", "Policy on remote work?", "Need a new badge"] * 4)
+    worker = SupportWorker(InternalSupportAgent(model=StubModel(latency=0.01)), queue, concurrency=1)
+
+    stats = await worker.run(drain=True)
+
+    assert {priority: len(waits) for priority, waits in stats.waits.items()} == {"urgent": 4, "medium": 4, "low": 4}
+    assert stats.wait_percentile("urgent", 95) < stats.wait_percentile("medium", 50)
+    assert stats.wait_percentile("medium", 95) < stats.wait_percentile("low", 50)
+    assert "urgent p50" in stats.wait_summary()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set")
+async def test_postgres_queue_round_trip():
+    """Test enqueue, claim and complete against a real Postgres."""
+    pytest.importorskip("psycopg")
+    queue = PostgresJobQueue(os.environ["TEST_DATABASE_URL"], visibility_timeout=30)
+    await queue.setup()
+    try:
+        before = await queue.pending()
+        await queue.enqueue(["postgres query"])
+        jobs = await queue.claim(1000)
+        assert any(job.query == "postgres query" for job in jobs)
+        assert await queue.complete([(job, _ticket(job.query)) for job in jobs]) == len(jobs)
+        assert await queue.pending() == before + 1 - len(jobs)
+    finally:
+        await queue.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set")
+async def test_postgres_queue_claims_by_aged_priority():
+    """Test that Postgres claims follow effective_at: urgent first, long-waiting jobs promoted."""
+    pytest.importorskip("psycopg")
+    queue = PostgresJobQueue(os.environ["TEST_DATABASE_URL"], visibility_timeout=30, aging=10)
+    await queue.setup()
+    try:
+        await queue.claim(100_000)  # clear jobs left by other tests
+        await queue.enqueue(["old low"], priorities=["low"])
+        conn = await queue._connection()
+        async with conn.transaction():
+            await conn.execute(
+                "UPDATE support_jobs SET visible_at = visible_at - interval '25 seconds', "
+                "effective_at = effective_at - interval '25 seconds' WHERE query = 'old low' AND status = 'pending'"
+            )
+        await queue.enqueue(["fresh high", "fresh urgent"], priorities=["high", "urgent"])
+
+        jobs = await queue.claim(3)
+        assert [job.query for job in jobs] == ["fresh urgent", "old low", "fresh high"]
+        await queue.complete([(job, _ticket(job.query)) for job in jobs])
+    finally:
+        await queue.close()
@@ -0,0 +1,65 @@
+"""
+Benchmark: tail latency with and without hedged requests
+
+Runs the same structured-output workload against long-tailed stub models,
+once on the primary alone and once through `HedgedRunner`, and reports the
+latency percentiles, hedge rate and estimated savings.
+
+Usage:
+    uv run python benchmarks/bench_hedging.py --requests 2000 --sigma 0.8
+"""
+import argparse
+import asyncio
+
+from pydantic import BaseModel
+from pydantic_ai import Agent
+
+from pydantic_ai_shared.hedging import HedgedRunner
+from pydantic_ai_shared.loadtest import LoadReport, run_load
+from pydantic_ai_shared.stub import StubModel, lognormal_latency
+
+
+class Ticket(BaseModel):
+    title: str
+    category: str
+    priority: str
+
+
+async def run(requests: int, median: float, sigma: float, percentile: float, concurrency: int) -> None:
+    """Compare the primary alone against hedged runs and print a report."""
+    def model(seed: int) -> StubModel:
+        return StubModel(latency=lognormal_latency(median, sigma), seed=seed)
+
+    inputs = [f"Request {index}: laptop will not connect to the VPN" for index in range(requests)]
+    direct = Agent(model(1), result_type=Ticket)
+    hedger = HedgedRunner(
+        model(2), model(3), result_type=Ticket, percentile=percentile, min_delay=0.0, max_delay=median * 10,
+    )
+
+    print(LoadReport.header())
+    baseline = await run_load("primary only", lambda prompt: direct.run(prompt), inputs, concurrency, False)
+    print(baseline.format_row())
+    hedged = await run_load(f"hedged at p{percentile:g}", hedger.run, inputs, concurrency, False)
+    print(hedged.format_row())
+
+    stats = hedger.stats
+    print(
+        f"\nhedge rate {stats.hedge_rate:.1%}, secondary won {stats.hedge_wins}/{stats.hedged}, "
+        f"estimated saving {stats.mean_saving * 1000:.1f} ms per win, "
+        f"p99 {baseline.p99 * 1000:.1f} -> {hedged.p99 * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--median", type=float, default=0.02, help="median model latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.8, help="log-normal spread of model latency")
+    parser.add_argument("--percentile", type=float, default=95.0, help="primary latency percentile to hedge at")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.median, args.sigma, args.percentile, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
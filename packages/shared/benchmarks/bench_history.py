@@ -0,0 +1,85 @@
+"""
+Benchmark: chat latency and request size vs. conversation length
+
+Plays a long conversation against the local stub model, whose latency grows
+with prompt size, comparing full history resent every turn against the
+token-budgeted `ContextWindow`.
+
+Usage:
+    uv run python benchmarks/bench_history.py --turns 400 --budget 3000
+"""
+import argparse
+import asyncio
+import time
+
+from pydantic_ai import Agent
+
+from pydantic_ai_shared.examples.chatbot import CHATBOT_SYSTEM_PROMPT, ChatbotExample
+from pydantic_ai_shared.history import (
+    MESSAGE_OVERHEAD_TOKENS,
+    ContextWindow,
+    InMemoryHistoryStore,
+    agent_summarizer,
+    estimate_tokens,
+)
+from pydantic_ai_shared.stub import StubModel
+
+REPLY = "Here is a reasonably detailed answer that covers the question in a few sentences. " * 3
+
+
+def stub(prefill_rate: float) -> StubModel:
+    return StubModel(latency=0.005, prefill_tokens_per_second=prefill_rate, text=REPLY)
+
+
+async def run(turns: int, budget: int, prefill_rate: float, report_every: int) -> None:
+    """Play `turns` turns with both strategies and print latency per checkpoint."""
+    full_agent = Agent(stub(prefill_rate), system_prompt=CHATBOT_SYSTEM_PROMPT)
+    window = ContextWindow(
+        InMemoryHistoryStore(),
+        token_budget=budget,
+        summarizer=agent_summarizer(Agent(stub(prefill_rate))),
+        summarize_threshold=budget // 3,
+    )
+    chatbot = ChatbotExample(model=stub(prefill_rate), history=window)
+
+    print(f"{'turn':>6} {'full ms':>10} {'full tokens':>12} {'window ms':>10} {'window tokens':>14}")
+    history = []
+    full_tokens = 0
+    for turn in range(1, turns + 1):
+        message = f"Question number {turn}: can you explain the next step of the rollout plan?"
+
+        start = time.perf_counter()
+        result = await full_agent.run(message, message_history=history)
+        full_ms = (time.perf_counter() - start) * 1000
+        history = result.all_messages()
+
+        sent_before = window.stats.history_tokens
+        start = time.perf_counter()
+        await chatbot.chat(message, session_id="bench")
+        window_ms = (time.perf_counter() - start) * 1000
+        window_tokens = window.stats.history_tokens - sent_before
+
+        if turn % report_every == 0:
+            print(f"{turn:>6} {full_ms:>10.1f} {full_tokens:>12} {window_ms:>10.1f} {window_tokens:>14}")
+        # History tokens the full strategy sends on the next turn
+        full_tokens += estimate_tokens(message) + estimate_tokens(REPLY) + 2 * MESSAGE_OVERHEAD_TOKENS
+
+    print(f"\nsummarizations: {window.stats.summarizations} ({window.stats.summarized_messages} messages folded)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=3000, help="Context window token budget")
+    parser.add_argument("--prefill-rate", type=float, default=200_000, help="Stub prompt tokens processed per second")
+    parser.add_argument("--report-every", type=int, default=25)
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    asyncio.run(run(args.turns, args.budget, args.prefill_rate, args.report_every))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: retrieval query latency vs. corpus size
+
+Fills a `VectorIndex` with clustered synthetic embeddings (embedding cost is
+excluded) and reports, per corpus size, the build time, zero-copy open time,
+and p50/p99 query latency of exact and IVF search together with IVF recall@k
+against the exact results.
+
+Usage:
+    uv run python benchmarks/bench_retrieval.py --sizes 10000 100000 1000000 --dim 384
+"""
+import argparse
+import tempfile
+import time
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from pydantic_ai_shared.loadtest import percentile
+from pydantic_ai_shared.retrieval import VectorIndex, _normalize
+
+
+def synthetic(centers: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around topic `centers`, like real document embeddings."""
+    noise = rng.standard_normal((count, centers.shape[1]), dtype=np.float32) * 1.5 / np.sqrt(centers.shape[1])
+    return _normalize(centers[rng.integers(0, len(centers), count)] + noise)
+
+
+def timed_queries(
+    index: VectorIndex, queries: np.ndarray, k: int, nprobe: Optional[int]
+) -> Tuple[float, float, List[Set[int]]]:
+    """p50 and p99 latency in ms and the result rows of each query."""
+    latencies: List[float] = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append({row for row, _ in index.search(query, k, nprobe)})
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return percentile(latencies, 50), percentile(latencies, 99), results
+
+
+def run(sizes: List[int], dim: int, queries: int, k: int, nprobe: int, batch: int) -> None:
+    rng = np.random.default_rng(0)
+    print(
+        f"{'chunks':>9} {'build s':>8} {'ivf s':>7} {'open ms':>8} "
+        f"{'exact p50':>10} {'exact p99':>10} {'ivf p50':>8} {'ivf p99':>8} {f'recall@{k}':>9}"
+    )
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            index = VectorIndex(directory, dim)
+            centers = _normalize(rng.standard_normal((max(16, size // 500), dim), dtype=np.float32))
+            start = time.perf_counter()
+            for offset in range(0, size, batch):
+                rows = min(batch, size - offset)
+                index.add(f"doc-{offset}", str(offset), ["chunk"] * rows, synthetic(centers, rows, rng))
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            index.build_ivf()
+            ivf_build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = VectorIndex(directory, dim)
+            open_ms = (time.perf_counter() - start) * 1000
+
+            sample = synthetic(centers, queries, rng)
+            timed_queries(index, sample[:5], k, None)  # warm the page cache
+            exact_p50, exact_p99, exact = timed_queries(index, sample, k, None)
+            ivf_p50, ivf_p99, approximate = timed_queries(index, sample, k, nprobe)
+            recall = sum(len(a & e) for a, e in zip(approximate, exact, strict=True)) / sum(len(e) for e in exact)
+            print(
+                f"{size:>9} {build:>8.1f} {ivf_build:>7.1f} {open_ms:>8.2f} "
+                f"{exact_p50:>10.2f} {exact_p99:>10.2f} {ivf_p50:>8.2f} {ivf_p99:>8.2f} {recall:>9.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=10_000, help="rows appended per document")
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.queries, args.k, args.nprobe, args.batch)
+
+
+if __name__ == "__main__":
+    main()
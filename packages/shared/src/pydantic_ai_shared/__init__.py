@@ -4,5 +4,79 @@ Pydantic AI Shared - Common utilities and code
 This package contains shared utilities and common code used across
 multiple Pydantic AI projects in the monorepo.
 """
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
 __version__ = "0.1.0"
+
+# Public names and their submodules; submodules load on first attribute
+# access (PEP 562), so importing the package itself is nearly free
+_EXPORTS = {
+    "ResponseCache": "cache",
+    "cache_key": "cache",
+    "namespace_key": "cache",
+    "Settings": "config",
+    "get_default_model": "config",
+    "get_settings": "config",
+    "HedgedRunner": "hedging",
+    "ContextWindow": "history",
+    "ResultMemo": "memo",
+    "AgentRegistry": "registry",
+    "get_registry": "registry",
+    "CascadeRouter": "routing",
+    "Route": "routing",
+    "AgentService": "service",
+    "SingleFlight": "singleflight",
+    "configure_telemetry": "telemetry",
+    "instrument": "telemetry",
+    "span": "telemetry",
+    "ToolSet": "tools",
+}
+
+__all__ = [
+    "ResponseCache",
+    "cache_key",
+    "namespace_key",
+    "Settings",
+    "get_default_model",
+    "get_settings",
+    "HedgedRunner",
+    "ContextWindow",
+    "ResultMemo",
+    "AgentRegistry",
+    "get_registry",
+    "CascadeRouter",
+    "Route",
+    "AgentService",
+    "SingleFlight",
+    "configure_telemetry",
+    "instrument",
+    "span",
+    "ToolSet",
+]
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache, cache_key, namespace_key
+    from .config import Settings, get_default_model, get_settings
+    from .hedging import HedgedRunner
+    from .history import ContextWindow
+    from .memo import ResultMemo
+    from .registry import AgentRegistry, get_registry
+    from .routing import CascadeRouter, Route
+    from .service import AgentService
+    from .singleflight import SingleFlight
+    from .telemetry import configure_telemetry, instrument, span
+    from .tools import ToolSet
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_EXPORTS})
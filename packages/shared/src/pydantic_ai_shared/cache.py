@@ -0,0 +1,400 @@
+"""
+Response caching for agent results.
+
+Provides a tiered cache that sits in front of `Agent.run`:
+
+- an exact-match tier keyed by a hash of the normalized query text, held in an
+  in-process LRU with TTL;
+- an optional shared tier (e.g. Redis) so several workers reuse each other's results;
+- an optional semantic tier that returns a cached result when a query's embedding
+  is similar enough to a previously answered one.
+
+Entries are scoped by the model that produced them, so switching models never
+serves the previous model's answers.
+"""
+import hashlib
+import inspect
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Protocol, Sequence, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel, ValidationError
+from loguru import logger
+
+from .config import get_settings
+from .memo import model_id
+from .telemetry import current_span, instrument
+
+ResultT = TypeVar("ResultT", bound=BaseModel)
+
+Embedder = Callable[[str], Union[Sequence[float], Awaitable[Sequence[float]]]]
+
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize text so trivially different queries share a cache entry.
+
+    Args:
+        text: Raw query text
+
+    Returns:
+        Lower-cased text with punctuation removed and whitespace collapsed
+    """
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(text: str, namespace: str = "") -> str:
+    """Build a stable cache key for a query.
+
+    Args:
+        text: Raw query text
+        namespace: Prefix separating caches for different agents or models
+
+    Returns:
+        Hex digest of the namespaced, normalized query
+    """
+    digest = hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}" if namespace else digest
+
+
+def namespace_key(*parts: str) -> str:
+    """Build a namespace from several components without ambiguity.
+
+    The components are JSON-encoded before hashing, so ("a|b", "c") and
+    ("a", "b|c") never share a namespace.
+
+    Args:
+        *parts: Namespace components, e.g. role and department
+
+    Returns:
+        Hex digest of the encoded components
+    """
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class CacheBackend(Protocol):
+    """Storage tier holding serialized results by key."""
+
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class LRUCache:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 3600.0):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl: Default time-to-live in seconds (None keeps entries until evicted)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class RedisCache:
+    """Shared cache tier backed by Redis (requires the `redis` extra)."""
+
+    def __init__(self, url: str = "redis://localhost:6379", ttl: Optional[float] = 3600.0, client=None):
+        """Initialize the Redis tier.
+
+        Args:
+            url: Redis connection URL (ignored when `client` is given)
+            ttl: Default time-to-live in seconds
+            client: An existing `redis.asyncio.Redis` client to reuse
+        """
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as exc:
+                raise ImportError("RedisCache requires the 'redis' extra: pip install redis") from exc
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        await self.client.set(key, value, ex=int(ttl) if ttl is not None else None)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two vectors (0.0 if either is all zeros)."""
+    dot = sum(x * y for x, y in zip(a, b, strict=True))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SemanticCache:
+    """Similarity tier returning a stored value for sufficiently similar queries."""
+
+    def __init__(self, embedder: Embedder, threshold: float = 0.92, maxsize: int = 1024, recent: int = 256):
+        """Initialize the semantic tier.
+
+        Args:
+            embedder: Sync or async callable mapping text to an embedding vector
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of stored embeddings (oldest evicted first)
+            recent: Embeddings of recently looked-up queries kept so that storing
+                the answer to a miss doesn't embed the query again
+        """
+        self.embedder = embedder
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._entries: List[Tuple[str, Sequence[float], str]] = []
+        self._recent: "OrderedDict[str, Sequence[float]]" = OrderedDict()
+        self._recent_size = recent
+
+    async def embed(self, text: str) -> Sequence[float]:
+        normalized = normalize_query(text)
+        vector = self._recent.get(normalized)
+        if vector is not None:
+            self._recent.move_to_end(normalized)
+            return vector
+        vector = self.embedder(normalized)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        self._recent[normalized] = vector
+        while len(self._recent) > self._recent_size:
+            self._recent.popitem(last=False)
+        return vector
+
+    async def get(self, text: str, scope: str = "") -> Optional[str]:
+        """Find the stored value whose query is most similar to `text` within `scope`."""
+        if not any(entry_scope == scope for entry_scope, _, _ in self._entries):
+            return None
+        vector = await self.embed(text)
+        best_score, best_value = max(
+            (
+                (cosine_similarity(vector, stored), value)
+                for entry_scope, stored, value in self._entries
+                if entry_scope == scope
+            ),
+            key=lambda pair: pair[0],
+        )
+        return best_value if best_score >= self.threshold else None
+
+    async def set(self, text: str, value: str, scope: str = "") -> None:
+        """Store `value` under the embedding of `text` within `scope`."""
+        self._entries.append((scope, await self.embed(text), value))
+        if len(self._entries) > self.maxsize:
+            del self._entries[: len(self._entries) - self.maxsize]
+
+    async def discard(self, value: str) -> None:
+        """Drop every entry holding `value`."""
+        self._entries = [entry for entry in self._entries if entry[2] != value]
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a `ResponseCache`."""
+    exact_hits: int = 0
+    shared_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.exact_hits + self.shared_hits + self.semantic_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache(Generic[ResultT]):
+    """Tiered cache of validated agent results."""
+
+    def __init__(
+        self,
+        result_type: Type[ResultT],
+        local: Optional[LRUCache] = None,
+        shared: Optional[CacheBackend] = None,
+        semantic: Optional[SemanticCache] = None,
+        namespace: str = "",
+    ):
+        """Initialize the cache.
+
+        Args:
+            result_type: Pydantic model stored in the cache
+            local: In-process exact-match tier (a default LRU is created if omitted)
+            shared: Optional cross-worker exact-match tier, e.g. `RedisCache`
+            semantic: Optional embedding-similarity tier
+            namespace: Key prefix, e.g. the agent and model name
+        """
+        self.result_type = result_type
+        self.local = local if local is not None else LRUCache()
+        self.shared = shared
+        self.semantic = semantic
+        self.namespace = namespace or result_type.__name__
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_settings(
+        cls,
+        result_type: Type[ResultT],
+        namespace: str = "",
+        embedder: Optional[Embedder] = None,
+    ) -> "ResponseCache[ResultT]":
+        """Build a cache whose tiers follow the shared cache settings.
+
+        Args:
+            result_type: Pydantic model stored in the cache
+            namespace: Key prefix, e.g. the agent and model name
+            embedder: Enables the semantic tier when given
+
+        Returns:
+            A configured cache
+        """
+        settings = get_settings()
+        cache_settings = settings.cache
+        shared = None
+        if cache_settings.backend == "redis":
+            shared = RedisCache(settings.redis_url, ttl=cache_settings.ttl)
+        semantic = None
+        if embedder is not None:
+            semantic = SemanticCache(embedder, cache_settings.semantic_threshold, cache_settings.maxsize)
+        return cls(
+            result_type,
+            local=LRUCache(cache_settings.maxsize, cache_settings.ttl),
+            shared=shared,
+            semantic=semantic,
+            namespace=namespace,
+        )
+
+    def scope(self, model: Any = None) -> str:
+        """Namespace of the entries produced by `model` (the bare namespace if None).
+
+        Args:
+            model: Model name like 'openai:gpt-4' or a pydantic-ai `Model`
+        """
+        return self.namespace if model is None else f"{self.namespace}:{model_id(model)}"
+
+    @instrument("cache.get")
+    async def get(self, query: str, model: Any = None) -> Optional[ResultT]:
+        """Look a query up in each tier, fastest first.
+
+        Args:
+            query: Raw query text
+            model: Model whose answers to look up (see `scope`)
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        scope = self.scope(model)
+        key = cache_key(query, scope)
+
+        payload = await self.local.get(key)
+        if payload is not None:
+            result = await self._validate(payload, "local", lambda: self.local.delete(key))
+            if result is not None:
+                self.stats.exact_hits += 1
+                current_span().set_attribute("cache.tier", "local")
+                return result
+
+        if self.shared is not None:
+            try:
+                payload = await self.shared.get(key)
+            except Exception as exc:
+                logger.warning(f"Shared cache read failed: {exc!r}")
+                payload = None
+            if payload is not None:
+                result = await self._validate(payload, "shared", lambda: self.shared.delete(key))
+                if result is not None:
+                    self.stats.shared_hits += 1
+                    current_span().set_attribute("cache.tier", "shared")
+                    await self.local.set(key, payload)
+                    return result
+
+        if self.semantic is not None:
+            payload = await self.semantic.get(query, scope)
+            if payload is not None:
+                result = await self._validate(payload, "semantic", lambda: self.semantic.discard(payload))
+                if result is not None:
+                    self.stats.semantic_hits += 1
+                    current_span().set_attribute("cache.tier", "semantic")
+                    return result
+
+        self.stats.misses += 1
+        current_span().set_attribute("cache.tier", "miss")
+        return None
+
+    async def _validate(
+        self, payload: str, tier: str, drop: Callable[[], Awaitable[None]]
+    ) -> Optional[ResultT]:
+        """Validate a cached payload; entries written under an older schema are dropped and count as misses."""
+        try:
+            return self.result_type.model_validate_json(payload)
+        except ValidationError:
+            logger.warning(f"Dropping {tier} cache entry that no longer validates as {self.result_type.__name__}")
+            try:
+                await drop()
+            except Exception as exc:
+                logger.warning(f"Dropping {tier} cache entry failed: {exc!r}")
+            return None
+
+    async def set(self, query: str, result: ResultT, model: Any = None) -> None:
+        """Store a result in every configured tier.
+
+        Args:
+            query: Raw query text
+            result: Validated result to cache
+            model: Model that produced the result (see `scope`)
+        """
+        scope = self.scope(model)
+        key = cache_key(query, scope)
+        payload = result.model_dump_json()
+        await self.local.set(key, payload)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, payload)
+            except Exception as exc:
+                logger.warning(f"Shared cache write failed: {exc!r}")
+        if self.semantic is not None:
+            await self.semantic.set(query, payload, scope)
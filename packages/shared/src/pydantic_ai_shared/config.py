@@ -1,26 +1,392 @@
 """
 Shared configuration for all projects.
+
+Settings are loaded once from the environment and `.env`, validated, frozen and
+memoized. Agents read tuning knobs through `get_settings()` at the point of use,
+so `reload_settings()` (or SIGHUP, see `install_reload_handler`) takes effect
+without restarting workers.
+
+Nested values use `__` as the delimiter, e.g. `PROVIDERS__OPENAI__MODEL`,
+`CACHE__BACKEND=redis` or `CONCURRENCY__BATCH=32`.
 """
 import os
+import signal
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from loguru import logger
+
+if TYPE_CHECKING:
+    import asyncio
 
 # Default model configurations
 DEFAULT_MODEL_OPENAI = "openai:gpt-4"
 DEFAULT_MODEL_ANTHROPIC = "anthropic:claude-3-5-sonnet-20241022"
+DEFAULT_FAST_MODEL_OPENAI = "openai:gpt-4o-mini"
+DEFAULT_FAST_MODEL_ANTHROPIC = "anthropic:claude-3-5-haiku-latest"
+
+
+class ProviderSettings(BaseModel):
+    """Per-provider model and limits."""
+    model_config = ConfigDict(frozen=True)
+
+    model: str
+    fast_model: Optional[str] = None  # cheap first tier for cascading routers
+    timeout: float = 600.0
+    max_concurrency: int = Field(default=16, ge=1)
+    rpm: Optional[int] = Field(default=None, ge=1)  # requests per minute per model (None learns from headers)
+    tpm: Optional[int] = Field(default=None, ge=1)  # tokens per minute per model
+    prompt_cache: bool = True  # mark the static prompt prefix cacheable where the provider needs it
+
+
+class ConcurrencySettings(BaseModel):
+    """Default concurrency limits of the agent entry points."""
+    model_config = ConfigDict(frozen=True)
+
+    batch: int = Field(default=10, ge=1)
+    workflow_agent: int = Field(default=4, ge=1)
+    extraction: int = Field(default=8, ge=1)
+
+
+class HttpSettings(BaseModel):
+    """Connection pool settings for provider HTTP clients."""
+    model_config = ConfigDict(frozen=True)
+
+    max_connections: int = Field(default=100, ge=1)
+    max_keepalive_connections: int = Field(default=20, ge=0)
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 5.0
+
+
+class CacheSettings(BaseModel):
+    """Response cache backends and sizing."""
+    model_config = ConfigDict(frozen=True)
+
+    backend: Literal["memory", "redis"] = "memory"
+    ttl: Optional[float] = 3600.0
+    maxsize: int = Field(default=1024, ge=1)
+    semantic_threshold: float = Field(default=0.92, ge=0.0, le=1.0)
+
+
+class MemoSettings(BaseModel):
+    """Persistent memoization of agent results across runs."""
+    model_config = ConfigDict(frozen=True)
+
+    path: Optional[str] = None  # SQLite file; None disables memoization
+    max_bytes: int = Field(default=256 * 1024 * 1024, ge=1)  # stored results kept before LRU eviction
+    mode: Literal["readwrite", "replay"] = "readwrite"  # replay never calls the model and fails on a miss
+
+
+class ModelPrice(BaseModel):
+    """List price of a model in USD per million tokens."""
+    model_config = ConfigDict(frozen=True)
+
+    input_per_mtok: float = Field(default=0.0, ge=0.0)
+    output_per_mtok: float = Field(default=0.0, ge=0.0)
+
+
+def _default_prices() -> Dict[str, ModelPrice]:
+    return {
+        DEFAULT_MODEL_OPENAI: ModelPrice(input_per_mtok=30.0, output_per_mtok=60.0),
+        DEFAULT_FAST_MODEL_OPENAI: ModelPrice(input_per_mtok=0.15, output_per_mtok=0.6),
+        DEFAULT_MODEL_ANTHROPIC: ModelPrice(input_per_mtok=3.0, output_per_mtok=15.0),
+        DEFAULT_FAST_MODEL_ANTHROPIC: ModelPrice(input_per_mtok=0.8, output_per_mtok=4.0),
+    }
+
+
+class RoutingSettings(BaseModel):
+    """Thresholds and model prices for cascading model routers."""
+    model_config = ConfigDict(frozen=True)
+
+    confidence_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    # Per-route cost accounting, keyed by model name, e.g.
+    # ROUTING__PRICES='{"openai:gpt-4o": {"input_per_mtok": 2.5, "output_per_mtok": 10}}'
+    prices: Dict[str, ModelPrice] = Field(default_factory=_default_prices)
+
+
+class HedgeSettings(BaseModel):
+    """Hedged requests against a secondary provider."""
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = False
+    percentile: float = Field(default=95.0, gt=0.0, lt=100.0)  # hedge calls slower than this primary latency
+    min_delay: float = Field(default=0.5, ge=0.0)
+    max_delay: float = Field(default=10.0, ge=0.0)  # also used until enough latencies are observed
+    window: int = Field(default=500, ge=1)  # recent primary latencies kept per runner
+    min_samples: int = Field(default=20, ge=1)
+
+
+class CircuitBreakerSettings(BaseModel):
+    """When to stop sending requests to a failing provider."""
+    model_config = ConfigDict(frozen=True)
+
+    failure_rate: float = Field(default=0.5, gt=0.0, le=1.0)
+    min_calls: int = Field(default=10, ge=1)  # calls in the window before the rate counts
+    window: float = Field(default=60.0, gt=0.0)  # seconds
+    cooldown: float = Field(default=30.0, ge=0.0)  # seconds open before a trial call
+
+
+class ToolSettings(BaseModel):
+    """Execution defaults for agent tools."""
+    model_config = ConfigDict(frozen=True)
+
+    timeout: float = Field(default=10.0, gt=0.0)  # seconds per tool call
+    cache_size: int = Field(default=1024, ge=1)  # cached results per tool set
+
+
+class RetrievalSettings(BaseModel):
+    """Document retrieval index and chunking."""
+    model_config = ConfigDict(frozen=True)
+
+    index_path: Optional[str] = None  # directory of the vector index; None disables retrieval
+    dim: int = Field(default=384, ge=8)  # embedding dimensions of the default hashing embedder
+    chunk_chars: int = Field(default=1200, ge=100)
+    chunk_overlap: int = Field(default=200, ge=0)
+    top_k: int = Field(default=4, ge=1)
+    nprobe: int = Field(default=8, ge=1)  # IVF lists scanned per query
+
+
+class ServiceSettings(BaseModel):
+    """HTTP service limits and process layout."""
+    model_config = ConfigDict(frozen=True)
+
+    host: str = "127.0.0.1"
+    port: int = Field(default=8000, ge=0)
+    workers: int = Field(default=1, ge=1)  # pre-forked processes sharing the listening socket
+    max_in_flight: int = Field(default=64, ge=1)  # concurrent requests per endpoint and process
+    max_queue: int = Field(default=128, ge=0)  # requests waiting for a slot before 429s
+    queue_timeout: float = Field(default=5.0, gt=0.0)  # seconds a request may wait for a slot
+    drain_timeout: float = Field(default=30.0, ge=0.0)  # seconds in-flight requests get on shutdown
+    max_body_bytes: int = Field(default=1_000_000, ge=1)
+
+
+class RetrySettings(BaseModel):
+    """Retry policy for provider calls."""
+    model_config = ConfigDict(frozen=True)
+
+    max_attempts: int = Field(default=3, ge=1)
+    initial_backoff: float = 0.5
+    max_backoff: float = 30.0
+    jitter: float = Field(default=0.5, ge=0.0, le=1.0)
+
+
+class RateLimitSettings(BaseModel):
+    """Provider rate limiting."""
+    model_config = ConfigDict(frozen=True)
+
+    backend: Literal["memory", "redis"] = "memory"  # redis shares one budget across workers
+    output_tokens_estimate: int = Field(default=512, ge=0)  # reserved per request, settled from usage
+
+
+class HistorySettings(BaseModel):
+    """Chat session storage and context window sizing."""
+    model_config = ConfigDict(frozen=True)
+
+    backend: Literal["memory", "redis"] = "memory"
+    ttl: Optional[float] = 7 * 24 * 3600.0
+    max_sessions: int = Field(default=10_000, ge=1)
+    token_budget: int = Field(default=3000, ge=1)  # history tokens sent per request
+    summarize_threshold: int = Field(default=1000, ge=1)  # overflow tokens folded into the summary at once
+
+
+class TelemetrySettings(BaseModel):
+    """Spans and metrics for agent entry points."""
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = False
+    otel: bool = False  # mirror spans to the OpenTelemetry tracer provider
+    prometheus_port: Optional[int] = None  # serve /metrics on this port
+
+
+def _default_providers() -> Dict[str, ProviderSettings]:
+    return {
+        "openai": ProviderSettings(model=DEFAULT_MODEL_OPENAI, fast_model=DEFAULT_FAST_MODEL_OPENAI),
+        "anthropic": ProviderSettings(model=DEFAULT_MODEL_ANTHROPIC, fast_model=DEFAULT_FAST_MODEL_ANTHROPIC),
+    }
+
+
+class Settings(BaseSettings):
+    """Typed, frozen settings for every package in the workspace."""
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_nested_delimiter="__",
+        extra="ignore",
+        frozen=True,
+    )
+
+    providers: Dict[str, ProviderSettings] = Field(default_factory=_default_providers)
+    concurrency: ConcurrencySettings = ConcurrencySettings()
+    http: HttpSettings = HttpSettings()
+    cache: CacheSettings = CacheSettings()
+    memo: MemoSettings = MemoSettings()
+    retry: RetrySettings = RetrySettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    routing: RoutingSettings = RoutingSettings()
+    hedge: HedgeSettings = HedgeSettings()
+    circuit_breaker: CircuitBreakerSettings = CircuitBreakerSettings()
+    tools: ToolSettings = ToolSettings()
+    retrieval: RetrievalSettings = RetrievalSettings()
+    service: ServiceSettings = ServiceSettings()
+    history: HistorySettings = HistorySettings()
+    telemetry: TelemetrySettings = TelemetrySettings()
+    redis_url: str = "redis://localhost:6379"
+    database_url: Optional[str] = None
+    log_level: str = "INFO"
+
+    # Legacy overrides, kept so existing DEFAULT_MODEL_<PROVIDER> variables keep working
+    default_model_openai: Optional[str] = None
+    default_model_anthropic: Optional[str] = None
+
+    @field_validator("providers", mode="before")
+    @classmethod
+    def _merge_default_providers(cls, value: Dict) -> Dict:
+        """Apply partial overrides (e.g. only PROVIDERS__OPENAI__TIMEOUT) on top of the defaults."""
+        merged = {name: provider.model_dump() for name, provider in _default_providers().items()}
+        for name, overrides in (value or {}).items():
+            if isinstance(overrides, BaseModel):
+                overrides = overrides.model_dump()
+            merged.setdefault(name, {}).update(overrides)
+        return merged
+
+    def provider(self, name: str) -> ProviderSettings:
+        """Get settings for a provider.
+
+        Args:
+            name: Provider name, e.g. 'openai'
+
+        Returns:
+            The provider's settings, including legacy model overrides
+
+        Raises:
+            ValueError: If the provider is not configured
+        """
+        if name not in self.providers:
+            raise ValueError(f"Unknown provider: {name}")
+        settings = self.providers[name]
+        legacy_model = getattr(self, f"default_model_{name}", None)
+        if legacy_model:
+            return settings.model_copy(update={"model": legacy_model})
+        return settings
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+_reload_callbacks: List[Callable[[Settings], None]] = []
+
+
+def get_settings() -> Settings:
+    """Get the process-wide settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
+
+
+def on_reload(callback: Callable[[Settings], None]) -> Callable[[Settings], None]:
+    """Call `callback` with the new settings after every successful reload.
+
+    For state built once from settings, such as connection pools.
+    """
+    _reload_callbacks.append(callback)
+    return callback
+
+
+def reload_settings() -> Settings:
+    """Reload settings from the environment and `.env`.
+
+    Invalid settings are logged and the previous settings are kept.
+
+    Returns:
+        The settings now in effect
+    """
+    global _settings
+    try:
+        new_settings = Settings()
+    except Exception as exc:
+        logger.error(f"Settings reload failed, keeping previous settings: {exc}")
+        return get_settings()
+    with _settings_lock:
+        _settings = new_settings
+    for callback in list(_reload_callbacks):
+        try:
+            callback(new_settings)
+        except Exception:
+            logger.exception(f"Settings reload callback {callback!r} failed")
+    logger.info("Settings reloaded")
+    return new_settings
+
+
+_reload_fd: Optional[int] = None
+
+
+def _reload_thread() -> int:
+    """Start a thread that reloads settings once per byte written to the returned pipe."""
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(write_fd, False)
+
+    def run() -> None:
+        while os.read(read_fd, 1):
+            reload_settings()
+
+    threading.Thread(target=run, name="settings-reload", daemon=True).start()
+    return write_fd
+
+
+def _request_reload(signum: int, frame: object) -> None:
+    # Runs in signal context: only an async-signal-safe write, never a lock
+    try:
+        os.write(_reload_fd, b"\0")
+    except BlockingIOError:
+        pass  # a reload is already pending
+
+
+def install_reload_handler(loop: Optional["asyncio.AbstractEventLoop"] = None) -> bool:
+    """Reload settings whenever the process receives SIGHUP.
+
+    The reload never runs inside the signal handler, where taking the
+    settings lock could deadlock against the interrupted code. With an event
+    loop (`loop`, or the running one) it runs as a loop callback; otherwise
+    the handler only wakes a background reload thread.
+
+    Must be called from the main thread.
+
+    Args:
+        loop: Event loop to reload on (defaults to the running loop, if any)
+
+    Returns:
+        False on platforms without SIGHUP
+    """
+    global _reload_fd
+    if not hasattr(signal, "SIGHUP"):
+        return False
+    if loop is None:
+        import asyncio
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+    if loop is not None:
+        loop.add_signal_handler(signal.SIGHUP, reload_settings)
+        return True
+    if _reload_fd is None:
+        _reload_fd = _reload_thread()
+    signal.signal(signal.SIGHUP, _request_reload)
+    return True
+
 
-# Get from environment or use defaults
 def get_default_model(provider: str = "openai") -> str:
     """Get default model for a provider.
-    
+
     Args:
-        provider: Model provider ('openai' or 'anthropic')
-        
+        provider: Model provider (e.g. 'openai' or 'anthropic')
+
     Returns:
         Model identifier string
     """
-    env_var = f"DEFAULT_MODEL_{provider.upper()}"
-    if provider == "openai":
-        return os.getenv(env_var, DEFAULT_MODEL_OPENAI)
-    elif provider == "anthropic":
-        return os.getenv(env_var, DEFAULT_MODEL_ANTHROPIC)
-    else:
-        raise ValueError(f"Unknown provider: {provider}")
+    return get_settings().provider(provider).model
@@ -0,0 +1,444 @@
+"""
+Example: Bulk Data Extraction Pipeline
+
+Runs `DataExtractionExample` over very large record sets. Input is read
+lazily, records are batched (optionally several per prompt), batches run with
+bounded concurrency, and validated results are written incrementally in input
+order. Malformed input records become error rows instead of stopping the
+run. Progress is checkpointed so a crashed run resumes where it left off,
+and memory stays flat regardless of input size.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple, Union
+
+from loguru import logger
+
+from ..config import get_settings
+from .data_extraction import DataExtractionExample, Person
+
+
+@dataclass(frozen=True)
+class InvalidRecord:
+    """An input record that could not be read; written as an error row."""
+    error: str
+
+
+Record = Union[str, InvalidRecord]
+
+
+def _invalid(where: str, problem: str) -> InvalidRecord:
+    logger.warning(f"Skipping malformed input at {where}: {problem}")
+    return InvalidRecord(f"invalid input at {where}: {problem}")
+
+
+def read_jsonl(path: str, text_field: str = "text") -> Iterator[Record]:
+    """Lazily read texts from a JSON Lines file.
+
+    Args:
+        path: Path to the input file
+        text_field: Key holding the text in each JSON object
+
+    Yields:
+        One text per non-empty line, or an `InvalidRecord` for a line that
+        isn't a JSON object with a string `text_field`
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                text = json.loads(line)[text_field]
+            except (ValueError, KeyError, TypeError) as exc:
+                yield _invalid(f"line {number}", repr(exc))
+                continue
+            yield text if isinstance(text, str) else _invalid(f"line {number}", f"{text_field!r} is not a string")
+
+
+def read_csv(path: str, text_field: str = "text") -> Iterator[Record]:
+    """Lazily read texts from a CSV file with a header row.
+
+    Args:
+        path: Path to the input file
+        text_field: Column holding the text
+
+    Yields:
+        One text per row, or an `InvalidRecord` for a row without the column
+    """
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            text = row.get(text_field)
+            yield text if text is not None else _invalid(f"line {reader.line_num}", f"no {text_field!r} column")
+
+
+class ResultSink(Protocol):
+    """Incremental, resumable destination for extracted rows."""
+
+    def open(self, state: Optional[Dict[str, Any]]) -> None:
+        """Open the sink, discarding anything written after `state` was captured."""
+        ...
+
+    def write(self, row: Dict[str, Any]) -> None:
+        ...
+
+    def flush(self, final: bool = False) -> Dict[str, Any]:
+        """Make written rows durable and return state to resume from.
+
+        `final` is set on the last flush of a completed run, after which no
+        more rows are written.
+        """
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class JsonlSink:
+    """Appends rows to a JSON Lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def open(self, state: Optional[Dict[str, Any]]) -> None:
+        self._file = open(self.path, "a+b")
+        # Drop rows written after the last checkpoint so resumed records are not duplicated
+        self._file.truncate(state["offset"] if state else 0)
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(row).encode("utf-8") + b"\n")
+
+    def flush(self, final: bool = False) -> Dict[str, Any]:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {"offset": self._file.tell()}
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink:
+    """Writes rows to a directory of Parquet part files (requires `pyarrow`).
+
+    Each part holds `rows_per_file` rows (the last one fewer). A Parquet file
+    can't be appended to, so rows of the part being filled are made durable
+    at each checkpoint in a JSON Lines spool next to it, which is reloaded on
+    resume and removed once the part is written and checkpointed.
+    """
+
+    def __init__(self, directory: str, rows_per_file: int = 100_000):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("ParquetSink requires pyarrow: pip install pyarrow") from exc
+        self.directory = Path(directory)
+        self.rows_per_file = rows_per_file
+        self._rows: List[Dict[str, Any]] = []
+        self._parts = 0
+        self._spooled = 0  # rows of `_rows` already in the spool
+        self._checkpointed_parts = 0  # parts recorded by the previous flush
+        self._finished = False
+
+    def _part_path(self, number: int) -> Path:
+        return self.directory / f"part-{number:05d}.parquet"
+
+    def _spool_path(self, number: int) -> Path:
+        return self.directory / f"part-{number:05d}.pending.jsonl"
+
+    def _spools(self) -> Iterator[Tuple[int, Path]]:
+        for spool in self.directory.glob("part-*.pending.jsonl"):
+            yield int(spool.name.split(".")[0].split("-")[1]), spool
+
+    def open(self, state: Optional[Dict[str, Any]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._parts = state["parts"] if state else 0
+        for stale in self.directory.glob("part-*.parquet"):
+            if int(stale.stem.split("-")[1]) >= self._parts:
+                stale.unlink()
+        for number, spool in self._spools():
+            if number != self._parts:
+                spool.unlink()
+        self._rows = []
+        spool = self._spool_path(self._parts)
+        if spool.exists():
+            with open(spool, "r+b") as f:
+                # Drop rows spooled after the last checkpoint
+                f.truncate(state.get("pending", 0) if state else 0)
+                f.seek(0)
+                self._rows = [json.loads(line) for line in f]
+        self._spooled = len(self._rows)
+        self._checkpointed_parts = self._parts
+        self._finished = False
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self.rows_per_file:
+            self._write_part()
+
+    def _write_part(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._rows:
+            return
+        pq.write_table(pa.Table.from_pylist(self._rows), self._part_path(self._parts))
+        # The part's spool stays until a checkpoint past this part is saved
+        self._parts += 1
+        self._rows = []
+        self._spooled = 0
+
+    def flush(self, final: bool = False) -> Dict[str, Any]:
+        # The previous flush's state has been checkpointed, so spools of parts before it are obsolete
+        for number, spool in self._spools():
+            if number < self._checkpointed_parts:
+                spool.unlink()
+        if final:
+            self._write_part()
+            self._finished = True
+        elif self._spooled < len(self._rows):
+            with open(self._spool_path(self._parts), "ab") as f:
+                for row in self._rows[self._spooled:]:
+                    f.write(json.dumps(row).encode("utf-8") + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._spooled = len(self._rows)
+        spool = self._spool_path(self._parts)
+        self._checkpointed_parts = self._parts
+        return {"parts": self._parts, "pending": spool.stat().st_size if spool.exists() else 0}
+
+    def close(self) -> None:
+        # After an interrupted run, buffered rows are left to the spool for the resumed run
+        if self._finished:
+            for _, spool in self._spools():
+                spool.unlink()
+        self._rows = []
+
+
+@dataclass
+class Checkpoint:
+    """Resume point of a pipeline run."""
+    records_done: int = 0
+    sink_state: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class PipelineStats:
+    """Counters for a pipeline run."""
+    records: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    batches: int = 0
+    resumed_from: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+
+class ExtractionPipeline:
+    """Streaming, checkpointed bulk extraction."""
+
+    def __init__(
+        self,
+        extractor: DataExtractionExample,
+        pack_size: int = 1,
+        max_concurrency: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = 1000,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            extractor: The extraction agent to run
+            pack_size: Records packed into one prompt (1 disables packing)
+            max_concurrency: Maximum number of batches in flight
+                (defaults to the shared `concurrency.extraction` setting)
+            checkpoint_path: Where to persist progress (None disables resume)
+            checkpoint_every: Records written between checkpoints
+        """
+        if max_concurrency is None:
+            max_concurrency = get_settings().concurrency.extraction
+        if pack_size < 1 or max_concurrency < 1:
+            raise ValueError("pack_size and max_concurrency must be at least 1")
+        self.extractor = extractor
+        self.pack_size = pack_size
+        self.max_concurrency = max_concurrency
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+
+    async def _extract_batch(self, records: List[Record]) -> List[Tuple[Optional[Person], Optional[str]]]:
+        results: List[Optional[Tuple[Optional[Person], Optional[str]]]] = [
+            (None, record.error) if isinstance(record, InvalidRecord) else None for record in records
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            extracted = await self._extract_texts([records[i] for i in pending])
+            for i, result in zip(pending, extracted, strict=True):
+                results[i] = result
+        return results
+
+    async def _extract_texts(self, texts: List[str]) -> List[Tuple[Optional[Person], Optional[str]]]:
+        if len(texts) > 1:
+            try:
+                return [(person, None) for person in await self.extractor.extract_many(texts)]
+            except Exception as exc:
+                logger.warning(f"Packed extraction of {len(texts)} records failed, retrying individually: {exc!r}")
+
+        async def extract_one(text: str) -> Tuple[Optional[Person], Optional[str]]:
+            try:
+                return await self.extractor.extract(text), None
+            except Exception as exc:
+                return None, repr(exc)
+
+        return list(await asyncio.gather(*(extract_one(text) for text in texts)))
+
+    async def run(self, texts: Iterable[Record], sink: ResultSink) -> PipelineStats:
+        """Extract every text and write the results to `sink`.
+
+        Rows are written in input order as `{"record": index, "person": ..., "error": ...}`.
+
+        Args:
+            texts: Input texts, typically a lazy reader such as `read_jsonl`;
+                `InvalidRecord`s are written as error rows without a model call
+            sink: Destination for extracted rows
+
+        Returns:
+            Counters for this run
+        """
+        checkpoint = Checkpoint.load(self.checkpoint_path) if self.checkpoint_path else Checkpoint()
+        stats = PipelineStats(resumed_from=checkpoint.records_done)
+        if checkpoint.records_done:
+            logger.info(f"Resuming extraction from record {checkpoint.records_done}")
+
+        sink.open(checkpoint.sink_state)
+        records_done = checkpoint.records_done
+        since_checkpoint = 0
+
+        # Batches are bounded by `window` from enqueue until written, so memory stays flat
+        window = asyncio.Semaphore(self.max_concurrency * 2)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency)
+        finished: Dict[int, Tuple[int, List[Tuple[Optional[Person], Optional[str]]]]] = {}
+        next_to_write = 0
+
+        def save_checkpoint(final: bool = False) -> None:
+            nonlocal since_checkpoint
+            state = sink.flush(final)
+            if self.checkpoint_path:
+                Checkpoint(records_done, state).save(self.checkpoint_path)
+            since_checkpoint = 0
+
+        def write_ready() -> None:
+            nonlocal next_to_write, records_done, since_checkpoint
+            while next_to_write in finished:
+                first_record, results = finished.pop(next_to_write)
+                for offset, (person, error) in enumerate(results):
+                    sink.write({
+                        "record": first_record + offset,
+                        "person": person.model_dump() if person else None,
+                        "error": error,
+                    })
+                    if error is None:
+                        stats.succeeded += 1
+                    else:
+                        stats.failed += 1
+                records_done += len(results)
+                since_checkpoint += len(results)
+                stats.records += len(results)
+                next_to_write += 1
+                window.release()
+                if since_checkpoint >= self.checkpoint_every:
+                    save_checkpoint()
+
+        async def produce() -> None:
+            remaining = itertools.islice(iter(texts), checkpoint.records_done, None)
+            first_record = checkpoint.records_done
+            for batch_number in itertools.count():
+                batch = list(itertools.islice(remaining, self.pack_size))
+                if not batch:
+                    break
+                await window.acquire()
+                await queue.put((batch_number, first_record, batch))
+                first_record += len(batch)
+            for _ in range(self.max_concurrency):
+                await queue.put(None)
+
+        async def work() -> None:
+            while (item := await queue.get()) is not None:
+                batch_number, first_record, batch = item
+                finished[batch_number] = (first_record, await self._extract_batch(batch))
+                stats.batches += 1
+                write_ready()
+
+        tasks = [asyncio.create_task(produce())]
+        tasks.extend(asyncio.create_task(work()) for _ in range(self.max_concurrency))
+        try:
+            await asyncio.gather(*tasks)
+            save_checkpoint(final=True)
+        finally:
+            # If one task failed the others are still running; stop them before the sink goes away
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            sink.close()
+
+        stats.elapsed = time.perf_counter() - stats.started_at
+        logger.info(
+            f"Extracted {stats.records} records ({stats.failed} failed) "
+            f"at {stats.records_per_second:.1f} records/s"
+        )
+        return stats
+
+
+async def main():
+    """Run the bulk extraction pipeline from the command line."""
+    parser = argparse.ArgumentParser(description="Bulk person extraction")
+    parser.add_argument("input", help="Input .jsonl or .csv file")
+    parser.add_argument("output", help="Output .jsonl file, or a directory for Parquet parts")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--pack-size", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (defaults to <output>.checkpoint)")
+    args = parser.parse_args()
+
+    reader = read_csv if args.input.endswith(".csv") else read_jsonl
+    sink = JsonlSink(args.output) if args.output.endswith(".jsonl") else ParquetSink(args.output)
+    pipeline = ExtractionPipeline(
+        DataExtractionExample(),
+        pack_size=args.pack_size,
+        max_concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint or f"{args.output.rstrip('/')}.checkpoint",
+    )
+    stats = await pipeline.run(reader(args.input, args.text_field), sink)
+    print(f"✅ {stats.succeeded} extracted, {stats.failed} failed, {stats.records_per_second:.1f} records/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
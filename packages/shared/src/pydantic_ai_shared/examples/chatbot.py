@@ -5,54 +5,96 @@ This example demonstrates a basic chatbot using Pydantic AI.
 """
 import asyncio
 import os
+from typing import AsyncIterator, Optional
 
-from pydantic import BaseModel
-from pydantic_ai import Agent, RunContext
+from pydantic_ai import RunContext
 from loguru import logger
 
-from .config import get_default_model
+from ..config import get_default_model
+from ..history import ChatMessage, ContextWindow, agent_summarizer, history_store_from_settings  # noqa: F401
+from ..registry import get_registry
+from ..streaming import StreamMetrics, stream_text
+from ..telemetry import instrument, traced_run
 
 
-class ChatMessage(BaseModel):
-    """A chat message structure."""
-    role: str
-    content: str
+CHATBOT_SYSTEM_PROMPT = """You are a helpful assistant.
+Provide concise, accurate responses.
+Be friendly and professional."""
+
+SUMMARIZER_SYSTEM_PROMPT = "You maintain concise running summaries of chat conversations."
 
 
 class ChatbotExample:
     """A simple chatbot example using Pydantic AI."""
     
-    def __init__(self, model: str = None):
+    def __init__(self, model: str = None, history: Optional[ContextWindow] = None):
         """Initialize the chatbot.
         
         Args:
             model: The model to use (defaults to configured OpenAI model)
+            history: Context window for chat sessions (defaults to the store and
+                budget from the shared `history` settings, summarizing with `model`)
         """
         if model is None:
             model = get_default_model("openai")
         
-        self.agent = Agent(
-            model,
-            system_prompt="""You are a helpful assistant. 
-            Provide concise, accurate responses. 
-            Be friendly and professional."""
-        )
+        self.agent = get_registry().agent(model, system_prompt=CHATBOT_SYSTEM_PROMPT)
+        if history is None:
+            summarizer = get_registry().agent(model, system_prompt=SUMMARIZER_SYSTEM_PROMPT)
+            history = ContextWindow(history_store_from_settings(), summarizer=agent_summarizer(summarizer))
+        self.history = history
         logger.info(f"Chatbot initialized with model: {model}")
     
-    async def chat(self, message: str) -> str:
+    @instrument("chatbot.chat")
+    async def chat(self, message: str, session_id: Optional[str] = None) -> str:
         """Send a message and get a response.
         
         Args:
             message: The user's message
+            session_id: Chat session to continue (None for a one-off message)
             
         Returns:
             The agent's response
         """
         logger.debug(f"User message: {message}")
-        result = await self.agent.run(message)
+        if session_id is None:
+            result = await traced_run(self.agent, message)
+        else:
+            history = await self.history.build(session_id, CHATBOT_SYSTEM_PROMPT)
+            result = await traced_run(self.agent, message, message_history=history)
+            await self.history.record(session_id, message, result.data)
         logger.debug(f"Agent response: {result.data}")
         return result.data
 
+    async def chat_stream(
+        self,
+        message: str,
+        metrics: Optional[StreamMetrics] = None,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Send a message and stream the response as it is generated.
+        
+        Args:
+            message: The user's message
+            metrics: Optional metrics object populated with time-to-first-token and tokens/sec
+            session_id: Chat session to continue (None for a one-off message)
+            
+        Yields:
+            Text deltas of the agent's response
+        """
+        logger.debug(f"User message (streaming): {message}")
+        if session_id is None:
+            async for delta in stream_text(self.agent, message, metrics):
+                yield delta
+            return
+
+        history = await self.history.build(session_id, CHATBOT_SYSTEM_PROMPT)
+        reply = []
+        async for delta in stream_text(self.agent, message, metrics, message_history=history):
+            reply.append(delta)
+            yield delta
+        await self.history.record(session_id, message, "".join(reply))
+
 
 async def main():
     """Run the chatbot example."""
@@ -77,8 +119,14 @@ async def main():
     
     for message in examples:
         print(f"\n👤 User: {message}")
-        response = await chatbot.chat(message)
-        print(f"🤖 Bot: {response}")
+        print("🤖 Bot: ", end="", flush=True)
+        metrics = StreamMetrics()
+        async for delta in chatbot.chat_stream(message, metrics, session_id="demo"):
+            print(delta, end="", flush=True)
+        if metrics.time_to_first_token is None:
+            print("\n   ⏱️  No text was streamed")
+        else:
+            print(f"\n   ⏱️  TTFT {metrics.time_to_first_token:.2f}s, {metrics.tokens_per_second or 0:.0f} tok/s")
     
     print("\n" + "=" * 60)
 
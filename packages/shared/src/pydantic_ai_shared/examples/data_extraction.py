@@ -4,13 +4,24 @@ Example: Data Extraction Agent
 This example demonstrates extracting structured data from unstructured text.
 """
 import asyncio
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent
 from loguru import logger
 
-from ..config import get_default_model
+from ..config import get_default_model, get_settings
+from ..registry import get_registry
+from ..telemetry import instrument, traced_run
+
+if TYPE_CHECKING:
+    from ..memo import ResultMemo
+
+EXTRACT_SYSTEM_PROMPT = """Extract person information from the text.
+Be accurate and only extract information that is present."""
+
+BATCH_SYSTEM_PROMPT = """Extract person information from each numbered record.
+Return exactly one person per record, in the same order as the records.
+Be accurate and only extract information that is present."""
 
 
 class Person(BaseModel):
@@ -24,23 +35,36 @@ class Person(BaseModel):
 class DataExtractionExample:
     """Extract structured data from text."""
     
-    def __init__(self, model: str = None):
+    def __init__(self, model: str = None, memo: Optional["ResultMemo"] = None):
         """Initialize the data extraction agent.
         
         Args:
             model: The model to use (defaults to configured OpenAI model)
+            memo: Optional persistent memo consulted before calling the model;
+                opened from the shared `memo` settings when a path is configured
         """
         if model is None:
             model = get_default_model("openai")
             
-        self.agent = Agent(
+        self.model = model
+        self.agent = get_registry().agent(
             model,
             result_type=Person,
-            system_prompt="""Extract person information from the text.
-            Be accurate and only extract information that is present."""
+            system_prompt=EXTRACT_SYSTEM_PROMPT,
+        )
+        self.batch_agent = get_registry().agent(
+            model,
+            result_type=List[Person],
+            system_prompt=BATCH_SYSTEM_PROMPT,
         )
+        if memo is None and get_settings().memo.path is not None:
+            from ..memo import ResultMemo
+
+            memo = ResultMemo.from_settings()
+        self.memo = memo
         logger.info("Data extraction agent initialized")
     
+    @instrument("extraction.extract")
     async def extract(self, text: str) -> Person:
         """Extract person data from text.
         
@@ -51,9 +75,45 @@ class DataExtractionExample:
             Structured Person data
         """
         logger.debug(f"Extracting data from: {text}")
-        result = await self.agent.run(text)
-        logger.debug(f"Extracted: {result.data}")
-        return result.data
+        person = await self._run(self.agent, EXTRACT_SYSTEM_PROMPT, Person, text)
+        logger.debug(f"Extracted: {person}")
+        return person
+
+    @instrument("extraction.extract_many")
+    async def extract_many(self, texts: List[str]) -> List[Person]:
+        """Extract person data from several texts in a single prompt.
+        
+        Args:
+            texts: The texts to extract from, one person per text
+            
+        Returns:
+            Structured Person data, one per text and in the same order
+            
+        Raises:
+            ValueError: If the model returned a different number of people
+        """
+        prompt = "\n\n".join(f"[Record {i}]\n{text}" for i, text in enumerate(texts, 1))
+        logger.debug(f"Extracting data from {len(texts)} packed records")
+
+        def check(people: List[Person]) -> None:
+            if len(people) != len(texts):
+                raise ValueError(f"Expected {len(texts)} people, got {len(people)}")
+
+        return await self._run(self.batch_agent, BATCH_SYSTEM_PROMPT, List[Person], prompt, check)
+
+    async def _run(self, agent, system_prompt: str, result_type, prompt: str, check=None):
+        async def call():
+            result = (await traced_run(agent, prompt)).data
+            if check is not None:
+                check(result)  # raise before the memo can store a bad result
+            return result
+
+        if self.memo is None:
+            return await call()
+        from ..memo import memo_key
+
+        key = memo_key(self.model, system_prompt, result_type, prompt)
+        return await self.memo.get_or_run(key, result_type, call)
 
 
 async def main():
@@ -0,0 +1,52 @@
+"""
+Example: Serving the Chatbot and Extraction Agents
+
+Registers `POST /chat` and `POST /extract` on an `AgentService`.
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from ..service import AgentService
+from .chatbot import ChatbotExample
+from .data_extraction import DataExtractionExample, Person
+
+
+class ChatRequest(BaseModel):
+    """Body of `POST /chat`."""
+    message: str = Field(min_length=1, max_length=8000)
+    session_id: Optional[str] = None
+
+
+class ChatResponse(BaseModel):
+    """Response of `POST /chat`."""
+    reply: str
+
+
+class ExtractRequest(BaseModel):
+    """Body of `POST /extract`."""
+    text: str = Field(min_length=1, max_length=8000)
+
+
+def add_example_routes(
+    service: AgentService,
+    chatbot: Optional[ChatbotExample] = None,
+    extractor: Optional[DataExtractionExample] = None,
+) -> None:
+    """Register the chat and extraction endpoints on `service`.
+
+    Args:
+        service: Service to register on
+        chatbot: Chatbot answering `/chat` (defaults to one on the configured model)
+        extractor: Extractor answering `/extract` (defaults to one on the configured model)
+    """
+    chatbot = chatbot or ChatbotExample()
+    extractor = extractor or DataExtractionExample()
+
+    @service.route("/chat", ChatRequest)
+    async def chat(request: ChatRequest) -> ChatResponse:
+        return ChatResponse(reply=await chatbot.chat(request.message, request.session_id))
+
+    @service.route("/extract", ExtractRequest)
+    async def extract(request: ExtractRequest) -> Person:
+        return await extractor.extract(request.text)
@@ -0,0 +1,344 @@
+"""
+Hedged requests and circuit-breaker failover across providers.
+
+Provider tail latency dominates p99. `HedgedRunner` starts a run on the
+primary model and, if it has not returned by a deadline taken from a
+percentile of recent primary latencies, starts the same run on a secondary
+model (by default the other configured provider). The first successful result
+wins and the other run is cancelled. A primary that fails before the deadline
+is retried on the secondary right away.
+
+Each provider has a `CircuitBreaker`. When its recent error rate spikes the
+breaker opens and runs go straight to the secondary model until a trial call
+succeeds again, so an OpenAI outage fails over to Anthropic and back.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Generic, Optional, Tuple, Type, TypeVar, Union
+
+from loguru import logger
+from pydantic_ai.models import Model
+
+from .config import get_settings
+from .loadtest import percentile as nearest_rank
+from .registry import AgentRegistry, get_registry
+from .telemetry import get_telemetry, traced_run
+
+if TYPE_CHECKING:
+    from .tools import ToolSet
+
+ResultT = TypeVar("ResultT")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def provider_of(model: Union[str, Model]) -> str:
+    """Provider name of a model, e.g. 'openai' for 'openai:gpt-4'."""
+    if isinstance(model, str):
+        return model.split(":", 1)[0]
+    return model.system
+
+
+def failover_model(model: Union[str, Model]) -> str:
+    """The configured model of the other main provider (OpenAI <-> Anthropic)."""
+    other = "anthropic" if provider_of(model) == "openai" else "openai"
+    return get_settings().provider(other).model
+
+
+class CircuitBreaker:
+    """Stops traffic to a provider whose recent error rate is too high.
+
+    Closed: calls flow and outcomes are counted over a sliding window.
+    Open: calls are refused until the cooldown has passed.
+    Half-open: one trial call is let through; success closes the breaker,
+    failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        window: Optional[float] = None,
+        cooldown: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the breaker.
+
+        Args:
+            name: Label for logs and metrics, usually the provider
+            failure_rate: Failure share in the window that opens the breaker
+            min_calls: Calls needed in the window before the rate is trusted
+            window: Sliding window in seconds
+            cooldown: Seconds to stay open before a trial call
+            clock: Monotonic time source (overridable in tests)
+
+        Unset arguments default to the shared `circuit_breaker` settings.
+        """
+        settings = get_settings().circuit_breaker
+        self.name = name
+        self.failure_rate = failure_rate if failure_rate is not None else settings.failure_rate
+        self.min_calls = min_calls if min_calls is not None else settings.min_calls
+        self.window = window if window is not None else settings.window
+        self.cooldown = cooldown if cooldown is not None else settings.cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.opens = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now.
+
+        In the half-open state this claims the single trial call; report its
+        outcome with `record` or give it back with `release`.
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.clock() - self._opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+            self._trial = False
+        if self._trial:
+            return False
+        self._trial = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        """Report the outcome of a call that `allow` let through."""
+        now = self.clock()
+        if self.state == HALF_OPEN:
+            self._trial = False
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info(f"Circuit {self.name} closed after a successful trial call")
+            else:
+                self._open(now)
+            return
+        if self.state == OPEN:
+            return
+        self._outcomes.append((now, ok))
+        while self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        if not ok and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def release(self) -> None:
+        """Give back a call that ended without an outcome (e.g. a cancelled hedge)."""
+        if self.state == HALF_OPEN:
+            self._trial = False
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self.opens += 1
+        get_telemetry().metrics.inc("agent_circuit_opens_total", breaker=self.name)
+        logger.warning(f"Circuit {self.name} opened; failing over for {self.cooldown:.0f}s")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide breaker for a provider, creating it on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+@dataclass
+class HedgeStats:
+    """Counters for a hedged runner."""
+    calls: int = 0
+    hedged: int = 0  # calls that started a secondary run
+    hedge_wins: int = 0  # hedged calls the secondary won
+    failovers: int = 0  # calls sent to the secondary by an open breaker or a primary error
+    total_latency: float = 0.0
+    estimated_savings: float = 0.0  # seconds, see `HedgedRunner.run`
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.calls if self.calls else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+    @property
+    def mean_saving(self) -> float:
+        """Estimated seconds saved per hedge the secondary won."""
+        return self.estimated_savings / self.hedge_wins if self.hedge_wins else 0.0
+
+
+class HedgedRunner(Generic[ResultT]):
+    """Runs prompts on a primary model, hedging slow calls on a secondary one."""
+
+    def __init__(
+        self,
+        primary: Union[str, Model],
+        secondary: Union[str, Model, None] = None,
+        result_type: Type[ResultT] = str,
+        system_prompt: str = "",
+        deps_type: Type[Any] = type(None),
+        toolset: Optional["ToolSet"] = None,
+        name: str = "hedge",
+        percentile: Optional[float] = None,
+        min_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        registry: Optional[AgentRegistry] = None,
+    ):
+        """Initialize the runner.
+
+        Args:
+            primary: Model tried first
+            secondary: Hedge and failover model (defaults to the other provider's model)
+            result_type: Structured result type of both agents
+            system_prompt: System prompt of both agents
+            deps_type: Dependency type passed to the agents
+            toolset: Tools both agents may call
+            name: Label for spans, logs and metrics
+            percentile: Primary latency percentile used as the hedge deadline
+            min_delay: Lower bound of the deadline in seconds
+            max_delay: Upper bound of the deadline, also used until enough
+                primary latencies have been observed
+            registry: Agent registry (defaults to the process-wide one)
+
+        Unset arguments default to the shared `hedge` settings.
+        """
+        settings = get_settings().hedge
+        self.primary = primary
+        self.secondary = secondary if secondary is not None else failover_model(primary)
+        self.name = name
+        self.percentile = percentile if percentile is not None else settings.percentile
+        self.min_delay = min_delay if min_delay is not None else settings.min_delay
+        self.max_delay = max_delay if max_delay is not None else settings.max_delay
+        self.min_samples = settings.min_samples
+        self.stats = HedgeStats()
+        self.breakers = (get_circuit_breaker(provider_of(primary)), get_circuit_breaker(provider_of(self.secondary)))
+        registry = registry or get_registry()
+        self.agents = tuple(
+            registry.agent(
+                model, result_type=result_type, system_prompt=system_prompt, deps_type=deps_type, toolset=toolset
+            )
+            for model in (primary, self.secondary)
+        )
+        self._latencies: Deque[float] = deque(maxlen=settings.window)
+
+    def deadline(self) -> float:
+        """Seconds to wait for the primary before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return self.max_delay
+        value = nearest_rank(sorted(self._latencies), self.percentile)
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def _expected_primary(self, elapsed: float) -> Optional[float]:
+        slower = [latency for latency in self._latencies if latency > elapsed]
+        return sum(slower) / len(slower) if slower else None
+
+    async def _attempt(self, index: int, prompt: str, run_kwargs: Dict[str, Any]) -> Any:
+        role = ("primary", "secondary")[index]
+        breaker = self.breakers[index]
+        start = time.perf_counter()
+        try:
+            result = await traced_run(self.agents[index], prompt, f"{self.name}.{role}", **run_kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(True)
+        if index == 0:
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    async def run(self, prompt: str, **run_kwargs: Any) -> Any:
+        """Run the prompt, hedging or failing over to the secondary model as needed.
+
+        When the secondary wins a hedge, the saving is estimated as the mean of
+        recent primary latencies longer than the winning latency, minus the
+        winning latency (the cancelled primary would have taken at least that
+        long).
+
+        Args:
+            prompt: The user prompt
+            **run_kwargs: Extra arguments for `Agent.run` (e.g. `deps`)
+
+        Returns:
+            The winning agent run result
+
+        Raises:
+            Exception: The error of the last run to fail if none succeeded
+        """
+        self.stats.calls += 1
+        telemetry = get_telemetry()
+        start = time.perf_counter()
+        first = 0
+        if not self.breakers[0].allow():
+            if self.breakers[1].allow():
+                self.stats.failovers += 1
+                telemetry.metrics.inc("agent_failovers_total", runner=self.name)
+                logger.info(f"{self.name}: {provider_of(self.primary)} circuit open, using {self.secondary}")
+                first = 1
+            # With both circuits open, try the primary anyway
+
+        tasks: Dict[asyncio.Task, int] = {asyncio.create_task(self._attempt(first, prompt, run_kwargs)): first}
+        deadline = self.deadline() if first == 0 else None
+        hedged = False
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=deadline)
+            failed = any(task.exception() is not None for task in done)
+            if first == 0 and (failed or not done) and self.breakers[1].allow():
+                if failed:
+                    self.stats.failovers += 1
+                    telemetry.metrics.inc("agent_failovers_total", runner=self.name)
+                    logger.info(f"{self.name}: {provider_of(self.primary)} failed, retrying on {self.secondary}")
+                else:
+                    hedged = True
+                    self.stats.hedged += 1
+                    logger.debug(f"{self.name}: primary slower than {deadline:.2f}s, hedging on {self.secondary}")
+                tasks[asyncio.create_task(self._attempt(1, prompt, run_kwargs))] = 1
+
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return self._won(task, tasks[task], hedged, start)
+                    error = task.exception()
+            raise error
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+            if hedged and any(tasks[task] == 0 for task in losers):
+                # The cancelled primary took at least this long; leaving it out
+                # would only keep the fast samples and pull the deadline down
+                self._latencies.append(max(time.perf_counter() - start, deadline))
+
+    def _won(self, task: asyncio.Task, index: int, hedged: bool, start: float) -> Any:
+        elapsed = time.perf_counter() - start
+        self.stats.total_latency += elapsed
+        if hedged:
+            winner = ("primary", "secondary")[index]
+            get_telemetry().metrics.inc("agent_hedged_requests_total", runner=self.name, winner=winner)
+            if index == 1:
+                self.stats.hedge_wins += 1
+                expected = self._expected_primary(elapsed)
+                if expected is not None:
+                    self.stats.estimated_savings += expected - elapsed
+        return task.result()
@@ -0,0 +1,339 @@
+"""
+Conversation history with token-budgeted context windows.
+
+Sessions are stored compactly as `(role, content, tokens)` entries plus a
+running summary, in process (`InMemoryHistoryStore`) or in Redis
+(`RedisHistoryStore`). `ContextWindow` assembles each request's message
+history from the most recent turns that fit a token budget. Older turns that
+fall out of the window are folded into the summary in chunks, so request size
+stays flat however long the conversation gets.
+"""
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Protocol, Sequence
+
+from pydantic import BaseModel
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, SystemPromptPart, TextPart, UserPromptPart
+from loguru import logger
+
+from .config import get_settings
+from .singleflight import SingleFlight
+from .tokens import estimate_tokens
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators
+
+
+class ChatMessage(BaseModel):
+    """A chat message structure."""
+    role: str
+    content: str
+
+
+@dataclass
+class StoredMessage:
+    """A message with its token estimate, as kept by the stores."""
+    role: str
+    content: str
+    tokens: int
+
+    @classmethod
+    def from_message(cls, message: ChatMessage) -> "StoredMessage":
+        return cls(message.role, message.content, estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS)
+
+    def to_message(self) -> ChatMessage:
+        return ChatMessage(role=self.role, content=self.content)
+
+
+@dataclass
+class Conversation:
+    """A session's running summary and the messages not yet folded into it."""
+    summary: str = ""
+    messages: List[StoredMessage] = field(default_factory=list)
+
+
+class HistoryStore(Protocol):
+    """Persistence for chat sessions."""
+
+    async def load(self, session_id: str) -> Conversation:
+        ...
+
+    async def append(self, session_id: str, messages: Sequence[ChatMessage]) -> None:
+        ...
+
+    async def compact(self, session_id: str, summary: str, drop: int) -> None:
+        """Replace the summary and drop the `drop` oldest messages it now covers."""
+        ...
+
+    async def clear(self, session_id: str) -> None:
+        ...
+
+
+class InMemoryHistoryStore:
+    """In-process session store, evicting the least recently used sessions."""
+
+    def __init__(self, max_sessions: int = 10_000):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def _session(self, session_id: str) -> Conversation:
+        conversation = self._sessions.get(session_id)
+        if conversation is None:
+            conversation = self._sessions[session_id] = Conversation()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return conversation
+
+    async def load(self, session_id: str) -> Conversation:
+        conversation = self._session(session_id)
+        return Conversation(conversation.summary, list(conversation.messages))
+
+    async def append(self, session_id: str, messages: Sequence[ChatMessage]) -> None:
+        self._session(session_id).messages.extend(StoredMessage.from_message(m) for m in messages)
+
+    async def compact(self, session_id: str, summary: str, drop: int) -> None:
+        conversation = self._session(session_id)
+        conversation.summary = summary
+        del conversation.messages[:drop]
+
+    async def clear(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class RedisHistoryStore:
+    """Session store shared across workers (requires the `redis` extra).
+
+    Each session is a Redis list of compact JSON entries plus a summary key;
+    both expire after `ttl` seconds of inactivity.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379", ttl: Optional[float] = None, client=None):
+        """Initialize the store.
+
+        Args:
+            url: Redis connection URL (ignored when `client` is given)
+            ttl: Session time-to-live in seconds (None keeps sessions forever)
+            client: An existing `redis.asyncio.Redis` client to reuse
+        """
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as exc:
+                raise ImportError("RedisHistoryStore requires the 'redis' extra: pip install redis") from exc
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.ttl = ttl
+
+    @staticmethod
+    def _keys(session_id: str) -> tuple:
+        return f"chat:{session_id}:messages", f"chat:{session_id}:summary"
+
+    def _touch(self, pipe, *keys: str) -> None:
+        if self.ttl is not None:
+            for key in keys:
+                pipe.expire(key, int(self.ttl))
+
+    async def load(self, session_id: str) -> Conversation:
+        messages_key, summary_key = self._keys(session_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(summary_key)
+            pipe.lrange(messages_key, 0, -1)
+            summary, entries = await pipe.execute()
+        return Conversation(summary or "", [StoredMessage(*json.loads(entry)) for entry in entries])
+
+    async def append(self, session_id: str, messages: Sequence[ChatMessage]) -> None:
+        messages_key, summary_key = self._keys(session_id)
+        entries = []
+        for message in messages:
+            stored = StoredMessage.from_message(message)
+            entries.append(json.dumps([stored.role, stored.content, stored.tokens], separators=(",", ":")))
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(messages_key, *entries)
+            self._touch(pipe, messages_key, summary_key)
+            await pipe.execute()
+
+    async def compact(self, session_id: str, summary: str, drop: int) -> None:
+        messages_key, summary_key = self._keys(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(summary_key, summary)
+            # Trimming from the front keeps messages appended concurrently
+            pipe.ltrim(messages_key, drop, -1)
+            self._touch(pipe, messages_key, summary_key)
+            await pipe.execute()
+
+    async def clear(self, session_id: str) -> None:
+        await self.client.delete(*self._keys(session_id))
+
+
+def history_store_from_settings() -> HistoryStore:
+    """Build the session store selected by the shared `history` settings."""
+    settings = get_settings()
+    if settings.history.backend == "redis":
+        return RedisHistoryStore(settings.redis_url, ttl=settings.history.ttl)
+    return InMemoryHistoryStore(settings.history.max_sessions)
+
+
+Summarizer = Callable[[str, List[ChatMessage]], Awaitable[str]]
+
+
+def to_model_messages(system_prompt: str, summary: str, messages: Sequence[StoredMessage]) -> List[ModelMessage]:
+    """Convert a window of stored messages to agent message history.
+
+    The agent only adds its system prompt to an empty history, so the prompt
+    (and the running summary) lead the first request.
+
+    Args:
+        system_prompt: The agent's system prompt
+        summary: Running summary of older turns ('' for none)
+        messages: Messages in the window, oldest first
+
+    Returns:
+        Messages for `Agent.run(message_history=...)`
+    """
+    if not messages and not summary:
+        return []
+    pending: list = [SystemPromptPart(system_prompt)]
+    if summary:
+        pending.append(SystemPromptPart(SUMMARY_PREFIX + summary))
+    history: List[ModelMessage] = []
+    for message in messages:
+        if message.role == "user":
+            history.append(ModelRequest(parts=[*pending, UserPromptPart(message.content)]))
+            pending = []
+        else:
+            if pending:
+                history.append(ModelRequest(parts=pending))
+                pending = []
+            history.append(ModelResponse(parts=[TextPart(message.content)]))
+    if pending:
+        history.append(ModelRequest(parts=pending))
+    return history
+
+
+def agent_summarizer(agent, max_words: int = 150) -> Summarizer:
+    """Build a summarizer that asks a text agent to extend the running summary.
+
+    Args:
+        agent: An agent with a plain text result
+        max_words: Length the summary is kept under
+
+    Returns:
+        A summarizer for `ContextWindow`
+    """
+
+    async def summarize(summary: str, messages: List[ChatMessage]) -> str:
+        transcript = "\n".join(f"{message.role}: {message.content}" for message in messages)
+        prompt = (
+            f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}\n\n"
+            f"Update the summary to include the new messages. Keep facts, names, decisions "
+            f"and open questions. Reply with the summary only, under {max_words} words."
+        )
+        result = await agent.run(prompt)
+        return result.data
+
+    return summarize
+
+
+@dataclass
+class WindowStats:
+    """Counters for context assembly."""
+    requests: int = 0
+    history_tokens: int = 0
+    summarizations: int = 0
+    summarized_messages: int = 0
+
+
+class ContextWindow:
+    """Assembles token-budgeted message history for chat sessions."""
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        token_budget: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+        summarize_threshold: Optional[int] = None,
+    ):
+        """Initialize the window.
+
+        Args:
+            store: Where sessions are kept
+            token_budget: Tokens of system prompt, summary and history sent per request
+                (defaults to the shared `history.token_budget` setting)
+            summarizer: Folds old turns into the running summary; without one,
+                turns outside the window are simply not sent
+            summarize_threshold: Overflow tokens that trigger a summarization,
+                so the summarizer runs once per chunk rather than every turn
+                (defaults to the shared `history.summarize_threshold` setting)
+        """
+        settings = get_settings().history
+        self.store = store
+        self.token_budget = token_budget or settings.token_budget
+        self.summarizer = summarizer
+        self.summarize_threshold = summarize_threshold or settings.summarize_threshold
+        self.stats = WindowStats()
+        self._compactions: SingleFlight[Conversation] = SingleFlight("history.compact")
+
+    def _window_start(self, conversation: Conversation, budget: int) -> int:
+        messages = conversation.messages
+        start, used = len(messages), 0
+        while start > 0 and used + messages[start - 1].tokens <= budget:
+            start -= 1
+            used += messages[start].tokens
+        # Start on a user turn so providers see alternating roles
+        while start < len(messages) and messages[start].role != "user":
+            start += 1
+        return start
+
+    async def build(self, session_id: str, system_prompt: str) -> List[ModelMessage]:
+        """Assemble the message history for the next request in a session.
+
+        Args:
+            session_id: The chat session
+            system_prompt: The agent's system prompt
+
+        Returns:
+            Messages for `Agent.run(message_history=...)`
+        """
+        conversation = await self.store.load(session_id)
+        overflow = self._overflow(conversation, system_prompt)
+        if self.summarizer is not None and sum(m.tokens for m in overflow) >= self.summarize_threshold:
+            # Concurrent turns of a session share one summarization instead of
+            # each folding (and dropping) the same messages
+            conversation = await self._compactions.do(session_id, lambda: self._compact(session_id, system_prompt))
+
+        window = conversation.messages[len(self._overflow(conversation, system_prompt)):]
+        self.stats.requests += 1
+        self.stats.history_tokens += sum(m.tokens for m in window)
+        return to_model_messages(system_prompt, conversation.summary, window)
+
+    def _overflow(self, conversation: Conversation, system_prompt: str) -> List[StoredMessage]:
+        """Messages that don't fit in the window next to the system prompt and summary."""
+        fixed = estimate_tokens(system_prompt) + estimate_tokens(conversation.summary)
+        return conversation.messages[: self._window_start(conversation, self.token_budget - fixed)]
+
+    async def _compact(self, session_id: str, system_prompt: str) -> Conversation:
+        """Fold a session's overflow into its summary and return the compacted conversation."""
+        # Load again: a summarization that finished since the caller's load
+        # has already folded these messages
+        conversation = await self.store.load(session_id)
+        overflow = self._overflow(conversation, system_prompt)
+        if sum(m.tokens for m in overflow) < self.summarize_threshold:
+            return conversation
+        conversation.summary = await self.summarizer(
+            conversation.summary, [message.to_message() for message in overflow]
+        )
+        await self.store.compact(session_id, conversation.summary, len(overflow))
+        self.stats.summarizations += 1
+        self.stats.summarized_messages += len(overflow)
+        logger.debug(f"Folded {len(overflow)} messages into the summary of session {session_id}")
+        conversation.messages = conversation.messages[len(overflow):]
+        return conversation
+
+    async def record(self, session_id: str, user_message: str, reply: str) -> None:
+        """Append a completed turn to the session."""
+        await self.store.append(session_id, [
+            ChatMessage(role="user", content=user_message),
+            ChatMessage(role="assistant", content=reply),
+        ])
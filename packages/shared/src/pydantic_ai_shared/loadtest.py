@@ -0,0 +1,178 @@
+"""
+Load-generation harness for agent entry points.
+
+Drives an async callable with bounded concurrency and reports throughput,
+latency percentiles and peak Python memory. Reports can be compared against a
+stored baseline so CI can fail on performance regressions.
+"""
+import asyncio
+import json
+import math
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values: Values in ascending order
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(q / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class LoadReport:
+    """Results of one load run."""
+    name: str
+    requests: int
+    errors: int
+    elapsed: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    peak_memory_mb: Optional[float] = None
+    memory_source: Optional[str] = None  # "fresh target" or "timed run", see `run_load`
+
+    def format_row(self) -> str:
+        memory = f"{self.peak_memory_mb:>9.1f}" if self.peak_memory_mb is not None else f"{'-':>9}"
+        return (
+            f"{self.name:<36} {self.requests:>7} {self.errors:>6} {self.throughput:>9.1f} "
+            f"{self.p50 * 1000:>8.1f} {self.p95 * 1000:>8.1f} {self.p99 * 1000:>8.1f} {memory} "
+            f"{self.memory_source or '-':<12}"
+        )
+
+    @staticmethod
+    def header() -> str:
+        return (
+            f"{'target':<36} {'reqs':>7} {'errors':>6} {'req/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>9} {'memory from':<12}"
+        )
+
+
+async def run_load(
+    name: str,
+    target: Callable[[Any], Awaitable[Any]],
+    inputs: Sequence[Any],
+    concurrency: int = 16,
+    measure_memory: bool = True,
+    fresh_target: Optional[Callable[[], Callable[[Any], Awaitable[Any]]]] = None,
+) -> LoadReport:
+    """Call `target` once per input with bounded concurrency.
+
+    With `fresh_target`, memory is measured in a second pass over the same
+    inputs against a newly built target, so tracing overhead does not distort
+    the latency figures and warm caches in `target` don't hide allocations.
+    Without it, memory is traced during the timed run itself, which slows
+    that run somewhat. `LoadReport.memory_source` records which one it was.
+
+    Args:
+        name: Label for the report
+        target: Async callable under test, e.g. `agent.process_query`
+        inputs: One argument per call
+        concurrency: Maximum calls in flight
+        measure_memory: Also report peak Python allocations
+        fresh_target: Builds a new, cold instance of the target for the memory pass
+
+    Returns:
+        Throughput, latency percentiles and error count for the run
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def call(run: Callable[[Any], Awaitable[Any]], item: Any) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await run(item)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async def traced(run: Awaitable[Any]) -> float:
+        tracemalloc.start()
+        try:
+            await run
+            return tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+
+    peak_memory_mb = memory_source = None
+    trace_timed_run = measure_memory and fresh_target is None
+    started = time.perf_counter()
+    timed_run = asyncio.gather(*(call(target, item) for item in inputs))
+    if trace_timed_run:
+        peak_memory_mb, memory_source = await traced(timed_run), "timed run"
+    else:
+        await timed_run
+    elapsed = time.perf_counter() - started
+
+    if measure_memory and fresh_target is not None:
+        timed_latencies, timed_errors = latencies, errors
+        latencies = []
+        fresh = fresh_target()
+        peak_memory_mb = await traced(asyncio.gather(*(call(fresh, item) for item in inputs)))
+        memory_source = "fresh target"
+        latencies, errors = timed_latencies, timed_errors
+
+    latencies.sort()
+    return LoadReport(
+        name=name,
+        requests=len(inputs),
+        errors=errors,
+        elapsed=elapsed,
+        throughput=len(inputs) / elapsed if elapsed else 0.0,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        peak_memory_mb=peak_memory_mb,
+        memory_source=memory_source,
+    )
+
+
+def save_reports(reports: List[LoadReport], path: str) -> None:
+    """Write reports as JSON, e.g. to record a baseline."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(report) for report in reports], f, indent=2)
+
+
+def find_regressions(reports: List[LoadReport], baseline_path: str, tolerance: float = 0.2) -> List[str]:
+    """Compare reports against a stored baseline.
+
+    Args:
+        reports: Reports of the current run
+        baseline_path: JSON file written by `save_reports`
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        Human-readable descriptions of every regression found
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline: Dict[str, Dict[str, Any]] = {entry["name"]: entry for entry in json.load(f)}
+
+    regressions = []
+    for report in reports:
+        previous = baseline.get(report.name)
+        if previous is None:
+            continue
+        if report.throughput < previous["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{report.name}: throughput {report.throughput:.1f} < baseline {previous['throughput']:.1f} req/s"
+            )
+        if report.p99 > previous["p99"] * (1 + tolerance):
+            regressions.append(
+                f"{report.name}: p99 {report.p99 * 1000:.1f} > baseline {previous['p99'] * 1000:.1f} ms"
+            )
+    return regressions
@@ -0,0 +1,241 @@
+"""
+Persistent memoization of validated agent results.
+
+Re-running an extraction or planning job over the same inputs (evals,
+backfills, a rerun after a crash) would otherwise pay the provider for every
+call again. `ResultMemo` stores each validated result in a SQLite file keyed
+by a content hash of everything that determines it: the model, the system
+prompt, the result type's JSON schema and the input. Changing any of them
+changes the key, so stale results are never returned; they simply age out.
+
+The file survives restarts and may be shared by several processes: it runs in
+WAL mode, so readers never block writers, and concurrent writers wait on a
+busy timeout instead of failing. Once the stored results outgrow `max_bytes`,
+the least recently used ones are evicted. In replay mode the file is opened
+read-only and a miss raises `MemoMissError` instead of calling the model,
+which makes test runs repeatable and free.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Literal, Optional, Sequence, Type, TypeVar
+
+from loguru import logger
+from pydantic import ValidationError
+
+from .config import get_settings
+from .schemas import json_schema, type_adapter, validate_json
+from .telemetry import get_telemetry
+
+T = TypeVar("T")
+
+MemoMode = Literal["readwrite", "replay"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals (id, bytes) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN
+    UPDATE totals SET bytes = bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN
+    UPDATE totals SET bytes = bytes - old.size WHERE id = 0;
+END;
+"""
+
+# Reads refresh `accessed_at` at most this often, so hot entries don't turn every hit into a write
+_TOUCH_INTERVAL = 60.0
+
+
+class MemoMissError(LookupError):
+    """Raised in replay mode when a result was never recorded."""
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_id(model: Any) -> str:
+    """Stable name of a model given as a string or a pydantic-ai `Model`, e.g. "openai:gpt-4"."""
+    if isinstance(model, str):
+        return model
+    return f"{model.system}:{model.model_name}"
+
+
+def memo_key(
+    model: Any,
+    system_prompt: str,
+    result_type: Type[Any],
+    prompt: str,
+    context: Sequence[str] = (),
+) -> str:
+    """Build the content-addressed key of one agent call.
+
+    Args:
+        model: Model name or `Model` instance
+        system_prompt: The agent's static system prompt
+        result_type: The agent's result type, e.g. `Person` or `List[Person]`
+        prompt: The exact user prompt
+        context: Any other inputs the result depends on, e.g. the caller's role
+
+    Returns:
+        Hex digest identifying the call
+    """
+    schema = json.dumps(json_schema(result_type), sort_keys=True, separators=(",", ":"))
+    parts = [model_id(model), _digest(system_prompt), _digest(schema), prompt, *context]
+    return _digest(json.dumps(parts, separators=(",", ":")))
+
+
+class ResultMemo:
+    """Disk-backed, content-addressed store of validated agent results."""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, mode: MemoMode = "readwrite"):
+        """Open (and if needed create) a memo file.
+
+        Args:
+            path: SQLite database file
+            max_bytes: Stored result bytes kept before least recently used entries are evicted
+            mode: "readwrite" records misses; "replay" opens the file read-only and
+                raises `MemoMissError` on a miss
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        if mode == "replay":
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._db = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        # One connection per memo; calls from worker threads take turns on it
+        self._lock = threading.Lock()
+        logger.info(f"Result memo opened at {path} ({mode})")
+
+    @classmethod
+    def from_settings(cls) -> Optional["ResultMemo"]:
+        """Open the memo configured in the shared settings, or None if `memo.path` is unset."""
+        memo_settings = get_settings().memo
+        if memo_settings.path is None:
+            return None
+        return cls(memo_settings.path, memo_settings.max_bytes, memo_settings.mode)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Bytes of stored results."""
+        with self._lock:
+            return self._db.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT value, accessed_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if self.mode != "replay" and now - row[1] > _TOUCH_INTERVAL:
+                self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Delete then insert so the size triggers see both the old and new entry
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.execute(
+                    "INSERT INTO results (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now),
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        while total > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM results ORDER BY accessed_at LIMIT 64").fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        logger.debug(f"Result memo evicted {evicted} entries")
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    async def get(self, key: str, result_type: Type[T]) -> Optional[T]:
+        """Return the stored result for `key`, or None.
+
+        Entries that no longer validate as `result_type` count as misses and
+        are dropped (kept in replay mode).
+        """
+        value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            return None
+        try:
+            return validate_json(result_type, value)
+        except ValidationError:
+            logger.warning(f"Discarding memoized result that no longer validates: {key}")
+            if self.mode != "replay":
+                await asyncio.to_thread(self._delete, key)
+            return None
+
+    async def set(self, key: str, result: Any, result_type: Type[Any]) -> None:
+        """Store a validated result under `key` (a no-op in replay mode)."""
+        if self.mode == "replay":
+            return
+        value = type_adapter(result_type).dump_json(result)
+        await asyncio.to_thread(self._set, key, value)
+
+    async def get_or_run(self, key: str, result_type: Type[T], run: Callable[[], Awaitable[T]]) -> T:
+        """Return the stored result for `key`, calling `run` and storing its result on a miss.
+
+        Args:
+            key: Key from `memo_key`
+            result_type: Type the result is validated as
+            run: Makes the real model call
+
+        Returns:
+            The memoized or freshly produced result
+
+        Raises:
+            MemoMissError: On a miss in replay mode
+        """
+        metrics = get_telemetry().metrics
+        result = await self.get(key, result_type)
+        if result is not None:
+            metrics.inc("agent_memo_lookups_total", outcome="hit")
+            return result
+        metrics.inc("agent_memo_lookups_total", outcome="miss")
+        if self.mode == "replay":
+            raise MemoMissError(f"No memoized result for {key} in {self.path}")
+        result = await run()
+        await self.set(key, result, result_type)
+        return result
@@ -0,0 +1,193 @@
+"""
+Provider prompt caching for the static prompt prefix.
+
+Every agent in this repo sends the same system prompt and tool definitions
+with each request. Providers can serve that prefix from a cache, which cuts
+time to first token and bills the cached input tokens at a fraction of the
+normal price:
+
+- OpenAI caches matching prefixes of 1024+ tokens automatically, so the only
+  requirement is that the static content comes first and is byte-identical
+  between requests (static system prompt, then tools, then dynamic context).
+- Anthropic only caches up to explicit `cache_control` breakpoints.
+  `CachingAnthropicModel` places them after the tool definitions and after
+  the static system prompt, and reports cache reads and writes in the usage.
+
+`CachingAnthropicModel` only overrides the public `request` /
+`request_stream` methods and wraps the Anthropic SDK client's public
+`messages.create`, so it does not depend on pydantic-ai's private helpers.
+
+Requires the `anthropic` extra.
+"""
+import contextvars
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, List, Optional
+
+from pydantic_ai.messages import ModelMessage, ModelRequest, SystemPromptPart
+from pydantic_ai.usage import Usage
+
+try:
+    from anthropic.types import RawMessageStartEvent
+    from pydantic_ai.models.anthropic import AnthropicModel
+except ImportError as exc:
+    raise ImportError("Prompt caching for Anthropic requires the 'anthropic' extra: pip install anthropic") from exc
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _cache_usage(usage: Any) -> Usage:
+    """Cached input tokens as a `Usage` to add on top of the uncached ones."""
+    read = getattr(usage, "cache_read_input_tokens", None) or 0
+    write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    if not read and not write:
+        return Usage()
+    # Anthropic's `input_tokens` excludes cached tokens; count them as input too
+    return Usage(
+        request_tokens=read + write,
+        total_tokens=read + write,
+        details={"cache_read_input_tokens": read, "cache_creation_input_tokens": write},
+    )
+
+
+@dataclass
+class _Call:
+    """One model request: its system prompt parts and the provider's usage report."""
+    system_parts: List[str] = field(default_factory=list)
+    usage: Any = None
+
+
+_call: contextvars.ContextVar[Optional[_Call]] = contextvars.ContextVar("prompt_cache_call", default=None)
+
+
+def _system_blocks(system: Any, call: Optional[_Call]) -> Any:
+    """Split the joined system prompt into blocks with breakpoints after the first and last part."""
+    if not isinstance(system, str) or not system:
+        return system
+    parts = call.system_parts if call is not None else []
+    if not parts or "".join(parts) != system:
+        parts = [system]  # not the parts we expected; still cache the whole prompt
+    blocks = [{"type": "text", "text": content} for content in parts]
+    blocks[0]["cache_control"] = CACHE_CONTROL
+    blocks[-1]["cache_control"] = CACHE_CONTROL
+    return blocks
+
+
+class _RecordingStream:
+    """Anthropic event stream that records the usage of its `message_start` event."""
+
+    def __init__(self, stream: Any, call: Optional[_Call]):
+        self._stream = stream
+        self._call = call
+
+    async def __aenter__(self) -> "_RecordingStream":
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        return await self._stream.__aexit__(*exc_info)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        async for event in self._stream:
+            if self._call is not None and isinstance(event, RawMessageStartEvent):
+                self._call.usage = event.message.usage
+            yield event
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class _CachingMessages:
+    """`client.messages` with cache breakpoints added to every `create` call."""
+
+    def __init__(self, messages: Any):
+        self._messages = messages
+
+    async def create(self, **kwargs: Any) -> Any:
+        call = _call.get()
+        kwargs["system"] = _system_blocks(kwargs.get("system"), call)
+        tools = kwargs.get("tools")
+        if isinstance(tools, list) and tools:
+            kwargs["tools"] = [*tools[:-1], {**tools[-1], "cache_control": CACHE_CONTROL}]
+        response = await self._messages.create(**kwargs)
+        if kwargs.get("stream"):
+            return _RecordingStream(response, call)
+        if call is not None:
+            call.usage = response.usage
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._messages, name)
+
+
+class _CachingClient:
+    """Anthropic SDK client whose `messages` add cache breakpoints."""
+
+    def __init__(self, client: Any):
+        self._client = client
+        self.messages = _CachingMessages(client.messages)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class _CachedUsageStream:
+    """Streamed response whose `usage()` includes cached input tokens."""
+
+    def __init__(self, stream: Any, call: _Call):
+        self._stream = stream
+        self._call = call
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._stream.__aiter__()
+
+    def usage(self) -> Usage:
+        return self._stream.usage() + _cache_usage(self._call.usage)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+def _system_parts(messages: List[ModelMessage]) -> List[str]:
+    return [
+        part.content
+        for message in messages
+        if isinstance(message, ModelRequest)
+        for part in message.parts
+        if isinstance(part, SystemPromptPart) and part.content
+    ]
+
+
+class CachingAnthropicModel(AnthropicModel):
+    """Anthropic model that marks the static prompt prefix as cacheable.
+
+    Breakpoints go after the last tool definition (tools lead Anthropic's
+    prefix), after the first system prompt part (the agent's static prompt)
+    and after the last system prompt part, so dynamic system context such as
+    a conversation summary is cached separately from the static prompt.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.client = _CachingClient(self.client)
+
+    async def request(self, messages: List[ModelMessage], model_settings: Any, model_request_parameters: Any):
+        call = _Call(_system_parts(messages))
+        token = _call.set(call)
+        try:
+            response, usage = await super().request(messages, model_settings, model_request_parameters)
+        finally:
+            _call.reset(token)
+        return response, usage + _cache_usage(call.usage)
+
+    @asynccontextmanager
+    async def request_stream(
+        self, messages: List[ModelMessage], model_settings: Any, model_request_parameters: Any
+    ) -> AsyncIterator[Any]:
+        call = _Call(_system_parts(messages))
+        token = _call.set(call)
+        try:
+            async with super().request_stream(messages, model_settings, model_request_parameters) as stream:
+                yield _CachedUsageStream(stream, call)
+        finally:
+            _call.reset(token)
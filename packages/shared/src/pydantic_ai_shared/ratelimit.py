@@ -0,0 +1,561 @@
+"""
+Adaptive rate limiting and retry scheduling for provider calls.
+
+Every model request first takes one request and its estimated tokens from
+token buckets keyed by `provider:model`, with requests/min and tokens/min
+budgets. Estimates are settled against actual usage afterwards. Buckets adapt
+from the providers' rate-limit response headers: reported limits replace the
+configured ones when lower, remaining counts cap the local level, and
+`retry-after` pauses everyone sharing the key. Throttled or transiently
+failing requests (retryable HTTP statuses, connection errors and timeouts)
+are retried with jittered exponential backoff following the shared `retry`
+settings; SDK clients built by the registry don't retry on their own.
+
+Bucket state lives in process by default, in shared memory so the worker
+processes of one machine share a budget, or in Redis so a fleet of workers
+shares one global budget.
+"""
+import asyncio
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Protocol
+
+import httpx
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+from loguru import logger
+
+from .config import RetrySettings, get_settings
+from .telemetry import get_telemetry
+from .tokens import estimate_tokens
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+# Key of the model request in progress, so HTTP hooks can attribute response headers
+current_limit_key: ContextVar[Optional[str]] = ContextVar("current_limit_key", default=None)
+
+
+def backoff_delay(attempt: int, retry: Optional[RetrySettings] = None) -> float:
+    """Jittered exponential backoff before the next attempt.
+
+    Args:
+        attempt: Attempts made so far (1 after the first failure)
+        retry: Retry policy (defaults to the shared `retry` settings)
+
+    Returns:
+        Delay in seconds
+    """
+    retry = retry or get_settings().retry
+    delay = min(retry.max_backoff, retry.initial_backoff * 2 ** (attempt - 1))
+    return delay * (1 - retry.jitter * random.random())
+
+
+def retry_reason(exc: BaseException) -> Optional[str]:
+    """Why a failed request may be retried, or None if it should not be.
+
+    Args:
+        exc: Error raised by the model request
+
+    Returns:
+        The HTTP status for retryable statuses, 'timeout' or 'connection' for
+        transport failures, otherwise None
+    """
+    if isinstance(exc, ModelHTTPError):
+        return str(exc.status_code) if exc.status_code in RETRYABLE_STATUS_CODES else None
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.TransportError):
+        return "connection"
+    # The SDKs wrap transport failures in their own types; only check SDKs already loaded
+    for sdk in ("openai", "anthropic"):
+        module = sys.modules.get(sdk)
+        if module is None:
+            continue
+        if isinstance(exc, module.APITimeoutError):
+            return "timeout"
+        if isinstance(exc, module.APIConnectionError):
+            return "connection"
+    return None
+
+
+def estimate_request_tokens(messages: List[ModelMessage], output_tokens: int) -> int:
+    """Estimate the tokens a request will consume before sending it.
+
+    Args:
+        messages: Messages sent to the model
+        output_tokens: Tokens reserved for the response
+
+    Returns:
+        Estimated prompt plus response tokens
+    """
+    tokens = output_tokens
+    for message in messages:
+        for part in message.parts:
+            content = getattr(part, "content", None)
+            if isinstance(content, str):
+                tokens += estimate_tokens(content)
+            args = getattr(part, "args", None)
+            if args is not None:
+                tokens += estimate_tokens(args if isinstance(args, str) else str(args))
+    return tokens
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """Seconds until a rate-limit window resets.
+
+    Accepts OpenAI durations ('6m0s', '120ms'), plain seconds and RFC 3339
+    timestamps (Anthropic).
+    """
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    matches = _DURATION.findall(value)
+    if matches and "".join(number + unit for number, unit in matches) == value:
+        return sum(float(number) * _UNITS[unit] for number, unit in matches)
+    try:
+        return max(0.0, datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - time.time())
+    except ValueError:
+        return None
+
+
+@dataclass
+class RateLimitInfo:
+    """Rate-limit state reported by a provider response."""
+    request_limit: Optional[int] = None
+    token_limit: Optional[int] = None
+    requests_remaining: Optional[int] = None
+    tokens_remaining: Optional[int] = None
+    retry_after: Optional[float] = None
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "RateLimitInfo":
+        """Parse OpenAI (`x-ratelimit-*`) and Anthropic (`anthropic-ratelimit-*`) headers."""
+
+        def number(*names: str) -> Optional[int]:
+            for name in names:
+                value = headers.get(name)
+                if value is not None:
+                    try:
+                        return int(float(value))
+                    except ValueError:
+                        return None
+            return None
+
+        retry_after = headers.get("retry-after")
+        return cls(
+            request_limit=number("x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit"),
+            token_limit=number("x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit"),
+            requests_remaining=number("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining"),
+            tokens_remaining=number("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining"),
+            retry_after=parse_reset(retry_after) if retry_after else None,
+        )
+
+
+class BucketStore(Protocol):
+    """Storage for token bucket levels.
+
+    Buckets refill continuously at `rate` units per second up to `capacity`.
+    """
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """Take `cost` units if available.
+
+        A cost above the capacity is granted from a full bucket and leaves it
+        in debt, so oversized requests still go through.
+
+        Returns:
+            0.0 when taken, otherwise the seconds to wait before trying again
+        """
+        ...
+
+    async def adjust(self, key: str, delta: float, rate: float, capacity: float) -> None:
+        """Add (or with a negative delta, remove) units."""
+        ...
+
+    async def cap(self, key: str, level: float, rate: float, capacity: float) -> None:
+        """Lower the level to at most `level` (which may be negative to pause)."""
+        ...
+
+
+class LocalBucketStore:
+    """In-process bucket levels."""
+
+    def __init__(self):
+        self._buckets: Dict[str, List[float]] = {}  # key -> [level, updated_at]
+
+    def _refill(self, key: str, rate: float, capacity: float) -> List[float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        bucket = self._refill(key, rate, capacity)
+        needed = min(cost, capacity)
+        if bucket[0] >= needed:
+            bucket[0] -= cost
+            return 0.0
+        return (needed - bucket[0]) / rate
+
+    async def adjust(self, key: str, delta: float, rate: float, capacity: float) -> None:
+        bucket = self._refill(key, rate, capacity)
+        bucket[0] = min(capacity, bucket[0] + delta)
+
+    async def cap(self, key: str, level: float, rate: float, capacity: float) -> None:
+        bucket = self._refill(key, rate, capacity)
+        bucket[0] = min(bucket[0], level)
+
+
+class SharedMemoryBucketStore:
+    """Bucket levels in shared memory, shared by the processes of one machine.
+
+    Create the store in the parent before starting workers and pass it to
+    each (e.g. through a process pool initializer); it cannot be pickled
+    afterwards. Keys are stored as CRC-32 tags in a fixed table of `slots`.
+    """
+
+    def __init__(self, slots: int = 64, context: Any = None):
+        """Initialize the store.
+
+        Args:
+            slots: Maximum number of bucket keys
+            context: multiprocessing context the workers are started with (defaults to the default context)
+        """
+        import multiprocessing
+
+        context = context or multiprocessing.get_context()
+        self.slots = slots
+        self._lock = context.Lock()
+        self._table = context.RawArray("d", slots * 3)  # per slot: tag, level, updated_at
+
+    def _refill(self, key: str, rate: float, capacity: float) -> int:
+        """Offset of the key's slot, refilled to now; the caller holds the lock."""
+        table, now = self._table, time.monotonic()  # CLOCK_MONOTONIC is system-wide
+        tag = float(zlib.crc32(key.encode()) + 1)  # 0 marks a free slot
+        for probe in range(self.slots):
+            offset = (int(tag) + probe) % self.slots * 3
+            if table[offset] == tag:
+                table[offset + 1] = min(capacity, table[offset + 1] + (now - table[offset + 2]) * rate)
+                table[offset + 2] = now
+                return offset
+            if table[offset] == 0:
+                table[offset], table[offset + 1], table[offset + 2] = tag, capacity, now
+                return offset
+        raise RuntimeError(f"SharedMemoryBucketStore is full ({self.slots} keys)")
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        with self._lock:
+            offset = self._refill(key, rate, capacity)
+            needed = min(cost, capacity)
+            if self._table[offset + 1] >= needed:
+                self._table[offset + 1] -= cost
+                return 0.0
+            return (needed - self._table[offset + 1]) / rate
+
+    async def adjust(self, key: str, delta: float, rate: float, capacity: float) -> None:
+        with self._lock:
+            offset = self._refill(key, rate, capacity)
+            self._table[offset + 1] = min(capacity, self._table[offset + 1] + delta)
+
+    async def cap(self, key: str, level: float, rate: float, capacity: float) -> None:
+        with self._lock:
+            offset = self._refill(key, rate, capacity)
+            self._table[offset + 1] = min(self._table[offset + 1], level)
+
+
+_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local op = ARGV[3]
+local amount = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'level', 'updated')
+local level = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+level = math.min(capacity, level + (now - updated) * rate)
+local wait = 0
+if op == 'take' then
+    local needed = math.min(amount, capacity)
+    if level >= needed then level = level - amount else wait = (needed - level) / rate end
+elseif op == 'adjust' then
+    level = math.min(capacity, level + amount)
+else
+    level = math.min(level, amount)
+end
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Bucket levels shared through Redis (requires the `redis` extra).
+
+    Updates run atomically in a Lua script using the Redis server clock, so
+    workers on different hosts share one budget.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379", client=None, prefix: str = "ratelimit"):
+        """Initialize the store.
+
+        Args:
+            url: Redis connection URL (ignored when `client` is given)
+            client: An existing `redis.asyncio.Redis` client to reuse
+            prefix: Key prefix for bucket hashes
+        """
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as exc:
+                raise ImportError("RedisBucketStore requires the 'redis' extra: pip install redis") from exc
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_BUCKET_SCRIPT)
+
+    async def _call(self, key: str, op: str, amount: float, rate: float, capacity: float) -> float:
+        result = await self._script(keys=[f"{self.prefix}:{key}"], args=[rate, capacity, op, amount])
+        return float(result)
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        return await self._call(key, "take", cost, rate, capacity)
+
+    async def adjust(self, key: str, delta: float, rate: float, capacity: float) -> None:
+        await self._call(key, "adjust", delta, rate, capacity)
+
+    async def cap(self, key: str, level: float, rate: float, capacity: float) -> None:
+        await self._call(key, "cap", level, rate, capacity)
+
+
+@dataclass
+class LimitStats:
+    """Counters for one `provider:model` key."""
+    requests: int = 0
+    throttled: int = 0  # requests that had to wait for budget
+    waited: float = 0.0  # total seconds spent waiting
+    retries: int = 0
+    rate_limited: int = 0  # 429 responses
+
+
+class RateLimiter:
+    """Requests/min and tokens/min budgets per `provider:model` key."""
+
+    def __init__(self, store: Optional[BucketStore] = None):
+        """Initialize the limiter.
+
+        Args:
+            store: Where bucket levels live (defaults to in-process)
+        """
+        self.store = store or LocalBucketStore()
+        self.stats: Dict[str, LimitStats] = {}
+        self._learned: Dict[str, Dict[str, int]] = {}
+
+    def limits(self, key: str) -> Dict[str, int]:
+        """Effective per-minute limits for a key, e.g. `{'requests': 500, 'tokens': 30000}`.
+
+        Configured provider limits apply unless a provider reported lower ones.
+        """
+        provider = key.split(":", 1)[0]
+        configured = get_settings().providers.get(provider)
+        limits: Dict[str, int] = {}
+        if configured is not None:
+            if configured.rpm:
+                limits["requests"] = configured.rpm
+            if configured.tpm:
+                limits["tokens"] = configured.tpm
+        for kind, learned in self._learned.get(key, {}).items():
+            limits[kind] = min(limits.get(kind, learned), learned)
+        return limits
+
+    def _stats(self, key: str) -> LimitStats:
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = LimitStats()
+        return stats
+
+    async def acquire(self, key: str, tokens: int) -> float:
+        """Wait until one request and `tokens` tokens fit the budget, then take them.
+
+        Args:
+            key: `provider:model`
+            tokens: Estimated tokens of the request
+
+        Returns:
+            Seconds spent waiting
+        """
+        stats = self._stats(key)
+        stats.requests += 1
+        waited = 0.0
+        for kind, cost in (("requests", 1), ("tokens", tokens)):
+            while True:
+                per_minute = self.limits(key).get(kind)
+                if per_minute is None:
+                    break
+                wait = await self.store.take(f"{key}:{kind}", cost, per_minute / 60, per_minute)
+                if wait <= 0:
+                    break
+                # Wake slightly randomized so waiters do not retry in lockstep
+                wait *= 1 + 0.1 * random.random()
+                waited += wait
+                await asyncio.sleep(wait)
+        if waited:
+            stats.throttled += 1
+            stats.waited += waited
+        return waited
+
+    async def settle(self, key: str, estimated: int, actual: Optional[int]) -> None:
+        """Refund or charge the difference between estimated and actual tokens."""
+        per_minute = self.limits(key).get("tokens")
+        if per_minute is None or actual is None or actual == estimated:
+            return
+        await self.store.adjust(f"{key}:tokens", estimated - actual, per_minute / 60, per_minute)
+
+    async def observe(self, key: str, info: RateLimitInfo) -> None:
+        """Adapt a key's buckets to rate-limit state reported by the provider."""
+        learned = self._learned.setdefault(key, {})
+        if info.request_limit:
+            learned["requests"] = info.request_limit
+        if info.token_limit:
+            learned["tokens"] = info.token_limit
+        limits = self.limits(key)
+        for kind, remaining in (("requests", info.requests_remaining), ("tokens", info.tokens_remaining)):
+            per_minute = limits.get(kind)
+            if per_minute is None:
+                continue
+            rate = per_minute / 60
+            if info.retry_after:
+                # Everyone sharing the key waits out the provider's cool-down
+                await self.store.cap(f"{key}:{kind}", -info.retry_after * rate, rate, per_minute)
+            elif remaining is not None:
+                await self.store.cap(f"{key}:{kind}", remaining, rate, per_minute)
+
+
+class RateLimitedModel(WrapperModel):
+    """Wraps a model so requests respect the rate limiter and retry transient failures."""
+
+    def __init__(self, wrapped: Model, limiter: Optional["RateLimiter"] = None):
+        """Initialize the wrapper.
+
+        Args:
+            wrapped: The model to call
+            limiter: Rate limiter to use (defaults to the process-wide one)
+        """
+        super().__init__(wrapped)
+        self.limiter = limiter
+
+    @property
+    def limit_key(self) -> str:
+        return f"{self.wrapped.system}:{self.wrapped.model_name}"
+
+    def _estimate(self, messages: List[ModelMessage], model_settings: Any) -> int:
+        output_tokens = (model_settings or {}).get("max_tokens") or get_settings().rate_limit.output_tokens_estimate
+        return estimate_request_tokens(messages, output_tokens)
+
+    async def request(self, messages: List[ModelMessage], model_settings: Any, *args: Any, **kwargs: Any) -> Any:
+        limiter = self.limiter or get_rate_limiter()
+        key = self.limit_key
+        settings = get_settings()
+        estimated = self._estimate(messages, model_settings)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            await limiter.acquire(key, estimated)
+            token = current_limit_key.set(key)
+            try:
+                response, usage = await self.wrapped.request(messages, model_settings, *args, **kwargs)
+            except Exception as exc:
+                # A failed attempt used no tokens; give back its estimate before the next one takes it again
+                await limiter.settle(key, estimated, 0)
+                reason = retry_reason(exc)
+                if reason is None or attempt >= settings.retry.max_attempts:
+                    raise
+                stats = limiter._stats(key)
+                stats.retries += 1
+                if reason == "429":
+                    stats.rate_limited += 1
+                delay = backoff_delay(attempt, settings.retry)
+                get_telemetry().metrics.inc("agent_provider_retries_total", model=key, status=reason)
+                logger.warning(f"{key} failed ({reason}), retrying in {delay:.1f}s (attempt {attempt})")
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                current_limit_key.reset(token)
+            await limiter.settle(key, estimated, usage.total_tokens)
+            return response, usage
+
+    @asynccontextmanager
+    async def request_stream(
+        self, messages: List[ModelMessage], model_settings: Any, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        # Streams are rate limited but not retried: output may already have been consumed
+        limiter = self.limiter or get_rate_limiter()
+        key = self.limit_key
+        estimated = self._estimate(messages, model_settings)
+        await limiter.acquire(key, estimated)
+        token = current_limit_key.set(key)
+        try:
+            async with self.wrapped.request_stream(messages, model_settings, *args, **kwargs) as stream:
+                yield stream
+        finally:
+            current_limit_key.reset(token)
+        await limiter.settle(key, estimated, stream.usage().total_tokens)
+
+
+async def observe_response_headers(response: Any) -> None:
+    """httpx response hook feeding rate-limit headers to the process-wide limiter."""
+    key = current_limit_key.get()
+    if key is not None:
+        await get_rate_limiter().observe(key, RateLimitInfo.from_headers(response.headers))
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter, using the store selected by the shared settings."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                settings = get_settings()
+                store = RedisBucketStore(settings.redis_url) if settings.rate_limit.backend == "redis" else None
+                _limiter = RateLimiter(store)
+    return _limiter
+
+
+def configure_rate_limiter(store: Optional[BucketStore] = None) -> RateLimiter:
+    """Replace the process-wide rate limiter.
+
+    Args:
+        store: Where bucket levels live (defaults to in-process)
+
+    Returns:
+        The new rate limiter
+    """
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(store)
+    return _limiter
@@ -0,0 +1,317 @@
+"""
+Process-wide pooling of agents and HTTP clients.
+
+Building a `pydantic_ai.Agent` per request, each with whatever HTTP client its
+provider creates, leaks connections and repeats TLS handshakes. The registry
+hands out memoized agents keyed by (model, result type, system prompt, deps type,
+tool set) and shares one pooled `httpx.AsyncClient` per provider.
+
+Agents for model names are kept for the life of the registry. Agents for model
+instances are keyed by the instance and kept in a bounded LRU, so callers that
+build a model per request don't grow the registry without bound.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple, Type, Union
+
+import httpx
+from pydantic_ai import Agent
+from pydantic_ai.models import Model
+from loguru import logger
+
+from .config import HttpSettings, Settings, get_settings, on_reload
+from .ratelimit import RateLimitedModel, observe_response_headers
+from .tracing import TracedModel
+
+if TYPE_CHECKING:
+    from .tools import ToolSet
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    """Connection pool settings for provider HTTP clients."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    timeout: float = 600.0
+    connect_timeout: float = 5.0
+
+    @classmethod
+    def from_settings(cls, http: HttpSettings) -> "PoolLimits":
+        """Build pool limits from the shared HTTP settings."""
+        return cls(**http.model_dump())
+
+
+@dataclass
+class ClientStats:
+    """Connection usage of one provider's HTTP client."""
+    provider: str
+    connections: int = 0
+    idle_connections: int = 0
+    requests: int = 0
+
+
+@dataclass
+class RegistryStats:
+    """Snapshot of registry usage."""
+    agents: int = 0
+    agent_hits: int = 0
+    agent_misses: int = 0
+    clients: Dict[str, ClientStats] = field(default_factory=dict)
+
+
+class AgentRegistry:
+    """Memoizes agents and shares one pooled HTTP client per provider."""
+
+    def __init__(self, limits: Optional[PoolLimits] = None, max_instance_agents: int = 128):
+        """Initialize the registry.
+
+        Args:
+            limits: Connection pool settings applied to every provider client
+                (defaults to the shared HTTP settings)
+            max_instance_agents: Agents kept for model instances (as opposed to
+                model names) before the least recently used one is dropped
+        """
+        self.limits = limits or PoolLimits.from_settings(get_settings().http)
+        self.limits_from_settings = limits is None  # follow `http` settings on reload
+        self.max_instance_agents = max_instance_agents
+        self._agents: Dict[Tuple[Hashable, ...], Agent] = {}
+        # Models are unhashable dataclasses, so instances are keyed by id(); each
+        # entry keeps its model alive so the id can't be reused while it is cached
+        self._instance_agents: "OrderedDict[Tuple[Hashable, ...], Tuple[Model, Agent]]" = OrderedDict()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._retired: List[httpx.AsyncClient] = []  # replaced clients still used by older agents
+        self._requests: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def http_client(self, provider: str) -> httpx.AsyncClient:
+        """Get the shared HTTP client for a provider, creating it on first use.
+
+        Args:
+            provider: Provider name, e.g. 'openai'
+
+        Returns:
+            A pooled async HTTP client
+        """
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is None or client.is_closed:
+                client = self._build_client(provider)
+                self._clients[provider] = client
+            return client
+
+    def set_limits(self, limits: PoolLimits) -> None:
+        """Switch to new connection pool settings.
+
+        Agents handed out later get new pooled clients. Agents already in use
+        keep their clients, which stay open until `aclose`.
+        """
+        with self._lock:
+            if limits == self.limits:
+                return
+            self.limits = limits
+            self._retired.extend(self._clients.values())
+            self._clients.clear()
+            self._agents.clear()
+            self._instance_agents.clear()
+        logger.info(f"Connection pool limits changed to {limits}")
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        limits = self.limits
+        if limits.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError as exc:
+                raise ImportError("HTTP/2 pooling requires the 'h2' package: pip install httpx[http2]") from exc
+
+        async def count_request(request: httpx.Request) -> None:
+            self._requests[provider] = self._requests.get(provider, 0) + 1
+
+        provider_settings = get_settings().providers.get(provider)
+        timeout = provider_settings.timeout if provider_settings else limits.timeout
+
+        logger.debug(f"Creating pooled HTTP client for {provider}")
+        return httpx.AsyncClient(
+            http2=limits.http2,
+            limits=httpx.Limits(
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout=timeout, connect=limits.connect_timeout),
+            event_hooks={"request": [count_request], "response": [observe_response_headers]},
+        )
+
+    def model(self, model: Union[str, Model]) -> Union[str, Model]:
+        """Resolve a model name to a model backed by the pooled client.
+
+        Args:
+            model: Model identifier like 'openai:gpt-4', or a model instance
+
+        Returns:
+            A model instance for pooled providers, otherwise `model` unchanged
+        """
+        if not isinstance(model, str) or ":" not in model:
+            return model
+        provider, model_name = model.split(":", 1)
+        if provider == "openai":
+            from openai import AsyncOpenAI
+            from pydantic_ai.models.openai import OpenAIModel
+            from pydantic_ai.providers.openai import OpenAIProvider
+
+            # A dedicated SDK client without retries: they are scheduled by RateLimitedModel
+            client = AsyncOpenAI(http_client=self.http_client(provider), max_retries=0)
+            return OpenAIModel(model_name, provider=OpenAIProvider(openai_client=client))
+        if provider == "anthropic":
+            from anthropic import AsyncAnthropic
+            from pydantic_ai.models.anthropic import AnthropicModel
+            from pydantic_ai.providers.anthropic import AnthropicProvider
+
+            from .prompt_cache import CachingAnthropicModel
+
+            client = AsyncAnthropic(http_client=self.http_client(provider), max_retries=0)
+            anthropic_provider = AnthropicProvider(anthropic_client=client)
+            provider_settings = get_settings().providers.get(provider)
+            if provider_settings is not None and not provider_settings.prompt_cache:
+                return AnthropicModel(model_name, provider=anthropic_provider)
+            return CachingAnthropicModel(model_name, provider=anthropic_provider)
+        return model
+
+    def agent(
+        self,
+        model: Union[str, Model],
+        result_type: Type[Any] = str,
+        system_prompt: str = "",
+        deps_type: Type[Any] = type(None),
+        toolset: Optional["ToolSet"] = None,
+        **kwargs: Any,
+    ) -> Agent:
+        """Get a memoized agent, building it on first request.
+
+        Agents are safe to share: each `run` keeps its own state.
+
+        Args:
+            model: Model identifier or instance
+            result_type: Structured result type of the agent
+            system_prompt: Static system prompt; keep per-request context out of it
+                so the provider's prompt cache can serve the shared prefix
+            deps_type: Dependency type passed to tools and prompts
+            toolset: Tools the agent may call; part of the key, since tools
+                cannot be added to a shared agent later
+            **kwargs: Extra `Agent` arguments; these must not vary between callers
+                sharing the same key
+
+        Returns:
+            The shared agent for this configuration
+        """
+        by_name = isinstance(model, str)
+        key = (model if by_name else id(model), result_type, system_prompt, deps_type, toolset)
+        with self._lock:
+            agent = self._lookup(key, by_name)
+            if agent is not None:
+                self._hits += 1
+                return agent
+            self._misses += 1
+        resolved = self.model(model)
+        if isinstance(resolved, Model):
+            # Rate limit and retry each request; trace every attempt when telemetry is enabled
+            resolved = RateLimitedModel(TracedModel(resolved))
+        agent = Agent(
+            resolved,
+            result_type=result_type,
+            system_prompt=system_prompt,
+            deps_type=deps_type,
+            tools=toolset.tools() if toolset is not None else (),
+            **kwargs,
+        )
+        with self._lock:
+            # Another thread may have raced us; keep the first agent registered
+            existing = self._lookup(key, by_name)
+            if existing is not None:
+                return existing
+            if by_name:
+                self._agents[key] = agent
+            else:
+                self._instance_agents[key] = (model, agent)
+                while len(self._instance_agents) > self.max_instance_agents:
+                    self._instance_agents.popitem(last=False)
+            return agent
+
+    def _lookup(self, key: Tuple[Hashable, ...], by_name: bool) -> Optional[Agent]:
+        if by_name:
+            return self._agents.get(key)
+        entry = self._instance_agents.get(key)
+        if entry is None:
+            return None
+        self._instance_agents.move_to_end(key)
+        return entry[1]
+
+    def stats(self) -> RegistryStats:
+        """Take a snapshot of agent and connection pool usage."""
+        with self._lock:
+            agents = len(self._agents) + len(self._instance_agents)
+            stats = RegistryStats(agents=agents, agent_hits=self._hits, agent_misses=self._misses)
+            for provider, client in self._clients.items():
+                client_stats = ClientStats(provider=provider, requests=self._requests.get(provider, 0))
+                # httpx does not expose pool usage publicly; read it from the transport when available
+                pool = getattr(getattr(client, "_transport", None), "_pool", None)
+                for connection in getattr(pool, "connections", []):
+                    client_stats.connections += 1
+                    if connection.is_idle():
+                        client_stats.idle_connections += 1
+                stats.clients[provider] = client_stats
+            return stats
+
+    async def aclose(self) -> None:
+        """Close all pooled HTTP clients and forget memoized agents."""
+        with self._lock:
+            clients = [*self._clients.values(), *self._retired]
+            self._clients.clear()
+            self._retired.clear()
+            self._agents.clear()
+            self._instance_agents.clear()
+        for client in clients:
+            await client.aclose()
+
+
+_default_registry: Optional[AgentRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> AgentRegistry:
+    """Get the process-wide registry, creating it on first use."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = AgentRegistry()
+        return _default_registry
+
+
+def configure_registry(limits: PoolLimits) -> AgentRegistry:
+    """Replace the process-wide registry with one using new pool limits.
+
+    Call this at startup, before any agent is created.
+
+    Args:
+        limits: Connection pool settings
+
+    Returns:
+        The new process-wide registry
+    """
+    global _default_registry
+    with _default_lock:
+        _default_registry = AgentRegistry(limits)
+        return _default_registry
+
+
+@on_reload
+def _apply_http_settings(settings: Settings) -> None:
+    """Apply reloaded `http` settings to the process-wide registry."""
+    with _default_lock:
+        registry = _default_registry
+    if registry is not None and registry.limits_from_settings:
+        registry.set_limits(PoolLimits.from_settings(settings.http))
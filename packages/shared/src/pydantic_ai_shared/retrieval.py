@@ -0,0 +1,642 @@
+"""
+Local document retrieval for retrieval-augmented agents.
+
+Documents (markdown, plain text or text extracted from PDFs) are split into
+overlapping chunks, embedded with a pluggable local `Embedder` and stored in a
+`VectorIndex` directory:
+
+- `vectors.f32`: chunk embeddings as raw float32 rows, appended in place
+- `chunks.jsonl` / `chunks.idx`: chunk text and the byte offset of each line
+- `ivf-<generation>.*`: the optional inverted-file index (centroids, ids by
+  list, offsets), written under new names by every build
+- `manifest.json`: row count, document hashes, deletions and the current IVF
+  generation, replaced atomically after every write, so a crash never
+  exposes a partial batch
+
+Readers only map what the manifest describes, and no writer overwrites or
+shrinks those bytes: appends go past the recorded end, and rebuilt files get
+new names (or are swapped in with `os.replace`). Chunk text is read through a
+map as well, never by reopening the path, so other processes can keep their
+maps (e.g. pre-forked service workers) while an index is updated or compacted.
+
+Opening an index memory-maps these files read-only: startup cost does not grow
+with the corpus and pages are loaded on first touch. Builds are incremental:
+unchanged documents are skipped, changed ones are re-embedded and their old
+rows masked out until `compact()`.
+
+Search is exact (a matrix-vector product over every row) or approximate with
+IVF: k-means centroids partition the rows and only the `nprobe` closest lists
+are scanned. Rows added after the IVF build are always scanned exactly.
+
+Requires the `retrieval` extra (numpy).
+"""
+import asyncio
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Protocol, Sequence, Tuple
+
+from pydantic import BaseModel
+from loguru import logger
+
+from .config import get_settings
+
+try:
+    import numpy as np
+except ImportError as exc:
+    raise ImportError("Document retrieval requires the 'retrieval' extra: pip install numpy") from exc
+
+_HEADING = re.compile(r"^#{1,6}\s")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+_IVF_SUFFIXES = ("centroids.f32", "ids.i64", "offsets.i64")
+
+ASSIGN_BLOCK = 65_536  # rows per block when assigning rows to IVF lists
+IVF_MIN_ROWS = 10_000  # smaller indexes are searched exactly
+
+
+def _ivf_file(suffix: str, generation: Optional[int]) -> str:
+    # Indexes built before IVF files were versioned have no generation
+    return f"ivf-{generation}.{suffix}" if generation else f"ivf.{suffix}"
+
+
+def chunk_text(text: str, max_chars: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+    """Split a document into chunks of at most about `max_chars` characters.
+
+    Paragraphs are packed together until the limit; longer paragraphs are split
+    at sentence and then word boundaries. Each chunk repeats the last `overlap`
+    characters of the previous one and starts with the nearest markdown
+    heading, so a chunk is understandable on its own.
+
+    Args:
+        text: The document text
+        max_chars: Chunk size limit (defaults to `retrieval.chunk_chars`)
+        overlap: Characters carried over between chunks (defaults to `retrieval.chunk_overlap`)
+
+    Returns:
+        The chunks in document order
+    """
+    settings = get_settings().retrieval
+    max_chars = max_chars or settings.chunk_chars
+    overlap = min(overlap if overlap is not None else settings.chunk_overlap, max_chars // 2)
+
+    chunks: List[str] = []
+    heading = ""
+    current: List[str] = []
+    size = 0
+    fresh = False  # whether `current` holds text not yet in a chunk
+
+    def flush() -> None:
+        nonlocal current, size, fresh
+        body = "\n\n".join(current)
+        if heading and not body.startswith(heading):
+            body = f"{heading}\n\n{body}"
+        chunks.append(body)
+        tail = body[-overlap:] if overlap else ""
+        tail = tail[tail.find(" ") + 1:] if " " in tail else tail
+        current, size, fresh = ([tail], len(tail), False) if tail else ([], 0, False)
+
+    for block in _blocks(text, max_chars - overlap):
+        if _HEADING.match(block):
+            if fresh:
+                flush()
+            current, size = [], 0  # sections do not overlap
+            heading = block.splitlines()[0]
+        elif fresh and size + len(block) + 2 > max_chars:
+            flush()
+        current.append(block)
+        size += len(block) + 2
+        fresh = True
+    if fresh:
+        flush()
+    return chunks
+
+
+def _blocks(text: str, limit: int) -> Iterable[str]:
+    """Paragraphs of `text`, with paragraphs longer than `limit` split further."""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= limit:
+            yield paragraph
+            continue
+        piece = ""
+        for unit in _SENTENCE_END.split(paragraph):
+            words = [unit] if len(unit) <= limit else unit.split()
+            for word in words:
+                if piece and len(piece) + len(word) + 1 > limit:
+                    yield piece
+                    piece = ""
+                piece = f"{piece} {word}" if piece else word
+        if piece:
+            yield piece
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalized float32 vectors of `dim` dimensions."""
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray": ...
+
+
+class HashingEmbedder:
+    """Dependency-free embedder hashing word unigrams and bigrams into `dim` buckets.
+
+    Good enough for keyword-heavy internal docs and for tests and benchmarks;
+    swap in a neural embedder for semantic matching.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim or get_settings().retrieval.dim
+        self.name = f"hashing-{self.dim}"
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in pairwise(words)]
+            for feature in features:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Local neural embedder backed by `sentence-transformers`."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", device: Optional[str] = None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as exc:
+            raise ImportError(
+                "SentenceTransformerEmbedder requires sentence-transformers: pip install sentence-transformers"
+            ) from exc
+        self.model = SentenceTransformer(model_name, device=device)
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SearchHit(BaseModel):
+    """A chunk matching a query."""
+    source: str
+    position: int  # chunk number within the source document
+    text: str
+    score: float  # cosine similarity
+
+
+@dataclass
+class IngestStats:
+    """Outcome of an incremental build."""
+    added: int = 0  # new documents
+    replaced: int = 0  # changed documents re-embedded
+    skipped: int = 0  # unchanged documents
+    chunks: int = 0  # rows written
+
+
+class VectorIndex:
+    """Append-only, memory-mapped vector store with exact and IVF search."""
+
+    def __init__(self, path: os.PathLike, dim: int, embedder_name: str = ""):
+        """Open the index at `path`, creating it if needed.
+
+        Args:
+            path: Index directory
+            dim: Vector dimensions
+            embedder_name: Embedder the vectors came from; opening an index
+                built by a different embedder raises ValueError
+
+        Raises:
+            ValueError: If the index on disk has other dimensions or embedder
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = {"dim": dim, "embedder": embedder_name, "count": 0, "sources": {}, "deleted": [], "ivf": None}
+        elif manifest["dim"] != dim or (embedder_name and manifest["embedder"] != embedder_name):
+            raise ValueError(
+                f"Index at {self.path} holds {manifest['dim']}-d vectors from {manifest['embedder']!r}, "
+                f"not {dim}-d vectors from {embedder_name!r}"
+            )
+        self.manifest = manifest
+        self.dim = dim
+        self._map()
+
+    @property
+    def count(self) -> int:
+        """Rows in the index, including deleted ones."""
+        return self.manifest["count"]
+
+    @property
+    def live_count(self) -> int:
+        """Rows that can be returned by a search."""
+        return self.count - sum(end - start for start, end in self.manifest["deleted"])
+
+    def _file(self, name: str) -> Path:
+        return self.path / name
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._file("manifest.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self) -> None:
+        self._replace("manifest.json", json.dumps(self.manifest).encode("utf-8"))
+
+    def _replace(self, name: str, data: bytes) -> None:
+        """Write a whole file under a temporary name and swap it in atomically."""
+        temporary = self._file(f"{name}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, self._file(name))
+
+    def _memmap(self, name: str, dtype: Any, shape: Tuple[int, ...]) -> "np.ndarray":
+        if math.prod(shape) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    def _map(self) -> None:
+        """(Re)map the files, zero copy, as described by the manifest."""
+        count = self.count
+        self.vectors = self._memmap("vectors.f32", np.float32, (count, self.dim))
+        self.offsets = self._memmap("chunks.idx", np.int64, (count,))
+        self._chunks = self._map_chunks() if count else None
+        mask = np.ones(count, dtype=bool)
+        for start, end in self.manifest["deleted"]:
+            mask[start:end] = False
+        self._live = None if mask.all() else mask
+        ivf = self.manifest["ivf"]
+        if ivf is None:
+            self.centroids = self.list_ids = self.list_offsets = None
+        else:
+            generation = ivf.get("generation")
+            self.centroids = self._memmap(_ivf_file("centroids.f32", generation), np.float32, (ivf["nlist"], self.dim))
+            self.list_ids = self._memmap(_ivf_file("ids.i64", generation), np.int64, (ivf["count"],))
+            self.list_offsets = self._memmap(_ivf_file("offsets.i64", generation), np.int64, (ivf["nlist"] + 1,))
+
+    def _map_chunks(self) -> mmap.mmap:
+        """Map chunks.jsonl; the map keeps this version readable after `compact` replaces the file."""
+        with open(self._file("chunks.jsonl"), "rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _append(self, name: str, end: int, data: bytes) -> None:
+        """Write `data` at the manifest's end of a file.
+
+        Bytes past `end` were left by a write that never reached the manifest;
+        they are overwritten rather than truncated, because shrinking a file
+        other processes have mapped makes their reads fault.
+        """
+        file = self._file(name)
+        with open(file, "r+b" if file.exists() else "wb") as handle:
+            handle.seek(end)
+            handle.write(data)
+
+    def _remove_stale_ivf(self) -> None:
+        """Unlink IVF files of other generations; processes that mapped them keep their copy."""
+        ivf = self.manifest["ivf"]
+        current = {_ivf_file(suffix, ivf.get("generation")) for suffix in _IVF_SUFFIXES} if ivf else set()
+        for file in self.path.glob("ivf[.-]*"):
+            if file.name not in current:
+                file.unlink(missing_ok=True)
+
+    def add(self, source: str, digest: str, texts: Sequence[str], vectors: "np.ndarray") -> None:
+        """Append the chunks of one document, replacing its previous version.
+
+        Args:
+            source: Document identifier, e.g. its path
+            digest: Content hash used to skip unchanged documents
+            texts: Chunk texts
+            vectors: One normalized row per chunk
+        """
+        if vectors.shape != (len(texts), self.dim):
+            raise ValueError(f"Expected {len(texts)} x {self.dim} vectors, got {vectors.shape}")
+        with self._lock:
+            start = self.count
+            chunk_bytes = int(self.offsets[-1]) + len(self._line(start - 1)) if start else 0
+
+            lines = [
+                (json.dumps({"source": source, "position": i, "text": text}) + "\n").encode("utf-8")
+                for i, text in enumerate(texts)
+            ]
+            offsets = np.cumsum([chunk_bytes] + [len(line) for line in lines[:-1]], dtype=np.int64)
+            self._append("vectors.f32", start * self.dim * 4, np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            self._append("chunks.idx", start * 8, offsets.tobytes() if lines else b"")
+            self._append("chunks.jsonl", chunk_bytes, b"".join(lines))
+
+            previous = self.manifest["sources"].get(source)
+            if previous is not None:
+                self.manifest["deleted"].append(previous["rows"])
+            self.manifest["sources"][source] = {"hash": digest, "rows": [start, start + len(texts)]}
+            self.manifest["count"] = start + len(texts)
+            self._write_manifest()
+            self._map()
+
+    def remove(self, source: str) -> bool:
+        """Mask out a document's rows; returns False if it was not indexed."""
+        with self._lock:
+            previous = self.manifest["sources"].pop(source, None)
+            if previous is None:
+                return False
+            self.manifest["deleted"].append(previous["rows"])
+            self._write_manifest()
+            self._map()
+            return True
+
+    def digest(self, source: str) -> Optional[str]:
+        """Content hash of the indexed version of a document."""
+        entry = self.manifest["sources"].get(source)
+        return entry["hash"] if entry else None
+
+    def _line(self, row: int) -> bytes:
+        chunks = self._chunks
+        start = int(self.offsets[row])
+        end = chunks.find(b"\n", start)
+        return chunks[start:end + 1 if end >= 0 else len(chunks)]
+
+    def chunk(self, row: int) -> Dict[str, Any]:
+        """Source, position and text of a row."""
+        return json.loads(self._line(row))
+
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, sample: int = 64, seed: int = 0) -> None:
+        """Partition the rows into `nlist` lists with spherical k-means.
+
+        Args:
+            nlist: Number of lists (defaults to the square root of the row count)
+            iterations: k-means iterations
+            sample: Training rows per list (k-means runs on a sample)
+            seed: Random seed for the sample and initial centroids
+        """
+        with self._lock:
+            count = self.count
+            if count == 0:
+                return
+            nlist = max(1, min(count, nlist or int(math.sqrt(count))))
+            rng = np.random.default_rng(seed)
+            training = np.asarray(self.vectors[np.sort(rng.choice(count, min(count, nlist * sample), replace=False))])
+            centroids = training[rng.choice(len(training), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(training @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, training)
+                empty = np.bincount(assignment, minlength=nlist) == 0
+                sums[empty] = centroids[empty]  # keep centroids that attracted no rows
+                centroids = _normalize(sums)
+
+            assignment = np.empty(count, dtype=np.int64)
+            for start in range(0, count, ASSIGN_BLOCK):
+                block = np.asarray(self.vectors[start:start + ASSIGN_BLOCK])
+                assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            order = np.argsort(assignment, kind="stable").astype(np.int64)
+            offsets = np.searchsorted(assignment[order], np.arange(nlist + 1)).astype(np.int64)
+
+            previous = self.manifest["ivf"]
+            generation = (previous.get("generation") or 0) + 1 if previous else 1
+            for suffix, data in zip(_IVF_SUFFIXES, (centroids.astype(np.float32), order, offsets), strict=True):
+                self._replace(_ivf_file(suffix, generation), data.tobytes())
+            self.manifest["ivf"] = {"nlist": nlist, "count": count, "generation": generation}
+            self._write_manifest()
+            self._map()
+            self._remove_stale_ivf()
+        logger.info(f"Built IVF index over {count} rows with {nlist} lists")
+
+    def search(self, query: "np.ndarray", k: int, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Rows most similar to a normalized query vector.
+
+        Args:
+            query: Query vector of `dim` dimensions
+            k: Number of results
+            nprobe: IVF lists to scan; None (or no IVF built) searches exactly
+
+        Returns:
+            (row, cosine similarity) pairs, best first
+        """
+        vectors, live = self.vectors, self._live
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        if nprobe is None or self.centroids is None:
+            scores = vectors @ query
+            candidates = None
+        else:
+            candidates = self._candidates(query, nprobe)
+            scores = vectors[candidates] @ query
+        if live is not None:
+            scores = np.where(live if candidates is None else live[candidates], scores, -np.inf)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return [(int(row), float(scores[i])) for row, i in zip(rows, top, strict=True) if np.isfinite(scores[i])]
+
+    def _candidates(self, query: "np.ndarray", nprobe: int) -> "np.ndarray":
+        """Rows in the `nprobe` closest lists plus rows added since the IVF build."""
+        centroids, list_ids, offsets = self.centroids, self.list_ids, self.list_offsets
+        nprobe = min(nprobe, len(centroids))
+        probe = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+        parts = [list_ids[offsets[i]:offsets[i + 1]] for i in probe]
+        indexed = self.manifest["ivf"]["count"]
+        if indexed < self.count:
+            parts.append(np.arange(indexed, self.count, dtype=np.int64))
+        return np.sort(np.concatenate(parts))  # sorted rows read the memory map sequentially
+
+    def compact(self) -> None:
+        """Rewrite the index without deleted rows (drops the IVF lists)."""
+        with self._lock:
+            if self._live is None:
+                return
+            keep = np.flatnonzero(self._live)
+            remap = np.full(self.count, -1, dtype=np.int64)
+            remap[keep] = np.arange(len(keep))
+            lines = [self._line(int(row)) for row in keep]
+            vectors = np.asarray(self.vectors[keep])
+            offsets = np.cumsum([0] + [len(line) for line in lines[:-1]], dtype=np.int64)
+
+            for name, data in (
+                ("vectors.f32", vectors.tobytes()),
+                ("chunks.idx", offsets.tobytes() if lines else b""),
+                ("chunks.jsonl", b"".join(lines)),
+            ):
+                self._replace(name, data)
+            for entry in self.manifest["sources"].values():
+                start, end = entry["rows"]
+                entry["rows"] = [int(remap[start]), int(remap[start]) + end - start]
+            self.manifest.update(count=len(keep), deleted=[], ivf=None)
+            self._write_manifest()
+            self._map()
+            self._remove_stale_ivf()
+
+
+class Retriever:
+    """Chunks, embeds, indexes and searches documents."""
+
+    def __init__(
+        self,
+        index_path: os.PathLike,
+        embedder: Optional[Embedder] = None,
+        chunk_chars: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        top_k: Optional[int] = None,
+    ):
+        """Open (or create) the index at `index_path`.
+
+        Args:
+            index_path: Index directory
+            embedder: Embedder for chunks and queries (defaults to `HashingEmbedder`)
+            chunk_chars: Chunk size limit
+            chunk_overlap: Characters carried over between chunks
+            nprobe: IVF lists scanned per query
+            top_k: Default number of results
+
+        Unset arguments default to the shared `retrieval` settings.
+        """
+        settings = get_settings().retrieval
+        self.embedder = embedder or HashingEmbedder()
+        self.chunk_chars = chunk_chars or settings.chunk_chars
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.chunk_overlap
+        self.nprobe = nprobe or settings.nprobe
+        self.top_k = top_k or settings.top_k
+        self.index = VectorIndex(index_path, self.embedder.dim, self.embedder.name)
+
+    def ingest(self, documents: Mapping[str, str], rebuild_ivf_at: float = 0.2) -> IngestStats:
+        """Index new and changed documents, skipping unchanged ones.
+
+        Args:
+            documents: Text by source identifier
+            rebuild_ivf_at: Rebuild the IVF lists once rows added since the last
+                build exceed this share of the index (only for indexes of at
+                least `IVF_MIN_ROWS` rows)
+
+        Returns:
+            What was added, replaced and skipped
+        """
+        stats = IngestStats()
+        for source, text in documents.items():
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            previous = self.index.digest(source)
+            if previous == digest:
+                stats.skipped += 1
+                continue
+            chunks = chunk_text(text, self.chunk_chars, self.chunk_overlap)
+            self.index.add(source, digest, chunks, self.embedder.embed(chunks))
+            stats.chunks += len(chunks)
+            if previous is None:
+                stats.added += 1
+            else:
+                stats.replaced += 1
+
+        ivf = self.index.manifest["ivf"]
+        unindexed = self.index.count - (ivf["count"] if ivf else 0)
+        if self.index.count >= IVF_MIN_ROWS and unindexed > rebuild_ivf_at * self.index.count:
+            self.index.build_ivf()
+        logger.info(
+            f"Ingested {stats.added} new and {stats.replaced} changed documents "
+            f"({stats.chunks} chunks), {stats.skipped} unchanged"
+        )
+        return stats
+
+    def search(self, query: str, k: Optional[int] = None, exact: bool = False) -> List[SearchHit]:
+        """Chunks most relevant to a query.
+
+        Args:
+            query: Natural-language query
+            k: Number of results (defaults to `top_k`)
+            exact: Scan every row instead of the IVF lists
+
+        Returns:
+            Matching chunks, best first
+        """
+        vector = self.embedder.embed([query])[0]
+        rows = self.index.search(vector, k or self.top_k, None if exact else self.nprobe)
+        return [SearchHit(**self.index.chunk(row), score=score) for row, score in rows]
+
+    async def asearch(self, query: str, k: Optional[int] = None) -> List[SearchHit]:
+        """`search` in a worker thread, keeping the event loop free."""
+        return await asyncio.to_thread(self.search, query, k)
+
+
+def load_documents(directory: os.PathLike, patterns: Sequence[str] = ("*.md", "*.txt", "*.pdf")) -> Dict[str, str]:
+    """Read the documents under a directory, keyed by their relative path.
+
+    PDF text extraction requires pypdf.
+    """
+    root = Path(directory)
+    documents = {}
+    for pattern in patterns:
+        for file in sorted(root.rglob(pattern)):
+            documents[str(file.relative_to(root))] = _pdf_text(file) if file.suffix == ".pdf" else file.read_text()
+    return documents
+
+
+def _pdf_text(file: Path) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise ImportError("Reading PDFs requires pypdf: pip install pypdf") from exc
+    return "\n\n".join(page.extract_text() or "" for page in PdfReader(file).pages)
+
+
+_retriever: Optional[Retriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> Optional[Retriever]:
+    """The process-wide retriever over `retrieval.index_path`, or None if unset."""
+    global _retriever
+    index_path = get_settings().retrieval.index_path
+    if index_path is None:
+        return None
+    with _retriever_lock:
+        if _retriever is None or _retriever.index.path != Path(index_path):
+            _retriever = Retriever(index_path)
+        return _retriever
+
+
+def main() -> None:
+    """Index a directory of documents: `python -m pydantic_ai_shared.retrieval docs/ --index .index`."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or update a document retrieval index")
+    parser.add_argument("directory", help="directory of .md, .txt and .pdf files")
+    parser.add_argument("--index", default=get_settings().retrieval.index_path, help="index directory")
+    parser.add_argument("--compact", action="store_true", help="drop rows of replaced documents")
+    args = parser.parse_args()
+    if args.index is None:
+        parser.error("pass --index or set RETRIEVAL__INDEX_PATH")
+
+    retriever = Retriever(args.index)
+    documents = load_documents(args.directory)
+    for source in set(retriever.index.manifest["sources"]) - set(documents):
+        retriever.index.remove(source)
+    retriever.ingest(documents)
+    if args.compact:
+        retriever.index.compact()
+        if retriever.index.count >= IVF_MIN_ROWS:
+            retriever.index.build_ivf()
+    print(f"{retriever.index.live_count} chunks from {len(documents)} documents in {args.index}")
+
+
+if __name__ == "__main__":
+    main()
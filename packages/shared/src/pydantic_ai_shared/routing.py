@@ -0,0 +1,165 @@
+"""
+Model routing with cascading escalation.
+
+A `CascadeRouter` tries a cheap, fast model first and escalates to a larger
+model only when the structured result fails validation or an acceptance check
+rejects it (e.g. low confidence). Latency, token usage and cost are tracked
+per route.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generic, List, Optional, Type, TypeVar, Union
+
+from pydantic_ai.models import Model
+from pydantic_ai.usage import Usage
+from loguru import logger
+
+from .config import get_settings
+from .registry import AgentRegistry, get_registry
+from .telemetry import traced_run
+
+if TYPE_CHECKING:
+    from .tools import ToolSet
+
+ResultT = TypeVar("ResultT")
+
+
+@dataclass(frozen=True)
+class Route:
+    """A model tier in the cascade."""
+    name: str
+    model: Union[str, Model]
+    input_cost_per_mtok: float = 0.0  # USD per million input tokens
+    output_cost_per_mtok: float = 0.0  # USD per million output tokens
+
+    @classmethod
+    def priced(cls, name: str, model: Union[str, Model]) -> "Route":
+        """Build a route priced from the shared `routing.prices` setting (free if the model is unlisted)."""
+        model_name = model if isinstance(model, str) else f"{model.system}:{model.model_name}"
+        price = get_settings().routing.prices.get(model_name)
+        if price is None:
+            logger.warning(f"No price configured for {model_name}; route '{name}' cost is not tracked")
+            return cls(name, model)
+        return cls(name, model, price.input_per_mtok, price.output_per_mtok)
+
+    def cost(self, usage: Usage) -> float:
+        """Estimate the cost of a run from its usage."""
+        return (
+            (usage.request_tokens or 0) * self.input_cost_per_mtok
+            + (usage.response_tokens or 0) * self.output_cost_per_mtok
+        ) / 1_000_000
+
+
+@dataclass
+class RouteStats:
+    """Accounting for one route."""
+    calls: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    failures: int = 0
+    total_latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+@dataclass
+class RoutedResult(Generic[ResultT]):
+    """Result of a routed run."""
+    data: ResultT
+    route: str
+    attempts: List[str] = field(default_factory=list)
+
+    @property
+    def escalated(self) -> bool:
+        return len(self.attempts) > 1
+
+
+class CascadeRouter(Generic[ResultT]):
+    """Runs a prompt through progressively stronger models until one is accepted."""
+
+    def __init__(
+        self,
+        routes: List[Route],
+        result_type: Type[ResultT],
+        system_prompt: str = "",
+        accept: Optional[Callable[[ResultT], bool]] = None,
+        deps_type: Type[Any] = type(None),
+        toolset: Optional["ToolSet"] = None,
+        registry: Optional[AgentRegistry] = None,
+    ):
+        """Initialize the router.
+
+        Args:
+            routes: Routes from cheapest to strongest; the last one is never second-guessed
+            result_type: Structured result type validated for every route
+            system_prompt: System prompt shared by all routes
+            accept: Predicate deciding whether a valid result is good enough to keep
+            deps_type: Dependency type passed to the agents
+            toolset: Tools every route's agent may call
+            registry: Agent registry (defaults to the process-wide one)
+        """
+        if not routes:
+            raise ValueError("CascadeRouter needs at least one route")
+        self.routes = routes
+        self.result_type = result_type
+        self.system_prompt = system_prompt
+        self.accept = accept or (lambda data: True)
+        self.deps_type = deps_type
+        self.toolset = toolset
+        self.registry = registry or get_registry()
+        self.stats: Dict[str, RouteStats] = {route.name: RouteStats() for route in routes}
+
+    async def run(self, prompt: str, **run_kwargs: Any) -> RoutedResult[ResultT]:
+        """Run the prompt, escalating through the routes as needed.
+
+        Args:
+            prompt: The user prompt
+            **run_kwargs: Extra arguments for `Agent.run` (e.g. `deps`)
+
+        Returns:
+            The first accepted result, or the last route's result
+
+        Raises:
+            Exception: The last route's error if every route failed
+        """
+        attempts: List[str] = []
+        for position, route in enumerate(self.routes):
+            is_last = position == len(self.routes) - 1
+            stats = self.stats[route.name]
+            agent = self.registry.agent(
+                route.model,
+                result_type=self.result_type,
+                system_prompt=self.system_prompt,
+                deps_type=self.deps_type,
+                toolset=self.toolset,
+            )
+            attempts.append(route.name)
+            stats.calls += 1
+            start = time.perf_counter()
+            try:
+                result = await traced_run(agent, prompt, f"route.{route.name}", **run_kwargs)
+            except Exception as exc:
+                stats.total_latency += time.perf_counter() - start
+                stats.failures += 1
+                if is_last:
+                    raise
+                logger.warning(f"Route '{route.name}' failed, escalating: {exc!r}")
+                continue
+
+            stats.total_latency += time.perf_counter() - start
+            usage = result.usage()
+            stats.input_tokens += usage.request_tokens or 0
+            stats.output_tokens += usage.response_tokens or 0
+            stats.cost += route.cost(usage)
+
+            # The last route always returns or raises, so the loop never falls through
+            if is_last or self.accept(result.data):
+                stats.accepted += 1
+                return RoutedResult(result.data, route.name, attempts)
+            stats.rejected += 1
+            logger.info(f"Route '{route.name}' result rejected, escalating")
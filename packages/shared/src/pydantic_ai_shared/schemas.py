@@ -0,0 +1,69 @@
+"""
+Cached validators and JSON schemas for result types.
+
+Building a `TypeAdapter` compiles a validator and generating a JSON schema
+walks the whole type; both cost far more than validating one result. The
+helpers here build each once per type and process and reuse it. Validation
+goes straight from the raw JSON bytes or string a provider returned, without
+decoding to an intermediate dict first.
+
+`CaseInsensitive` lets a string `Literal` field accept spelling variants
+without slowing down validation of the canonical values.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar, Union, get_args
+
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler, TypeAdapter
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import CoreSchema, core_schema
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def type_adapter(result_type: Type[T]) -> TypeAdapter:
+    """The shared validator for `result_type`, e.g. `SupportTicket` or `List[Person]`."""
+    return TypeAdapter(result_type)
+
+
+@lru_cache(maxsize=None)
+def json_schema(result_type: Type[Any]) -> Dict[str, Any]:
+    """The JSON schema of `result_type`, generated once. Treat it as read-only."""
+    return type_adapter(result_type).json_schema()
+
+
+def validate_json(result_type: Type[T], data: Union[str, bytes, bytearray]) -> T:
+    """Validate raw JSON as `result_type` in one pass.
+
+    Raises:
+        pydantic.ValidationError: If the JSON is malformed or does not match
+    """
+    return type_adapter(result_type).validate_json(data)
+
+
+class CaseInsensitive:
+    """Annotation for a string `Literal` that also accepts case and whitespace variants.
+
+    `Annotated[Literal["IT", "HR"], CaseInsensitive()]` validates "IT" in
+    pydantic-core as a plain literal and only falls back to Python for
+    variants such as "it" or "Hr ", which become the canonical value. Fields
+    therefore always hold one of the literal's own (interned) strings, and
+    the JSON schema stays a plain enum.
+    """
+
+    def __get_pydantic_core_schema__(self, source: Any, handler: GetCoreSchemaHandler) -> CoreSchema:
+        values = get_args(source)
+        lookup = {value.lower(): value for value in values}
+
+        def canonical(value: Any) -> Any:
+            return lookup.get(value.strip().lower(), value) if isinstance(value, str) else value
+
+        return core_schema.union_schema(
+            [handler(source), core_schema.no_info_before_validator_function(canonical, handler(source))],
+            mode="left_to_right",
+            custom_error_type="invalid_choice",
+            custom_error_message=f"Input should be one of {', '.join(repr(value) for value in values)}",
+        )
+
+    def __get_pydantic_json_schema__(self, schema: CoreSchema, handler: GetJsonSchemaHandler) -> JsonSchemaValue:
+        return handler(schema["choices"][0])
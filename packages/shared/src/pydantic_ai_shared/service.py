@@ -0,0 +1,433 @@
+"""
+HTTP serving layer for agents.
+
+`AgentService` is a dependency-free ASGI application: packages register
+JSON endpoints on it (`add_support_routes`, `add_corporate_routes`,
+`add_example_routes`) and every request in a process runs on one event loop,
+sharing the registry's agents and pooled provider clients.
+
+Each endpoint admits at most `max_in_flight` concurrent requests. Up to
+`max_queue` more wait (for at most `queue_timeout` seconds) for a slot; past
+that the service answers 429 with `Retry-After` and `X-Queue-Depth`, so
+overload turns into fast rejections instead of unbounded latency. On
+shutdown the service stops admitting requests (503, and `/healthz` fails so
+load balancers move away), answers 503 to requests still queued, and waits
+up to `drain_timeout` for in-flight ones.
+
+`/metrics` renders this process's metrics only. Under pre-fork, each scrape
+lands on one worker, so run a single worker per instance where complete
+counters matter.
+
+`serve` runs the app under uvicorn (the `serve` extra) in `workers` pre-forked
+processes sharing one listening socket; the parent restarts crashed workers
+and forwards SIGTERM for a graceful drain.
+"""
+import asyncio
+import os
+import signal
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pydantic_core import to_json
+from loguru import logger
+
+from .config import get_settings
+from .telemetry import get_telemetry
+
+Handler = Callable[[Any], Awaitable[Any]]
+Hook = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class EndpointStats:
+    """Counters for one endpoint in this process."""
+    requests: int = 0
+    rejected: int = 0  # 429s
+    errors: int = 0  # 5xx other than draining
+    in_flight: int = 0
+    waiting: int = 0
+
+
+@dataclass
+class Endpoint:
+    """A JSON endpoint with its own admission limits."""
+    path: str
+    handler: Handler
+    request_type: Type[BaseModel]
+    max_in_flight: int
+    max_queue: int
+    stats: EndpointStats = field(default_factory=EndpointStats)
+    _slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:  # created on the serving loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+
+class AgentService:
+    """ASGI app exposing agent entry points with backpressure and graceful drain."""
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        drain_timeout: Optional[float] = None,
+    ):
+        """Initialize the service.
+
+        Args:
+            max_in_flight: Default concurrent requests per endpoint
+            max_queue: Default requests waiting per endpoint before 429s
+            queue_timeout: Seconds a request may wait for a slot
+            drain_timeout: Seconds in-flight requests get on shutdown
+
+        Unset arguments default to the shared `service` settings.
+        """
+        settings = get_settings().service
+        self.max_in_flight = max_in_flight or settings.max_in_flight
+        self.max_queue = max_queue if max_queue is not None else settings.max_queue
+        self.queue_timeout = queue_timeout or settings.queue_timeout
+        self.drain_timeout = drain_timeout if drain_timeout is not None else settings.drain_timeout
+        self.max_body_bytes = settings.max_body_bytes
+        self.routes: Dict[str, Endpoint] = {}
+        self.draining = False
+        self._in_flight = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._startup: List[Hook] = []
+        self._shutdown: List[Hook] = []
+
+    def route(
+        self,
+        path: str,
+        request_type: Type[BaseModel],
+        max_in_flight: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ) -> Callable[[Handler], Handler]:
+        """Register a POST endpoint taking and returning JSON.
+
+        The request body is validated as `request_type` and passed to the
+        handler; its return value (a model, or anything pydantic can
+        serialize) becomes the response body.
+
+        Args:
+            path: URL path, e.g. "/support/query"
+            request_type: Model the body is validated against
+            max_in_flight: Concurrent requests for this endpoint
+            max_queue: Requests waiting for this endpoint before 429s
+        """
+
+        def register(handler: Handler) -> Handler:
+            if path in self.routes:
+                raise ValueError(f"Route {path} is already registered")
+            self.routes[path] = Endpoint(
+                path,
+                handler,
+                request_type,
+                max_in_flight or self.max_in_flight,
+                max_queue if max_queue is not None else self.max_queue,
+            )
+            return handler
+
+        return register
+
+    def on_startup(self, hook: Hook) -> Hook:
+        """Run `hook` when the server starts, e.g. to warm agents."""
+        self._startup.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: Hook) -> Hook:
+        """Run `hook` after draining, e.g. to close connection pools."""
+        self._shutdown.append(hook)
+        return hook
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stop admitting requests and wait for in-flight ones.
+
+        Returns:
+            Whether every in-flight request finished within the timeout
+        """
+        self.draining = True
+        timeout = self.drain_timeout if timeout is None else timeout
+        if self._in_flight == 0:
+            return True
+        logger.info(f"Draining {self._in_flight} in-flight requests (up to {timeout:.0f}s)")
+        try:
+            await asyncio.wait_for(self._idle_event().wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Drain timed out with {self._in_flight} requests in flight")
+            return False
+
+    def _idle_event(self) -> asyncio.Event:
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            if self._in_flight == 0:
+                self._idle.set()
+        return self._idle
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    for hook in self._startup:
+                        await hook()
+                except Exception as exc:
+                    logger.exception("Service startup failed")
+                    await send({"type": "lifespan.startup.failed", "message": repr(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.drain()
+                for hook in self._shutdown:
+                    try:
+                        await hook()
+                    except Exception:
+                        logger.exception("Service shutdown hook failed")
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        path, method = scope["path"], scope["method"]
+        if path == "/healthz":
+            status = 503 if self.draining else 200
+            await _respond(send, status, {"status": "draining" if self.draining else "ok"})
+            return
+        if path == "/metrics" and method == "GET":
+            metrics = get_telemetry().metrics.render().encode()
+            await _respond(send, 200, metrics, content_type=b"text/plain; version=0.0.4")
+            return
+        endpoint = self.routes.get(path)
+        if endpoint is None:
+            await _respond(send, 404, {"error": f"no route {path}"})
+            return
+        if method != "POST":
+            await _respond(send, 405, {"error": "use POST"}, headers=[(b"allow", b"POST")])
+            return
+        if self.draining:
+            await self._unavailable(send)
+            return
+
+        status = await self._admit_and_handle(endpoint, receive, send)
+        get_telemetry().metrics.inc("agent_http_requests_total", path=path, status=str(status))
+
+    async def _admit_and_handle(self, endpoint: Endpoint, receive: Callable, send: Callable) -> int:
+        stats = endpoint.stats
+        stats.requests += 1
+        slots = endpoint.slots
+        # Counted synchronously, so a burst cannot overshoot before any slot is taken
+        if stats.in_flight + stats.waiting >= endpoint.max_in_flight + endpoint.max_queue:
+            return await self._reject(endpoint, send)
+        # Queued requests count as in flight too, so a drain waits until they have been answered
+        stats.waiting += 1
+        self._in_flight += 1
+        self._idle_event().clear()
+        try:
+            try:
+                await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                return await self._reject(endpoint, send)
+            finally:
+                stats.waiting -= 1
+            try:
+                if self.draining:  # the drain started while this request was queued
+                    return await self._unavailable(send)
+                stats.in_flight += 1
+                try:
+                    return await self._handle(endpoint, receive, send)
+                finally:
+                    stats.in_flight -= 1
+            finally:
+                slots.release()
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle_event().set()
+
+    async def _unavailable(self, send: Callable) -> int:
+        await _respond(send, 503, {"error": "draining"}, headers=[(b"connection", b"close")])
+        return 503
+
+    async def _reject(self, endpoint: Endpoint, send: Callable) -> int:
+        endpoint.stats.rejected += 1
+        depth = endpoint.stats.waiting
+        await _respond(
+            send,
+            429,
+            {"error": "overloaded", "queue_depth": depth},
+            headers=[(b"retry-after", b"1"), (b"x-queue-depth", str(depth).encode())],
+        )
+        return 429
+
+    async def _handle(self, endpoint: Endpoint, receive: Callable, send: Callable) -> int:
+        body = await _read_body(receive, self.max_body_bytes)
+        if body is None:
+            await _respond(send, 413, {"error": f"body larger than {self.max_body_bytes} bytes"})
+            return 413
+        try:
+            request = endpoint.request_type.model_validate_json(body)
+        except ValidationError as exc:
+            await _respond(send, 422, {"error": "invalid request", "detail": exc.errors(include_url=False)})
+            return 422
+        try:
+            with get_telemetry().span(f"http.{endpoint.path.strip('/').replace('/', '.')}"):
+                result = await endpoint.handler(request)
+        except Exception as exc:
+            endpoint.stats.errors += 1
+            logger.exception(f"{endpoint.path} failed")
+            await _respond(send, 500, {"error": type(exc).__name__})
+            return 500
+        await _respond(send, 200, result)
+        return 200
+
+
+async def _read_body(receive: Callable, limit: int) -> Optional[bytes]:
+    """The request body, or None if it exceeds `limit` bytes."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _respond(
+    send: Callable,
+    status: int,
+    body: Any,
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+    content_type: bytes = b"application/json",
+) -> None:
+    payload = body if isinstance(body, bytes) else to_json(body)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(payload)).encode()), *(headers or [])],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app_factory: Callable[[], AgentService], sock: socket.socket, drain_timeout: float) -> None:
+    import uvicorn
+
+    app = app_factory()
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        timeout_graceful_shutdown=int(drain_timeout),
+        log_level=get_settings().log_level.lower(),
+    )
+    asyncio.run(uvicorn.Server(config).serve(sockets=[sock]))
+
+
+def serve(
+    app_factory: Callable[[], AgentService],
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> None:
+    """Serve an app in pre-forked worker processes.
+
+    The parent binds the socket, then forks `workers` children that each
+    build their own app (and with it their own event loop, agents and
+    connection pools) with `app_factory` and accept from the shared socket.
+    Crashed children are replaced; SIGTERM or SIGINT drains every child and
+    exits.
+
+    Args:
+        app_factory: Builds the app inside each worker
+        host: Interface to bind
+        port: Port to bind
+        workers: Number of worker processes
+
+    Unset arguments default to the shared `service` settings.
+    """
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Serving requires the 'serve' extra: pip install uvicorn") from exc
+    settings = get_settings().service
+    host = host or settings.host
+    port = settings.port if port is None else port
+    workers = workers or settings.workers
+    sock = _bind(host, port)
+    logger.info(f"Serving on http://{host}:{sock.getsockname()[1]} with {workers} worker(s)")
+    if workers == 1:
+        _run_worker(app_factory, sock, settings.drain_timeout)
+        return
+
+    children: Dict[int, int] = {}  # pid -> worker number
+    stopping = False
+
+    def spawn(number: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                _run_worker(app_factory, sock, settings.drain_timeout)
+            finally:
+                os._exit(0)
+        children[pid] = number
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for number in range(workers):
+        spawn(number)
+
+    deadline = None
+    while children:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + settings.drain_timeout + 5
+        if deadline is not None and time.monotonic() > deadline:
+            logger.warning(f"Killing {len(children)} worker(s) that did not drain in time")
+            for pid in children:
+                os.kill(pid, signal.SIGKILL)
+            deadline = float("inf")
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.2)
+            continue
+        number = children.pop(pid)
+        if not stopping:
+            logger.warning(f"Worker {number} (pid {pid}) exited with status {status}; restarting")
+            spawn(number)
+    sock.close()
+    logger.info("All workers stopped")
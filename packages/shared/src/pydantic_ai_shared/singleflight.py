@@ -0,0 +1,92 @@
+"""
+Single-flight request coalescing.
+
+When many callers ask for the same thing at once (e.g. hundreds of employees
+reporting the same outage), `SingleFlight` runs the underlying call once and
+hands its result, or its exception, to every concurrent caller. Keys are only
+held while a call is in flight; later calls start a fresh one.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters for a single-flight group."""
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+
+    @property
+    def coalesce_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self, name: str = "singleflight"):
+        """Initialize the group.
+
+        Args:
+            name: Label used in log messages
+        """
+        self.name = name
+        self.stats = SingleFlightStats()
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._flights)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run `call`, or join the in-flight call with the same key.
+
+        The shared call keeps running while at least one caller is waiting, so
+        cancelling one caller does not fail the others.
+
+        Args:
+            key: Identity of the request, e.g. from `cache_key`
+            call: Zero-argument coroutine function performing the request
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        self.stats.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self.stats.executions += 1
+            flight = _Flight(asyncio.create_task(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.stats.coalesced += 1
+            logger.debug(f"{self.name}: joined in-flight call ({flight.waiters} waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
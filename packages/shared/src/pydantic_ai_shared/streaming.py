@@ -0,0 +1,306 @@
+"""
+Streaming helpers for agent output.
+
+Wraps pydantic-ai's streaming run so callers can render output as it is
+generated, either plain text, a single string field of a structured result,
+or the items of a structured result's list fields, while recording
+time-to-first-token and tokens/sec.
+"""
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Type, Union, get_args, get_origin
+
+import pydantic_core
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import UnexpectedModelBehavior
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.usage import Usage
+from loguru import logger
+
+from .schemas import type_adapter
+from .telemetry import get_telemetry
+
+
+@dataclass
+class StreamMetrics:
+    """Timing and throughput of a single streamed run."""
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    output_tokens: int = 0
+    restarts: int = 0  # abandoned attempts of `stream_items`
+    result: Any = None  # final validated output, set when the stream completes
+
+    def record_chunk(self) -> None:
+        """Record that a chunk of output was received."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+
+    def finish(self, usage: Usage, text: str, result: Any = None) -> None:
+        """Record the end of the stream.
+
+        Args:
+            usage: Usage reported for the run
+            text: All streamed text, used to estimate tokens when the provider reports none
+            result: The final validated output
+        """
+        self.finished_at = time.perf_counter()
+        self.output_tokens = usage.response_tokens or max(1, len(text) // 4)
+        self.result = result
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds from the start of the run to the first chunk."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Output tokens per second after the first token arrived."""
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return self.output_tokens / elapsed if elapsed > 0 else None
+
+
+def parse_partial_args(args: Union[str, dict, None]) -> dict:
+    """Parse possibly incomplete tool-call arguments.
+
+    Args:
+        args: Tool-call arguments, either a (partial) JSON string or a dict
+
+    Returns:
+        The fields decoded so far; a trailing string is returned truncated
+    """
+    if not args:
+        return {}
+    if isinstance(args, dict):
+        return args
+    try:
+        parsed = pydantic_core.from_json(args, allow_partial="trailing-strings")
+    except ValueError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _result_args(message: ModelResponse) -> dict:
+    for part in message.parts:
+        if isinstance(part, ToolCallPart):
+            return parse_partial_args(part.args)
+    return {}
+
+
+async def stream_text(
+    agent: Agent,
+    prompt: str,
+    metrics: Optional[StreamMetrics] = None,
+    **run_kwargs: Any,
+) -> AsyncIterator[str]:
+    """Stream a text agent's response as deltas.
+
+    Args:
+        agent: An agent with a plain text result
+        prompt: The user prompt
+        metrics: Optional metrics object populated during the stream
+        **run_kwargs: Extra arguments for `Agent.run_stream` (e.g. `deps`)
+
+    Yields:
+        Text deltas in generation order
+    """
+    metrics = metrics if metrics is not None else StreamMetrics()
+    metrics.started_at = time.perf_counter()
+    chunks = []
+    async with agent.run_stream(prompt, **run_kwargs) as result:
+        async for delta in result.stream_text(delta=True, debounce_by=None):
+            metrics.record_chunk()
+            chunks.append(delta)
+            yield delta
+        text = "".join(chunks)
+        metrics.finish(result.usage(), text, result=text)
+
+
+async def stream_field(
+    agent: Agent,
+    prompt: str,
+    field_name: str,
+    metrics: Optional[StreamMetrics] = None,
+    **run_kwargs: Any,
+) -> AsyncIterator[str]:
+    """Stream one string field of a structured result as deltas.
+
+    The full result is validated once the stream completes and stored in
+    `metrics.result`.
+
+    Args:
+        agent: An agent with a structured result type
+        prompt: The user prompt
+        field_name: Name of the string field to stream
+        metrics: Optional metrics object populated during the stream
+        **run_kwargs: Extra arguments for `Agent.run_stream` (e.g. `deps`)
+
+    Yields:
+        Deltas of the field's text in generation order
+    """
+    metrics = metrics if metrics is not None else StreamMetrics()
+    metrics.started_at = time.perf_counter()
+    emitted = ""
+    async with agent.run_stream(prompt, **run_kwargs) as result:
+        async for message, is_last in result.stream_structured(debounce_by=None):
+            value = _result_args(message).get(field_name)
+            if isinstance(value, str) and len(value) > len(emitted):
+                delta = value[len(emitted):]
+                emitted = value
+                metrics.record_chunk()
+                yield delta
+            if is_last:
+                data = await result.validate_structured_result(message)
+                metrics.finish(result.usage(), emitted, result=data)
+
+
+class InvalidPartialResult(ValueError):
+    """A streamed result that is already schema-invalid before it completes."""
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    """`X` for `Optional[X]` (or `X | None`), otherwise the annotation unchanged."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _field_adapter(model: Type[BaseModel], name: str, item: bool) -> TypeAdapter:
+    """Validator for a model field, or for one item of a (possibly optional) list field."""
+    annotation = model.model_fields[name].annotation
+    if item:
+        (annotation,) = get_args(_unwrap_optional(annotation)) or (Any,)
+    return type_adapter(annotation)
+
+
+def _complete_items(
+    model: Type[BaseModel], payload: Dict[str, Any], fields: Sequence[str], final: bool
+) -> Dict[str, List[Any]]:
+    """Validate the finished parts of a partial payload.
+
+    Keys arrive in generation order, so every key but the last is finished,
+    and so is every list item but the last. Strings only appear once closed,
+    so a trailing string item is finished too.
+
+    Returns:
+        The validated finished items of each field in `fields`
+
+    Raises:
+        InvalidPartialResult: If a finished field or item fails validation
+    """
+    keys = list(payload)
+    items: Dict[str, List[Any]] = {}
+    for position, key in enumerate(keys):
+        if key not in model.model_fields:
+            continue
+        done = final or position < len(keys) - 1
+        value = payload[key]
+        try:
+            if key in fields and isinstance(value, list):
+                adapter = _field_adapter(model, key, True)
+                finished = value if done or (value and isinstance(value[-1], str)) else value[:-1]
+                items[key] = [adapter.validate_python(item) for item in finished]
+            elif done:
+                _field_adapter(model, key, False).validate_python(value)
+        except ValidationError as exc:
+            raise InvalidPartialResult(f"{key}: {exc.errors(include_url=False)[0]['msg']}") from exc
+    return items
+
+
+def _result_payload(message: ModelResponse, final: bool) -> Dict[str, Any]:
+    """The result arguments parsed so far, without any unterminated string.
+
+    Raises:
+        InvalidPartialResult: If the arguments can no longer become valid JSON
+    """
+    for part in message.parts:
+        if isinstance(part, ToolCallPart):
+            if isinstance(part.args, dict):
+                return part.args
+            try:
+                parsed = pydantic_core.from_json(part.args or "{}", allow_partial=not final)
+            except ValueError as exc:
+                raise InvalidPartialResult(f"result arguments are not valid JSON: {exc}") from exc
+            return parsed if isinstance(parsed, dict) else {}
+    return {}
+
+
+async def stream_items(
+    agent: Agent,
+    prompt: str,
+    fields: Sequence[str],
+    metrics: Optional[StreamMetrics] = None,
+    retries: int = 1,
+    **run_kwargs: Any,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Stream the items of list fields of a structured result as each completes.
+
+    The partial result arguments are parsed incrementally and every finished
+    field and item is validated as it arrives. When one is invalid the stream
+    is abandoned at once, saving the rest of the generation, and the run is
+    retried with the validation error appended to the prompt. Items already
+    yielded are not repeated by a retry. The full result is validated once the
+    stream completes and stored in `metrics.result`.
+
+    Items yielded before an attempt was abandoned cannot be retracted: the
+    retry may drop or change them, so the streamed items are a preview and
+    `metrics.result` is authoritative. `metrics.restarts` counts abandoned
+    attempts, so a consumer can tell whether the preview may differ.
+
+    Args:
+        agent: An agent whose result type is a pydantic model
+        prompt: The user prompt
+        fields: Names of the list fields to stream
+        metrics: Optional metrics object populated during the stream
+        retries: Extra runs after an invalid result
+        **run_kwargs: Extra arguments for `Agent.run_stream` (e.g. `deps`)
+
+    Yields:
+        `(field_name, item)` pairs, each item validated against the field's item type
+
+    Raises:
+        UnexpectedModelBehavior: If the result is still invalid after `retries` retries
+    """
+    model = agent.result_type
+    metrics = metrics if metrics is not None else StreamMetrics()
+    metrics.started_at = time.perf_counter()
+    yielded: Dict[str, List[str]] = {name: [] for name in fields}  # across attempts
+    attempt_prompt = prompt
+    for attempt in range(retries + 1):
+        emitted: Dict[str, int] = dict.fromkeys(fields, 0)
+        repeats = {name: list(keys) for name, keys in yielded.items()}
+        try:
+            async with agent.run_stream(attempt_prompt, **run_kwargs) as result:
+                async for message, is_last in result.stream_structured(debounce_by=None):
+                    args = _result_payload(message, is_last)
+                    for name, items in _complete_items(model, args, fields, is_last).items():
+                        for item in items[emitted[name]:]:
+                            emitted[name] += 1
+                            key = pydantic_core.to_json(item).decode()
+                            if key in repeats[name]:  # already yielded by an abandoned attempt
+                                repeats[name].remove(key)
+                                continue
+                            yielded[name].append(key)
+                            metrics.record_chunk()
+                            yield name, item
+                    if is_last:
+                        data = await result.validate_structured_result(message)
+                        metrics.finish(result.usage(), pydantic_core.to_json(data).decode(), result=data)
+                        return
+        except (InvalidPartialResult, ValidationError, UnexpectedModelBehavior) as exc:
+            error = exc
+        metrics.restarts += 1
+        get_telemetry().metrics.inc("agent_stream_aborts_total", agent=agent.name or "agent")
+        logger.warning(f"Abandoned invalid streamed result (attempt {attempt + 1}/{retries + 1}): {error}")
+        attempt_prompt = f"{prompt}\n\nA previous answer was rejected ({error}). Follow the result schema exactly."
+    raise UnexpectedModelBehavior(f"Streamed result still invalid after {retries + 1} attempts: {error}")
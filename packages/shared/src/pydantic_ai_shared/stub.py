@@ -0,0 +1,180 @@
+"""
+Deterministic local stub model.
+
+`StubModel` stands in for a real provider so agents can be tested and
+load-tested without API keys or network access. It simulates request latency
+and token generation rate, injects errors at a configurable rate, and
+generates schema-valid structured results (e.g. `SupportTicket`,
+`WorkflowResult`, `Person`) from the agent's result tool schema.
+"""
+import asyncio
+import math
+import random
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, DeltaToolCalls, FunctionModel
+from pydantic_core import to_json
+
+LatencySampler = Callable[[random.Random], float]
+
+
+def fixed_latency(seconds: float) -> LatencySampler:
+    """Always wait `seconds`."""
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> LatencySampler:
+    """Wait a uniformly distributed time between `low` and `high` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> LatencySampler:
+    """Wait a log-normally distributed time, which gives provider-like long tails."""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def _input_tokens(messages: List[ModelMessage]) -> int:
+    """Rough token count of the prompt sent to the model."""
+    chars = sum(
+        len(part.content) for message in messages for part in message.parts
+        if isinstance(getattr(part, "content", None), str)
+    )
+    return chars // 4
+
+
+class SchemaFaker:
+    """Generates values matching a JSON schema, deterministically for a given seed."""
+
+    def __init__(self, rng: random.Random, max_items: int = 3):
+        self.rng = rng
+        self.max_items = max_items
+
+    def generate(self, schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None, name: str = "value") -> Any:
+        """Generate a value for `schema`.
+
+        Args:
+            schema: JSON schema of the value
+            defs: `$defs` of the enclosing schema for resolving references
+            name: Field name, used to make generated strings readable
+
+        Returns:
+            A JSON-compatible value valid against the schema
+        """
+        defs = {**(defs or {}), **schema.get("$defs", {})}
+        if "$ref" in schema:
+            return self.generate(defs[schema["$ref"].split("/")[-1]], defs, name)
+        if "const" in schema:
+            return schema["const"]
+        if "enum" in schema:
+            return self.rng.choice(schema["enum"])
+        for key in ("anyOf", "oneOf"):
+            if key in schema:
+                options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+                return self.generate(options[0], defs, name)
+        if "allOf" in schema:
+            return self.generate(schema["allOf"][0], defs, name)
+
+        kind = schema.get("type", "object" if "properties" in schema else "string")
+        if kind == "object":
+            properties = schema.get("properties", {})
+            return {key: self.generate(sub, defs, key) for key, sub in properties.items()}
+        if kind == "array":
+            low = schema.get("minItems", 1)
+            high = max(low, min(schema.get("maxItems", self.max_items), self.max_items))
+            return [self.generate(schema.get("items", {}), defs, name) for _ in range(self.rng.randint(low, high))]
+        if kind == "integer":
+            return self.rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+        if kind == "number":
+            return round(self.rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 1.0)), 3)
+        if kind == "boolean":
+            return self.rng.random() < 0.5
+        return f"stub {name} {self.rng.randint(0, 9999)}"
+
+
+class StubModel(FunctionModel):
+    """A local model with simulated latency, token rate and errors."""
+
+    def __init__(
+        self,
+        latency: Union[float, LatencySampler] = 0.0,
+        tokens_per_second: Optional[float] = None,
+        prefill_tokens_per_second: Optional[float] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        outputs: Optional[Dict[str, Any]] = None,
+        text: str = "This is a stub response.",
+        seed: int = 0,
+        model_name: str = "stub",
+    ):
+        """Initialize the stub model.
+
+        Args:
+            latency: Seconds before the first token, or a sampler such as `lognormal_latency`
+            tokens_per_second: Simulated generation rate (None generates instantly)
+            prefill_tokens_per_second: Simulated prompt processing rate, making latency
+                grow with input size (None ignores input size)
+            error_rate: Probability that a request fails with `ModelHTTPError`
+            error_status: HTTP status of injected errors (e.g. 429 or 503)
+            outputs: Fixed field values merged over generated structured results
+            text: Response for agents with a plain text result
+            seed: Seed making latencies, errors and generated values reproducible
+            model_name: Name reported for the model
+        """
+        super().__init__(self._respond, stream_function=self._stream, model_name=model_name)
+        self.latency = latency if callable(latency) else fixed_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.outputs = outputs or {}
+        self.text = text
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    def _result_args(self, info: AgentInfo) -> Optional[Dict[str, Any]]:
+        if not info.result_tools:
+            return None
+        schema = info.result_tools[0].parameters_json_schema
+        args = SchemaFaker(self.rng).generate(schema)
+        args.update(self.outputs)
+        return args
+
+    async def _before_request(self, messages: List[ModelMessage]) -> None:
+        self.requests += 1
+        delay = self.latency(self.rng)
+        if self.prefill_tokens_per_second:
+            delay += _input_tokens(messages) / self.prefill_tokens_per_second
+        await asyncio.sleep(max(0.0, delay))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise ModelHTTPError(self.error_status, self.model_name, body="injected stub error")
+
+    async def _generate(self, tokens: int) -> None:
+        if self.tokens_per_second:
+            await asyncio.sleep(tokens / self.tokens_per_second)
+
+    async def _respond(self, messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        await self._before_request(messages)
+        args = self._result_args(info)
+        if args is None:
+            await self._generate(len(self.text.split()))
+            return ModelResponse(parts=[TextPart(self.text)])
+        payload = to_json(args).decode()
+        await self._generate(max(1, len(payload) // 4))
+        return ModelResponse(parts=[ToolCallPart(info.result_tools[0].name, payload)])
+
+    async def _stream(self, messages: List[ModelMessage], info: AgentInfo) -> AsyncIterator[Union[str, DeltaToolCalls]]:
+        await self._before_request(messages)
+        args = self._result_args(info)
+        if args is None:
+            for i, word in enumerate(self.text.split(" ")):
+                await self._generate(1)
+                yield word if i == 0 else f" {word}"
+            return
+        payload = to_json(args).decode()
+        name = info.result_tools[0].name
+        for start in range(0, len(payload), 16):
+            await self._generate(4)
+            yield {0: DeltaToolCall(name=name if start == 0 else None, json_args=payload[start:start + 16])}
@@ -0,0 +1,597 @@
+"""
+Hot-path instrumentation for agent entry points.
+
+Records spans with correlation IDs for entry points, model requests, output
+validation, tool calls and cache lookups, plus Prometheus-style metrics:
+latency histograms per span, token usage per model (with input tokens split
+by prompt cache outcome) and retry counts.
+
+Spans can be bridged to OpenTelemetry (and from there over OTLP to a local
+collector), and metrics can be served as Prometheus text. Telemetry is off by
+default; while disabled, `span` returns a shared no-op object and the
+decorators call straight through, so the overhead is a flag check.
+"""
+import contextvars
+import functools
+import inspect
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Protocol, Tuple, TypeVar
+
+from loguru import logger
+
+from .config import get_settings
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+    from pydantic_ai.usage import Usage
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_HELP = {
+    "agent_span_duration_seconds": ("histogram", "Span latency in seconds"),
+    "agent_span_errors_total": ("counter", "Spans that ended with an exception"),
+    "agent_tokens_total": ("counter", "Tokens used, by model and kind (input/output)"),
+    "agent_input_tokens_total": ("counter", "Input tokens by model and prompt cache outcome (read/write/miss)"),
+    "agent_model_requests_total": ("counter", "Model requests, by model"),
+    "agent_retries_total": ("counter", "Retry prompts (invalid results, tool retries) sent to the model in one run"),
+    "agent_provider_retries_total": ("counter", "Provider requests retried after a throttling or transient error"),
+    "agent_hedged_requests_total": ("counter", "Runs that started a hedge, by runner and winning model"),
+    "agent_failovers_total": ("counter", "Runs sent to the secondary model because the primary circuit was open"),
+    "agent_circuit_opens_total": ("counter", "Times a provider circuit breaker opened"),
+    "agent_queue_wait_seconds": ("histogram", "Seconds a job waited before a worker claimed it, by queue and priority"),
+    "agent_http_requests_total": ("counter", "HTTP requests to agent endpoints, by path and status"),
+    "agent_stream_aborts_total": ("counter", "Streamed structured results abandoned as schema-invalid, by agent"),
+    "agent_memo_lookups_total": ("counter", "Persistent result memo lookups, by outcome (hit/miss)"),
+    "agent_tool_calls_total": ("counter", "Tool calls, by tool and outcome (ok/cached/retry/timeout/error)"),
+}
+
+
+def cached_input_tokens(usage: "Usage") -> Tuple[int, int]:
+    """Input tokens served from and written to the provider's prompt cache.
+
+    Reads OpenAI's `cached_tokens` and Anthropic's `cache_read_input_tokens` /
+    `cache_creation_input_tokens` usage details. Both are included in
+    `usage.request_tokens`.
+
+    Returns:
+        `(read, written)` token counts
+    """
+    details = usage.details or {}
+    read = details.get("cache_read_input_tokens", 0) or details.get("cached_tokens", 0)
+    return read, details.get("cache_creation_input_tokens", 0)
+
+
+def _set_usage_attributes(target: "Span", usage: "Usage") -> None:
+    read, written = cached_input_tokens(usage)
+    target.set_attribute("input_tokens", usage.request_tokens)
+    target.set_attribute("input_tokens_cached", read)
+    target.set_attribute("input_tokens_uncached", (usage.request_tokens or 0) - read)
+    target.set_attribute("output_tokens", usage.response_tokens)
+
+
+@dataclass
+class SpanRecord:
+    """A finished span."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float  # epoch seconds
+    duration: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class SpanExporter(Protocol):
+    """Receives every finished span."""
+
+    def export(self, record: SpanRecord) -> None:
+        ...
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list, e.g. for tests."""
+
+    def __init__(self):
+        self.spans: List[SpanRecord] = []
+
+    def export(self, record: SpanRecord) -> None:
+        self.spans.append(record)
+
+    def names(self) -> List[str]:
+        return [record.name for record in self.spans]
+
+
+class LogSpanExporter:
+    """Logs finished spans at debug level."""
+
+    def export(self, record: SpanRecord) -> None:
+        logger.debug(
+            f"span {record.name} trace={record.trace_id} {record.duration * 1000:.1f}ms "
+            f"{record.attributes}{' error=' + record.error if record.error else ''}"
+        )
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # One count per bucket, then sum and count
+            state = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Current value of a counter series."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        return self._counters.get(name, {}).get(key, 0)
+
+    def histogram(self, name: str, **labels: Any) -> Tuple[int, float]:
+        """Count and sum of a histogram series."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        state = self._histograms.get(name, {}).get(key)
+        return (int(state[-1]), state[-2]) if state else (0, 0.0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[Labels, Any]]]:
+        """A picklable copy of every series, e.g. to send from a worker process."""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "histograms": {
+                    name: {key: list(state) for key, state in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def merge(self, snapshot: Dict[str, Dict[str, Dict[Labels, Any]]]) -> None:
+        """Add a `snapshot` from another process (with the same buckets) to these metrics."""
+        with self._lock:
+            for name, series in snapshot["counters"].items():
+                target = self._counters.setdefault(name, {})
+                for key, value in series.items():
+                    target[key] = target.get(key, 0) + value
+            for name, series in snapshot["histograms"].items():
+                target = self._histograms.setdefault(name, {})
+                for key, state in series.items():
+                    current = target.setdefault(key, [0.0] * len(state))
+                    for i, value in enumerate(state):
+                        current[i] += value
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+
+        def fmt(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                kind, help_text = _HELP.get(name, ("counter", name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{fmt(labels)} {value:g}" for labels, value in series.items()]
+            for name, series in sorted(self._histograms.items()):
+                kind, help_text = _HELP.get(name, ("histogram", name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, state in series.items():
+                    for bound, count in zip(self.buckets, state[:-2], strict=True):
+                        lines.append(f"{name}_bucket{fmt(labels, (('le', f'{bound:g}'),))} {count:g}")
+                    lines.append(f"{name}_bucket{fmt(labels, (('le', '+Inf'),))} {state[-1]:g}")
+                    lines.append(f"{name}_sum{fmt(labels)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{fmt(labels)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+class _NoopSpan:
+    """Returned while telemetry is disabled."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """An active span; use as a context manager."""
+
+    def __init__(self, telemetry: "Telemetry", name: str, attributes: Dict[str, Any]):
+        self.telemetry = telemetry
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent: Optional[Span] = None
+        self.trace_id = ""
+        self._otel: Any = None
+        self._token: Optional[contextvars.Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent else uuid.uuid4().hex
+        self._token = _current_span.set(self)
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        if self.telemetry.tracer is not None:
+            self._otel = self.telemetry._start_otel(self.name, self.parent)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        duration = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        error = repr(exc) if exc is not None else None
+        if self._otel is not None:
+            self._otel.set_attributes({k: v for k, v in self.attributes.items() if v is not None})
+            if error:
+                self._otel.record_exception(exc)
+            self._otel.end()
+        self.telemetry._finish(SpanRecord(
+            self.name, self.trace_id, self.span_id, self.parent.span_id if self.parent else None,
+            self.start_time, duration, self.attributes, error,
+        ))
+
+
+class Telemetry:
+    """Span and metric recorder."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        exporters: Optional[List[SpanExporter]] = None,
+        tracer: Any = None,
+    ):
+        """Initialize telemetry.
+
+        Args:
+            enabled: Record spans and metrics (when False everything is a no-op)
+            exporters: Receivers of finished spans
+            tracer: Optional OpenTelemetry tracer that every span is mirrored to
+        """
+        self.enabled = enabled
+        self.exporters = list(exporters or [])
+        self.tracer = tracer
+        self.metrics = Metrics()
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """Open a span as a child of the current one.
+
+        Args:
+            name: Span name, e.g. 'model.request'
+            **attributes: Initial span attributes
+
+        Returns:
+            A context manager yielding the span
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def record_span(self, name: str, started: float, duration: float, **attributes: Any) -> None:
+        """Record a span that has already finished, as a child of the current span.
+
+        Args:
+            name: Span name
+            started: Start time as epoch seconds
+            duration: Duration in seconds
+            **attributes: Span attributes
+        """
+        if not self.enabled:
+            return
+        parent = _current_span.get()
+        if self.tracer is not None:
+            otel_span = self._start_otel(name, parent, start_time=int(started * 1e9))
+            otel_span.set_attributes({k: v for k, v in attributes.items() if v is not None})
+            otel_span.end(end_time=int((started + duration) * 1e9))
+        self._finish(SpanRecord(
+            name, parent.trace_id if parent else uuid.uuid4().hex, uuid.uuid4().hex[:16],
+            parent.span_id if parent else None, started, duration, attributes,
+        ))
+
+    def record_usage(self, usage: "Usage", model_name: str) -> None:
+        """Count tokens and requests of a model response."""
+        if not self.enabled:
+            return
+        self.metrics.inc("agent_model_requests_total", usage.requests or 1, model=model_name)
+        if usage.request_tokens:
+            self.metrics.inc("agent_tokens_total", usage.request_tokens, model=model_name, kind="input")
+            read, written = cached_input_tokens(usage)
+            for cache, tokens in (("read", read), ("write", written), ("miss", usage.request_tokens - read - written)):
+                if tokens:
+                    self.metrics.inc("agent_input_tokens_total", tokens, model=model_name, cache=cache)
+        if usage.response_tokens:
+            self.metrics.inc("agent_tokens_total", usage.response_tokens, model=model_name, kind="output")
+
+    def _start_otel(self, name: str, parent: Optional[Span], start_time: Optional[int] = None) -> Any:
+        from opentelemetry import trace
+
+        context = trace.set_span_in_context(parent._otel) if parent is not None and parent._otel else None
+        return self.tracer.start_span(name, context=context, start_time=start_time)
+
+    def _finish(self, record: SpanRecord) -> None:
+        self.metrics.observe("agent_span_duration_seconds", record.duration, span=record.name)
+        if record.error:
+            self.metrics.inc("agent_span_errors_total", span=record.name)
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as exc:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {exc!r}")
+
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """Get the process-wide telemetry, configured from the shared settings on first use."""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                settings = get_settings().telemetry
+                _telemetry = _build_telemetry(settings.enabled, settings.otel, settings.prometheus_port)
+    return _telemetry
+
+
+def configure_telemetry(
+    enabled: bool = True,
+    otel: bool = False,
+    prometheus_port: Optional[int] = None,
+    exporters: Optional[List[SpanExporter]] = None,
+) -> Telemetry:
+    """Replace the process-wide telemetry.
+
+    Args:
+        enabled: Record spans and metrics
+        otel: Mirror spans to the global OpenTelemetry tracer provider
+        prometheus_port: Serve metrics on this port (None disables the endpoint);
+            if the port is taken, e.g. by another worker process, telemetry
+            still records but this process serves no endpoint
+        exporters: Receivers of finished spans
+
+    Returns:
+        The new telemetry
+    """
+    global _telemetry
+    with _telemetry_lock:
+        _telemetry = _build_telemetry(enabled, otel, prometheus_port, exporters)
+    return _telemetry
+
+
+def _build_telemetry(
+    enabled: bool,
+    otel: bool,
+    prometheus_port: Optional[int],
+    exporters: Optional[List[SpanExporter]] = None,
+) -> Telemetry:
+    tracer = None
+    if enabled and otel:
+        try:
+            from opentelemetry import trace
+        except ImportError as exc:
+            raise ImportError("OpenTelemetry export requires the 'otel' extra: pip install opentelemetry-api") from exc
+        tracer = trace.get_tracer("pydantic_ai_shared")
+    telemetry = Telemetry(enabled, exporters, tracer)
+    if enabled and prometheus_port is not None:
+        try:
+            serve_prometheus(telemetry, prometheus_port)
+        except OSError as exc:
+            # Worker processes share the settings, so only the first to bind the port serves it
+            logger.warning(f"Not serving Prometheus metrics from this process: port {prometheus_port} unavailable ({exc})")
+    return telemetry
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """Open a span on the process-wide telemetry (see `Telemetry.span`)."""
+    return get_telemetry().span(name, **attributes)
+
+
+def current_span() -> Any:
+    """The active span, or a no-op span outside any span."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def current_trace_id() -> Optional[str]:
+    """Correlation ID of the active trace, e.g. for log lines."""
+    active = _current_span.get()
+    return active.trace_id if active else None
+
+
+def instrument(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorate a function so each call is recorded as a span.
+
+    Works for sync and async functions, including agent tools.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+
+    Returns:
+        The decorator
+    """
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                telemetry = get_telemetry()
+                if not telemetry.enabled:
+                    return await func(*args, **kwargs)
+                with telemetry.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            telemetry = get_telemetry()
+            if not telemetry.enabled:
+                return func(*args, **kwargs)
+            with telemetry.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@dataclass
+class _RunState:
+    last_response_at: Optional[float] = None  # epoch seconds
+    last_response_perf: float = 0.0
+    tool_calls: int = 0
+    tool_time: float = 0.0
+
+
+_run_state: contextvars.ContextVar[Optional[_RunState]] = contextvars.ContextVar("run_state", default=None)
+
+
+def note_tool_call(duration: float) -> None:
+    """Add a finished tool call to the totals of the enclosing `traced_run`."""
+    state = _run_state.get()
+    if state is not None:
+        state.tool_calls += 1
+        state.tool_time += duration
+
+
+def count_retries(messages: List[Any]) -> int:
+    """Retry prompts in a run's messages: invalid results and tool `ModelRetry`s sent back to the model."""
+    from pydantic_ai.messages import ModelRequest, RetryPromptPart
+
+    return sum(
+        isinstance(part, RetryPromptPart)
+        for message in messages if isinstance(message, ModelRequest)
+        for part in message.parts
+    )
+
+
+async def traced_run(agent: Any, prompt: str, name: str = "agent.run", **run_kwargs: Any) -> Any:
+    """Run an agent, recording its model time, validation time, tool time and retries.
+
+    The time between the last model response and the end of the run is
+    recorded as an `agent.validate` span, which separates our own output
+    validation from provider latency.
+
+    Args:
+        agent: The agent to run
+        prompt: The user prompt
+        name: Span name for the whole run
+        **run_kwargs: Extra arguments for `Agent.run` (e.g. `deps`)
+
+    Returns:
+        The agent's run result
+    """
+    telemetry = get_telemetry()
+    if not telemetry.enabled:
+        return await agent.run(prompt, **run_kwargs)
+
+    model_name = getattr(agent.model, "model_name", str(agent.model))
+    with telemetry.span(name, model=model_name) as run_span:
+        state = _RunState()
+        token = _run_state.set(state)
+        try:
+            result = await agent.run(prompt, **run_kwargs)
+        finally:
+            _run_state.reset(token)
+        if state.last_response_at is not None:
+            telemetry.record_span(
+                "agent.validate", state.last_response_at, time.perf_counter() - state.last_response_perf,
+            )
+        usage = result.usage()
+        _set_usage_attributes(run_span, usage)
+        run_span.set_attribute("model_requests", usage.requests)
+        if state.tool_calls:
+            run_span.set_attribute("tool_calls", state.tool_calls)
+            run_span.set_attribute("tool_seconds", state.tool_time)
+        # Tool round trips also add model requests; only retry prompts are retries
+        retries = count_retries(result.all_messages())
+        if retries:
+            telemetry.metrics.inc("agent_retries_total", retries, span=name)
+    return result
+
+
+def serve_prometheus(telemetry: Telemetry, port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve `/metrics` in Prometheus text format from a background thread.
+
+    Args:
+        telemetry: Telemetry whose metrics are served
+        port: Port to listen on (0 picks a free port)
+        host: Interface to bind
+
+    Returns:
+        The running server; call `shutdown()` to stop it
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = telemetry.metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return None
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="prometheus-metrics", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def __getattr__(name: str) -> Any:
+    # TracedModel subclasses a pydantic_ai model; importing it on first use
+    # keeps `instrument` and `span` cheap to import
+    if name == "TracedModel":
+        from .tracing import TracedModel
+
+        return TracedModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
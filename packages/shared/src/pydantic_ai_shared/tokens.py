@@ -0,0 +1,11 @@
+"""
+Token estimates for text that has not been sent to a provider yet.
+
+Rate limiting reserves budget before a request and the context window fits
+history into a token budget, both before any provider reports real usage.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English text)."""
+    return len(text) // 4 + 1
@@ -0,0 +1,190 @@
+"""
+Tool framework for agents.
+
+A `ToolSet` collects async tool functions with per-tool options: a result
+cache TTL for tools whose answers only depend on their arguments, and a
+timeout that time-boxes every call. pydantic_ai already runs the tool calls
+of one model turn concurrently, so tools must be async and must not block
+the event loop.
+
+Hand the set to `AgentRegistry.agent(toolset=...)`. Registry agents are
+shared, so the tool set is part of the memoization key; do not register
+tools on a registry agent afterwards. Backing stores reach tools through the
+run's deps (e.g. `CorporateContext.stores`), so they are created once per
+process and pooled across runs.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar, get_type_hints
+
+from pydantic_core import to_json
+
+from .cache import CacheBackend, LRUCache
+from .config import get_settings
+from .schemas import validate_json
+from .telemetry import get_telemetry, note_tool_call
+
+DepsT = TypeVar("DepsT")
+
+
+def _return_type(func: Callable[..., Any]) -> Any:
+    try:
+        return get_type_hints(func).get("return", Any)
+    except NameError:  # unresolvable forward reference; cached results come back as plain JSON
+        return Any
+
+
+@dataclass(frozen=True)
+class ToolOptions:
+    """How a tool is executed."""
+    name: str
+    ttl: Optional[float]  # seconds results are cached; None disables caching
+    timeout: float  # seconds before the call is abandoned
+    vary: Optional[Callable[[Any], Any]] = None  # run context -> extra cache key part
+    return_type: Any = Any  # cached results are validated back into this type
+
+
+@dataclass
+class ToolStats:
+    """Counters for one tool."""
+    calls: int = 0
+    cache_hits: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class ToolSet(Generic[DepsT]):
+    """A named collection of tools with caching and timeouts."""
+
+    def __init__(self, name: str, cache: Optional[CacheBackend] = None, timeout: Optional[float] = None):
+        """Initialize the tool set.
+
+        Args:
+            name: Label for cache keys, spans and logs
+            cache: Where cacheable results are kept (defaults to an in-process LRU;
+                pass a `RedisCache` to share results between workers)
+            timeout: Default per-call timeout in seconds (defaults to the
+                shared `tools.timeout` setting)
+        """
+        settings = get_settings().tools
+        self.name = name
+        self.cache = cache or LRUCache(maxsize=settings.cache_size, ttl=None)
+        self.timeout = timeout or settings.timeout
+        self.stats: Dict[str, ToolStats] = {}
+        self._functions: Dict[str, Tuple[Callable[..., Any], ToolOptions]] = {}
+        self._tools: Optional[List[Any]] = None
+
+    def tool(
+        self,
+        func: Optional[Callable[..., Any]] = None,
+        *,
+        ttl: Optional[float] = None,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+        vary: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Register a tool; use as `@tools.tool` or `@tools.tool(ttl=300, timeout=2)`.
+
+        The function takes the `RunContext` first and its docstring and
+        parameters become the tool's description and schema.
+
+        Args:
+            func: The async tool function
+            ttl: Cache results for this many seconds (None: never cache); hits are
+                validated back into the function's return annotation
+            timeout: Per-call timeout in seconds (defaults to the set's timeout)
+            name: Tool name shown to the model (defaults to the function name)
+            vary: Function of the `RunContext` whose value joins the cache key,
+                for results that depend on deps (e.g. `lambda ctx: ctx.deps.department`)
+
+        Returns:
+            The function, unchanged
+        """
+
+        def register(func: Callable[..., Any]) -> Callable[..., Any]:
+            if not inspect.iscoroutinefunction(func):
+                raise TypeError(f"Tool {func.__name__} must be async; tool calls share the event loop")
+            options = ToolOptions(name or func.__name__, ttl, timeout or self.timeout, vary, _return_type(func))
+            if options.name in self._functions:
+                raise ValueError(f"Tool {options.name} is already registered in {self.name}")
+            self._functions[options.name] = (func, options)
+            self.stats[options.name] = ToolStats()
+            self._tools = None
+            return func
+
+        return register(func) if func is not None else register
+
+    def tools(self) -> List[Any]:
+        """The registered tools as `pydantic_ai.Tool`s for `Agent(tools=...)`."""
+        from pydantic_ai import Tool
+
+        if self._tools is None:
+            self._tools = [
+                Tool(self._wrap(func, options), takes_ctx=True, name=options.name)
+                for func, options in self._functions.values()
+            ]
+        return list(self._tools)
+
+    def _cache_key(self, options: ToolOptions, ctx: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        varies = options.vary(ctx) if options.vary is not None else None
+        arguments = json.dumps([varies, args, kwargs], sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(arguments.encode("utf-8")).hexdigest()
+        return f"tool:{self.name}:{options.name}:{digest}"
+
+    def _wrap(self, func: Callable[..., Any], options: ToolOptions) -> Callable[..., Any]:
+        stats = self.stats[options.name]
+
+        @functools.wraps(func)
+        async def run(ctx: Any, *args: Any, **kwargs: Any) -> Any:
+            from pydantic_ai import ModelRetry
+
+            stats.calls += 1
+            telemetry = get_telemetry()
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                with telemetry.span(f"tool.{options.name}") as tool_span:
+                    key = self._cache_key(options, ctx, args, kwargs) if options.ttl is not None else None
+                    if key is not None:
+                        cached = await self.cache.get(key)
+                        if cached is not None:
+                            stats.cache_hits += 1
+                            outcome = "cached"
+                            tool_span.set_attribute("cached", True)
+                            return validate_json(options.return_type, cached)
+                    try:
+                        result = await asyncio.wait_for(func(ctx, *args, **kwargs), options.timeout)
+                    except asyncio.TimeoutError:
+                        stats.timeouts += 1
+                        outcome = "timeout"
+                        tool_span.set_attribute("timed_out", True)
+                        raise ModelRetry(
+                            f"{options.name} timed out after {options.timeout:g}s; retry or continue without it"
+                        ) from None
+                    except ModelRetry:
+                        outcome = "retry"
+                        raise
+                    except Exception:
+                        stats.errors += 1
+                        raise
+                    outcome = "ok"
+                    if key is not None:
+                        await self.cache.set(key, to_json(result).decode("utf-8"), ttl=options.ttl)
+                    return result
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.total_time += elapsed
+                note_tool_call(elapsed)
+                telemetry.metrics.inc("agent_tool_calls_total", tool=options.name, outcome=outcome)
+
+        return run
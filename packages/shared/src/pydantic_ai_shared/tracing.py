@@ -0,0 +1,53 @@
+"""
+Model wrapper recording provider requests as telemetry spans.
+
+Kept apart from `telemetry` so that instrumenting a module does not import
+pydantic_ai; `pydantic_ai_shared.telemetry.TracedModel` still resolves here.
+"""
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+from .telemetry import _run_state, _set_usage_attributes, get_telemetry
+
+
+class TracedModel(WrapperModel):
+    """Wraps a model so each request is recorded as a `model.request` span."""
+
+    def __init__(self, wrapped: Model):
+        super().__init__(wrapped)
+
+    def _mark_response(self) -> None:
+        state = _run_state.get()
+        if state is not None:
+            state.last_response_at = time.time()
+            state.last_response_perf = time.perf_counter()
+
+    async def request(self, *args: Any, **kwargs: Any) -> Any:
+        telemetry = get_telemetry()
+        if not telemetry.enabled:
+            return await self.wrapped.request(*args, **kwargs)
+        with telemetry.span("model.request", model=self.model_name) as request_span:
+            response, usage = await self.wrapped.request(*args, **kwargs)
+            _set_usage_attributes(request_span, usage)
+        telemetry.record_usage(usage, self.model_name)
+        self._mark_response()
+        return response, usage
+
+    @asynccontextmanager
+    async def request_stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        telemetry = get_telemetry()
+        if not telemetry.enabled:
+            async with self.wrapped.request_stream(*args, **kwargs) as stream:
+                yield stream
+            return
+        with telemetry.span("model.stream", model=self.model_name) as stream_span:
+            async with self.wrapped.request_stream(*args, **kwargs) as stream:
+                yield stream
+            usage = stream.usage()
+            _set_usage_attributes(stream_span, usage)
+        telemetry.record_usage(usage, self.model_name)
+        self._mark_response()
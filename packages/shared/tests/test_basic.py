@@ -1,6 +1,11 @@
 """
 Tests for Pydantic AI Shared utilities.
 """
+import asyncio
+import os
+import signal
+import time
+
 import pytest
 
 
@@ -9,6 +14,13 @@ def test_basic():
     assert True
 
 
+def test_lazy_exports_are_listed_in_all():
+    """Test that __all__ names exactly the lazily exported names."""
+    import pydantic_ai_shared
+
+    assert pydantic_ai_shared.__all__ == list(pydantic_ai_shared._EXPORTS)
+
+
 def test_config():
     """Test configuration module."""
     from pydantic_ai_shared import config
@@ -28,3 +40,109 @@ async def test_async():
     """Test that async tests work."""
     assert True
 
+
+@pytest.fixture
+def fresh_settings(monkeypatch):
+    """Reload settings around a test that changes the environment."""
+    from pydantic_ai_shared import config
+
+    yield monkeypatch
+    monkeypatch.undo()
+    config.reload_settings()
+
+
+def test_settings_are_frozen_and_memoized():
+    """Test that settings load once and cannot be mutated."""
+    from pydantic import ValidationError
+    from pydantic_ai_shared import config
+
+    settings = config.get_settings()
+    assert config.get_settings() is settings
+    with pytest.raises(ValidationError):
+        settings.log_level = "DEBUG"
+
+
+def test_settings_reload_applies_environment(fresh_settings):
+    """Test nested overrides, extra providers and legacy model variables."""
+    from pydantic_ai_shared import config
+
+    fresh_settings.setenv("PROVIDERS__OPENAI__TIMEOUT", "30")
+    fresh_settings.setenv("PROVIDERS__GROQ__MODEL", "groq:llama-3.1-8b-instant")
+    fresh_settings.setenv("DEFAULT_MODEL_ANTHROPIC", "anthropic:claude-3-5-haiku-latest")
+    fresh_settings.setenv("CONCURRENCY__BATCH", "32")
+    settings = config.reload_settings()
+
+    assert settings.provider("openai").timeout == 30
+    assert settings.provider("openai").model == config.DEFAULT_MODEL_OPENAI
+    assert config.get_default_model("groq") == "groq:llama-3.1-8b-instant"
+    assert config.get_default_model("anthropic") == "anthropic:claude-3-5-haiku-latest"
+    assert config.get_settings().concurrency.batch == 32
+    with pytest.raises(ValueError):
+        config.get_default_model("unknown")
+
+
+def test_invalid_reload_keeps_previous_settings(fresh_settings):
+    """Test that a bad reload does not replace working settings."""
+    from pydantic_ai_shared import config
+
+    previous = config.get_settings()
+    fresh_settings.setenv("CONCURRENCY__BATCH", "0")
+    assert config.reload_settings() is previous
+
+
+@pytest.fixture
+def sighup(fresh_settings):
+    """Restore the SIGHUP handler after a test installs the reload handler."""
+    previous = signal.getsignal(signal.SIGHUP)
+    yield fresh_settings
+    signal.signal(signal.SIGHUP, previous)
+
+
+def test_sighup_reloads_outside_the_signal_handler(sighup):
+    """Test that SIGHUP reloads settings on the background reload thread."""
+    from pydantic_ai_shared import config
+
+    assert config.install_reload_handler()
+    sighup.setenv("CONCURRENCY__BATCH", "33")
+    os.kill(os.getpid(), signal.SIGHUP)
+    deadline = time.monotonic() + 5
+    while config.get_settings().concurrency.batch != 33 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert config.get_settings().concurrency.batch == 33
+
+
+@pytest.mark.asyncio
+async def test_sighup_reloads_on_the_running_loop(sighup):
+    """Test that inside an event loop SIGHUP reloads as a loop callback."""
+    from pydantic_ai_shared import config
+
+    loop = asyncio.get_running_loop()
+    assert config.install_reload_handler()
+    try:
+        sighup.setenv("CONCURRENCY__BATCH", "34")
+        os.kill(os.getpid(), signal.SIGHUP)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if config.get_settings().concurrency.batch == 34:
+                break
+        assert config.get_settings().concurrency.batch == 34
+    finally:
+        loop.remove_signal_handler(signal.SIGHUP)
+
+
+def test_reload_applies_pool_limits_to_the_registry(fresh_settings):
+    """Test that reloaded HTTP settings reach the process-wide registry's pools."""
+    from pydantic_ai_shared import config, registry
+
+    fresh_settings.setattr(registry, "_default_registry", None)
+    default = registry.get_registry()
+    custom = registry.AgentRegistry(registry.PoolLimits(max_connections=5))
+    old_client = default.http_client("openai")
+
+    fresh_settings.setenv("HTTP__MAX_CONNECTIONS", "7")
+    config.reload_settings()
+
+    assert default.limits.max_connections == 7
+    assert default.http_client("openai") is not old_client
+    assert not old_client.is_closed  # still used by agents built before the reload
+    assert custom.limits.max_connections == 5
@@ -0,0 +1,225 @@
+"""
+Tests for the bulk extraction pipeline.
+"""
+import asyncio
+import json
+import re
+
+import pytest
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+from pydantic_ai_shared.examples.bulk_extraction import (
+    ExtractionPipeline,
+    InvalidRecord,
+    JsonlSink,
+    read_csv,
+    read_jsonl,
+)
+from pydantic_ai_shared.examples.data_extraction import DataExtractionExample
+
+
+def make_extractor(calls):
+    """Extractor whose stub model names each person after their record text."""
+
+    async def respond(messages, info):
+        prompt = messages[-1].parts[-1].content
+        calls.append(prompt)
+        if "[Record" in prompt:
+            names = re.findall(r"\[Record \d+\]\n(.*)", prompt)
+            args = {"response": [{"name": n, "age": 30, "occupation": "x"} for n in names]}
+        else:
+            if prompt == "broken":
+                raise RuntimeError("provider error")
+            args = {"name": prompt, "age": 30, "occupation": "x"}
+        return ModelResponse(parts=[ToolCallPart(info.result_tools[0].name, args)])
+
+    return DataExtractionExample(model=FunctionModel(respond))
+
+
+class Crash(Exception):
+    """Simulated crash of the input reader."""
+
+
+def read_rows(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_jsonl(tmp_path):
+    """Test lazy JSONL reading."""
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"text": "a"}\n\n{"text": "b"}\n')
+    assert list(read_jsonl(str(path))) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_packs_records_and_preserves_order(tmp_path):
+    """Test packing, ordering and per-record fallback for failures."""
+    calls = []
+    texts = [f"person-{i}" for i in range(10)]
+    pipeline = ExtractionPipeline(make_extractor(calls), pack_size=4, max_concurrency=3)
+    output = tmp_path / "out.jsonl"
+
+    stats = await pipeline.run(texts, JsonlSink(str(output)))
+
+    rows = read_rows(output)
+    assert [row["record"] for row in rows] == list(range(10))
+    assert [row["person"]["name"] for row in rows] == texts
+    assert stats.batches == 3
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_failures_individually(tmp_path):
+    """Test that a failing record does not fail the rest of its batch."""
+    calls = []
+    extractor = make_extractor(calls)
+    pipeline = ExtractionPipeline(extractor, pack_size=1, max_concurrency=2)
+    output = tmp_path / "out.jsonl"
+
+    stats = await pipeline.run(["ok", "broken", "fine"], JsonlSink(str(output)))
+
+    rows = read_rows(output)
+    assert rows[1]["person"] is None and "provider error" in rows[1]["error"]
+    assert stats.succeeded == 2 and stats.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_malformed_records_become_error_rows(tmp_path):
+    """Test that unreadable input records are written as errors without stopping the run."""
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"text": "a"}\n{"text": \n{"other": "b"}\n["c"]\n{"text": 4}\n{"text": "d"}\n')
+    records = list(read_jsonl(str(path)))
+    assert records[0] == "a" and records[-1] == "d"
+    assert all(isinstance(record, InvalidRecord) for record in records[1:-1])
+
+    csv_path = tmp_path / "in.csv"
+    csv_path.write_text("text,id\ne,1\n")
+    assert list(read_csv(str(csv_path))) == ["e"]
+    assert isinstance(next(read_csv(str(csv_path), text_field="body")), InvalidRecord)
+
+    calls = []
+    output = tmp_path / "out.jsonl"
+    stats = await ExtractionPipeline(make_extractor(calls), pack_size=3).run(records, JsonlSink(str(output)))
+
+    rows = read_rows(output)
+    assert [row["person"]["name"] for row in (rows[0], rows[-1])] == ["a", "d"]
+    assert all(row["person"] is None and "invalid input at line" in row["error"] for row in rows[1:-1])
+    assert (stats.succeeded, stats.failed) == (2, 4)
+    assert sorted(calls) == ["a", "d"]  # invalid records never reach the model
+
+
+@pytest.mark.asyncio
+async def test_pipeline_resumes_from_checkpoint(tmp_path):
+    """Test that a crashed run resumes without duplicating or losing records."""
+    texts = [f"person-{i}" for i in range(20)]
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "out.checkpoint"
+
+    def crashing_input():
+        for i, text in enumerate(texts):
+            if i == 13:
+                raise Crash
+            yield text
+
+    first = ExtractionPipeline(make_extractor([]), pack_size=2, max_concurrency=1,
+                               checkpoint_path=str(checkpoint), checkpoint_every=4)
+    with pytest.raises(Crash):
+        await first.run(crashing_input(), JsonlSink(str(output)))
+
+    calls = []
+    second = ExtractionPipeline(make_extractor(calls), pack_size=2, max_concurrency=1,
+                                checkpoint_path=str(checkpoint), checkpoint_every=4)
+    stats = await second.run(texts, JsonlSink(str(output)))
+
+    rows = read_rows(output)
+    assert [row["record"] for row in rows] == list(range(20))
+    assert stats.resumed_from > 0
+    assert stats.records == 20 - stats.resumed_from
+
+
+@pytest.mark.asyncio
+async def test_pipeline_writes_parquet_parts(tmp_path):
+    """Test the Parquet sink."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    from pydantic_ai_shared.examples.bulk_extraction import ParquetSink
+
+    pipeline = ExtractionPipeline(make_extractor([]), pack_size=2, max_concurrency=2)
+    await pipeline.run([f"p{i}" for i in range(5)], ParquetSink(str(tmp_path / "out"), rows_per_file=2))
+
+    parts = sorted((tmp_path / "out").glob("part-*.parquet"))
+    rows = [row for part in parts for row in pq.read_table(part).to_pylist()]
+    assert len(parts) == 3
+    assert [row["record"] for row in rows] == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_parquet_parts_hold_rows_per_file_across_a_resume(tmp_path):
+    """Test that checkpoints don't cut Parquet parts short and a resume keeps spooled rows."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    from pydantic_ai_shared.examples.bulk_extraction import ParquetSink
+
+    texts = [f"p{i}" for i in range(11)]
+    directory, checkpoint = tmp_path / "out", tmp_path / "out.checkpoint"
+
+    def crashing_input():
+        for i, text in enumerate(texts):
+            if i == 9:
+                raise Crash
+            yield text
+
+    def pipeline():
+        return ExtractionPipeline(make_extractor([]), max_concurrency=1,
+                                  checkpoint_path=str(checkpoint), checkpoint_every=3)
+
+    with pytest.raises(Crash):
+        await pipeline().run(crashing_input(), ParquetSink(str(directory), rows_per_file=4))
+    stats = await pipeline().run(texts, ParquetSink(str(directory), rows_per_file=4))
+
+    parts = sorted(directory.glob("part-*.parquet"))
+    tables = [pq.read_table(part).to_pylist() for part in parts]
+    assert [len(table) for table in tables] == [4, 4, 3]
+    assert [row["record"] for table in tables for row in table] == list(range(11))
+    assert stats.resumed_from in (3, 6)  # resumed mid-part, from the spool
+    assert not list(directory.glob("*.pending.jsonl"))
+
+
+class RecordingSink(JsonlSink):
+    """JSONL sink that records writes made after it was closed."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.late_writes = []
+
+    def write(self, row):
+        if self._file is None:
+            self.late_writes.append(row)
+            return
+        super().write(row)
+
+
+@pytest.mark.asyncio
+async def test_producer_failure_stops_workers_before_closing_the_sink(tmp_path):
+    """Test that in-flight batches are cancelled, not written to a closed sink."""
+    started = asyncio.Event()
+
+    class SlowExtractor:
+        """Extractor still busy when the input fails."""
+
+        async def extract(self, text):
+            started.set()
+            await asyncio.sleep(0.05)
+            return None
+
+    def crashing_input():
+        yield "first"
+        yield "second"
+        raise Crash
+
+    sink = RecordingSink(str(tmp_path / "out.jsonl"))
+    with pytest.raises(Crash):
+        await ExtractionPipeline(SlowExtractor(), max_concurrency=2).run(crashing_input(), sink)
+    assert started.is_set()
+    await asyncio.sleep(0.1)  # a leftover worker would write now
+    assert sink.late_writes == []
@@ -0,0 +1,130 @@
+"""
+Tests for the response cache.
+"""
+import pytest
+from pydantic import BaseModel
+
+from pydantic_ai_shared.cache import (
+    LRUCache,
+    ResponseCache,
+    SemanticCache,
+    cache_key,
+    namespace_key,
+    normalize_query,
+)
+
+
+class Answer(BaseModel):
+    """Structured result stored in the test caches."""
+    text: str
+
+
+def test_normalize_query():
+    """Test that trivially different queries normalize identically."""
+    assert normalize_query("  VPN   down!! ") == normalize_query("vpn down")
+    assert cache_key("VPN down?") == cache_key("vpn   down")
+    assert cache_key("vpn down", "a") != cache_key("vpn down", "b")
+
+
+def test_namespace_components_cannot_collide():
+    """Test that separators inside components don't make namespaces collide."""
+    assert namespace_key("a|b", "c") != namespace_key("a", "b|c")
+    assert namespace_key("a", "b") == namespace_key("a", "b")
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl():
+    """Test LRU eviction order and TTL expiry."""
+    lru = LRUCache(maxsize=2, ttl=None)
+    await lru.set("a", "1")
+    await lru.set("b", "2")
+    await lru.get("a")
+    await lru.set("c", "3")
+    assert await lru.get("b") is None
+    assert await lru.get("a") == "1"
+
+    await lru.set("d", "4", ttl=0)
+    assert await lru.get("d") is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_exact_and_semantic_tiers():
+    """Test exact hits, semantic hits and the hit/miss counters."""
+    vectors = {"vpn down": [1.0, 0.0], "vpn is down": [0.99, 0.05], "printer jam": [0.0, 1.0]}
+    cache = ResponseCache(Answer, semantic=SemanticCache(vectors.__getitem__, threshold=0.95))
+
+    assert await cache.get("VPN down") is None
+    await cache.set("VPN down", Answer(text="restart the client"))
+
+    assert (await cache.get("vpn down!")).text == "restart the client"
+    assert (await cache.get("VPN is down")).text == "restart the client"
+    assert await cache.get("printer jam") is None
+
+    assert cache.stats.exact_hits == 1
+    assert cache.stats.semantic_hits == 1
+    assert cache.stats.misses == 2
+    assert cache.stats.hit_rate == 0.5
+
+
+@pytest.mark.asyncio
+async def test_response_cache_shared_tier_backfills_local():
+    """Test that a shared-tier hit is copied into the local tier."""
+    shared = LRUCache()
+    writer = ResponseCache(Answer, shared=shared)
+    reader = ResponseCache(Answer, shared=shared)
+
+    await writer.set("reset password", Answer(text="use the portal"))
+    assert (await reader.get("reset password")).text == "use the portal"
+    assert (await reader.get("reset password")).text == "use the portal"
+    assert reader.stats.shared_hits == 1
+    assert reader.stats.exact_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_from_an_older_schema_are_dropped_as_misses():
+    """Test that payloads that no longer validate count as misses in every tier and are removed."""
+    vectors = {"vpn down": [1.0, 0.0]}
+    shared = LRUCache()
+    semantic = SemanticCache(vectors.__getitem__, threshold=0.95)
+    cache = ResponseCache(Answer, shared=shared, semantic=semantic)
+    key = cache_key("vpn down", cache.namespace)
+    stale = '{"answer": "restart the client"}'  # written before `text` was required
+    await cache.local.set(key, stale)
+    await shared.set(key, stale)
+    await semantic.set("vpn down", stale, cache.scope())
+
+    assert await cache.get("vpn down") is None
+    assert cache.stats.misses == 1 and cache.stats.hits == 0
+    assert await cache.local.get(key) is None
+    assert await shared.get(key) is None
+    assert await semantic.get("vpn down", cache.scope()) is None
+
+
+@pytest.mark.asyncio
+async def test_entries_are_scoped_by_model():
+    """Test that one model's answers are never served for another model."""
+    vectors = {"vpn down": [1.0, 0.0]}
+    cache = ResponseCache(Answer, shared=LRUCache(), semantic=SemanticCache(vectors.__getitem__, threshold=0.95))
+    await cache.set("vpn down", Answer(text="restart the client"), model="openai:gpt-4o")
+
+    assert await cache.get("vpn down", model="anthropic:claude-3-5-haiku-latest") is None
+    assert (await cache.get("vpn down", model="openai:gpt-4o")).text == "restart the client"
+    assert cache.scope("openai:gpt-4o") != cache.scope("anthropic:claude-3-5-haiku-latest")
+
+
+@pytest.mark.asyncio
+async def test_semantic_tier_embeds_a_missed_query_once():
+    """Test that storing the answer to a miss reuses the lookup's embedding."""
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [1.0, 0.0] if "vpn" in text else [0.0, 1.0]
+
+    cache = ResponseCache(Answer, semantic=SemanticCache(embed, threshold=0.95))
+    await cache.set("printer jam", Answer(text="open tray 2"))
+    calls.clear()
+
+    assert await cache.get("VPN down") is None
+    await cache.set("VPN down", Answer(text="restart the client"))
+    assert calls == ["vpn down"]
@@ -0,0 +1,134 @@
+"""
+Tests for hedged requests and circuit breakers.
+"""
+import asyncio
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from pydantic_ai_shared import hedging
+from pydantic_ai_shared.hedging import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, HedgedRunner, failover_model
+from pydantic_ai_shared.registry import AgentRegistry
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    """Give each test its own process-wide breakers."""
+    monkeypatch.setattr(hedging, "_breakers", {})
+
+
+def _model(reply, delay=0.0, events=None):
+    async def respond(messages, info):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if events is not None:
+                events.append(f"{reply} cancelled")
+            raise
+        if isinstance(reply, Exception):
+            raise reply
+        return ModelResponse(parts=[TextPart(reply)])
+
+    return FunctionModel(respond)
+
+
+def _runner(primary, secondary, **kwargs):
+    runner = HedgedRunner(primary, secondary, registry=AgentRegistry(), **kwargs)
+    runner.breakers = (CircuitBreaker("primary", min_calls=2), CircuitBreaker("secondary", min_calls=2))
+    return runner
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    """Test that a primary answering before the deadline runs alone."""
+    runner = _runner(_model("primary"), _model("secondary"), max_delay=1.0)
+    result = await runner.run("hi")
+    assert result.data == "primary"
+    assert runner.stats.hedged == 0
+    assert runner.stats.hedge_rate == 0.0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    """Test that a slow primary is hedged and cancelled when the secondary wins."""
+    events = []
+    runner = _runner(_model("primary", delay=5.0, events=events), _model("secondary", delay=0.01), max_delay=0.02)
+    result = await runner.run("hi")
+    assert result.data == "secondary"
+    assert events == ["primary cancelled"]
+    assert (runner.stats.calls, runner.stats.hedged, runner.stats.hedge_wins) == (1, 1, 1)
+    assert runner.stats.mean_latency < 1.0
+
+
+@pytest.mark.asyncio
+async def test_hedge_falls_back_to_primary_when_secondary_fails():
+    """Test that a failing hedge leaves the primary to finish."""
+    runner = _runner(_model("primary", delay=0.1), _model(RuntimeError("down")), max_delay=0.01)
+    result = await runner.run("hi")
+    assert result.data == "primary"
+    assert runner.stats.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_primary_fails_over_then_opens_circuit():
+    """Test that primary errors are retried on the secondary at once, then skip the primary."""
+    runner = _runner(_model(RuntimeError("down")), _model("secondary"), max_delay=5.0)
+    for _ in range(2):
+        result = await runner.run("hi")
+        assert result.data == "secondary"
+    assert runner.breakers[0].state == OPEN
+    assert runner.stats.mean_latency < 1.0  # did not wait for the hedge deadline
+
+    result = await runner.run("hi")
+    assert result.data == "secondary"
+    assert (runner.stats.failovers, runner.stats.hedged) == (3, 0)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_primary_latency_is_recorded_as_at_least_the_deadline():
+    """Test that a primary losing a hedge still adds a latency sample."""
+    runner = _runner(_model("primary", delay=5.0), _model("secondary"), max_delay=0.05)
+    await runner.run("hi")
+    assert len(runner._latencies) == 1
+    assert runner._latencies[0] >= 0.05
+
+
+def test_deadline_tracks_primary_latency_percentile():
+    """Test that the deadline follows the primary latency percentile within its bounds."""
+    runner = _runner(_model("primary"), _model("secondary"), percentile=90, min_delay=0.1, max_delay=5.0)
+    assert runner.deadline() == 5.0  # not enough samples yet
+    runner._latencies.extend([0.2] * 18 + [3.0, 4.0])
+    assert runner.deadline() == 0.2
+    runner._latencies.extend([9.0] * 20)
+    assert runner.deadline() == 5.0
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test the closed, open and half-open breaker transitions."""
+    now = [0.0]
+    breaker = CircuitBreaker("openai", failure_rate=0.5, min_calls=4, window=10, cooldown=5, clock=lambda: now[0])
+    for ok in (True, True, False):
+        breaker.record(ok)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    now[0] = 6.0
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one trial call at a time
+    breaker.record(False)
+    assert breaker.state == OPEN and breaker.opens == 2
+
+    now[0] = 12.0
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+
+def test_failover_model_swaps_providers():
+    """Test that the failover model comes from the other provider."""
+    assert failover_model("openai:gpt-4").startswith("anthropic:")
+    assert failover_model("anthropic:claude-3-5-sonnet-latest").startswith("openai:")
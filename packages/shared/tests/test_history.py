@@ -0,0 +1,133 @@
+"""
+Tests for conversation history and context windows.
+"""
+import asyncio
+
+import pytest
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart, UserPromptPart
+
+from pydantic_ai_shared.examples.chatbot import ChatbotExample
+from pydantic_ai_shared.history import (
+    ChatMessage,
+    ContextWindow,
+    InMemoryHistoryStore,
+    StoredMessage,
+    to_model_messages,
+)
+from pydantic_ai_shared.stub import StubModel
+
+
+async def _fill(store, session_id, turns, size=40):
+    for turn in range(turns):
+        await store.append(session_id, [
+            ChatMessage(role="user", content=f"question {turn} " + "x" * size),
+            ChatMessage(role="assistant", content=f"answer {turn} " + "y" * size),
+        ])
+
+
+def test_to_model_messages_puts_system_prompt_and_summary_first():
+    store_messages = [
+        ChatMessage(role="user", content="hi"),
+        ChatMessage(role="assistant", content="hello"),
+    ]
+    history = to_model_messages("be nice", "earlier stuff", [StoredMessage.from_message(m) for m in store_messages])
+    assert isinstance(history[0], ModelRequest)
+    assert [type(part) for part in history[0].parts] == [SystemPromptPart, SystemPromptPart, UserPromptPart]
+    assert isinstance(history[1], ModelResponse)
+    assert to_model_messages("be nice", "", []) == []
+
+
+@pytest.mark.asyncio
+async def test_window_keeps_recent_turns_within_budget():
+    store = InMemoryHistoryStore()
+    await _fill(store, "s", turns=20)
+    window = ContextWindow(store, token_budget=120, summarize_threshold=10_000)
+
+    history = await window.build("s", "system")
+    first_user = history[0].parts[-1].content
+    assert first_user.startswith("question ")
+    assert int(first_user.split()[1]) > 10
+    assert history[-1].parts[0].content.startswith("answer 19")
+    assert window.stats.history_tokens <= 120
+    assert len((await store.load("s")).messages) == 40
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_folded_into_summary_incrementally():
+    store = InMemoryHistoryStore()
+    await _fill(store, "s", turns=20)
+    calls = []
+
+    async def summarizer(summary, messages):
+        calls.append((summary, len(messages)))
+        return f"{summary}+{len(messages)}"
+
+    window = ContextWindow(store, token_budget=150, summarizer=summarizer, summarize_threshold=50)
+    history = await window.build("s", "system")
+
+    conversation = await store.load("s")
+    assert calls[0][0] == ""
+    assert conversation.summary == f"+{calls[0][1]}"
+    assert len(conversation.messages) == 40 - calls[0][1]
+    assert history[0].parts[1].content.endswith(conversation.summary)
+
+    # No new overflow, so no new summarization
+    await window.build("s", "system")
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_turns_share_one_summarization():
+    """Test that concurrent builds of a session fold its overflow once."""
+    store = InMemoryHistoryStore()
+    await _fill(store, "s", turns=20)
+    calls = []
+
+    async def summarizer(summary, messages):
+        calls.append(len(messages))
+        await asyncio.sleep(0.01)
+        return f"{summary}+{len(messages)}"
+
+    window = ContextWindow(store, token_budget=150, summarizer=summarizer, summarize_threshold=50)
+    histories = await asyncio.gather(*(window.build("s", "system") for _ in range(5)))
+
+    assert len(calls) == 1
+    assert len((await store.load("s")).messages) == 40 - calls[0]
+    summary = (await store.load("s")).summary
+    assert all(history[0].parts[1].content.endswith(summary) for history in histories)
+    assert len({len(history) for history in histories}) == 1
+
+
+def test_in_memory_store_evicts_least_recent_sessions():
+    import asyncio
+
+    store = InMemoryHistoryStore(max_sessions=2)
+
+    async def scenario():
+        await store.append("a", [ChatMessage(role="user", content="1")])
+        await store.append("b", [ChatMessage(role="user", content="2")])
+        await store.load("a")
+        await store.append("c", [ChatMessage(role="user", content="3")])
+        return [len((await store.load(s)).messages) for s in ("a", "b")]
+
+    assert asyncio.run(scenario()) == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_chatbot_sessions_resend_history():
+    seen = []
+    model = StubModel(text="ok")
+    original = model._respond
+
+    async def spy(messages, info):
+        seen.append(len(messages))
+        return await original(messages, info)
+
+    model.function = spy
+    chatbot = ChatbotExample(model=model, history=ContextWindow(InMemoryHistoryStore(), token_budget=1000))
+
+    await chatbot.chat("first", session_id="s")
+    await chatbot.chat("second", session_id="s")
+    await chatbot.chat("unrelated")
+
+    assert seen == [1, 3, 1]
@@ -0,0 +1,90 @@
+"""
+Tests for the persistent result memo.
+"""
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from pydantic_ai_shared.memo import MemoMissError, ResultMemo, memo_key
+
+
+class Answer(BaseModel):
+    """Result stored in the memo."""
+    text: str
+
+
+def test_memo_key_covers_every_input():
+    """Test that changing any input changes the key."""
+    base = memo_key("openai:gpt-4", "system", Answer, "question")
+    assert memo_key("openai:gpt-4", "system", Answer, "question") == base
+    assert len({
+        base,
+        memo_key("openai:gpt-4o", "system", Answer, "question"),
+        memo_key("openai:gpt-4", "other system", Answer, "question"),
+        memo_key("openai:gpt-4", "system", List[Answer], "question"),
+        memo_key("openai:gpt-4", "system", Answer, "question "),
+        memo_key("openai:gpt-4", "system", Answer, "question", context=("HR",)),
+    }) == 6
+
+
+@pytest.mark.asyncio
+async def test_memo_survives_reopen_and_replays(tmp_path):
+    """Test that results persist across instances and replay mode never calls the model."""
+    path = str(tmp_path / "memo.sqlite")
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return Answer(text="hello")
+
+    memo = ResultMemo(path)
+    key = memo_key("m", "s", Answer, "q")
+    assert await memo.get_or_run(key, Answer, run) == Answer(text="hello")
+    assert await memo.get_or_run(key, Answer, run) == Answer(text="hello")
+    memo.close()
+    assert len(calls) == 1
+
+    replay = ResultMemo(path, mode="replay")
+    assert await replay.get_or_run(key, Answer, run) == Answer(text="hello")
+    with pytest.raises(MemoMissError):
+        await replay.get_or_run(memo_key("m", "s", Answer, "unseen"), Answer, run)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_memo_evicts_least_recently_used(tmp_path):
+    """Test size-based eviction and that concurrent writers share one file."""
+    path = str(tmp_path / "memo.sqlite")
+    writer = ResultMemo(path, max_bytes=100)
+    other = ResultMemo(path, max_bytes=100)
+    for i in range(10):
+        await (writer if i % 2 else other).set(f"k{i}", Answer(text=f"{i:>10}"), Answer)
+
+    assert writer.size <= 100
+    assert len(writer) == 100 // len(b'{"text":"         0"}')
+    assert await writer.get("k0", Answer) is None
+    assert await writer.get("k9", Answer) == Answer(text="         9")
+
+
+@pytest.mark.asyncio
+async def test_wrong_length_batch_extraction_is_not_memoized(tmp_path):
+    """Test that a batch result with the wrong number of people is rejected before it is stored."""
+    from pydantic_ai.messages import ModelResponse, ToolCallPart
+    from pydantic_ai.models.function import FunctionModel
+
+    from pydantic_ai_shared.examples.data_extraction import DataExtractionExample
+
+    calls = []
+
+    def respond(messages, info):
+        calls.append(1)
+        people = [{"name": "a", "age": 30, "occupation": "x"}] * (1 if len(calls) == 1 else 2)
+        return ModelResponse(parts=[ToolCallPart(info.result_tools[0].name, {"response": people})])
+
+    memo = ResultMemo(str(tmp_path / "memo.sqlite"))
+    extractor = DataExtractionExample(model=FunctionModel(respond), memo=memo)
+    with pytest.raises(ValueError):
+        await extractor.extract_many(["first", "second"])
+    assert len(await extractor.extract_many(["first", "second"])) == 2
+    assert len(calls) == 2
@@ -0,0 +1,140 @@
+"""
+Tests for provider prompt caching.
+"""
+import json
+
+import httpx
+import pytest
+from pydantic import BaseModel
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelRequest, ModelResponse, SystemPromptPart, TextPart
+from pydantic_ai.usage import Usage
+
+pytest.importorskip("anthropic")
+
+from pydantic_ai.providers.anthropic import AnthropicProvider  # noqa: E402
+
+from pydantic_ai_shared.prompt_cache import CACHE_CONTROL, CachingAnthropicModel  # noqa: E402
+from pydantic_ai_shared.telemetry import Telemetry, TracedModel, cached_input_tokens  # noqa: E402
+
+
+class Answer(BaseModel):
+    """Structured result returned through the final_result tool."""
+    text: str
+
+
+def _anthropic(requests, content, usage):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "id": "msg_1", "type": "message", "role": "assistant", "model": "claude-test",
+            "content": content, "stop_reason": "end_turn", "stop_sequence": None, "usage": usage,
+        })
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return CachingAnthropicModel("claude-test", provider=AnthropicProvider(api_key="test", http_client=client))
+
+
+def _sse(events):
+    return "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events)
+
+
+CACHED_USAGE = {"input_tokens": 20, "output_tokens": 5, "cache_read_input_tokens": 1500, "cache_creation_input_tokens": 0}
+
+
+@pytest.mark.asyncio
+async def test_breakpoints_on_tools_and_static_system_prompt():
+    """Test that the last tool and both system prompt parts carry breakpoints."""
+    requests = []
+    content = [{"type": "tool_use", "id": "t1", "name": "final_result", "input": {"text": "hi"}}]
+    model = _anthropic(requests, content, CACHED_USAGE)
+    agent = Agent(model, result_type=Answer, system_prompt="Static instructions.")
+
+    history = [
+        ModelRequest(parts=[SystemPromptPart("Static instructions."), SystemPromptPart("Summary: earlier turns")]),
+        ModelResponse(parts=[TextPart("ok")]),
+    ]
+    result = await agent.run("hello", message_history=history)
+
+    body = requests[0]
+    assert body["system"] == [
+        {"type": "text", "text": "Static instructions.", "cache_control": CACHE_CONTROL},
+        {"type": "text", "text": "Summary: earlier turns", "cache_control": CACHE_CONTROL},
+    ]
+    assert body["tools"][-1]["cache_control"] == CACHE_CONTROL
+    assert result.data.text == "hi"
+
+    usage = result.usage()
+    assert usage.request_tokens == 1520
+    assert cached_input_tokens(usage) == (1500, 0)
+
+
+@pytest.mark.asyncio
+async def test_plain_text_agent_without_tools_or_system_prompt():
+    """Test that requests without tools or a system prompt are left alone."""
+    requests = []
+    model = _anthropic(requests, [{"type": "text", "text": "hi"}], {"input_tokens": 3, "output_tokens": 1})
+    result = await Agent(model).run("hello")
+    assert "system" not in requests[0]
+    assert "tools" not in requests[0]
+    assert result.usage().request_tokens == 3
+    assert cached_input_tokens(result.usage()) == (0, 0)
+
+
+def test_cached_input_tokens_reads_openai_details():
+    """Test that OpenAI's cached token detail is read as cache reads."""
+    assert cached_input_tokens(Usage(request_tokens=2000, details={"cached_tokens": 1024})) == (1024, 0)
+    assert cached_input_tokens(Usage(request_tokens=10)) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_metrics_split_input_tokens_by_cache_outcome(monkeypatch):
+    """Test that input token metrics separate cache reads from misses."""
+    telemetry = Telemetry(enabled=True)
+    monkeypatch.setattr("pydantic_ai_shared.telemetry._telemetry", telemetry)
+    model = _anthropic([], [{"type": "text", "text": "hi"}], CACHED_USAGE)
+    await Agent(TracedModel(model)).run("hello")
+
+    metrics = telemetry.metrics
+    assert metrics.counter("agent_input_tokens_total", model="claude-test", cache="read") == 1500
+    assert metrics.counter("agent_input_tokens_total", model="claude-test", cache="miss") == 20
+    assert metrics.counter("agent_tokens_total", model="claude-test", kind="input") == 1520
+
+
+@pytest.mark.asyncio
+async def test_streamed_usage_includes_cached_tokens():
+    """Test that streamed requests get breakpoints and report cache reads."""
+    requests = []
+    events = [
+        {"type": "message_start", "message": {
+            "id": "msg_1", "type": "message", "role": "assistant", "model": "claude-test", "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": CACHED_USAGE,
+        }},
+        {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+        {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "hi"}},
+        {"type": "content_block_stop", "index": 0},
+        {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+         "usage": {"output_tokens": 5}},
+        {"type": "message_stop"},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, text=_sse(events), headers={"content-type": "text/event-stream"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    model = CachingAnthropicModel("claude-test", provider=AnthropicProvider(api_key="test", http_client=client))
+    agent = Agent(model, system_prompt="Static instructions.")
+    async with agent.run_stream("hello") as result:
+        assert await result.get_data() == "hi"
+
+    assert requests[0]["system"] == [{"type": "text", "text": "Static instructions.", "cache_control": CACHE_CONTROL}]
+    assert cached_input_tokens(result.usage()) == (1500, 0)
+    assert result.usage().request_tokens == 1520
+
+
+def test_sdk_client_is_wrapped_through_public_attributes():
+    """Test that the model still exposes the SDK client as `client` for the wrapper to replace."""
+    model = CachingAnthropicModel("claude-test", provider=AnthropicProvider(api_key="test"))
+    assert callable(model.client.messages.create)
+    assert model.client.base_url == model.base_url
@@ -0,0 +1,163 @@
+"""
+Tests for adaptive rate limiting and retries.
+"""
+import time
+
+import pytest
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+from pydantic_ai.models.function import FunctionModel
+
+from pydantic_ai_shared.ratelimit import (
+    LocalBucketStore,
+    RateLimitedModel,
+    RateLimiter,
+    RateLimitInfo,
+    SharedMemoryBucketStore,
+    estimate_request_tokens,
+    parse_reset,
+)
+from pydantic_ai_shared.registry import AgentRegistry
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("pydantic_ai_shared.ratelimit.backoff_delay", lambda attempt, retry=None: 0.0)
+
+
+def test_parse_reset_formats():
+    assert parse_reset("20") == 20
+    assert parse_reset("6m0s") == 360
+    assert parse_reset("120ms") == pytest.approx(0.12)
+    assert parse_reset("1.5s") == 1.5
+    assert parse_reset("2099-01-01T00:00:00Z") > 0
+    assert parse_reset("soon") is None
+
+
+def test_headers_are_parsed_for_both_providers():
+    openai = RateLimitInfo.from_headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "29000",
+    })
+    assert (openai.request_limit, openai.requests_remaining, openai.token_limit, openai.tokens_remaining) == (
+        500, 499, 30000, 29000,
+    )
+    anthropic = RateLimitInfo.from_headers({
+        "anthropic-ratelimit-requests-limit": "50",
+        "anthropic-ratelimit-tokens-remaining": "100",
+        "retry-after": "3",
+    })
+    assert (anthropic.request_limit, anthropic.tokens_remaining, anthropic.retry_after) == (50, 100, 3)
+
+
+def test_estimate_request_tokens_counts_prompt_and_reserved_output():
+    messages = [ModelRequest(parts=[UserPromptPart("x" * 400)]), ModelResponse(parts=[TextPart("y" * 40)])]
+    assert estimate_request_tokens(messages, output_tokens=100) == 100 + 101 + 11
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_type", [LocalBucketStore, SharedMemoryBucketStore])
+async def test_bucket_grants_bursts_then_asks_to_wait(store_type):
+    store = store_type()
+    assert await store.take("k", 1, rate=10, capacity=2) == 0
+    assert await store.take("k", 1, rate=10, capacity=2) == 0
+    assert await store.take("k", 1, rate=10, capacity=2) == pytest.approx(0.1, abs=0.01)
+    # Oversized costs are granted from a full bucket
+    assert await store.take("big", 50, rate=10, capacity=20) == 0
+    assert await store.take("big", 1, rate=10, capacity=20) > 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_adapts_to_headers_and_waits():
+    limiter = RateLimiter()
+    key = "openai:gpt-4"
+    assert await limiter.acquire(key, 100) == 0  # nothing configured or learned yet
+
+    await limiter.observe(key, RateLimitInfo(request_limit=6000, requests_remaining=0))
+    assert limiter.limits(key)["requests"] == 6000
+
+    start = time.perf_counter()
+    waited = await limiter.acquire(key, 100)
+    assert waited > 0
+    assert time.perf_counter() - start >= 0.009
+    assert limiter.stats[key].throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_settle_refunds_overestimated_tokens():
+    limiter = RateLimiter()
+    key = "anthropic:claude"
+    await limiter.observe(key, RateLimitInfo(token_limit=600, tokens_remaining=600))
+    await limiter.acquire(key, 600)
+    await limiter.settle(key, estimated=600, actual=100)
+    assert await limiter.store.take(f"{key}:tokens", 400, rate=10, capacity=600) == 0
+
+
+def _flaky_model(statuses):
+    calls = []
+
+    def respond(messages, info):
+        calls.append(1)
+        if len(calls) <= len(statuses):
+            raise ModelHTTPError(statuses[len(calls) - 1], "flaky", body="error")
+        return ModelResponse(parts=[TextPart("ok")])
+
+    return FunctionModel(respond), calls
+
+
+@pytest.mark.asyncio
+async def test_registry_agents_retry_throttled_requests():
+    model, calls = _flaky_model([429, 503])
+    agent = AgentRegistry().agent(model)
+    result = await agent.run("hi")
+    assert result.data == "ok"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_and_exhausted_errors_propagate():
+    model, calls = _flaky_model([400])
+    with pytest.raises(ModelHTTPError):
+        await AgentRegistry().agent(model).run("hi")
+    assert len(calls) == 1
+
+    limiter = RateLimiter()
+    model, calls = _flaky_model([429, 429, 429, 429])
+    wrapped = RateLimitedModel(model, limiter)
+    from pydantic_ai import Agent
+
+    with pytest.raises(ModelHTTPError):
+        await Agent(wrapped).run("hi")
+    assert len(calls) == 3  # retry.max_attempts
+    assert limiter.stats["function:function:respond:"].rate_limited == 2
+
+
+@pytest.mark.asyncio
+async def test_connection_errors_are_retried_and_refund_their_tokens():
+    """Test that transport failures are retried and failed attempts don't keep their token estimate."""
+    import httpx
+    import openai
+
+    errors = [httpx.ConnectError("refused"), openai.APITimeoutError(httpx.Request("POST", "https://api.openai.com"))]
+    calls = []
+
+    def respond(messages, info):
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return ModelResponse(parts=[TextPart("ok")])
+
+    limiter = RateLimiter()
+    key = "function:function:respond:"
+    await limiter.observe(key, RateLimitInfo(token_limit=60_000))
+    from pydantic_ai import Agent
+
+    result = await Agent(RateLimitedModel(FunctionModel(respond), limiter)).run("hi")
+    assert result.data == "ok"
+    assert len(calls) == 3
+    assert limiter.stats[key].retries == 2
+    # Only the successful attempt's tokens are charged
+    level = limiter.store._buckets[f"{key}:tokens"][0]
+    assert level >= 60_000 - result.usage().total_tokens - 1
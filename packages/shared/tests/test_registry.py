@@ -0,0 +1,83 @@
+"""
+Tests for the agent and HTTP client registry.
+"""
+import pytest
+from pydantic import BaseModel
+from pydantic_ai.models.test import TestModel
+
+from pydantic_ai_shared.registry import AgentRegistry, PoolLimits
+
+
+class Result(BaseModel):
+    """Structured result of the test agents."""
+    value: int
+
+
+def test_agents_are_memoized_per_configuration():
+    """Test that identical configurations share one agent."""
+    registry = AgentRegistry()
+    model = TestModel()
+
+    first = registry.agent(model, result_type=Result, system_prompt="a")
+    assert registry.agent(model, result_type=Result, system_prompt="a") is first
+    assert registry.agent(model, result_type=Result, system_prompt="b") is not first
+    assert registry.agent(TestModel(), result_type=Result, system_prompt="a") is not first
+
+    stats = registry.stats()
+    assert stats.agents == 3
+    assert stats.agent_hits == 1
+    assert stats.agent_misses == 3
+
+
+def test_agents_for_model_instances_are_bounded():
+    """Test that per-instance agents are evicted least recently used first."""
+    registry = AgentRegistry(max_instance_agents=2)
+    models = [TestModel() for _ in range(3)]
+    first = registry.agent(models[0])
+    registry.agent(models[1])
+    assert registry.agent(models[0]) is first  # now the most recently used
+    registry.agent(models[2])
+
+    assert registry.stats().agents == 2
+    assert registry.agent(models[0]) is first
+    registry.agent(models[1])  # evicted, so built again
+    assert registry.stats().agent_misses == 4
+
+
+def test_provider_models_get_their_own_sdk_client_without_retries(monkeypatch):
+    """Test that SDK retries are disabled on a dedicated client, not a shared one."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    registry = AgentRegistry()
+    first = registry.model("openai:gpt-4o")
+    second = registry.model("openai:gpt-4o-mini")
+    assert first.client is not second.client
+    assert first.client.max_retries == 0
+    assert registry.model("anthropic:claude-3-5-haiku-latest").client.max_retries == 0
+
+
+@pytest.mark.asyncio
+async def test_provider_models_share_one_pooled_client(monkeypatch):
+    """Test that models of the same provider reuse one HTTP client."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    registry = AgentRegistry(PoolLimits(max_connections=5))
+
+    client = registry.http_client("openai")
+    assert registry.http_client("openai") is client
+    assert client._transport._pool._max_connections == 5
+
+    registry.agent("openai:gpt-4o-mini", system_prompt="a")
+    registry.agent("openai:gpt-4o", system_prompt="a")
+    assert list(registry.stats().clients) == ["openai"]
+
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.stats().agents == 0
+
+
+def test_non_pooled_models_pass_through():
+    """Test that unknown providers and model instances are left alone."""
+    registry = AgentRegistry()
+    model = TestModel()
+    assert registry.model(model) is model
+    assert registry.model("test") == "test"
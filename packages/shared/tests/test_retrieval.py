@@ -0,0 +1,117 @@
+"""
+Tests for local document retrieval.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pydantic_ai_shared.retrieval import HashingEmbedder, Retriever, VectorIndex, chunk_text  # noqa: E402
+
+HANDBOOK = """# Time off
+
+Employees get 25 days of paid vacation per year. Unused days carry over up to 5 days.
+
+# Benefits
+
+Health insurance covers dental and vision. """ + "The gym subsidy is paid monthly. " * 40
+
+
+def test_chunks_respect_size_and_keep_headings():
+    """Test that chunks stay under the limit and carry their section heading."""
+    chunks = chunk_text(HANDBOOK, max_chars=300, overlap=50)
+
+    assert len(chunks) > 3
+    assert all(len(chunk) <= 300 + len("# Benefits\n\n") for chunk in chunks)
+    assert chunks[0].startswith("# Time off") and "vacation" in chunks[0]
+    assert all(chunk.startswith("# Benefits") for chunk in chunks[1:])
+
+
+def test_incremental_ingest_and_zero_copy_reopen(tmp_path):
+    """Test that unchanged documents are skipped and replaced ones masked out."""
+    retriever = Retriever(tmp_path, chunk_chars=300, chunk_overlap=50)
+    stats = retriever.ingest({"hr.md": HANDBOOK, "it.md": "# VPN\n\nReset VPN tokens in the IT portal."})
+    assert (stats.added, stats.skipped) == (2, 0)
+    assert retriever.search("paid vacation days")[0].source == "hr.md"
+
+    assert retriever.ingest({"hr.md": HANDBOOK}).skipped == 1
+    assert retriever.ingest({"hr.md": HANDBOOK.replace("25 days", "30 days")}).replaced == 1
+    assert retriever.index.live_count < retriever.index.count
+
+    reopened = Retriever(tmp_path, chunk_chars=300, chunk_overlap=50)
+    assert isinstance(reopened.index.vectors, np.memmap)
+    hits = reopened.search("paid vacation days", k=20)
+    assert "30 days" in hits[0].text
+    assert not any("25 days" in hit.text for hit in hits)
+
+    reopened.index.compact()
+    assert reopened.index.count == reopened.index.live_count
+    assert reopened.search("VPN tokens")[0].source == "it.md"
+
+
+def test_ivf_search_matches_exact_search(tmp_path):
+    """Test IVF recall on clustered vectors, including rows added after the build."""
+    rng = np.random.default_rng(0)
+    dim = 32
+    centers = rng.standard_normal((20, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.3 * rng.standard_normal((2000, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    index = VectorIndex(tmp_path, dim)
+    index.add("a", "1", ["chunk"] * 1500, vectors[:1500])
+    index.build_ivf(nlist=20)
+    index.add("b", "2", ["chunk"] * 500, vectors[1500:])
+
+    recall = []
+    for query in vectors[rng.integers(0, 2000, 20)]:
+        exact = {row for row, _ in index.search(query, 10)}
+        approximate = {row for row, _ in index.search(query, 10, nprobe=4)}
+        recall.append(len(exact & approximate) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_updates_never_rewrite_files_a_reader_has_mapped(tmp_path):
+    """Test that IVF rebuilds use new files and appends never shrink mapped files."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    writer = VectorIndex(tmp_path, 16)
+    writer.add("a", "1", ["chunk"] * 200, vectors[:200])
+    writer.build_ivf(nlist=8)
+
+    reader = VectorIndex(tmp_path, 16)
+    mapped_centroids = np.array(reader.centroids)
+    with open(tmp_path / "vectors.f32", "ab") as file:
+        file.write(b"partial write lost in a crash")
+    size = (tmp_path / "vectors.f32").stat().st_size
+
+    writer.add("b", "2", ["chunk"] * 100, vectors[200:])
+    writer.build_ivf(nlist=4)
+
+    assert (tmp_path / "vectors.f32").stat().st_size >= size
+    assert np.array_equal(reader.centroids, mapped_centroids)  # old generation still mapped
+    assert sorted(file.name for file in tmp_path.glob("ivf*")) == [
+        "ivf-2.centroids.f32", "ivf-2.ids.i64", "ivf-2.offsets.i64",
+    ]
+    assert np.allclose(VectorIndex(tmp_path, 16).vectors[200:], vectors[200:])
+
+
+def test_compaction_keeps_other_readers_working(tmp_path):
+    """Test that a reader opened before a compaction still reads its chunks afterwards."""
+    writer = Retriever(tmp_path, chunk_chars=300, chunk_overlap=50)
+    writer.ingest({"hr.md": HANDBOOK, "it.md": "# VPN\n\nReset VPN tokens in the IT portal."})
+    reader = Retriever(tmp_path, chunk_chars=300, chunk_overlap=50)
+
+    writer.ingest({"hr.md": HANDBOOK.replace("25 days", "30 days")})
+    writer.index.compact()
+
+    assert reader.search("VPN tokens")[0].source == "it.md"
+    assert "25 days" in reader.search("paid vacation days")[0].text
+    assert "30 days" in writer.search("paid vacation days")[0].text
+
+
+def test_index_rejects_other_embedder(tmp_path):
+    """Test that an index built by one embedder cannot be searched with another."""
+    Retriever(tmp_path, embedder=HashingEmbedder(dim=64)).ingest({"a": "text"})
+
+    with pytest.raises(ValueError):
+        Retriever(tmp_path, embedder=HashingEmbedder(dim=128))
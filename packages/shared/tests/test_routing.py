@@ -0,0 +1,86 @@
+"""
+Tests for cascading model routing.
+"""
+import pytest
+from pydantic import BaseModel
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+from pydantic_ai_shared.registry import AgentRegistry
+from pydantic_ai_shared.routing import CascadeRouter, Route
+
+
+class Answer(BaseModel):
+    """Structured result with a confidence score."""
+    text: str
+    confidence: float
+
+
+def answering(text, confidence, fail=False):
+    async def respond(messages, info):
+        if fail:
+            raise RuntimeError("provider down")
+        return ModelResponse(parts=[ToolCallPart(
+            info.result_tools[0].name, {"text": text, "confidence": confidence}
+        )])
+
+    return FunctionModel(respond)
+
+
+def make_router(fast, strong):
+    return CascadeRouter(
+        [
+            Route("fast", fast, input_cost_per_mtok=0.15, output_cost_per_mtok=0.6),
+            Route("strong", strong, input_cost_per_mtok=30, output_cost_per_mtok=60),
+        ],
+        result_type=Answer,
+        accept=lambda answer: answer.confidence >= 0.8,
+        registry=AgentRegistry(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_confident_fast_result_is_kept():
+    """Test that the fast tier answers when it is confident."""
+    router = make_router(answering("fast", 0.9), answering("strong", 1.0))
+    routed = await router.run("question")
+
+    assert routed.data.text == "fast"
+    assert not routed.escalated
+    assert router.stats["fast"].accepted == 1
+    assert router.stats["strong"].calls == 0
+    assert router.stats["fast"].cost > 0
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_and_failures_escalate():
+    """Test escalation on rejection and on errors."""
+    router = make_router(answering("fast", 0.2), answering("strong", 0.1))
+    routed = await router.run("question")
+    assert routed.data.text == "strong"
+    assert routed.attempts == ["fast", "strong"]
+    assert router.stats["fast"].rejected == 1
+
+    router = make_router(answering("fast", 1.0, fail=True), answering("strong", 1.0))
+    routed = await router.run("question")
+    assert routed.route == "strong"
+    assert router.stats["fast"].failures == 1
+
+
+@pytest.mark.asyncio
+async def test_all_routes_failing_raises_last_error():
+    """Test that the last error propagates when nothing succeeds."""
+    router = make_router(answering("", 0, fail=True), answering("", 0, fail=True))
+    with pytest.raises(RuntimeError):
+        await router.run("question")
+
+
+def test_priced_route_reads_model_prices_from_settings(monkeypatch):
+    """Test that routes built from settings carry the configured model prices."""
+    from pydantic_ai_shared import config
+
+    monkeypatch.setattr(config, "_settings", config.Settings(
+        routing={"prices": {"openai:cheap": {"input_per_mtok": 1.0, "output_per_mtok": 2.0}}}
+    ))
+    assert Route.priced("fast", "openai:cheap") == Route("fast", "openai:cheap", 1.0, 2.0)
+    assert Route.priced("other", "openai:unlisted").input_cost_per_mtok == 0.0
@@ -0,0 +1,29 @@
+"""
+Tests for cached validators and schemas.
+"""
+from typing import Annotated, List, Literal
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from pydantic_ai_shared.schemas import CaseInsensitive, json_schema, type_adapter, validate_json
+
+
+class Item(BaseModel):
+    kind: Annotated[Literal["IT", "HR"], CaseInsensitive()]
+
+
+def test_adapters_and_schemas_are_built_once():
+    """Test that repeated lookups reuse the compiled adapter and schema."""
+    assert type_adapter(List[Item]) is type_adapter(List[Item])
+    assert json_schema(Item) is json_schema(Item)
+    assert validate_json(List[Item], b'[{"kind": "IT"}, {"kind": "HR"}]') == [Item(kind="IT"), Item(kind="HR")]
+
+
+def test_case_insensitive_literal():
+    """Test that spelling variants become the canonical literal value."""
+    assert Item.model_validate_json('{"kind": " it "}').kind == "IT"
+    assert Item(kind="hr").kind is Item(kind="HR").kind
+    assert json_schema(Item)["properties"]["kind"]["enum"] == ["IT", "HR"]
+    with pytest.raises(ValidationError, match="Input should be one of 'IT', 'HR'"):
+        Item(kind="Facilities")
@@ -0,0 +1,120 @@
+"""
+Tests for the HTTP service.
+"""
+import asyncio
+
+import httpx
+import pytest
+from pydantic import BaseModel
+
+from pydantic_ai_shared.examples.chatbot import ChatbotExample
+from pydantic_ai_shared.examples.data_extraction import DataExtractionExample
+from pydantic_ai_shared.examples.service import add_example_routes
+from pydantic_ai_shared.service import AgentService
+from pydantic_ai_shared.stub import StubModel
+
+
+class Echo(BaseModel):
+    """Request and response of the test endpoint."""
+    text: str
+
+
+def make_service(**limits) -> AgentService:
+    service = AgentService(**limits)
+
+    @service.route("/echo", Echo)
+    async def echo(request: Echo) -> Echo:
+        await asyncio.sleep(0.2 if request.text == "slow" else 0)
+        return request
+
+    return service
+
+
+def client(service: AgentService) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=service), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_route_validates_and_answers():
+    """Test validation, 404 and 405 responses."""
+    async with client(make_service()) as http:
+        ok = await http.post("/echo", json={"text": "hi"})
+        invalid = await http.post("/echo", json={"wrong": 1})
+        missing = await http.post("/nope", json={})
+        wrong_method = await http.get("/echo")
+
+    assert ok.status_code == 200 and ok.json() == {"text": "hi"}
+    assert invalid.status_code == 422
+    assert missing.status_code == 404
+    assert wrong_method.status_code == 405
+
+
+@pytest.mark.asyncio
+async def test_rejects_with_429_beyond_queue():
+    """Test that requests beyond the queue are rejected with Retry-After."""
+    service = make_service(max_in_flight=1, max_queue=1)
+    async with client(service) as http:
+        responses = await asyncio.gather(*(http.post("/echo", json={"text": "slow"}) for _ in range(4)))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 200, 429, 429]
+    rejected = next(response for response in responses if response.status_code == 429)
+    assert rejected.headers["retry-after"] == "1"
+    assert service.routes["/echo"].stats.rejected == 2
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_in_flight_and_refuses_new_requests():
+    """Test that a drain waits for in-flight requests and answers new ones with 503."""
+    service = make_service()
+    async with client(service) as http:
+        in_flight = asyncio.create_task(http.post("/echo", json={"text": "slow"}))
+        await asyncio.sleep(0.05)
+        drained = asyncio.create_task(service.drain(timeout=5))
+        await asyncio.sleep(0)
+        refused = await http.post("/echo", json={"text": "hi"})
+        health = await http.get("/healthz")
+
+        assert (await in_flight).status_code == 200
+        assert await drained is True
+    assert refused.status_code == 503
+    assert health.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_queued_requests_and_refuses_them():
+    """Test that a request queued when the drain starts is answered 503 before the drain returns."""
+    service = AgentService(max_in_flight=1)
+    handled = []
+
+    @service.route("/echo", Echo)
+    async def echo(request: Echo) -> Echo:
+        handled.append(request.text)
+        await asyncio.sleep(0.2)
+        return request
+
+    async with client(service) as http:
+        running = asyncio.create_task(http.post("/echo", json={"text": "first"}))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(http.post("/echo", json={"text": "queued"}))
+        await asyncio.sleep(0.05)
+        assert service.routes["/echo"].stats.waiting == 1
+
+        assert await service.drain(timeout=5) is True
+        assert service.routes["/echo"].stats.waiting == 0
+        assert (await running).status_code == 200
+        assert (await queued).status_code == 503
+    assert handled == ["first"]
+
+
+@pytest.mark.asyncio
+async def test_example_chat_route():
+    """Test the example chat endpoint against a stub model."""
+    service = AgentService()
+    model = StubModel(text="hello")
+    add_example_routes(service, ChatbotExample(model=model), DataExtractionExample(model=model))
+    async with client(service) as http:
+        response = await http.post("/chat", json={"message": "hi"})
+
+    assert response.status_code == 200
+    assert response.json() == {"reply": "hello"}
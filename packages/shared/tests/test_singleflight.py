@@ -0,0 +1,64 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import asyncio
+
+import pytest
+
+from pydantic_ai_shared.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    executions = 0
+
+    async def call():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    results = await asyncio.gather(*(group.do("key", call) for _ in range(10)))
+    assert executions == 1
+    assert all(result is results[0] for result in results)
+    assert (group.stats.calls, group.stats.executions, group.stats.coalesced) == (10, 1, 9)
+    assert group.in_flight() == 0
+
+    await group.do("key", call)
+    assert executions == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    group = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    results = await asyncio.gather(*(group.do("key", call) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_shared_call():
+    group = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.create_task(group.do("key", call))
+    second = asyncio.create_task(group.do("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+
+    lonely = asyncio.create_task(group.do("other", call))
+    await asyncio.sleep(0)
+    lonely.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await lonely
+    await asyncio.sleep(0)
+    assert group.in_flight() == 0
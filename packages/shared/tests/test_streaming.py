@@ -0,0 +1,154 @@
+"""
+Tests for streaming helpers.
+"""
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import UnexpectedModelBehavior
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+
+from pydantic_ai_shared.examples.chatbot import ChatbotExample
+from pydantic_ai_shared.streaming import StreamMetrics, parse_partial_args, stream_field, stream_items
+
+
+class Report(BaseModel):
+    """Result with a string field to stream."""
+    title: str
+    summary: str
+
+
+def test_parse_partial_args():
+    """Test decoding of incomplete tool-call JSON."""
+    assert parse_partial_args('{"title": "Q3", "summary": "Rev') == {"title": "Q3", "summary": "Rev"}
+    assert parse_partial_args({"a": 1}) == {"a": 1}
+    assert parse_partial_args(None) == {}
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_yields_deltas_and_metrics():
+    """Test that the chatbot streams text deltas and records metrics."""
+
+    async def stream(messages, info):
+        for chunk in ["Hello", ", ", "world"]:
+            yield chunk
+
+    chatbot = ChatbotExample(model=FunctionModel(stream_function=stream))
+    metrics = StreamMetrics()
+    deltas = [delta async for delta in chatbot.chat_stream("hi", metrics)]
+
+    assert "".join(deltas) == "Hello, world"
+    assert metrics.result == "Hello, world"
+    assert metrics.chunks == len(deltas)
+    assert metrics.time_to_first_token is not None
+    assert metrics.output_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_stream_field_yields_field_deltas_and_result():
+    """Test streaming a single field of a structured result."""
+    payload = '{"title": "Q3", "summary": "Revenue grew by ten percent"}'
+
+    async def stream(messages, info):
+        name = info.result_tools[0].name
+        for i in range(0, len(payload), 7):
+            yield {0: DeltaToolCall(name=name if i == 0 else None, json_args=payload[i:i + 7])}
+
+    agent = Agent(FunctionModel(stream_function=stream), result_type=Report)
+    metrics = StreamMetrics()
+    deltas = [delta async for delta in stream_field(agent, "plan", "summary", metrics)]
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Revenue grew by ten percent"
+    assert metrics.result == Report(title="Q3", summary="Revenue grew by ten percent")
+
+
+class Owner(BaseModel):
+    """Structured list item."""
+    name: str
+
+
+class Plan(BaseModel):
+    """Result with list fields to stream."""
+    status: str
+    steps: List[str]
+    owners: List[Owner] = []
+
+
+def streaming_model(*payloads: str, chunk: int = 5) -> FunctionModel:
+    """Streams each payload in turn, one per run, `chunk` characters at a time."""
+    runs = iter(payloads)
+    chunks: List[str] = []
+
+    async def stream(messages, info):
+        payload = next(runs)
+        name = info.result_tools[0].name
+        for i in range(0, len(payload), chunk):
+            chunks.append(payload[i:i + chunk])
+            yield {0: DeltaToolCall(name=name if i == 0 else None, json_args=payload[i:i + chunk])}
+
+    model = FunctionModel(stream_function=stream)
+    model.chunks = chunks
+    return model
+
+
+@pytest.mark.asyncio
+async def test_stream_items_yields_each_item_once_complete():
+    """Test that list items are yielded as soon as each one is complete."""
+    payload = '{"status": "ok", "steps": ["draft", "review", "draft"], "owners": [{"name": "ana"}, {"name": "bo"}]}'
+    model = streaming_model(payload)
+    agent = Agent(model, result_type=Plan)
+    metrics = StreamMetrics()
+    items = []
+    async for name, item in stream_items(agent, "plan", ["steps", "owners"], metrics):
+        items.append((name, item, len(model.chunks)))
+
+    assert [(name, item) for name, item, _ in items] == [
+        ("steps", "draft"), ("steps", "review"), ("steps", "draft"),
+        ("owners", Owner(name="ana")), ("owners", Owner(name="bo")),
+    ]
+    assert items[0][2] < len(model.chunks) / 2  # long before the payload finished
+    assert metrics.result.steps == ["draft", "review", "draft"]
+
+
+@pytest.mark.asyncio
+async def test_stream_items_abandons_invalid_partial_and_retries():
+    """Test that an invalid item ends the stream early and the run is retried."""
+    invalid = '{"status": "ok", "steps": ["draft", 42, ' + '"padding", ' * 50 + '"end"]}'
+    valid = '{"status": "ok", "steps": ["draft", "review"]}'
+    model = streaming_model(invalid, valid)
+    agent = Agent(model, result_type=Plan)
+    metrics = StreamMetrics()
+
+    items = [item async for _, item in stream_items(agent, "plan", ["steps"], metrics)]
+
+    assert items == ["draft", "review"]  # "draft" is not repeated by the retry
+    assert len(model.chunks) < (len(invalid) + len(valid)) / 5 / 2  # the invalid stream was cut short
+    assert metrics.result == Plan(status="ok", steps=["draft", "review"])
+    assert metrics.restarts == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_items_raises_after_retries():
+    """Test that a result still invalid after every retry raises."""
+    agent = Agent(streaming_model('{"status": 1, "steps": []}', '{"status": 2, "steps": []}'), result_type=Plan)
+
+    with pytest.raises(UnexpectedModelBehavior):
+        async for _ in stream_items(agent, "plan", ["steps"], retries=1):
+            pass
+
+
+class Backlog(BaseModel):
+    """Result with an optional list field."""
+    owners: Optional[List[Owner]] = None
+
+
+@pytest.mark.asyncio
+async def test_stream_items_of_an_optional_list_field():
+    """Test that items of an `Optional[List[...]]` field are validated against the item type."""
+    agent = Agent(streaming_model('{"owners": [{"name": "ana"}, {"name": "bo"}]}'), result_type=Backlog)
+
+    items = [item async for _, item in stream_items(agent, "plan", ["owners"])]
+
+    assert items == [Owner(name="ana"), Owner(name="bo")]
@@ -0,0 +1,104 @@
+"""
+Tests for the stub model and load-test harness.
+"""
+from typing import List, Literal, Optional
+
+import pytest
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
+
+from pydantic_ai_shared.loadtest import LoadReport, find_regressions, percentile, run_load, save_reports
+from pydantic_ai_shared.stub import StubModel
+
+
+class Item(BaseModel):
+    """Nested list item with a bounded field."""
+    name: str
+    quantity: int = Field(ge=1, le=5)
+
+
+class Order(BaseModel):
+    """Result type exercising literals, lists, optionals and bounds."""
+    status: Literal["open", "closed"]
+    items: List[Item]
+    note: Optional[str] = None
+    score: float = Field(ge=0, le=1)
+
+
+@pytest.mark.asyncio
+async def test_stub_generates_schema_valid_results():
+    """Test that generated results satisfy the result schema's constraints."""
+    agent = Agent(StubModel(seed=3), result_type=Order)
+    result = await agent.run("order")
+    assert result.data.status in ("open", "closed")
+    assert all(1 <= item.quantity <= 5 for item in result.data.items)
+
+
+@pytest.mark.asyncio
+async def test_stub_is_deterministic_and_honours_outputs():
+    """Test that a seed fixes the output and `outputs` overrides fields."""
+    first = await Agent(StubModel(seed=7), result_type=Order).run("order")
+    second = await Agent(StubModel(seed=7), result_type=Order).run("order")
+    assert first.data == second.data
+
+    fixed = await Agent(StubModel(outputs={"status": "closed"}), result_type=Order).run("order")
+    assert fixed.data.status == "closed"
+
+
+@pytest.mark.asyncio
+async def test_stub_injects_errors():
+    """Test that the configured error rate raises HTTP errors with the given status."""
+    model = StubModel(error_rate=1.0, error_status=429)
+    with pytest.raises(ModelHTTPError) as exc_info:
+        await Agent(model).run("hi")
+    assert exc_info.value.status_code == 429
+    assert model.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_stub_streams_text_and_structured_results():
+    """Test that text and structured results can be streamed."""
+    agent = Agent(StubModel(text="one two three"))
+    async with agent.run_stream("hi") as result:
+        deltas = [delta async for delta in result.stream_text(delta=True)]
+    assert "".join(deltas) == "one two three"
+
+    async with Agent(StubModel(), result_type=Order).run_stream("order") as result:
+        order = await result.get_data()
+    assert isinstance(order, Order)
+
+
+def test_percentile():
+    """Test nearest-rank percentiles, including an empty sample."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_load_and_regressions(tmp_path):
+    """Test a load run's report and regression detection against a baseline."""
+    agent = Agent(StubModel(error_rate=0.5, seed=1))
+    report = await run_load("stub", agent.run, [f"q{i}" for i in range(20)], concurrency=4)
+    assert report.requests == 20
+    assert 0 < report.errors < 20
+    assert report.peak_memory_mb is not None
+    assert report.memory_source == "timed run"
+
+    models = []
+
+    def build():
+        models.append(StubModel())
+        return Agent(models[-1]).run
+
+    report = await run_load("stub", build(), ["q"] * 5, fresh_target=build)
+    assert report.memory_source == "fresh target"
+    assert [model.requests for model in models] == [5, 5]  # each pass ran against its own target
+
+    baseline = tmp_path / "baseline.json"
+    save_reports([LoadReport("stub", 10, 0, 1.0, 100.0, 0.01, 0.02, 0.03)], str(baseline))
+    slower = LoadReport("stub", 10, 0, 2.0, 50.0, 0.01, 0.02, 0.03)
+    assert len(find_regressions([slower], str(baseline))) == 1
+    assert find_regressions([slower], str(baseline), tolerance=0.6) == []
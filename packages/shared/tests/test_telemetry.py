@@ -0,0 +1,194 @@
+"""
+Tests for hot-path instrumentation.
+"""
+import urllib.request
+
+import pytest
+from pydantic import BaseModel
+
+from pydantic_ai_shared import telemetry
+from pydantic_ai_shared.cache import ResponseCache
+from pydantic_ai_shared.registry import AgentRegistry
+from pydantic_ai_shared.stub import StubModel
+from pydantic_ai_shared.telemetry import (
+    InMemorySpanExporter,
+    Metrics,
+    configure_telemetry,
+    current_trace_id,
+    instrument,
+    serve_prometheus,
+    span,
+    traced_run,
+)
+
+
+class Answer(BaseModel):
+    """Structured result of the traced agents."""
+    text: str
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Enable telemetry with an in-memory span exporter for one test."""
+    monkeypatch.setattr(telemetry, "_telemetry", None)
+    exporter = InMemorySpanExporter()
+    configure_telemetry(exporters=[exporter])
+    yield exporter
+    telemetry._telemetry = None
+
+
+def test_disabled_telemetry_is_a_noop(monkeypatch):
+    """Test that disabled telemetry records no spans or metrics."""
+    monkeypatch.setattr(telemetry, "_telemetry", None)
+    configure_telemetry(enabled=False)
+    with span("work") as active:
+        active.set_attribute("ignored", True)
+        assert current_trace_id() is None
+    assert telemetry.get_telemetry().metrics.render() == "\n"
+
+
+@pytest.mark.asyncio
+async def test_traced_run_records_model_and_validation_spans(exporter):
+    """Test the span tree of a traced run and the metrics it records."""
+    agent = AgentRegistry().agent(StubModel(), result_type=Answer)
+
+    @instrument("entry")
+    async def entry():
+        trace_id = current_trace_id()
+        await traced_run(agent, "hello")
+        return trace_id
+
+    trace_id = await entry()
+
+    assert exporter.names() == ["model.request", "agent.validate", "agent.run", "entry"]
+    assert {record.trace_id for record in exporter.spans} == {trace_id}
+    by_name = {record.name: record for record in exporter.spans}
+    assert by_name["model.request"].parent_id == by_name["agent.run"].span_id
+    assert by_name["agent.run"].parent_id == by_name["entry"].span_id
+
+    metrics = telemetry.get_telemetry().metrics
+    assert metrics.histogram("agent_span_duration_seconds", span="entry")[0] == 1
+    assert metrics.counter("agent_model_requests_total", model="stub") == 1
+    assert metrics.counter("agent_tokens_total", model="stub", kind="output") > 0
+
+
+@pytest.mark.asyncio
+async def test_retries_and_errors_are_counted(exporter):
+    """Test that result retries and span errors are counted."""
+    attempts = 0
+
+    def flaky(messages, info):
+        from pydantic_ai.messages import ModelResponse, ToolCallPart
+
+        nonlocal attempts
+        attempts += 1
+        args = {"wrong": 1} if attempts == 1 else {"text": "ok"}
+        return ModelResponse(parts=[ToolCallPart(info.result_tools[0].name, args)])
+
+    from pydantic_ai.models.function import FunctionModel
+
+    agent = AgentRegistry().agent(FunctionModel(flaky), result_type=Answer)
+    await traced_run(agent, "hello")
+    metrics = telemetry.get_telemetry().metrics
+    assert metrics.counter("agent_retries_total", span="agent.run") == 1
+
+    with pytest.raises(RuntimeError):
+        with span("broken"):
+            raise RuntimeError("boom")
+    assert exporter.spans[-1].error == "RuntimeError('boom')"
+    assert metrics.counter("agent_span_errors_total", span="broken") == 1
+
+
+@pytest.mark.asyncio
+async def test_tool_round_trips_are_not_retries(exporter):
+    """Test that only retry prompts, not ordinary tool calls, count as retries."""
+    from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, ToolCallPart
+    from pydantic_ai.models.function import FunctionModel
+
+    from pydantic_ai_shared.tools import ToolSet
+
+    tools = ToolSet("telemetry-test")
+
+    @tools.tool
+    async def ping(ctx) -> str:
+        """Answer a ping."""
+        return "pong"
+
+    def respond(messages, info):
+        if len([message for message in messages if isinstance(message, ModelRequest)]) == 1:
+            return ModelResponse(parts=[ToolCallPart("ping", {})])
+        return ModelResponse(parts=[TextPart("done")])
+
+    agent = AgentRegistry().agent(FunctionModel(respond), toolset=tools)
+    result = await traced_run(agent, "hello")
+
+    assert result.usage().requests == 2
+    assert telemetry.get_telemetry().metrics.counter("agent_retries_total", span="agent.run") == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_lookup_span_records_tier(exporter):
+    """Test that cache lookups record the tier that answered."""
+    cache = ResponseCache(Answer)
+    await cache.get("question")
+    await cache.set("question", Answer(text="a"))
+    await cache.get("question")
+    assert [record.attributes["cache.tier"] for record in exporter.spans] == ["miss", "local"]
+
+
+def test_prometheus_rendering_and_endpoint():
+    """Test the Prometheus text format and the /metrics endpoint."""
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe("agent_span_duration_seconds", 0.5, span="x")
+    metrics.inc("agent_tokens_total", 7, model="m", kind="input")
+    text = metrics.render()
+    assert 'agent_span_duration_seconds_bucket{span="x",le="0.1"} 0' in text
+    assert 'agent_span_duration_seconds_bucket{span="x",le="1"} 1' in text
+    assert 'agent_span_duration_seconds_count{span="x"} 1' in text
+    assert 'agent_tokens_total{kind="input",model="m"} 7' in text
+
+    recorder = telemetry.Telemetry(enabled=True)
+    recorder.metrics = metrics
+    server = serve_prometheus(recorder, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.read().decode() == text
+    finally:
+        server.shutdown()
+
+
+def test_metrics_merge_snapshots_from_other_processes():
+    """Test that worker snapshots add up counters and histogram buckets."""
+    worker = Metrics(buckets=(0.1, 1.0))
+    worker.inc("agent_tokens_total", 3, model="m", kind="input")
+    worker.observe("agent_span_duration_seconds", 0.5, span="x")
+    parent = Metrics(buckets=(0.1, 1.0))
+    parent.inc("agent_tokens_total", 4, model="m", kind="input")
+
+    parent.merge(worker.snapshot())
+    parent.merge(worker.snapshot())
+
+    assert parent.counter("agent_tokens_total", model="m", kind="input") == 10
+    assert parent.histogram("agent_span_duration_seconds", span="x") == (2, 1.0)
+
+
+def test_prometheus_label_values_are_escaped():
+    """Test that backslashes, quotes and newlines in label values are escaped."""
+    metrics = Metrics()
+    metrics.inc("agent_span_errors_total", span='say "hi"\\now\nplease')
+    assert 'agent_span_errors_total{span="say \\"hi\\"\\\\now\\nplease"} 1' in metrics.render()
+
+
+def test_taken_prometheus_port_leaves_telemetry_usable(monkeypatch):
+    """Test that a port already bound by another process only disables the endpoint."""
+    first = serve_prometheus(telemetry.Telemetry(enabled=True), port=0)
+    try:
+        monkeypatch.setattr(telemetry, "_telemetry", None)
+        recorder = configure_telemetry(prometheus_port=first.server_address[1])
+        assert telemetry.get_telemetry() is recorder
+        recorder.metrics.inc("agent_span_errors_total", span="x")
+        assert recorder.metrics.counter("agent_span_errors_total", span="x") == 1
+    finally:
+        first.shutdown()
+        telemetry._telemetry = None
@@ -0,0 +1,137 @@
+"""
+Tests for the tool framework.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+from pydantic import BaseModel
+from pydantic_ai import RunContext
+from pydantic_ai.messages import ModelRequest, ModelResponse, RetryPromptPart, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import FunctionModel
+
+from pydantic_ai_shared.registry import AgentRegistry
+from pydantic_ai_shared.tools import ToolSet
+
+
+@dataclass
+class Deps:
+    region: str = "eu"
+    lookups: List[str] = field(default_factory=list)
+    active: int = 0
+    peak: int = 0
+
+
+class Forecast(BaseModel):
+    """Model returned by a tool."""
+    city: str
+    high: int
+
+
+def make_toolset() -> ToolSet[Deps]:
+    tools: ToolSet[Deps] = ToolSet("test", timeout=1)
+
+    @tools.tool(ttl=60, vary=lambda ctx: ctx.deps.region)
+    async def weather(ctx: RunContext[Deps], city: str) -> Dict[str, str]:
+        """Weather in a city."""
+        ctx.deps.lookups.append(city)
+        ctx.deps.active += 1
+        ctx.deps.peak = max(ctx.deps.peak, ctx.deps.active)
+        await asyncio.sleep(0.05)
+        ctx.deps.active -= 1
+        return {"city": city, "region": ctx.deps.region}
+
+    @tools.tool(ttl=60)
+    async def forecast(ctx: RunContext[Deps], city: str) -> Forecast:
+        """Forecast for a city."""
+        ctx.deps.lookups.append(city)
+        return Forecast(city=city, high=21)
+
+    @tools.tool(timeout=0.05)
+    async def stuck(ctx: RunContext[Deps]) -> str:
+        """Never answers in time."""
+        await asyncio.sleep(1)
+        return "late"
+
+    return tools
+
+
+def calling(*calls):
+    """A model that makes `calls` in one turn, then answers with the tool returns."""
+
+    async def respond(messages, info):
+        returns = [
+            part for message in messages if isinstance(message, ModelRequest)
+            for part in message.parts if isinstance(part, (ToolReturnPart, RetryPromptPart))
+        ]
+        if returns:
+            return ModelResponse(parts=[TextPart(" | ".join(str(part.content) for part in returns))])
+        return ModelResponse(parts=[ToolCallPart(name, args) for name, args in calls])
+
+    return FunctionModel(respond)
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_in_one_turn_run_concurrently_and_are_cached():
+    """Test concurrent execution and TTL caching of tool results."""
+    tools = make_toolset()
+    model = calling(("weather", {"city": "Paris"}), ("weather", {"city": "Rome"}))
+    agent = AgentRegistry().agent(model, deps_type=Deps, toolset=tools)
+    deps = Deps()
+
+    result = await agent.run("weather?", deps=deps)
+    assert deps.peak == 2  # both calls were in flight at once
+    assert "Paris" in result.data and "Rome" in result.data
+    assert sorted(deps.lookups) == ["Paris", "Rome"]
+
+    await agent.run("weather again?", deps=deps)
+    assert len(deps.lookups) == 2
+    assert tools.stats["weather"].calls == 4
+    assert tools.stats["weather"].cache_hits == 2
+
+    # The vary function keeps other regions out of the cached answers
+    await agent.run("weather?", deps=Deps(region="us"))
+    assert tools.stats["weather"].cache_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_return_the_declared_type():
+    """Test that a cached result is rebuilt as the tool's return type, not a dict."""
+    tools = make_toolset()
+    forecast = {tool.name: tool for tool in tools.tools()}["forecast"].function
+    ctx = SimpleNamespace(deps=Deps())
+
+    fresh = await forecast(ctx, city="Oslo")
+    cached = await forecast(ctx, city="Oslo")
+
+    assert cached == fresh == Forecast(city="Oslo", high=21)
+    assert tools.stats["forecast"].cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_tool_timeout_asks_the_model_to_retry():
+    """Test that a timed-out tool becomes a retry prompt instead of failing the run."""
+    tools = make_toolset()
+    agent = AgentRegistry().agent(calling(("stuck", {})), deps_type=Deps, toolset=tools)
+
+    result = await agent.run("go", deps=Deps())
+
+    assert "timed out" in result.data
+    assert tools.stats["stuck"].timeouts == 1
+
+
+def test_registration_is_validated():
+    """Test that sync functions and duplicate names are rejected."""
+    tools = make_toolset()
+
+    with pytest.raises(TypeError):
+        @tools.tool
+        def sync(ctx: RunContext[Deps]) -> str:
+            return ""
+
+    with pytest.raises(ValueError):
+        @tools.tool(name="weather")
+        async def other(ctx: RunContext[Deps]) -> str:
+            return ""
@@ -0,0 +1,90 @@
+"""
+Load-test every agent class against the local stub model.
+
+Reports throughput, p50/p95/p99 latency and peak Python memory per agent
+entry point (memory is traced in a second pass on a freshly built agent), without API keys or network access. With --baseline, exits
+non-zero when throughput or p99 regress beyond --tolerance.
+
+Usage:
+    uv run python scripts/bench_agents.py --requests 500 --concurrency 32
+    uv run python scripts/bench_agents.py --save baseline.json
+    uv run python scripts/bench_agents.py --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import sys
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from corporate_agentic_system.orchestrator import CorporateContext, CorporateOrchestrator
+from internal_support_agent.agent import InternalSupportAgent
+from pydantic_ai_shared.examples.chatbot import ChatbotExample
+from pydantic_ai_shared.examples.data_extraction import DataExtractionExample
+from pydantic_ai_shared.loadtest import LoadReport, find_regressions, run_load, save_reports
+from pydantic_ai_shared.stub import StubModel, lognormal_latency
+
+
+async def run(args: argparse.Namespace) -> int:
+    def model() -> StubModel:
+        return StubModel(
+            latency=lognormal_latency(args.latency),
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+
+    context = CorporateContext(user_role="manager", department="engineering")
+
+    def plan_workflow() -> Callable[[str], Awaitable[object]]:
+        orchestrator = CorporateOrchestrator(model=model())
+        return lambda request: orchestrator.plan_workflow(request, context)
+
+    # Each entry builds a new agent, so memory is measured on a cold one (no warm caches)
+    targets = {
+        "InternalSupportAgent.process_query": lambda: InternalSupportAgent(model=model()).process_query,
+        "CorporateOrchestrator.plan_workflow": plan_workflow,
+        "ChatbotExample.chat": lambda: ChatbotExample(model=model()).chat,
+        "DataExtractionExample.extract": lambda: DataExtractionExample(model=model()).extract,
+    }
+    inputs = [f"Benchmark request #{i}" for i in range(args.requests)]
+
+    print(LoadReport.header())
+    reports = []
+    for name, build in targets.items():
+        report = await run_load(
+            name, build(), inputs, args.concurrency, measure_memory=not args.no_memory, fresh_target=build
+        )
+        print(report.format_row())
+        reports.append(report)
+
+    if args.save:
+        save_reports(reports, args.save)
+    if args.baseline:
+        regressions = find_regressions(reports, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02, help="Median stub latency (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc memory tracking")
+    parser.add_argument("--save", help="Write the reports to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    logger.remove()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
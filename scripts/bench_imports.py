@@ -0,0 +1,111 @@
+"""
+Measure cold import time of the agent packages against a startup budget.
+
+Each module is imported in a fresh interpreter under `python -X importtime`;
+the best of --runs is reported, minus the interpreter's own startup imports,
+together with the slowest imports it pulled in. Exits non-zero when a module
+exceeds its budget or loads a module it should defer until first run
+(pydantic_ai and the provider SDKs).
+
+Usage:
+    uv run python scripts/bench_imports.py
+    uv run python scripts/bench_imports.py --runs 10 --budget internal_support_agent.agent=250
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+# Budgets in milliseconds, generous enough for a loaded CI runner
+BUDGETS_MS = {
+    "internal_support_agent": 50.0,
+    "corporate_agentic_system": 50.0,
+    "pydantic_ai_shared": 50.0,
+    "pydantic_ai_shared.telemetry": 400.0,
+    "internal_support_agent.agent": 450.0,
+    "corporate_agentic_system.orchestrator": 450.0,
+}
+
+# Loaded on first run, never at import
+DEFERRED = ("pydantic_ai", "openai", "anthropic", "httpx")
+
+
+def import_profile(statement: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """Run `statement` in a fresh interpreter with -X importtime.
+
+    Returns:
+        Total import time in ms, (cumulative ms, module) for every import
+        and the deferred modules that ended up loaded
+    """
+    check = f"import sys; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{statement}; {check}"],
+        capture_output=True, text=True, check=True,
+    )
+    total, top = 0.0, []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            ms = int(cumulative) / 1000
+            if not name.startswith("  "):  # one leading space: imported directly
+                total += ms
+            top.append((ms, name.rstrip()))
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return total, top, loaded
+
+
+def measure(
+    module: str, runs: int, baseline: float, startup: Set[str]
+) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """Best-of-`runs` import time of `module` in ms, net of interpreter startup."""
+    best = None
+    for _ in range(runs):
+        total, top, loaded = import_profile(f"import {module}")
+        if best is None or total < best[0]:
+            best = (total, top, loaded)
+    total, top, loaded = best
+    nested = [(ms, name) for ms, name in top if name.strip() not in startup and name.strip() != module]
+    return max(0.0, total - baseline), sorted(nested, reverse=True), loaded
+
+
+def parse_budgets(overrides: List[str]) -> Dict[str, float]:
+    budgets = dict(BUDGETS_MS)
+    for override in overrides:
+        module, _, ms = override.partition("=")
+        budgets[module] = float(ms)
+    return budgets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module (best is kept)")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS", help="override a budget")
+    parser.add_argument("--top", type=int, default=5, help="slowest nested imports to list per module")
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    startup_profiles = [import_profile("pass") for _ in range(args.runs)]
+    baseline = min(total for total, _, _ in startup_profiles)
+    startup = {name.strip() for _, top, _ in startup_profiles for _, name in top}
+    failures = []
+    print(f"{'module':<40} {'import ms':>10} {'budget ms':>10}")
+    for module, budget in budgets.items():
+        elapsed, top, loaded = measure(module, args.runs, baseline, startup)
+        status = "" if elapsed <= budget else "  OVER BUDGET"
+        print(f"{module:<40} {elapsed:>10.1f} {budget:>10.1f}{status}")
+        for ms, name in top[:args.top]:
+            print(f"    {ms:>8.1f}  {name.strip()}")
+        if status:
+            failures.append(f"{module} took {elapsed:.1f} ms (budget {budget:.1f} ms)")
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)} eagerly")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
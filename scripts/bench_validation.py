@@ -0,0 +1,85 @@
+"""
+Benchmark: validating agent results
+
+Validates --count serialized results of each agent result type
+(`SupportTicket`, `WorkflowResult`, `Task`, `Person`) three ways, reporting
+seconds per 100k results (best of --repeat):
+
+- dict:   json.loads, then `model_validate` on the dict
+- json:   `model_validate_json` straight from the raw bytes
+- batch:  one cached `List[T]` adapter over a JSON array of all results
+
+It also reports what the `schemas` cache saves per lookup: building a
+`List[T]` adapter plus its JSON schema from scratch versus fetching both from
+the cache. Results are generated by the stub model's schema faker, so they
+exercise the real field types.
+
+Usage:
+    uv run python scripts/bench_validation.py --count 100000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from corporate_agentic_system.orchestrator import Task, WorkflowResult
+from internal_support_agent.agent import SupportTicket
+from pydantic_ai_shared.examples.data_extraction import Person
+from pydantic_ai_shared.schemas import json_schema, type_adapter
+from pydantic_ai_shared.stub import SchemaFaker
+
+
+def payloads(result_type: Type[BaseModel], count: int) -> List[bytes]:
+    faker = SchemaFaker(random.Random(0))
+    schema = json_schema(result_type)
+    return [json.dumps(faker.generate(schema)).encode() for _ in range(count)]
+
+
+def timed(func: Callable[[], Any], repeat: int, scale: float = 1.0) -> float:
+    """Best wall time of `repeat` calls, times `scale`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * scale
+
+
+def run(count: int, repeat: int) -> None:
+    per_100k = 100_000 / count
+    print(
+        f"{'result type':<16} {'dict s':>8} {'json s':>8} {'batch s':>8} "
+        f"{'fresh schema ms':>16} {'cached schema us':>17}"
+    )
+    for result_type in (SupportTicket, WorkflowResult, Task, Person):
+        data = payloads(result_type, count)
+        array = b"[" + b",".join(data) + b"]"
+        batch = type_adapter(List[result_type])
+
+        # Loop variables are bound as defaults so each lambda keeps this iteration's values
+        dict_s = timed(
+            lambda t=result_type, d=data: [t.model_validate(json.loads(raw)) for raw in d], repeat, per_100k
+        )
+        json_s = timed(lambda t=result_type, d=data: [t.model_validate_json(raw) for raw in d], repeat, per_100k)
+        batch_s = timed(lambda b=batch, a=array: b.validate_json(a), repeat, per_100k)
+        fresh_ms = timed(lambda t=result_type: TypeAdapter(List[t]).json_schema(), repeat, 1000)
+        cached_us = timed(lambda t=result_type: json_schema(List[t]), repeat, 1_000_000)
+        print(
+            f"{result_type.__name__:<16} {dict_s:>8.2f} {json_s:>8.2f} {batch_s:>8.2f} "
+            f"{fresh_ms:>16.2f} {cached_us:>17.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load-test the HTTP service per endpoint.
+
+Sends --requests POSTs to each endpoint with --concurrency clients and
+reports requests/sec, latency percentiles and the number of 429 rejections.
+By default the service runs in-process on stub agents (no server, API keys
+or network needed); --url targets a running `scripts/serve.py` instead. The
+overload scenario shrinks the admission limits below the offered concurrency
+to show backpressure: excess requests get a fast 429 and retry after
+--backoff seconds, while the latency of admitted ones stays bounded.
+
+Usage:
+    uv run python scripts/loadtest_service.py --requests 500 --concurrency 64
+    uv run python scripts/loadtest_service.py --overload
+    uv run python scripts/loadtest_service.py --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from pydantic_ai_shared.loadtest import percentile
+
+BODIES: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "/support/query": lambda i: {"query": f"I cannot log in to the VPN (#{i})"},
+    "/corporate/plan": lambda i: {
+        "request": f"Onboard a new hire (#{i})", "user_role": "manager", "department": "engineering"
+    },
+    "/chat": lambda i: {"message": f"Hello (#{i})"},
+    "/extract": lambda i: {"text": f"Ada Lovelace, 36, mathematician (#{i})"},
+}
+
+
+async def load_endpoint(
+    client: httpx.AsyncClient, path: str, requests: int, concurrency: int, backoff: float
+) -> str:
+    """Drive one endpoint and format its report row."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def call(i: int) -> None:
+        async with semaphore:
+            while True:
+                start = time.perf_counter()
+                try:
+                    status = (await client.post(path, json=BODIES[path](i))).status_code
+                except httpx.HTTPError:
+                    status = 0
+                statuses[status] += 1
+                if status != 429:
+                    break
+                await asyncio.sleep(backoff)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    other = requests - statuses[200]
+    return (
+        f"{path:<16} {requests:>6} {statuses[200]:>6} {statuses[429]:>6} {other:>6} "
+        f"{statuses[200] / elapsed:>8.1f} {percentile(latencies, 50) * 1000:>8.1f} "
+        f"{percentile(latencies, 95) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> int:
+    if args.url:
+        transport: Optional[httpx.AsyncBaseTransport] = None
+        base_url = args.url
+    else:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from serve import build_app
+
+        limits = {"max_in_flight": args.concurrency // 4, "max_queue": args.concurrency // 8} if args.overload else {}
+        transport = httpx.ASGITransport(app=build_app(args.latency, **limits))
+        base_url = "http://service"
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        print(
+            f"{'endpoint':<16} {'reqs':>6} {'ok':>6} {'429':>6} {'other':>6} "
+            f"{'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for path in BODIES:
+            print(await load_endpoint(client, path, args.requests, args.concurrency, args.backoff))
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running service (default: in-process stub service)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.02, help="Median stub latency (s)")
+    parser.add_argument("--overload", action="store_true", help="Admit only a quarter of the offered concurrency")
+    parser.add_argument("--backoff", type=float, default=0.05, help="Seconds a client waits after a 429")
+    args = parser.parse_args()
+
+    logger.remove()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
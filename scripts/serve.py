@@ -0,0 +1,55 @@
+"""
+Serve every agent over HTTP.
+
+Exposes `POST /support/query`, `POST /corporate/plan`, `POST /chat` and
+`POST /extract` (plus `/healthz` and `/metrics`) from pre-forked uvicorn
+workers. With --stub-latency the agents answer from the local stub model, so
+the service can be load-tested without API keys.
+
+Usage:
+    uv run python scripts/serve.py --workers 4 --port 8000
+    uv run python scripts/serve.py --stub-latency 0.05
+"""
+import argparse
+from typing import Optional
+
+from corporate_agentic_system.orchestrator import CorporateOrchestrator
+from corporate_agentic_system.service import add_corporate_routes
+from internal_support_agent.agent import InternalSupportAgent
+from internal_support_agent.service import add_support_routes
+from pydantic_ai_shared.examples.chatbot import ChatbotExample
+from pydantic_ai_shared.examples.data_extraction import DataExtractionExample
+from pydantic_ai_shared.examples.service import add_example_routes
+from pydantic_ai_shared.service import AgentService, serve
+from pydantic_ai_shared.stub import StubModel, lognormal_latency
+
+
+def build_app(stub_latency: Optional[float] = None, **limits: float) -> AgentService:
+    """Build the service with every agent's routes.
+
+    Args:
+        stub_latency: Median latency of a stub model to use instead of the configured models
+        **limits: Overrides for `AgentService` admission limits
+    """
+    def model() -> Optional[StubModel]:
+        return StubModel(latency=lognormal_latency(stub_latency)) if stub_latency is not None else None
+
+    service = AgentService(**limits)
+    add_support_routes(service, InternalSupportAgent(model=model()))
+    add_corporate_routes(service, CorporateOrchestrator(model=model()))
+    add_example_routes(service, ChatbotExample(model=model()), DataExtractionExample(model=model()))
+    return service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--stub-latency", type=float, default=None, help="Serve stub agents with this median latency (s)")
+    args = parser.parse_args()
+    serve(lambda: build_app(args.stub_latency), args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()